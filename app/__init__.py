@@ -59,6 +59,10 @@ def create_app(test_config=None):
     app.register_blueprint(teller_bp, url_prefix="/teller")
 
 
+    # Time requests and publish this worker's load, so the batch worker can back off while it is busy
+    from scripts.requestStats import install_request_stats
+    install_request_stats(app)
+
     # ---------------------------
     # Home Routes
     # ---------------------------
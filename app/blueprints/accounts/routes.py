@@ -14,7 +14,7 @@ from flask import (
 
 # Import shared utilities for checking account type and managing flash messages
 from app.blueprints.sharedUtilities import (
-    user_has_account_type, get_csv_path, 
+    user_has_account_type, get_csv_path, read_table,
     flash_success, flash_error, get_customer_accounts, login_required
 )
 # Internal utility and form imports
@@ -170,7 +170,7 @@ def mortgage_application():
             )
     
         try:
-            accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
+            accounts_df = read_table(get_csv_path("accounts.csv"))
 
             # Check for existing mortgage
             existing_mortgage = accounts_df[
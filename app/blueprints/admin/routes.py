@@ -1,15 +1,19 @@
 # Spring 2025 Authors: Bailee Segars, Braden Doty, Sierra Yerges
 from flask import Blueprint, Response, request, session, current_app, render_template, redirect, url_for, flash, jsonify
 from app.blueprints.sharedUtilities import (
-    get_csv_path, login_required, flash_error, flash_success, get_account_transactions, get_customer_accounts
+    get_csv_path, read_table, write_table, locks_tables, login_required, flash_error, flash_success, get_account_transactions, get_customer_accounts
 )
 from app.blueprints.auth.forms import LoginForm
 from .forms import AdminSettingsForm
 import pandas as pd
 import hashlib
 import json
-import csv
 import os
+from scripts.tableCache import cache_stats
+from scripts.tableLock import lock_stats
+from scripts.jobQueue import JobQueue
+from scripts.batchWorker import check_job
+from scripts.requestStats import read_request_load, request_stats
 
 # Blueprint for admin routes
 admin_bp = Blueprint('admin', __name__, template_folder='templates')
@@ -34,7 +38,7 @@ def admin_login():
         employee_id = request.form.get("employeeId")
         username = username.lower()
 
-        df = pd.read_csv(get_csv_path("employees.csv"))
+        df = read_table(get_csv_path("employees.csv"))
 
         match = df[(df["Username"] == username) & (df["EmployeeID"].astype(str) == str(employee_id)) & (df["Position"] == "Admin")]
 
@@ -55,10 +59,10 @@ def admin_login():
 @login_required("admin")
 def admin_dashboard():
     employeePath = get_csv_path("employees.csv")
-    customers_df = pd.read_csv(get_csv_path("customers.csv"))
-    persons_df = pd.read_csv(get_csv_path("persons.csv"))
-    accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
-    log_df = pd.read_csv(get_csv_path("logs.csv"))
+    customers_df = read_table(get_csv_path("customers.csv"))
+    persons_df = read_table(get_csv_path("persons.csv"))
+    accounts_df = read_table(get_csv_path("accounts.csv"))
+    log_df = read_table(get_csv_path("logs.csv"))
 
     # Convert IDs to int for consistency
     customers_df["CustomerID"] = customers_df["CustomerID"].astype(int)
@@ -85,7 +89,7 @@ def admin_dashboard():
 
         logs = log_df.to_dict(orient="records")
         if os.path.exists(employeePath) and os.path.getsize(employeePath) > 0:
-            df = pd.read_csv(employeePath)
+            df = read_table(employeePath)
 
             # Check if required columns exist
             if all(col in df.columns for col in ["Username", "EmployeeID", "Position"]):
@@ -122,8 +126,8 @@ def admin_settings():
         return redirect(url_for('auth.admin_login'))
 
     # Load user data from CSVs
-    cust_df = pd.read_csv(get_csv_path("employees.csv"))
-    per_df = pd.read_csv(get_csv_path("persons.csv"))
+    cust_df = read_table(get_csv_path("employees.csv"))
+    per_df = read_table(get_csv_path("persons.csv"))
 
     try:
         admin_id = cust_df.loc[cust_df['Username'] == username, 'EmployeeID'].iloc[0]
@@ -206,7 +210,7 @@ def check_employee():
         return jsonify({'exists': bool(exists)})
 
     try:
-        df = pd.read_csv(get_csv_path("persons.csv"))
+        df = read_table(get_csv_path("persons.csv"))
         exists = (df["ID"] == int(employee_id)).any()
         return jsonify({'exists': bool(exists)})
     except FileNotFoundError:
@@ -242,6 +246,7 @@ def create_teller_route():
 # -------------
 @admin_bp.route("/edit-teller", methods=["POST"])
 @login_required("admin")
+@locks_tables('employees.csv')
 def edit_teller():
     data = request.get_json()
     employee_id = int(data.get("employeeID", 0))
@@ -253,9 +258,9 @@ def edit_teller():
     csv_path = get_csv_path("employees.csv")
 
     try:
-        df = pd.read_csv(csv_path)
+        df = read_table(csv_path)
         df.loc[df["EmployeeID"] == employee_id, "Username"] = new_username
-        df.to_csv(csv_path, index=False)
+        write_table(df, csv_path)
         return jsonify(success=True)
     except Exception as e:
         return jsonify(success=False, message=str(e)), 500
@@ -290,19 +295,18 @@ def delete_teller():
 def get_accounts(customer_id):
     accounts = []
     try:
-        accounts_path = get_csv_path("accounts.csv")
-        with open(accounts_path, newline="") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if int(row["CustomerID"]) == customer_id:
-                    accounts.append({
-                        "AccountID": row["AccountID"],
-                        "AccountType": row["AccountType"],
-                        "CurrBal": row["CurrBal"],
-                        "DateOpened": row["DateOpened"],
-                        "CreditLimit": row.get("CreditLimit", ""),
-                        "APR": row.get("APR", "")
-                    })
+        # Read as raw strings so balances are returned exactly as stored
+        accounts_df = read_table(get_csv_path("accounts.csv"), dtype=str, keep_default_na=False)
+        for row in accounts_df.to_dict(orient="records"):
+            if int(row["CustomerID"]) == customer_id:
+                accounts.append({
+                    "AccountID": row["AccountID"],
+                    "AccountType": row["AccountType"],
+                    "CurrBal": row["CurrBal"],
+                    "DateOpened": row["DateOpened"],
+                    "CreditLimit": row.get("CreditLimit", ""),
+                    "APR": row.get("APR", "")
+                })
         return jsonify(success=True, accounts=accounts)
     except Exception as e:
         return jsonify(success=False, message=str(e))
@@ -314,8 +318,8 @@ def get_accounts(customer_id):
 @login_required("admin")
 def check_customer_accounts(customer_id):
     try:
-        accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
-        bills_df = pd.read_csv(get_csv_path("bills.csv"))
+        accounts_df = read_table(get_csv_path("accounts.csv"))
+        bills_df = read_table(get_csv_path("bills.csv"))
 
         nonzero_balance = accounts_df[
             (accounts_df['CustomerID'] == customer_id) & 
@@ -364,11 +368,10 @@ def get_customer_accounts_route(customer_id):
 @login_required("admin")
 def transactions_for_customer(customer_id):
     try:
-        acc_df = pd.read_csv(get_csv_path("accounts.csv"))
-        tx_df = pd.read_csv(get_csv_path("transactions.csv"))
+        acc_df = read_table(get_csv_path("accounts.csv"))
 
         acc_ids = acc_df[acc_df["CustomerID"] == int(customer_id)]["AccountID"].tolist()
-        filtered_tx = tx_df[tx_df["AccountID"].isin(acc_ids)]
+        filtered_tx = get_account_transactions(acc_ids)
 
         return jsonify(filtered_tx.to_dict(orient="records"))
 
@@ -391,4 +394,72 @@ def get_account_transactions_route(account_id):
 
         return jsonify(success=True, transactions=df_sorted.to_dict(orient="records"))
     except Exception as e:
-        return jsonify(success=False, message=str(e)), 500
\ No newline at end of file
+        return jsonify(success=False, message=str(e)), 500
+
+# ----------------------
+# Table Cache Statistics
+# ----------------------
+@admin_bp.route("/api/table-cache", methods=["GET"])
+@login_required("admin")
+def table_cache_stats():
+    """
+    Returns the shared table cache's hit/miss counters so we can confirm
+    dashboard routes are served from memory instead of re-parsing CSVs.
+    """
+    return jsonify(success=True, **cache_stats())
+
+# ---------------------
+# Table Lock Statistics
+# ---------------------
+@admin_bp.route("/api/table-locks", methods=["GET"])
+@login_required("admin")
+def table_lock_stats():
+    """
+    Returns this worker's per-table lock counts and wait times, so lock
+    contention can be watched when running several workers.
+    """
+    return jsonify(success=True, tables=lock_stats())
+
+# -------------------
+# Online Request Load
+# -------------------
+@admin_bp.route("/api/request-load", methods=["GET"])
+@login_required("admin")
+def request_load():
+    """
+    Returns this worker's in-flight count and p95 latency, and the load of
+    all workers that the batch throttle backs off on.
+    """
+    return jsonify(success=True, worker=request_stats(), combined=read_request_load())
+
+# ---------------
+# Batch Job Queue
+# ---------------
+@admin_bp.route("/api/jobs", methods=["GET"])
+@login_required("admin")
+def list_batch_jobs():
+    """
+    Returns the most recent batch jobs with their status and duration.
+    """
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify(success=True, jobs=JobQueue().jobs(limit))
+
+@admin_bp.route("/api/jobs", methods=["POST"])
+@login_required("admin")
+def run_batch_job():
+    """
+    Queues a batch job to run now, e.g. {"kind": "nightly_batch", "params": {"run_date": "2025-03-01"}}.
+    The batch worker runs it; poll GET /admin/api/jobs for its status.
+    """
+    data = request.get_json(silent=True) or {}
+    kind = data.get("kind", "")
+    params = data.get("params") or {}
+    if not isinstance(params, dict):
+        return jsonify(success=False, message="params must be an object"), 400
+    try:
+        check_job(kind, params)
+    except ValueError as e:
+        return jsonify(success=False, message=str(e)), 400
+
+    job_id = JobQueue().enqueue(kind, params, source=f"admin:{session.get('admin')}")
+    return jsonify(success=True, job_id=job_id), 202
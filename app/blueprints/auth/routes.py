@@ -15,7 +15,7 @@ from flask import (
 from app.blueprints.auth.forms import LoginForm, ResetPasswordForm
 from scripts.customer import webLogin, resetPassword
 from app.blueprints.sharedUtilities import (
-    get_csv_path,
+    get_csv_path, read_table,
     flash_success, flash_error
 )
 
@@ -154,7 +154,7 @@ def get_customer_id_by_username(username: str) -> int:
         IndexError: If username is not found.
     """
     customer_csv_path: str = get_csv_path("customers.csv")
-    user_info = pd.read_csv(customer_csv_path)
+    user_info = read_table(customer_csv_path)
 
     if 'Username' not in user_info.columns or 'CustomerID' not in user_info.columns:
         raise ValueError("Malformed customer CSV: missing required columns.")
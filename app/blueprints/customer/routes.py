@@ -9,8 +9,8 @@ from datetime import datetime, timedelta, date
 from collections import Counter
 from dateutil.relativedelta import relativedelta
 from app.blueprints.sharedUtilities import (
-    get_csv_path, get_logged_in_customer,
-    get_customer_accounts, 
+    get_csv_path, read_table, write_table, locks_tables, get_logged_in_customer,
+    get_customer_accounts, get_account_transactions,
     login_required, flash_error, flash_success
 )
 
@@ -20,7 +20,10 @@ from scripts.makeDeposit import deposit
 from scripts.withdrawMoney import withdraw
 from scripts.fundTransfer import transferFunds
 from scripts.billPayment import scheduleBillPayment
+from scripts.billIndex import write_bills
 from scripts.transactionLog import generate_transaction_ID
+from scripts.transactionJournal import append_transactions
+from scripts.repository import get_repository
 from .forms import (
     DepositForm, WithdrawForm, choose_account, TransferForm, BillPaymentForm, SettingsForm
 )
@@ -38,14 +41,13 @@ def build_account_choices(accounts_df: pd.DataFrame) -> list:
             for _, row in accounts_df.iterrows()]
 
 def load_account_by_id(account_id: int) -> pd.Series:
-    accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
-    account_row = accounts_df[accounts_df["AccountID"] == account_id]
-    if account_row.empty:
+    account_row = get_repository().get("accounts", account_id)
+    if account_row is None:
         raise ValueError("Account not found.")
-    return account_row.iloc[0]
+    return account_row
 
 def get_bill_for_account(customer_id: int, account_id: int) -> pd.Series:
-    bills_df = pd.read_csv(get_csv_path("bills.csv"))
+    bills_df = read_table(get_csv_path("bills.csv"))
     filtered_bills = bills_df[
         (bills_df['PaymentAccID'] == account_id) &
         (bills_df['CustomerID'] == customer_id)
@@ -56,9 +58,9 @@ def get_bill_for_account(customer_id: int, account_id: int) -> pd.Series:
 
 def read_dataframes():
     try:
-        bills_df = pd.read_csv(get_csv_path("bills.csv"))
-        accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
-        logs_df = pd.read_csv(get_csv_path("logs.csv"))
+        bills_df = read_table(get_csv_path("bills.csv"))
+        accounts_df = read_table(get_csv_path("accounts.csv"))
+        logs_df = read_table(get_csv_path("logs.csv"))
         return bills_df, accounts_df, logs_df
     except Exception as e:
         logger.error("Error reading data files.", exc_info=True)
@@ -69,7 +71,7 @@ def update_account_balance(accounts_df, account_id, new_balance):
     if acc_index.empty:
         raise ValueError("Payment account not found.")
     accounts_df.at[acc_index[0], 'CurrBal'] = float(new_balance)  # Convert to float
-    accounts_df.to_csv(get_csv_path("accounts.csv"), index=False)
+    write_table(accounts_df, get_csv_path("accounts.csv"))
 
 def get_account_by_id(account_id: int) -> tuple:
     """
@@ -104,7 +106,7 @@ def load_csv(filename: str) -> pd.DataFrame:
     Loads a CSV file from the configured CSV path.
     """
     path = get_csv_path(filename)
-    return pd.read_csv(path)
+    return read_table(path)
 
 @customer_bp.route('/terms')
 def terms_of_service() -> Response:
@@ -168,7 +170,7 @@ def get_previous_bill_due_date(account_id: int) -> datetime.date:
             return datetime.now().date()
         
         # Load archived bills
-        archived_bills_df = pd.read_csv(archived_bills_path)
+        archived_bills_df = read_table(archived_bills_path)
         
         # Filter for the account
         matching_bills = archived_bills_df[archived_bills_df['PaymentAccID'] == account_id]
@@ -231,6 +233,7 @@ def account_overview(account_id: int) -> Response:
 
 @customer_bp.route('/settings', methods=['GET', 'POST'])
 @login_required("customer_id")
+@locks_tables('customers.csv', 'persons.csv')
 def settings() -> Response:
     """
     Render and process the user settings form.
@@ -241,8 +244,8 @@ def settings() -> Response:
         flash_error("You must be logged in to access settings.")
         return redirect(url_for('auth.customer_login'))
 
-    cust_df = pd.read_csv(get_csv_path("customers.csv"))
-    per_df = pd.read_csv(get_csv_path("persons.csv"))
+    cust_df = read_table(get_csv_path("customers.csv"))
+    per_df = read_table(get_csv_path("persons.csv"))
 
     try:
         customer_id = cust_df.loc[cust_df['Username'] == username, 'CustomerID'].iloc[0]
@@ -275,10 +278,10 @@ def settings() -> Response:
 
         if newUser != username:
             per_df.at[idx, 'Username'] = newUser
-            per_df.to_csv(get_csv_path("persons.csv"), index=False)
+            write_table(per_df, get_csv_path("persons.csv"))
     
             cust_df.loc[cust_df['CustomerID'] == customer_id, 'Username'] = newUser
-            cust_df.to_csv(get_csv_path("customers.csv"), index=False)
+            write_table(cust_df, get_csv_path("customers.csv"))
             session['customer'] = newUser
 
             changes['Username'] = newUser
@@ -364,7 +367,7 @@ def credit_mortgage_page(account_id: int) -> Response:
         if pd.notna(apr):
             extra_info["apr"] = float(apr)
 
-        bills_df = pd.read_csv(get_csv_path("bills.csv"))
+        bills_df = read_table(get_csv_path("bills.csv"))
         bill_row = bills_df[bills_df["PaymentAccID"] == account_id]
         if not bill_row.empty:
             bill_data = bill_row.iloc[0]
@@ -655,6 +658,7 @@ def setup_bill_payment_form(customer_id: int, account_id: int, bill_data: dict,
     return form
 
 
+@locks_tables('accounts.csv', 'archivedBills.csv', 'archivedLoans.csv', 'bills.csv', 'logs.csv', 'transactions.csv')
 def process_bill_payment(form: BillPaymentForm, account_id: int, account_type: str, customer_id: int):
     """
     Processes a bill payment submission.
@@ -814,28 +818,33 @@ def process_existing_bill_payment(bills_df, accounts_df, logs_df, bill_id, amoun
     # Payment account always decreases
     new_payment_balance = payment_account_balance - amount
     
-    # Update balances and record transactions
-    update_account_balance(accounts_df, account_id, new_balance)
-    update_account_balance(accounts_df, payment_account_id, new_payment_balance)
-    record_payment_transactions(payment_account_id, account_id, amount, payee_name, account_type)
-    
-    # Process bill based on type
+    # Settle the bill first, so an error while archiving or scheduling the next
+    # bill is raised before any money has moved
     if bill_type == "CreditCard":
-        return process_credit_card_bill(
+        response = process_credit_card_bill(
             bills_df, bill_id, bill_index, amount, full_amount_due, 
-            is_recurring, account_id, customer_id, bill_record, current_due_date
+            is_recurring, account_id, customer_id, bill_record, current_due_date, new_balance
         )
     elif bill_type == "Mortgage":
-        return process_mortgage_bill(
+        response = process_mortgage_bill(
             bills_df, bill_id, bill_index, amount, full_amount_due,
             is_recurring, account_id, customer_id, bill_record, current_due_date, new_balance
         )
     else:
-        return process_regular_bill(
+        response = process_regular_bill(
             bills_df, bill_id, bill_index, amount, is_recurring,
             customer_id, bill_record, account_id, current_due_date
         )
 
+    # Update balances and record transactions
+    update_account_balance(accounts_df, account_id, new_balance)
+    update_account_balance(accounts_df, payment_account_id, new_payment_balance)
+    record_payment_transactions(payment_account_id, account_id, amount, payee_name, account_type)
+    if bill_type == "Mortgage" and new_balance >= Decimal("0.00"):
+        # A paid-off loan can only be archived once its zero balance is written
+        archive("loan", account_id)
+    return response
+
 
 def validate_payment_amount(bill_type, amount, full_amount_due, bill_record, 
                           account_id, form, due_date_str, account_type):
@@ -892,11 +901,8 @@ def validate_payment_amount(bill_type, amount, full_amount_due, bill_record,
 
 def record_payment_transactions(payment_account_id, account_id, amount, payee_name, account_type):
     """Records transactions for a bill payment."""
-    trans_path = get_csv_path("transactions.csv")
-    trans_data = pd.read_csv(trans_path)
-
     # Transaction for the source account (payment)
-    transaction_id = generate_transaction_ID(trans_data)
+    transaction_id = generate_transaction_ID()
     source_transaction = {
         'TransactionID': transaction_id,
         'AccountID': payment_account_id,
@@ -904,13 +910,13 @@ def record_payment_transactions(payment_account_id, account_id, amount, payee_na
         'Amount': -float(amount),  # Negative amount since money is leaving this account
         'TransDate': datetime.now().strftime("%Y-%m-%d")
     }
-    trans_data.loc[len(trans_data)] = source_transaction
+    new_transactions = [source_transaction]
 
     # For credit cards and mortgages, also create a transaction for the destination account
     if account_type in ["Credit Card", "Mortgage Loan"]:
         dest_transaction_type = "Loan Payment Received" if account_type == "Mortgage Loan" else "Payment Received"
         
-        dest_transaction_id = generate_transaction_ID(trans_data)
+        dest_transaction_id = generate_transaction_ID()
         dest_transaction = {
             'TransactionID': dest_transaction_id,
             'AccountID': account_id,
@@ -918,14 +924,14 @@ def record_payment_transactions(payment_account_id, account_id, amount, payee_na
             'Amount': float(amount),  # Positive amount since money is being added to this account
             'TransDate': datetime.now().strftime("%Y-%m-%d")
         }
-        trans_data.loc[len(trans_data)] = dest_transaction
+        new_transactions.append(dest_transaction)
 
-    # Save updated transactions
-    trans_data.to_csv(trans_path, index=False)
+    # Append both postings to the transaction journal in one write
+    append_transactions(new_transactions)
 
 
 def process_credit_card_bill(bills_df, bill_id, bill_index, amount, full_amount_due, 
-                          is_recurring, account_id, customer_id, bill_record, current_due_date):
+                          is_recurring, account_id, customer_id, bill_record, current_due_date, new_balance):
     """Processes a credit card bill payment."""
     remaining_amount = full_amount_due - amount
     
@@ -935,17 +941,16 @@ def process_credit_card_bill(bills_df, bill_id, bill_index, amount, full_amount_
         # Store remaining amount as negative value
         bills_df.at[bill_index, 'Amount'] = -remaining_amount
         bills_df.at[bill_index, 'Status'] = 'PartiallyPaid'
-        bills_df.to_csv(get_csv_path("bills.csv"), index=False)
+        write_bills(bills_df, get_csv_path("bills.csv"))
         
         flash_success(f"Partial payment of ${amount:.2f} applied. Remaining balance: ${remaining_amount:.2f}")
     else:
         # Full payment - mark as paid
         bills_df.at[bill_index, 'Status'] = 'Paid'
-        bills_df.to_csv(get_csv_path("bills.csv"), index=False)
+        write_bills(bills_df, get_csv_path("bills.csv"))
         
-        # Check if new bill needed
-        account = load_account_by_id(account_id)
-        current_balance = Decimal(account["CurrBal"]).quantize(Decimal("0.00"))
+        # Check if new bill needed, from the balance the payment leaves
+        current_balance = new_balance
         
         # CurrBal is negative for credit cards with a balance to pay
         if current_balance < Decimal("0.00") and is_recurring == 1:
@@ -984,12 +989,11 @@ def process_mortgage_bill(bills_df, bill_id, bill_index, amount, full_amount_due
     """Processes a mortgage bill payment."""
     # Mark bill as paid
     bills_df.at[bill_index, 'Status'] = 'Paid'
-    bills_df.to_csv(get_csv_path("bills.csv"), index=False)
+    write_bills(bills_df, get_csv_path("bills.csv"))
     
     # Check if mortgage is fully paid - new_balance should be 0 or positive
     if new_balance >= Decimal("0.00"):
-        # Mortgage fully paid - archive
-        archive("loan", account_id)
+        # Mortgage fully paid - archive (the loan itself once the payment is written)
         archive("bill", int(bill_id), remove_record=True)
         flash_success("Mortgage fully paid off and archived.")
         return redirect(url_for("customer.customer_dashboard"))
@@ -1032,7 +1036,7 @@ def process_regular_bill(bills_df, bill_id, bill_index, amount, is_recurring,
     """Processes a regular bill payment."""
     # Mark as paid
     bills_df.at[bill_index, 'Status'] = 'Paid'
-    bills_df.to_csv(get_csv_path("bills.csv"), index=False)
+    write_bills(bills_df, get_csv_path("bills.csv"))
     
     # If recurring, schedule the next one
     if is_recurring == 1:
@@ -1121,11 +1125,8 @@ def load_transactions_for_account(account_id):
     Returns:
         DataFrame: Filtered transactions for the account
     """
-    path = get_csv_path('transactions.csv')
-    df = pd.read_csv(path)
-    
-    # Filter for the account and convert dates
-    matching = df[df['AccountID'] == account_id].copy()
+    # Only the account's rows are read, using the transaction offset index
+    matching = get_account_transactions(account_id)
     if 'TransDate' in matching.columns:
         matching["TransDate"] = pd.to_datetime(matching["TransDate"], errors='coerce')
     
@@ -1268,15 +1269,10 @@ def find_active_bill(account_id: int):
     Returns:
         dict or None: Bill information if found, None otherwise
     """
-    # Load bills data
-    bills_df = load_csv("bills.csv")
-    bills_df["PaymentAccID"] = bills_df["PaymentAccID"].astype(int)
-    
-    # Filter for active bills for this account
-    matching = bills_df[
-        (bills_df["PaymentAccID"] == account_id) & 
-        (bills_df["Status"].isin(["Pending", "PartiallyPaid", "Late"]))
-    ]
+    # Look up active bills for this account
+    matching = get_repository().find(
+        "bills", PaymentAccID=account_id, Status=["Pending", "PartiallyPaid", "Late"]
+    )
     
     if not matching.empty:
         # Convert dates and find earliest due bill
@@ -23,7 +23,7 @@ from scripts.billPayment import scheduleBillPayment
 
 # Import shared utilities for checking account type and managing flash messages
 from app.blueprints.sharedUtilities import (
-    user_has_account_type, get_csv_path, 
+    user_has_account_type, get_csv_path, read_table,
     flash_success, flash_error
 )
 
@@ -53,7 +53,7 @@ def get_customer_id_by_username(username: str) -> int:
     """
     # Path to the customer CSV file
     customer_csv_path: str = get_csv_path("customers.csv")
-    user_info = pd.read_csv(customer_csv_path)
+    user_info = read_table(customer_csv_path)
 
     # Check if the necessary columns exist in the CSV
     if 'Username' not in user_info.columns or 'CustomerID' not in user_info.columns:
@@ -103,7 +103,7 @@ def register_step2():
     form = RegistrationStep2Form()
     if form.validate_on_submit():
         # Check if the username is already taken
-        usernames = pd.read_csv(get_csv_path("customers.csv"))['Username'].str.lower()
+        usernames = read_table(get_csv_path("customers.csv"))['Username'].str.lower()
         if form.username.data.lower() in usernames.values:
             flash_error("Username already taken. Please choose another.")
             return render_template('registration/register_step2.html', form=form)
@@ -157,7 +157,7 @@ def register_teller_username():
 
     if form.validate_on_submit():
         # Read from employees.csv
-        df = pd.read_csv(get_csv_path("employees.csv"))
+        df = read_table(get_csv_path("employees.csv"))
         username_input = form.username.data.strip().lower()
 
         # Match user by lowercased username
@@ -2,11 +2,12 @@
 # ---------------------------
 # Imports
 # ---------------------------
-import os
-import pandas as pd
 from functools import wraps
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
+from scripts.transactionIndex import read_account_transactions
 from flask import (
-    current_app, session, abort,
+    session, abort,
     redirect, url_for, flash, request
 )
 
@@ -23,7 +24,7 @@ def get_csv_path(filename):
     Returns:
         str: Full file path to the CSV file.
     """
-    return os.path.join(current_app.root_path, '..', 'csvFiles', filename)
+    return table_path(filename)
 
 # ---------------------------
 # Session & Customer Utilities
@@ -56,7 +57,7 @@ def user_has_account_type(customer_id, account_type):
     """
     accounts_csv = get_csv_path("accounts.csv")
     try:
-        accounts = pd.read_csv(accounts_csv)
+        accounts = read_table(accounts_csv)
     except FileNotFoundError:
         return False  # If the CSV file is not found, return False
     
@@ -77,16 +78,22 @@ def get_customer_accounts(customer_id):
         DataFrame: A pandas DataFrame containing all accounts for the specified customer.
     """
     accounts_csv_path = get_csv_path("accounts.csv")
-    accounts_df = pd.read_csv(accounts_csv_path)
+    accounts_df = read_table(accounts_csv_path)
     return accounts_df[accounts_df["CustomerID"] == customer_id]
 
 def get_account_transactions(account_id):
-    transactions_path = get_csv_path("transactions.csv")
-    transactions_df = pd.read_csv(transactions_path)
-    print("Account IDs in CSV:", transactions_df["AccountID"].unique())
-    print("Filtering for Account ID:", account_id)
+    """
+    Retrieve the transactions for a specific account (or list of accounts).
+
+    Only those accounts' rows are read, using the transaction offset index.
+
+    Args:
+        account_id (int or list): The account ID, or several account IDs.
 
-    return transactions_df[transactions_df["AccountID"] == account_id]
+    Returns:
+        DataFrame: The matching transactions.
+    """
+    return read_account_transactions(account_id)
 
 
 # ---------------------------
@@ -1,15 +1,17 @@
 # Spring 2025 Authors: Baile Segars, Braden Doty, Sierra Yerges
 from flask import Blueprint, Response, request, session, current_app, render_template, redirect, url_for, flash, jsonify
 from app.blueprints.sharedUtilities import (
-    get_csv_path, login_required, flash_error, flash_success, get_account_transactions, get_customer_accounts
+    get_csv_path, read_table, write_table, locks_tables, login_required, flash_error, flash_success, get_account_transactions, get_customer_accounts
 )
 from .forms import TellerSettingsForm, BillPaymentForm
 from Crypto.PublicKey import ECC
 from decimal import Decimal
 import pandas as pd
+from scripts.money import to_money, format_money_columns
+from scripts.idAllocator import next_id
+from scripts.billIndex import write_bills
 import hashlib
 import json
-import csv
 import os
 import logging
 from datetime import datetime
@@ -41,7 +43,7 @@ def teller_login():
         employee_id = request.form.get("employeeId")
         username = username.lower()
 
-        df = pd.read_csv(get_csv_path("employees.csv"))
+        df = read_table(get_csv_path("employees.csv"))
 
         match = df[(df["Username"] == username) & (df["EmployeeID"].astype(str) == str(employee_id)) & (df["Position"] == "Teller")]
 
@@ -62,9 +64,9 @@ def teller_login():
 @login_required("teller")
 def teller_dashboard():
     try:
-        customers_df = pd.read_csv(get_csv_path("customers.csv"))
-        persons_df = pd.read_csv(get_csv_path("persons.csv"))
-        accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
+        customers_df = read_table(get_csv_path("customers.csv"))
+        persons_df = read_table(get_csv_path("persons.csv"))
+        accounts_df = read_table(get_csv_path("accounts.csv"))
 
         # Convert IDs to int for consistency
         customers_df["CustomerID"] = customers_df["CustomerID"].astype(int)
@@ -96,6 +98,7 @@ def teller_dashboard():
 # ---------------
 @teller_bp.route("/settings", methods=["GET", "POST"])
 @login_required('teller')
+@locks_tables('employees.csv', 'persons.csv')
 def teller_settings():
     from scripts.customer import modifyInfo
     form = TellerSettingsForm()
@@ -105,8 +108,8 @@ def teller_settings():
         return redirect(url_for('auth.teller_login'))
 
     # Load user data from CSVs
-    cust_df = pd.read_csv(get_csv_path("employees.csv"))
-    per_df = pd.read_csv(get_csv_path("persons.csv"))
+    cust_df = read_table(get_csv_path("employees.csv"))
+    per_df = read_table(get_csv_path("persons.csv"))
 
     try:
         teller_id = cust_df.loc[cust_df['Username'] == username, 'EmployeeID'].iloc[0]
@@ -139,7 +142,7 @@ def teller_settings():
             changes['Address'] = form.address.data.strip()
         if newUser != username:
             cust_df.loc[cust_df['EmployeeID'] == teller_id, 'Username'] = newUser
-            cust_df.to_csv(get_csv_path("employees.csv"), index=False)
+            write_table(cust_df, get_csv_path("employees.csv"))
 
             session['teller'] = newUser
             username_changed = True
@@ -214,6 +217,7 @@ def teller_settings():
 # ----------------------
 @teller_bp.route("/edit-username", methods=["POST"])
 @login_required("teller")
+@locks_tables('customers.csv')
 def edit_username():
     data = request.get_json()
     customer_id = data.get("customerId")
@@ -224,13 +228,13 @@ def edit_username():
     try:
         customer_id = int(customer_id)
         customers_path = get_csv_path("customers.csv")
-        df = pd.read_csv(customers_path)
+        df = read_table(customers_path)
 
         if customer_id not in df['CustomerID'].values:
             return jsonify(success=False, message="Customer ID not found"), 404
 
         df.loc[df['CustomerID'] == customer_id, 'Username'] = new_username
-        df.to_csv(customers_path, index=False)
+        write_table(df, customers_path)
         return jsonify(success=True)
     except Exception as e:
         return jsonify(success=False, message=str(e)), 500
@@ -280,19 +284,18 @@ def reset_customer_password():
 def get_accounts(customer_id):
     accounts = []
     try:
-        accounts_path = get_csv_path("accounts.csv")
-        with open(accounts_path, newline="") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if int(row["CustomerID"]) == customer_id:
-                    accounts.append({
-                        "AccountID": row["AccountID"],
-                        "AccountType": row["AccountType"],
-                        "CurrBal": row["CurrBal"],
-                        "DateOpened": row["DateOpened"],
-                        "CreditLimit": row.get("CreditLimit", ""),
-                        "APR": row.get("APR", "")
-                    })
+        # Read as raw strings so balances are returned exactly as stored
+        accounts_df = read_table(get_csv_path("accounts.csv"), dtype=str, keep_default_na=False)
+        for row in accounts_df.to_dict(orient="records"):
+            if int(row["CustomerID"]) == customer_id:
+                accounts.append({
+                    "AccountID": row["AccountID"],
+                    "AccountType": row["AccountType"],
+                    "CurrBal": row["CurrBal"],
+                    "DateOpened": row["DateOpened"],
+                    "CreditLimit": row.get("CreditLimit", ""),
+                    "APR": row.get("APR", "")
+                })
         return jsonify(success=True, accounts=accounts)
     except Exception as e:
         return jsonify(success=False, message=str(e))
@@ -304,8 +307,8 @@ def get_accounts(customer_id):
 @login_required("teller")
 def check_customer_accounts(customer_id):
     try:
-        accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
-        bills_df = pd.read_csv(get_csv_path("bills.csv"))
+        accounts_df = read_table(get_csv_path("accounts.csv"))
+        bills_df = read_table(get_csv_path("bills.csv"))
 
         nonzero_balance = accounts_df[
             (accounts_df['CustomerID'] == customer_id) & 
@@ -354,11 +357,10 @@ def get_customer_accounts_route(customer_id):
 @login_required("teller")
 def get_customer_transactions(customer_id):
     try:
-        trans_df = pd.read_csv(get_csv_path("transactions.csv"))
-        acc_df = pd.read_csv(get_csv_path("accounts.csv"))
+        acc_df = read_table(get_csv_path("accounts.csv"))
 
         customer_accounts = acc_df[acc_df["CustomerID"] == int(customer_id)]["AccountID"].tolist()
-        filtered = trans_df[trans_df["AccountID"].isin(customer_accounts)]
+        filtered = get_account_transactions(customer_accounts)
 
         return jsonify(filtered.to_dict(orient="records"))
 
@@ -388,6 +390,7 @@ def get_account_transactions_route(account_id):
 # ------------------------------------
 @teller_bp.route("/open-account", methods=["POST"])
 @login_required("teller")
+@locks_tables('accounts.csv', 'customers.csv', 'employees.csv', 'logs.csv', 'persons.csv')
 def open_account():
     from scripts.customer.webLogin import login_page_button_pressed
     data = request.get_json()
@@ -414,7 +417,7 @@ def open_account():
             return jsonify(success=False, message=result["message"])
 
         # Get new customer ID
-        cust_df = pd.read_csv(get_csv_path("customers.csv"))
+        cust_df = read_table(get_csv_path("customers.csv"))
         customer_row = cust_df[cust_df["Username"] == username]
         if customer_row.empty:
             return jsonify(success=False, message="Customer ID not found after creation.")
@@ -422,16 +425,13 @@ def open_account():
 
         # Add account
         acc_path = get_csv_path("accounts.csv")
-        acc_df = pd.read_csv(acc_path) if os.path.exists(acc_path) else pd.DataFrame(columns=[
+        acc_df = read_table(acc_path) if os.path.exists(acc_path) else pd.DataFrame(columns=[
             "AccountID", "CustomerID", "AccountType", "CurrBal", "DateOpened", "CreditLimit", "APR"
         ])
-        import random
         from datetime import date
         from decimal import Decimal
 
-        acc_id = random.randint(1000, 9999)
-        while acc_id in acc_df["AccountID"].values:
-            acc_id = random.randint(1000, 9999)
+        acc_id = next_id('account')
 
         acc_df.loc[len(acc_df)] = {
             "AccountID": acc_id,
@@ -442,7 +442,7 @@ def open_account():
             "CreditLimit": None,
             "APR": None
         }
-        acc_df.to_csv(acc_path, index=False)
+        write_table(acc_df, acc_path)
 
         return jsonify(success=True, message="Customer account successfully created.")
     except Exception as e:
@@ -508,7 +508,7 @@ def delete_account():
         return jsonify({"status": "error", "message": "No authenticated user found."})
 
     # Load employees.csv to get performed_by_id
-    employees_df = pd.read_csv(get_csv_path("employees.csv"))
+    employees_df = read_table(get_csv_path("employees.csv"))
     user_row = employees_df[employees_df["Username"] == username]
 
     if user_row.empty:
@@ -524,6 +524,7 @@ def delete_account():
 # --------------------------------
 @teller_bp.route("/delete-customer", methods=["POST"])
 @login_required("teller")
+@locks_tables('accounts.csv', 'bills.csv', 'customers.csv', 'employees.csv', 'logs.csv', 'persons.csv')
 def delete_customer():
     from scripts.customer.deleteUser import delete_user_button_pressed
     data = request.get_json()
@@ -533,8 +534,8 @@ def delete_customer():
         accounts_path = get_csv_path("accounts.csv")
         bills_path = get_csv_path("bills.csv")
 
-        acc_df = pd.read_csv(accounts_path)
-        bills_df = pd.read_csv(bills_path)
+        acc_df = read_table(accounts_path)
+        bills_df = read_table(bills_path)
 
         # Delete only $0.00 accounts
         acc_df = acc_df[~((acc_df["CustomerID"] == customer_id) & (acc_df["CurrBal"].astype(float) == 0.00))]
@@ -543,8 +544,8 @@ def delete_customer():
         bills_df = bills_df[~((bills_df["CustomerID"] == customer_id) & (bills_df["Amount"].astype(float) == 0.00))]
 
         # Save updated files
-        acc_df.to_csv(accounts_path, index=False)
-        bills_df.to_csv(bills_path, index=False)
+        write_table(acc_df, accounts_path)
+        write_bills(bills_df, bills_path)
 
         # Now attempt delete
         result = delete_user_button_pressed("Customer", customer_id, is_admin=True)
@@ -564,14 +565,14 @@ def delete_customer():
 # ----------------------
 @teller_bp.route("/deposit", methods=["POST"])
 @login_required("teller")
+@locks_tables('accounts.csv', 'bills.csv', 'transactions.csv')
 def deposit():
     from scripts.makeDeposit import deposit
     data = request.get_json()
 
     try:
         accPath = get_csv_path("accounts.csv")
-        df = pd.read_csv(accPath)
-        df['CurrBal'] = df['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
+        df = read_table(accPath)
         
         accountID = data.get("accountId").strip()
         amount = data.get("amount").strip()
@@ -579,7 +580,7 @@ def deposit():
 
         accIndex = df.loc[df['AccountID'] == accountID].index[0]
 
-        bal = Decimal(df.at[accIndex, 'CurrBal'])
+        bal = to_money(df.at[accIndex, 'CurrBal'])
         account_type = df.at[accIndex, 'AccountType']
 
         if not accountID or not amount:
@@ -600,15 +601,13 @@ def deposit():
             return jsonify(success=False, message="Invalid account ID or deposit amount format.")
 
         if result["status"] == "success":
+            # deposit() has already posted the new balance
             bal += Decimal(amount)
-            df.at[accIndex, 'CurrBal'] = Decimal(bal)
-            df['CurrBal'] = df['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
             if account_type in ["Mortgage Loan", "Credit Card"] and bal == Decimal("0.00"):
                 bills_path = get_csv_path("bills.csv")
-                bills_df = pd.read_csv(bills_path)
+                bills_df = read_table(bills_path)
                 bills_df = bills_df[bills_df['AccountID'] != accountID]
-                bills_df.to_csv(bills_path, index=False)
-            df.to_csv(accPath, index=False)
+                write_bills(bills_df, bills_path)
             return jsonify(success=True, message="Deposit completed.")
         else:
             return jsonify(success=False, message=result["message"])
@@ -616,28 +615,50 @@ def deposit():
         print(f"Deposit failed: {e}")
         return jsonify(success=False, message="Deposit failed.")
 
+# ---------------------------------------------
+# Batch of Deposits, Withdrawals and Transfers
+# ---------------------------------------------
+@teller_bp.route("/batch", methods=["POST"])
+@login_required("teller")
+def post_batch():
+    """
+    Posts a list of deposits, withdrawals and transfers in one commit.
+
+    Accepts either a JSON list of items or {"items": [...]}, where each item is
+    {"type": "deposit" | "directDeposit" | "withdrawal", "accountId": ..., "amount": ...}
+    or {"type": "transfer", "sourceAccountId": ..., "destinationAccountId": ..., "amount": ...}.
+
+    Returns:
+        JSON with success, message and one {"status", "message"} result per item.
+    """
+    from scripts.batchPosting import post_batch
+    data = request.get_json(silent=True)
+    items = data.get("items") if isinstance(data, dict) else data
+
+    try:
+        result = post_batch(items)
+    except Exception as e:
+        print(f"Batch posting failed: {e}")
+        return jsonify(success=False, message="Batch posting failed.")
+
+    return jsonify(success=result["status"] == "success", message=result["message"],
+                   results=result.get("results", []))
+
 # -----------------------
 # Withdraw for a Customer
 # -----------------------
 @teller_bp.route("/withdraw", methods=["POST"])
 @login_required("teller")
+@locks_tables('accounts.csv', 'transactions.csv')
 def withdraw():
     from scripts.withdrawMoney import withdraw
     data = request.get_json()
 
     try:
-        accPath = get_csv_path("accounts.csv")
-        df = pd.read_csv(accPath)
-        df['CurrBal'] = df['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        
         accountID = data.get("accountId").strip()
         amount = data.get("amount").strip()
         accountID = int(accountID)
 
-        accIndex = df.loc[df['AccountID'] == accountID].index[0]
-
-        bal = Decimal(df.at[accIndex, 'CurrBal'])
-
         if not accountID or not amount:
             return jsonify(success=False, message="Account ID and withdrawal amount are required.")
 
@@ -651,10 +672,6 @@ def withdraw():
             return jsonify(success=False, message="Invalid account ID or withdrawal amount format.")
 
         if result["status"] == "success":
-            bal -= Decimal(amount)
-            df.at[accIndex, 'CurrBal'] = Decimal(bal)
-            df['CurrBal'] = df['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-            df.to_csv(accPath, index=False)
             return jsonify(success=True, message="Withdrawal completed.")
         else:
             return jsonify(success=False, message=result["message"])
@@ -667,15 +684,12 @@ def withdraw():
 # -----------------------
 @teller_bp.route("/transfer", methods=["POST"])
 @login_required("teller")
+@locks_tables('accounts.csv', 'transactions.csv')
 def transfer():
     from scripts.fundTransfer import transferFunds
     data = request.get_json()
 
     try:
-        accPath = get_csv_path("accounts.csv")
-        df = pd.read_csv(accPath)
-        df['CurrBal'] = df['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        
         src_account = data.get("sourceAccountId").strip()
         dest_account = data.get("destinationAccountId").strip()
         amount = data.get("amount").strip()
@@ -684,12 +698,6 @@ def transfer():
         dest_account = int(dest_account)
         amount = Decimal(amount)
 
-        src_index = df.loc[df['AccountID'] == src_account].index[0]
-        dest_index = df.loc[df['AccountID'] == dest_account].index[0]
-
-        srcBal = Decimal(df.at[src_index, 'CurrBal'])
-        destBal = Decimal(df.at[dest_index, 'CurrBal'])
-
         if not src_account or not dest_account or not amount:
             return jsonify(success=False, message="Source Account ID, Destination Account ID, and transfer amount are required.")
 
@@ -703,12 +711,6 @@ def transfer():
             return jsonify(success=False, message="Invalid account ID or transfer amount format.")
 
         if result["status"] == "success":
-            srcBal -= Decimal(amount)
-            destBal += Decimal(amount)
-            df.at[src_index, 'CurrBal'] = Decimal(srcBal)
-            df.at[dest_index, 'CurrBal'] = Decimal(destBal)
-            df['CurrBal'] = df['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-            df.to_csv(accPath, index=False)
             return jsonify(success=True, message="Transfer completed.")
         else:
             return jsonify(success=False, message=result["message"])
@@ -721,6 +723,7 @@ def transfer():
 # -----------------------
 @teller_bp.route('/pay-bill/<int:account_id>', methods=['GET', 'POST'])
 @login_required("teller")
+@locks_tables('accounts.csv', 'bills.csv', 'transactions.csv')
 def pay_bill(account_id: int):
     """
     Handles bill payment for a specified account.
@@ -728,34 +731,29 @@ def pay_bill(account_id: int):
     - For mortgages: Requires full payment of monthly amount
     - For recurring bills: Allows payment and maintains recurrence
     """
-    import random
+    from scripts.transactionLog import generate_transaction_ID
+    from scripts.transactionJournal import log_transaction
     data = request.get_json()
 
     try:
         billPath = get_csv_path("bills.csv")
-        df = pd.read_csv(billPath)
-        df['Amount'] = df['Amount'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-
-        transactionPath = get_csv_path("transactions.csv")
-        transactionDF = pd.read_csv(transactionPath)
+        df = read_table(billPath)
 
         accPath = get_csv_path("accounts.csv")
-        accDF = pd.read_csv(accPath)
+        accDF = read_table(accPath)
 
         accIndex = accDF.loc[accDF['AccountID'] == account_id].index[0]
-        accDF['CurrBal'] = accDF['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        currBal = accDF.at[accIndex, 'CurrBal']
+        currBal = to_money(accDF.at[accIndex, 'CurrBal'])
 
         payAmount = data.get('billAmount').strip()
         billIndex = df.loc[df['PaymentAccID'] == account_id].index[0]
         billType = df.at[billIndex, 'BillType']
-        billAmount = df.at[billIndex, 'Amount']
+        billAmount = to_money(df.at[billIndex, 'Amount'])
 
         payAccountId = data.get('payAccount').strip()
         payAccountId = int(payAccountId)
         payAccIndex = accDF.loc[accDF['AccountID'] == payAccountId].index[0]
-        accDF['CurrBal'] = accDF['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        payAccBal = accDF.at[payAccIndex, 'CurrBal']
+        payAccBal = to_money(accDF.at[payAccIndex, 'CurrBal'])
         
         if not account_id or not payAmount:
             return jsonify(success=False, message="Account ID and amount are required.")
@@ -767,30 +765,20 @@ def pay_bill(account_id: int):
                 billAmount += Decimal(payAmount)
                 payAccBal -= Decimal(payAmount)
 
-        df.at[billIndex, 'Amount'] = Decimal(billAmount)
-        df['Amount'] = df['Amount'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
+        format_money_columns(df, 'Amount')
+        df.at[billIndex, 'Amount'] = str(to_money(billAmount))
         if billAmount == Decimal('0.00'):
             df.at[billIndex, 'Status'] = 'Paid'
         else:
             df.at[billIndex, 'Status'] = 'PartiallyPaid'
 
-        transactionID = random.randint(999, 9999)
-        while transactionID in transactionDF['TransactionID']:
-            transactionID = random.randint(999, 9999)
-        newTransactionRow = {'TransactionID': transactionID,
-                             'AccountID': account_id,
-                             'TransactionType': 'Bill Payment',
-                             'Amount': Decimal(payAmount),
-                             'TransDate': datetime.today()
-                            }
-        transactionDF.loc[len(transactionDF)] = newTransactionRow
-
-        accDF.at[accIndex, 'CurrBal'] = Decimal(currBal)
-        accDF.at[payAccIndex, 'CurrBal'] = Decimal(payAccBal)
+        format_money_columns(accDF, 'CurrBal')
+        accDF.at[accIndex, 'CurrBal'] = str(to_money(currBal))
+        accDF.at[payAccIndex, 'CurrBal'] = str(to_money(payAccBal))
 
-        accDF.to_csv(accPath, index=False)
-        transactionDF.to_csv(transactionPath, index=False)
-        df.to_csv(billPath, index=False)
+        write_table(accDF, accPath)
+        write_bills(df, billPath)
+        log_transaction(generate_transaction_ID(), account_id, 'Bill Payment', Decimal(payAmount), datetime.today())
 
         flash_success("Bill payment completed.")
         return jsonify(success=True, message="Bill payment completed.")
@@ -848,16 +836,13 @@ def find_active_bill(account_id):
     Returns:
         dict or None: Bill information if found, None otherwise
     """
-    # Load bills data
+    from scripts.repository import get_repository
+
+    # Look up active bills for this account
     try:
-        bills_df = pd.read_csv(get_csv_path("bills.csv"))
-        bills_df["PaymentAccID"] = bills_df["PaymentAccID"].astype(int)
-        
-        # Filter for active bills for this account
-        matching = bills_df[
-            (bills_df["PaymentAccID"] == account_id) & 
-            (bills_df["Status"].isin(["Pending", "PartiallyPaid", "Late"]))
-        ]
+        matching = get_repository().find(
+            "bills", PaymentAccID=account_id, Status=["Pending", "PartiallyPaid", "Late"]
+        )
         
         if not matching.empty:
             # Convert dates and find earliest due bill
@@ -887,7 +872,7 @@ def load_account_data(account_id):
         dict: Account information
     """
     # Retrieve account information
-    accounts_df = pd.read_csv(get_csv_path("accounts.csv"))
+    accounts_df = read_table(get_csv_path("accounts.csv"))
     account_row = accounts_df[accounts_df["AccountID"] == account_id]
     
     if account_row.empty:
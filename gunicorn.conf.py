@@ -0,0 +1,57 @@
+# gunicorn.conf.py
+"""
+gunicorn settings for the production server (see render.yaml):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every worker competes for the scheduler lease after it starts, so exactly one
+of them schedules the nightly batch jobs and another takes over if it dies.
+The jobs themselves run in a batch worker process (scripts/batchWorker.py)
+that the master starts next to the web workers and starts again whenever it
+exits or gunicorn reloads (scripts/workerProcess.py), unless BATCH_WORKER=0
+(e.g. when the batch worker is run under a supervisor of its own).
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# Request threads per worker
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Seconds the batch worker gets to finish its current job at shutdown
+BATCH_WORKER_GRACE = float(os.environ.get('BATCH_WORKER_GRACE', '60'))
+
+_batch_worker = None
+
+
+def when_ready(server):
+    global _batch_worker
+    if os.environ.get('BATCH_WORKER', '1') != '0':
+        from scripts.workerProcess import WorkerProcess
+        _batch_worker = WorkerProcess(cwd=os.path.dirname(os.path.abspath(__file__)), log=server.log)
+        _batch_worker.start()
+
+
+def on_reload(server):
+    # The batch worker runs the new code too
+    if _batch_worker is not None:
+        _batch_worker.restart(BATCH_WORKER_GRACE)
+
+
+def on_exit(server):
+    if _batch_worker is not None:
+        _batch_worker.stop(BATCH_WORKER_GRACE)
+
+
+def post_worker_init(worker):
+    from scheduler import start_leader_election
+    start_leader_election()
+
+
+def worker_exit(server, worker):
+    # Hand the lease over now rather than when it expires
+    from scheduler import stop_leader_election
+    stop_leader_election()
+    # The batch throttle should not count a worker that is gone
+    from scripts.requestStats import close_request_stats
+    close_request_stats()
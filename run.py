@@ -9,14 +9,17 @@ It then runs the development server if this module is executed as the main progr
 import os
 from app import create_app  # Import the application factory function from the app module
 from scheduler import start_scheduler
+from scripts.batchWorker import start_worker_thread
 
 # Create an instance of the Flask application
 app = create_app()
 
 if __name__ == '__main__':
 
-    # Start the scheduler
+    # Start the scheduler, and the batch worker that runs the jobs it queues
+    # (gunicorn runs the worker as a separate process, see gunicorn.conf.py)
     scheduler = start_scheduler()
+    start_worker_thread()
 
     # For local debugging:
     # app.run(debug=True)
@@ -2,11 +2,11 @@
 import logging
 import os
 import time
-import pandas as pd
+from datetime import date
 from apscheduler.schedulers.background import BackgroundScheduler
-from scripts.calcCreditInterest import calculateCreditInterest
-from scripts.calcInterest import accrue_interest
-from scripts.billPayment import processScheduledBills, generate_monthly_credit_card_statements
+from scripts.jobQueue import JobQueue
+from scripts.leaderLease import LeaderElector, LeaderLease
+from scripts.repository import get_repository
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,55 +14,29 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Create a global scheduler instance to prevent duplicate schedulers
 _scheduler = None
 
-def monthly_interest_job():
-    """Calculate monthly interest for savings and money market accounts."""
-    try:
-        # Calculate interest for savings accounts
-        accrue_interest('Savings')
-        logging.info("Monthly interest calculations for Savings accounts completed successfully.")
-        
-        # Calculate interest for money market accounts
-        accrue_interest('Money Market')
-        logging.info("Monthly interest calculations for Money Market accounts completed successfully.")
-    except Exception as e:
-        logging.error("Error running monthly interest job: %s", e)
+# Lease election between the workers of a multi-worker server (see start_leader_election)
+_elector = None
 
-def daily_credit_interest_job():
-    """Calculate daily interest and process late bills for credit card and mortgage accounts."""
+def _enqueue(kind, params):
+    """Queue a job for the batch worker (scripts/batchWorker.py)."""
     try:
-        credit_results = calculateCreditInterest()
-        for result in credit_results:
-            status = result.get("status")
-            message = result.get("message")
-            log_func = logging.info if status == "success" else logging.warning
-            log_func(f"Credit Interest - {status.upper()}: {message}")
-        logging.info("Daily credit interest and late bill processing completed.")
+        job_id = JobQueue().enqueue(kind, params, source='scheduler')
+        logging.info(f"Queued {kind} job {job_id} for the batch worker.")
     except Exception as e:
-        logging.error("Error running daily credit interest job: %s", e)
+        logging.error("Error queueing %s job: %s", kind, e)
 
-def daily_bill_processing_job():
-    """Process scheduled bills due today - mark overdue bills as Late and handle auto payments."""
-    try:
-        results = processScheduledBills()
-        for result in results:
-            status = result.get("status")
-            message = result.get("message")
-            log_func = logging.info if status == "success" else logging.warning
-            log_func(f"Bill Processing - {status.upper()}: {message}")
-        logging.info("Daily bill processing completed.")
-    except Exception as e:
-        logging.error("Error running daily bill processing job: %s", e)
+def nightly_batch_job():
+    """
+    Queue tonight's nightly pipeline: monthly interest (on the 1st), bill
+    processing, credit card statements and credit interest, committed together.
+    """
+    _enqueue('nightly_batch', {"run_date": date.today().isoformat()})
 
-def daily_credit_statement_job():
-    """Generate monthly credit card statements for accounts without active bills."""
-    try:
-        result = generate_monthly_credit_card_statements()
-        status = result.get("status")
-        message = result.get("message")
-        log_func = logging.info if status == "success" else logging.warning
-        log_func(f"Credit Statement - {status.upper()}: {message}")
-    except Exception as e:
-        logging.error("Error running daily credit card statement job: %s", e)
+def catch_up_job():
+    """
+    Queue a run of the nights missed while the app was down (see catch_up_missed_runs).
+    """
+    _enqueue('catch_up', {"today": date.today().isoformat()})
 
 def start_scheduler():
     """Initialize and start the APScheduler."""
@@ -75,29 +49,57 @@ def start_scheduler():
     
     _scheduler = BackgroundScheduler()
     
+    # Finish a nightly commit interrupted by a crash before anything reads the tables
+    get_repository().recover()
+
     # PRODUCTION SCHEDULE
-    # Monthly interest job for savings and money market accounts - 1st of each month at midnight
-    _scheduler.add_job(monthly_interest_job, 'cron', day=1, hour=0, minute=0)
-    
-    # Daily credit interest and late bill processing - every day at 1:00 AM
-    _scheduler.add_job(daily_credit_interest_job, 'cron', hour=1, minute=0)
-    
-    # Daily bill processing job - every day at midnight
-    _scheduler.add_job(daily_bill_processing_job, 'cron', hour=0, minute=0)
-    
-    # Daily credit card statement generation - every day at 12:05 AM
-    _scheduler.add_job(daily_credit_statement_job, 'cron', hour=0, minute=5)
+    # Nightly pipeline - every day at midnight. Monthly interest runs as its
+    # first stage on the 1st, then bill processing, credit card statements
+    # and credit interest, all on one snapshot committed together.
+    _scheduler.add_job(nightly_batch_job, 'cron', hour=0, minute=0)
 
-    # TEST MODE: Uncomment the lines below to override the production schedule with test frequency
-    #_scheduler.add_job(monthly_interest_job, 'interval', seconds=30)
-    #_scheduler.add_job(daily_credit_interest_job, 'interval', seconds=20)
-    #_scheduler.add_job(daily_bill_processing_job, 'interval', seconds=40)
-    #_scheduler.add_job(daily_credit_statement_job, 'interval', seconds=30)
+    # Nights missed while the app was down - once, as soon as the scheduler starts
+    _scheduler.add_job(catch_up_job)
+
+    # TEST MODE: Uncomment the line below to override the production schedule with test frequency
+    #_scheduler.add_job(nightly_batch_job, 'interval', seconds=30)
 
     _scheduler.start()
-    logging.info("Scheduler started with updated interest calculation jobs.")
+    logging.info("Scheduler started with the nightly batch job.")
     return _scheduler
 
+def stop_scheduler():
+    """Shut the APScheduler down, waiting for a running job to finish."""
+    global _scheduler
+
+    if _scheduler is not None and _scheduler.running:
+        _scheduler.shutdown()
+        logging.info("Scheduler shut down.")
+    _scheduler = None
+
+def start_leader_election(lease_path=None):
+    """
+    Compete for the scheduler lease and run the scheduler only while holding it.
+
+    Every worker of a multi-worker server calls this (see gunicorn.conf.py);
+    the one that holds the lease starts the scheduler, and if it dies or
+    stops renewing, another worker takes the lease over and starts its own.
+    """
+    global _elector
+
+    if _elector is None:
+        _elector = LeaderElector(LeaderLease(lease_path), start_scheduler, stop_scheduler)
+    _elector.start()
+    return _elector
+
+def stop_leader_election():
+    """Stop competing for the lease, shutting the scheduler down if this process leads."""
+    global _elector
+
+    if _elector is not None:
+        _elector.stop()
+        _elector = None
+
 if __name__ == "__main__":
     scheduler = start_scheduler()
     try:
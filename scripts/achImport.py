@@ -0,0 +1,247 @@
+# achImport.py
+"""
+Streaming importer for direct-deposit files.
+
+The input is a CSV file with an AccountID and an Amount column (other
+columns, such as a trace number or payee name, are ignored):
+
+    AccountID,Amount,TraceNumber
+    101,1250.00,000000001
+    202,980.15,000000002
+
+The file is read in chunks, so memory stays bounded however long it is. Each
+chunk is checked against the set of checking and savings account IDs built
+once from accounts.csv, and accepted credits are summed per account. Lines
+that fail a check are written to a reject file with their line number and
+reason. At the end every credited account gets one balance update (a single
+write of accounts.csv) and one 'Direct Deposit' journal row, appended in
+batches. If the journal append fails, the balances and the journal are
+restored.
+
+Run from the root dir:
+    python -m scripts.achImport <file> [--rejects <file>] [--chunk-size <lines>]
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import date
+import numpy as np
+import pandas as pd
+from scripts.idAllocator import reserve_ids
+from scripts.ledger import LEG_RULES
+from scripts.money import NA_CENTS, to_cents, format_cents
+from scripts.tableCache import STORAGE_BACKEND, read_table, write_table, invalidate_table, table_path
+from scripts.tableLock import table_lock
+from scripts.transactionJournal import TransactionJournal, append_transactions
+
+# Input lines parsed per chunk
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Journal rows appended per write
+JOURNAL_BATCH_SIZE = 10_000
+
+REJECT_COLUMNS = ['LineNumber', 'AccountID', 'Amount', 'Reason']
+
+# Accounts that accept direct deposits
+ELIGIBLE_TYPES = LEG_RULES['directDeposit']['accountTypes']
+
+
+class _Rejects:
+    """Writes rejected lines to the reject file as they are found."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._handle = None
+
+    def write(self, lines: np.ndarray, accounts: pd.Series, amounts: pd.Series, reason: str) -> None:
+        if not len(lines):
+            return
+        if self._handle is None:
+            self._handle = open(self.path, 'w', newline='')
+            self._handle.write(','.join(REJECT_COLUMNS) + '\n')
+        pd.DataFrame({'LineNumber': lines, 'AccountID': accounts.to_numpy(),
+                      'Amount': amounts.to_numpy(), 'Reason': reason}).to_csv(
+            self._handle, header=False, index=False, lineterminator='\n')
+        self.count += len(lines)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        elif os.path.exists(self.path):
+            # Do not leave a previous run's rejects behind
+            os.remove(self.path)
+
+
+def _scan(path: str, accounts: pd.DataFrame, rejects: _Rejects, chunk_size: int):
+    """
+    Streams the input file and returns (credits, lines_read) where credits is
+    a Series of total cents per accepted AccountID.
+    """
+    ids = pd.to_numeric(accounts['AccountID'], errors='coerce')
+    known = np.unique(ids.dropna().to_numpy(dtype=np.int64))
+    eligible = np.unique(ids[accounts['AccountType'].isin(ELIGIBLE_TYPES)].dropna().to_numpy(dtype=np.int64))
+
+    totals = {}
+    lines_read = 0
+    reader = pd.read_csv(path, usecols=['AccountID', 'Amount'], dtype=str,
+                         keep_default_na=False, skip_blank_lines=False, chunksize=chunk_size)
+    for chunk in reader:
+        # Line 1 is the header
+        line_numbers = chunk.index.to_numpy() + 2
+        lines_read += len(chunk)
+        rawAccounts = chunk['AccountID'].str.strip()
+        rawAmounts = chunk['Amount'].str.strip()
+
+        accountIDs = pd.to_numeric(rawAccounts, errors='coerce')
+        numeric = accountIDs.notna().to_numpy() & (accountIDs.fillna(0) % 1 == 0).to_numpy()
+        cents = to_cents(rawAmounts)
+
+        checks = [
+            (~numeric, "Malformed account ID"),
+            (cents == NA_CENTS, "Malformed amount"),
+            (cents <= 0, "Amount must be positive"),
+        ]
+        rejected = np.zeros(len(chunk), dtype=bool)
+        for failed, reason in checks:
+            failed = failed & ~rejected
+            rejects.write(line_numbers[failed], rawAccounts[failed], rawAmounts[failed], reason)
+            rejected |= failed
+
+        accountIDs = accountIDs.fillna(0).to_numpy(dtype=np.int64)
+        for failed, reason in [(~np.isin(accountIDs, known), "Account not found"),
+                               (~np.isin(accountIDs, eligible), "Account does not accept direct deposits")]:
+            failed = failed & ~rejected
+            rejects.write(line_numbers[failed], rawAccounts[failed], rawAmounts[failed], reason)
+            rejected |= failed
+
+        accepted = ~rejected
+        if accepted.any():
+            sums = pd.Series(cents[accepted]).groupby(accountIDs[accepted]).sum()
+            for accID, total in sums.items():
+                totals[accID] = totals.get(accID, 0) + int(total)
+
+    return pd.Series(totals, dtype=np.int64), lines_read
+
+
+def _journal_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def import_deposits(path: str, rejects_path: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    transDate=None, accounts_path: str = None, journal_path: str = None) -> dict:
+    """
+    Imports a direct-deposit file.
+
+    Parameters
+    ----------
+    path : str
+        The input CSV file with AccountID and Amount columns.
+    rejects_path : str, optional
+        Where rejected lines are written (`<path>.rejects.csv` by default).
+        The file is only created when a line is rejected.
+    chunk_size : int
+        Input lines parsed at a time.
+    transDate : date, optional
+        Date recorded on the journal rows (today by default).
+    accounts_path, journal_path : str, optional
+        The accounts and transactions tables (csvFiles/ by default).
+
+    Returns
+    -------
+    dict
+        {"status": "success", "message": "...", "lines": n, "accepted": n,
+         "rejected": n, "accounts": n, "total": "0.00", "seconds": s,
+         "lines_per_second": r} or {"status": "error", "message": "..."}.
+    """
+    if not os.path.exists(path):
+        return {"status": "error", "message": f"{path} not found."}
+    rejects_path = rejects_path or f'{path}.rejects.csv'
+    accounts_path = accounts_path or table_path('accounts.csv')
+    journal_path = journal_path or table_path('transactions.csv')
+    start = time.perf_counter()
+
+    with table_lock(accounts_path, journal_path):
+        accInfo = read_table(accounts_path)
+        rejects = _Rejects(rejects_path)
+        try:
+            credits, lines_read = _scan(path, accInfo, rejects, max(1, chunk_size))
+        except ValueError as e:
+            rejects.close()
+            return {"status": "error", "message": f"Cannot read {os.path.basename(path)}: {e}"}
+        rejects.close()
+
+        if len(credits):
+            _commit(accInfo, credits, accounts_path, journal_path, transDate or date.today())
+
+    seconds = time.perf_counter() - start
+    accepted = lines_read - rejects.count
+    total = format_cents(np.array([credits.sum() if len(credits) else 0]))[0]
+    return {
+        "status": "success",
+        "message": f"Imported {accepted} of {lines_read} lines into {len(credits)} accounts "
+                   f"({rejects.count} rejected).",
+        "lines": lines_read,
+        "accepted": accepted,
+        "rejected": rejects.count,
+        "accounts": len(credits),
+        "total": total,
+        "seconds": round(seconds, 3),
+        "lines_per_second": int(lines_read / seconds) if seconds else 0
+    }
+
+
+def _commit(accInfo: pd.DataFrame, credits: pd.Series, accounts_path: str, journal_path: str, transDate) -> None:
+    """Adds the credits to the balances and journals them; all or nothing."""
+    ids = pd.to_numeric(accInfo['AccountID'], errors='coerce').fillna(-1).astype(np.int64)
+    # Only the first row of a duplicated AccountID is credited, as elsewhere
+    first = ~ids.duplicated()
+    added = ids.map(credits).where(first, 0).fillna(0).to_numpy(dtype=np.int64)
+
+    previous = accInfo['CurrBal'].copy()
+    balances = to_cents(previous)
+    credited = added != 0
+    balances[credited] = np.where(balances[credited] == NA_CENTS, 0, balances[credited]) + added[credited]
+    accInfo['CurrBal'] = format_cents(balances)
+    write_table(accInfo, accounts_path)
+
+    journal = TransactionJournal(journal_path) if journal_path != table_path('transactions.csv') else None
+    size = _journal_size(journal_path)
+    amounts = format_cents(credits.to_numpy())
+    transactionIDs = reserve_ids('transaction', len(credits))
+    try:
+        for offset in range(0, len(credits), JOURNAL_BATCH_SIZE):
+            rows = [{'TransactionID': transactionIDs[i], 'AccountID': int(credits.index[i]),
+                     'TransactionType': 'Direct Deposit', 'Amount': amounts[i], 'TransDate': transDate}
+                    for i in range(offset, min(offset + JOURNAL_BATCH_SIZE, len(credits)))]
+            if journal is not None:
+                journal.append(rows)
+            else:
+                append_transactions(rows)
+    except Exception:
+        accInfo['CurrBal'] = previous
+        write_table(accInfo, accounts_path)
+        if journal is not None or STORAGE_BACKEND == 'csv':
+            if _journal_size(journal_path) > size:
+                os.truncate(journal_path, size)
+            invalidate_table(journal_path)
+        raise
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m scripts.achImport', description='Import a direct-deposit file.')
+    parser.add_argument('file')
+    parser.add_argument('--rejects', help='reject file (default: <file>.rejects.csv)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='input lines parsed at a time')
+    args = parser.parse_args(argv)
+
+    result = import_deposits(args.file, args.rejects, args.chunk_size)
+    print(result["message"])
+    if result["status"] == "success":
+        print(f"Credited {result['total']} in {result['seconds']}s ({result['lines_per_second']} lines/s).")
+    return 0 if result["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,15 +2,13 @@
 # archive.py
 
 import pandas as pd
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
+from scripts.money import to_cents, format_money_columns
+from scripts.billIndex import write_bills
 import os
-from decimal import Decimal
-
-# Define file paths
-billsPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '../csvFiles/bills.csv'))
-loansPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '../csvFiles/accounts.csv'))  # Mortgage loans are stored here
-archivedBillsPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '../csvFiles/archivedBills.csv'))
-archivedLoansPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '../csvFiles/archivedLoans.csv'))
 
+@locks_tables('accounts.csv', 'archivedBills.csv', 'archivedLoans.csv', 'bills.csv')
 def archive(recordType: str, recordID: int, remove_record: bool = False) -> dict:
     """
     Archives a bill or a fully paid home mortgage loan.
@@ -32,11 +30,17 @@ def archive(recordType: str, recordID: int, remove_record: bool = False) -> dict
     dict
         A dictionary indicating success or failure.
     """
+    # Define file paths
+    billsPath = table_path('bills.csv')
+    loansPath = table_path('accounts.csv')  # Mortgage loans are stored here
+    archivedBillsPath = table_path('archivedBills.csv')
+    archivedLoansPath = table_path('archivedLoans.csv')
+
     if recordType == "bill":
         if not os.path.exists(billsPath):
             return {"status": "error", "message": "No bills to archive."}
 
-        billsData = pd.read_csv(billsPath)
+        billsData = read_table(billsPath)
 
         # Locate the bill record
         billRecord = billsData[billsData['BillID'] == recordID]
@@ -44,30 +48,30 @@ def archive(recordType: str, recordID: int, remove_record: bool = False) -> dict
             return {"status": "error", "message": f"Bill with ID {recordID} not found."}
 
         # Archive: append a copy to archivedBills.csv
-        archivedBillsData = pd.read_csv(archivedBillsPath) if os.path.exists(archivedBillsPath) else pd.DataFrame()
+        archivedBillsData = read_table(archivedBillsPath) if os.path.exists(archivedBillsPath) else pd.DataFrame()
         if archivedBillsData.empty:
             archivedBillsData = billRecord.copy()
         else:
             archivedBillsData = pd.concat([archivedBillsData, billRecord], ignore_index=True)
         
         # Ensure 'Amount' column is properly formatted
-        archivedBillsData['Amount'] = archivedBillsData['Amount'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
+        format_money_columns(archivedBillsData, 'Amount')
         
         # Update the status to 'Archived' before saving
         idx = archivedBillsData.index[-1]  # Get the index of the last row (the one we just added)
         archivedBillsData.at[idx, 'Status'] = 'Archived'
         
-        archivedBillsData.to_csv(archivedBillsPath, index=False)
+        write_table(archivedBillsData, archivedBillsPath)
 
         # If removal is requested (i.e. fully paid), remove the active record.
         if remove_record:
             billsData = billsData[billsData['BillID'] != recordID]
-            billsData['Amount'] = billsData['Amount'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-            billsData.to_csv(billsPath, index=False)
+            format_money_columns(billsData, 'Amount')
+            write_bills(billsData, billsPath)
         else:
             # If not removing, update the status to indicate it's been archived
             billsData.loc[billsData['BillID'] == recordID, 'Status'] = 'Archived'
-            billsData.to_csv(billsPath, index=False)
+            write_bills(billsData, billsPath)
             
         return {"status": "success", "message": f"Bill with ID {recordID} archived successfully."}
 
@@ -75,30 +79,27 @@ def archive(recordType: str, recordID: int, remove_record: bool = False) -> dict
         if not os.path.exists(loansPath):
             return {"status": "error", "message": "No mortgage loans to archive."}
 
-        loansData = pd.read_csv(loansPath)
-        loansData['CurrBal'] = loansData['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
+        loansData = read_table(loansPath)
         loanRecord = loansData[
             (loansData['AccountID'] == recordID) & 
             (loansData['AccountType'] == 'Mortgage Loan') & 
-            (loansData['CurrBal'] == Decimal('0.00'))
+            (to_cents(loansData['CurrBal']) == 0)
         ]
         if loanRecord.empty:
             return {"status": "error", "message": f"Mortgage Loan with ID {recordID} is not fully paid off or does not exist."}
 
-        archivedLoansData = pd.read_csv(archivedLoansPath) if os.path.exists(archivedLoansPath) else pd.DataFrame()
+        archivedLoansData = read_table(archivedLoansPath) if os.path.exists(archivedLoansPath) else pd.DataFrame()
         if archivedLoansData.empty:
             archivedLoansData = loanRecord.copy()
         else:
             archivedLoansData = pd.concat([archivedLoansData, loanRecord], ignore_index=True)
-        archivedLoansData['CurrBal'] = archivedLoansData['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        archivedLoansData['CreditLimit'] = archivedLoansData['CreditLimit'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        archivedLoansData.to_csv(archivedLoansPath, index=False)
+        format_money_columns(archivedLoansData, 'CurrBal', 'CreditLimit')
+        write_table(archivedLoansData, archivedLoansPath)
 
         # For loans, if we remove the record when fully paid.
         loansData = loansData[loansData['AccountID'] != recordID]
-        loansData['CurrBal'] = loansData['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        loansData['CreditLimit'] = loansData['CreditLimit'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        loansData.to_csv(loansPath, index=False)
+        format_money_columns(loansData, 'CurrBal', 'CreditLimit')
+        write_table(loansData, loansPath)
 
         return {"status": "success", "message": f"Mortgage Loan with ID {recordID} archived successfully."}
     else:
@@ -119,10 +120,11 @@ def viewArchivedBills(customerID: int) -> list:
     list
         A list of dictionaries representing each archived bill.
     """
+    archivedBillsPath = table_path('archivedBills.csv')
     if not os.path.exists(archivedBillsPath):
         return [{"status": "error", "message": "No archived bills found."}]
 
-    archivedBillsData = pd.read_csv(archivedBillsPath)
+    archivedBillsData = read_table(archivedBillsPath)
     customerBills = archivedBillsData[archivedBillsData['CustomerID'] == customerID].to_dict(orient='records')
 
     return customerBills if customerBills else [{"status": "error", "message": "No archived bills found for this customer."}]
@@ -142,10 +144,11 @@ def viewArchivedLoans(customerID: int) -> list:
     list
         A list of dictionaries representing each archived mortgage loan.
     """
+    archivedLoansPath = table_path('archivedLoans.csv')
     if not os.path.exists(archivedLoansPath):
         return [{"status": "error", "message": "No archived mortgage loans found."}]
 
-    archivedLoansData = pd.read_csv(archivedLoansPath)
+    archivedLoansData = read_table(archivedLoansPath)
     customerLoans = archivedLoansData[archivedLoansData['CustomerID'] == customerID].to_dict(orient='records')
 
     return customerLoans if customerLoans else [{"status": "error", "message": "No archived mortgage loans found for this customer."}]
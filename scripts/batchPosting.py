@@ -0,0 +1,119 @@
+# batchPosting.py
+"""
+Posts a list of deposits, withdrawals and transfers in one commit.
+
+Used by the teller batch endpoint and by bulk feeds such as payroll, which
+would otherwise rewrite accounts.csv once per item.
+"""
+from decimal import Decimal, InvalidOperation
+from scripts.ledger import post_many
+from scripts.fundTransfer import transfer_legs, transfer_outcome
+
+# Largest batch accepted in one call
+MAX_BATCH_ITEMS = 5000
+
+ITEM_TYPES = ('deposit', 'directDeposit', 'withdrawal', 'transfer')
+
+def _parse_amount(value):
+    """Returns a positive Decimal amount, or None if the value is not one."""
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+    if not amount.is_finite() or amount <= Decimal('0.00'):
+        return None
+    return amount
+
+def _parse_account(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+def _legs(item: dict):
+    """Returns (legs, None) for a well-formed item, or (None, error message)."""
+    if not isinstance(item, dict):
+        return None, "Item must be an object."
+    itemType = item.get('type')
+    if itemType not in ITEM_TYPES:
+        return None, f"Unknown item type '{itemType}'. Use one of {', '.join(ITEM_TYPES)}."
+    amount = _parse_amount(item.get('amount'))
+    if amount is None:
+        return None, "Amount must be a positive number."
+
+    if itemType == 'transfer':
+        srcAccID = _parse_account(item.get('sourceAccountId'))
+        destAccID = _parse_account(item.get('destinationAccountId'))
+        if srcAccID is None or destAccID is None:
+            return None, "Source and destination account IDs are required."
+        if srcAccID == destAccID:
+            return None, "Source and destination accounts cannot be the same."
+        return transfer_legs(srcAccID, destAccID, amount), None
+
+    accID = _parse_account(item.get('accountId'))
+    if accID is None:
+        return None, "Account ID is required."
+    return [(itemType, accID, amount)], None
+
+def _item_result(item: dict, legs: list, result: dict) -> dict:
+    """Returns one item's result in the shape of the matching single-item function."""
+    if item['type'] == 'transfer':
+        (_, srcAccID, amount), (_, destAccID, _) = legs
+        return transfer_outcome(result, srcAccID, destAccID, amount)
+    _, accID, amount = legs[0]
+    if result["status"] != "success":
+        return {"status": "error", "message": result["message"]}
+    if item['type'] == 'withdrawal':
+        return {"status": "success", "message": f"Withdrew {amount} from account {accID}."}
+    return {"status": "success", "message": f"{amount} deposited to account {accID}."}
+
+def post_batch(items, transDate=None) -> dict:
+    """
+    Validates a list of postings against one snapshot of accounts.csv,
+    applies them in order and commits the accepted ones in one write.
+
+    Parameters
+    ----------
+    items : list of dict
+        Each item has a 'type' ('deposit', 'directDeposit', 'withdrawal' or
+        'transfer') and an 'amount'. Transfers name 'sourceAccountId' and
+        'destinationAccountId'; other items name 'accountId'.
+    transDate : date, optional
+        Date recorded on the journal rows (today by default).
+
+    Returns
+    -------
+    dict
+        - {"status": "success", "message": "Posted {n} of {n} items.", "results": [...]}
+          if every item was posted.
+        - {"status": "error", "message": "Posted {k} of {n} items.", "results": [...]}
+          if any item was rejected. Rejected items change nothing; the others
+          are still posted.
+        - {"status": "error", "message": "..."} if the batch itself is invalid.
+
+        Each entry of "results" is the {"status", "message"} dict that
+        directDeposit, deposit, withdraw or transferFunds would have returned
+        for that item.
+    """
+    if not isinstance(items, (list, tuple)) or not items:
+        return {"status": "error", "message": "A batch must be a non-empty list of items."}
+    if len(items) > MAX_BATCH_ITEMS:
+        return {"status": "error", "message": f"A batch cannot have more than {MAX_BATCH_ITEMS} items."}
+
+    results = [None] * len(items)
+    parsed = []
+    for position, item in enumerate(items):
+        legs, error = _legs(item)
+        if error:
+            results[position] = {"status": "error", "message": error}
+        else:
+            parsed.append((position, legs))
+
+    outcomes = post_many([legs for _, legs in parsed], transDate) if parsed else []
+    for (position, legs), outcome in zip(parsed, outcomes):
+        results[position] = _item_result(items[position], legs, outcome)
+
+    posted = sum(result["status"] == "success" for result in results)
+    return {"status": "success" if posted == len(items) else "error",
+            "message": f"Posted {posted} of {len(items)} items.",
+            "results": results}
@@ -0,0 +1,100 @@
+# batchThrottle.py
+"""
+Cooperative throttling of the nightly batch.
+
+A throttled nightly run (see run_nightly_batch) works one slice (partition)
+at a time and holds the table locks only while it reloads, processes and
+commits that slice. Before each slice it calls BatchThrottle.wait(), which
+reads the load the web workers publish (scripts/requestStats.py) and backs
+off while their p95 latency is above BATCH_TARGET_P95_MS or more than
+BATCH_MAX_IN_FLIGHT requests are in flight. The pause doubles from
+BATCH_BACKOFF_MIN up to BATCH_BACKOFF_MAX seconds while the web app stays
+busy, and the slice goes ahead anyway after BATCH_MAX_WAIT seconds so a
+busy day cannot stop the batch for good. Every decision is logged.
+
+Set NIGHTLY_THROTTLE=1 to throttle the scheduled runs.
+"""
+import os
+import time
+import logging
+from scripts.requestStats import read_request_load
+
+# Throttle the scheduled nightly runs
+NIGHTLY_THROTTLE = os.environ.get('NIGHTLY_THROTTLE', '0') == '1'
+
+# Web app targets: back off while either is exceeded
+TARGET_P95_MS = float(os.environ.get('BATCH_TARGET_P95_MS', '250'))
+MAX_IN_FLIGHT = int(os.environ.get('BATCH_MAX_IN_FLIGHT', '4'))
+
+# Back-off bounds and the longest a slice waits, in seconds
+MIN_BACKOFF = float(os.environ.get('BATCH_BACKOFF_MIN', '0.5'))
+MAX_BACKOFF = float(os.environ.get('BATCH_BACKOFF_MAX', '30'))
+MAX_WAIT = float(os.environ.get('BATCH_MAX_WAIT', '300'))
+
+
+class BatchThrottle:
+    """
+    Decides when the next batch slice may take the table locks.
+
+    Parameters
+    ----------
+    target_p95_ms, max_in_flight : optional
+        The web app's targets (BATCH_TARGET_P95_MS and BATCH_MAX_IN_FLIGHT by default).
+    min_backoff, max_backoff, max_wait : float, optional
+        Back-off bounds and the longest wait per slice, in seconds.
+    load : callable, optional
+        Returns {"in_flight", "p95_ms", "workers"} (read_request_load by default).
+    sleep : callable, optional
+        Waits a number of seconds (time.sleep by default).
+    """
+
+    def __init__(self, target_p95_ms: float = None, max_in_flight: int = None, min_backoff: float = None,
+                 max_backoff: float = None, max_wait: float = None, load=read_request_load, sleep=time.sleep):
+        self.target_p95_ms = TARGET_P95_MS if target_p95_ms is None else target_p95_ms
+        self.max_in_flight = MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        self.min_backoff = MIN_BACKOFF if min_backoff is None else min_backoff
+        self.max_backoff = MAX_BACKOFF if max_backoff is None else max_backoff
+        self.max_wait = MAX_WAIT if max_wait is None else max_wait
+        self.load = load
+        self.sleep = sleep
+        self.slices = 0
+        self.backoffs = 0
+        self.waited = 0.0
+
+    def _busy(self, load: dict) -> str:
+        """Says why the web app is too busy for a slice, or returns '' if it is not."""
+        if load["p95_ms"] > self.target_p95_ms:
+            return f"p95 {load['p95_ms']}ms > {self.target_p95_ms:g}ms"
+        if load["in_flight"] > self.max_in_flight:
+            return f"{load['in_flight']} requests in flight > {self.max_in_flight}"
+        return ''
+
+    def wait(self, label: str = 'slice') -> float:
+        """
+        Blocks until the web app is within its targets, or for at most
+        max_wait seconds. Returns the seconds waited.
+        """
+        self.slices += 1
+        waited, backoff = 0.0, self.min_backoff
+        while True:
+            load = self.load()
+            reason = self._busy(load)
+            if not reason:
+                logging.info(f"Batch throttle: {label} proceeds (p95 {load['p95_ms']}ms, "
+                             f"{load['in_flight']} in flight, waited {waited:.1f}s).")
+                break
+            if waited >= self.max_wait:
+                logging.warning(f"Batch throttle: {label} proceeds after waiting {waited:.1f}s although {reason}.")
+                break
+            pause = min(backoff, self.max_wait - waited)
+            logging.info(f"Batch throttle: {label} backs off {pause:.1f}s ({reason}).")
+            self.sleep(pause)
+            self.backoffs += 1
+            waited += pause
+            backoff = min(backoff * 2, self.max_backoff)
+        self.waited += waited
+        return waited
+
+    def summary(self) -> dict:
+        """Slices let through, back-offs and total seconds waited so far."""
+        return {"slices": self.slices, "backoffs": self.backoffs, "waited_seconds": round(self.waited, 3)}
@@ -0,0 +1,170 @@
+# batchWorker.py
+"""
+Batch worker: runs the jobs in the job queue (scripts/jobQueue.py).
+
+The scheduler and the admin "run now" API only queue jobs; this worker runs
+them one at a time, in a process of its own, so the CPU-heavy nightly stages
+never compete with request handling for a web worker's GIL. gunicorn starts
+one next to the web workers and keeps it running (see gunicorn.conf.py and
+scripts/workerProcess.py); it can also be run on its own from the root dir:
+
+    python -m scripts.batchWorker [--once]
+
+--once runs the queued jobs and exits instead of waiting for more.
+
+Jobs, by kind:
+    nightly_batch  - run_nightly_batch(run_date, stages)
+    catch_up       - catch_up_missed_runs(today)
+
+Dates are ISO strings and are fixed when the job is queued, so a nightly
+job that waits in the queue past midnight still processes its own day.
+"""
+import sys
+import time
+import signal
+import inspect
+import logging
+import threading
+from datetime import date
+from scripts.jobQueue import JobQueue, worker_name
+from scripts.repository import get_repository
+from scripts.nightlyBatch import catch_up_missed_runs, run_nightly_batch
+
+# Seconds between looks at an empty queue
+POLL_INTERVAL = 1.0
+
+
+def _nightly_batch(run_date: str = None, stages: list = None) -> dict:
+    return run_nightly_batch(date.fromisoformat(run_date) if run_date else None, stages=stages)
+
+
+def _catch_up(today: str = None) -> dict:
+    return catch_up_missed_runs(date.fromisoformat(today) if today else None)
+
+
+# Job kind -> function called with the job's params, returning {"status", "message", ...}
+JOBS = {
+    'nightly_batch': _nightly_batch,
+    'catch_up': _catch_up,
+}
+
+# Job params holding an ISO date, which may not be after today
+DATE_PARAMS = ('run_date', 'today')
+
+
+def check_job(kind: str, params: dict = None, jobs: dict = None) -> None:
+    """
+    Raises ValueError unless `kind` is a known job, `params` are arguments it
+    takes and its DATE_PARAMS are ISO dates no later than today.
+    """
+    jobs = JOBS if jobs is None else jobs
+    if kind not in jobs:
+        raise ValueError(f"Unknown job '{kind}'. Known jobs: {', '.join(sorted(jobs))}.")
+    unknown = set(params or {}) - set(inspect.signature(jobs[kind]).parameters)
+    if unknown:
+        raise ValueError(f"Job '{kind}' does not take {', '.join(sorted(unknown))}.")
+    for name in DATE_PARAMS:
+        value = (params or {}).get(name)
+        if value is None:
+            continue
+        try:
+            day = date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a date as YYYY-MM-DD, not {value!r}.")
+        if day > date.today():
+            raise ValueError(f"{name} {day.isoformat()} is after today.")
+
+
+def log_batch_result(result: dict) -> None:
+    """Logs each stage's results and timings of one nightly run."""
+    for stage in result.get("stages", []):
+        for line in stage["results"]:
+            log_func = logging.info if line.get("status") == "success" else logging.warning
+            log_func(f"{stage['stage']} - {line.get('status', '').upper()}: {line.get('message')}")
+        logging.info(f"Nightly stage {stage['stage']} {stage['status']} in {stage['seconds']}s.")
+    if result["status"] == "info":
+        logging.info(result["message"])
+    elif result["status"] == "success" and "partitions" in result:
+        logging.info(f"{result['message']} ({result['partitions']} partition(s) on {result['workers']} worker(s): "
+                     f"load {result['load_seconds']}s, stages {result['compute_seconds']}s, commit {result['commit_seconds']}s)")
+    elif result["status"] == "success":
+        logging.info(result["message"])
+    else:
+        logging.error(result["message"])
+
+
+def run_job(queue: JobQueue, job: dict, jobs: dict = None) -> dict:
+    """
+    Runs one claimed job and records its outcome and duration in the queue.
+
+    Returns
+    -------
+    dict
+        The job's result: {"status": "success" | "info" | "error", "message": "...", ...}
+    """
+    jobs = JOBS if jobs is None else jobs
+    start = time.perf_counter()
+    try:
+        check_job(job['Kind'], job['Params'], jobs)
+        result = jobs[job['Kind']](**job['Params'])
+    except Exception as e:
+        result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+    seconds = time.perf_counter() - start
+
+    for run in result.get("runs", [result]):
+        log_batch_result(run)
+    if "runs" in result:
+        log_batch_result({"status": result["status"], "message": result["message"]})
+    queue.finish(job['JobID'], result["status"] != "error", result["message"], seconds)
+    logging.info(f"Job {job['JobID']} ({job['Kind']}) {result['status']} in {seconds:.3f}s.")
+    return result
+
+
+def run_worker(queue: JobQueue = None, once: bool = False, stop: threading.Event = None,
+               poll_interval: float = POLL_INTERVAL, jobs: dict = None) -> int:
+    """
+    Claims and runs queued jobs until `stop` is set, or until the queue is
+    empty if `once` is True. Returns the number of jobs run.
+    """
+    queue = queue or JobQueue()
+    stop = stop or threading.Event()
+    worker = worker_name()
+
+    requeued = queue.requeue_abandoned()
+    if requeued:
+        logging.warning(f"Queued again job(s) {requeued} left running by a worker that exited.")
+    # Finish a nightly commit interrupted by a crash before running anything
+    get_repository().recover()
+
+    count = 0
+    while not stop.is_set():
+        job = queue.claim(worker)
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(queue, job, jobs)
+        count += 1
+    return count
+
+
+def start_worker_thread(queue: JobQueue = None) -> threading.Thread:
+    """
+    Runs the worker on a daemon thread of this process. For the development
+    server (run.py) only: in production the worker is a process of its own.
+    """
+    thread = threading.Thread(target=run_worker, kwargs={"queue": queue}, name='batch-worker', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    stopping = threading.Event()
+    # Let the running job finish on SIGTERM (gunicorn shutting down) or Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    logging.info("Batch worker %s started.", worker_name())
+    count = run_worker(once='--once' in sys.argv, stop=stopping)
+    logging.info("Batch worker stopped after %d job(s).", count)
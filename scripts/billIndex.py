@@ -0,0 +1,426 @@
+# billIndex.py
+"""
+Due-date index for bills.csv.
+
+The sidecar file bills.csv.idx holds one record per row of bills.csv: (due
+day, status bit, BillID, byte offset, byte length). Records are sorted by due
+date and then by position, so each due date is a run of BillIDs and "due on
+or before a day" is a prefix of the records. Every status has its own bit
+(STATUS_BITS), so a set of statuses is one mask over the status column.
+
+The nightly jobs use it to parse and write back only the bills they act on:
+read_slice() (or read_bills(), by BillID) reads the selected rows straight
+from their offsets, and splice() rewrites those rows and appends new bills,
+copying every other row through as raw bytes and patching the index to
+match. A writer that has to commit the bills with other tables builds the
+same file with spliced(), commits it, and then stamps the patched records
+with save_records().
+
+The index is stamped with the size and mtime of the bills.csv it describes.
+It is kept up to date in three ways:
+    - writers that rewrite the whole table go through write_bills(), which
+      rebuilds it
+    - splice(), append() and save_records() patch it as they write
+    - a reader that finds it stale, or a different bill at a recorded
+      offset, rebuilds it first
+
+A file whose rows cannot be told apart by line breaks (a quoted field with a
+newline in it) is marked unindexable, and bill_index() returns None for it,
+as it does for tables stored in SQLite; callers then read the whole table.
+
+Run `python -m scripts.billIndex rebuild` from the root dir to rebuild it by hand.
+"""
+import io
+import os
+import sys
+import mmap
+import numpy as np
+import pandas as pd
+from datetime import date
+from scripts.tableCache import reads_from_csv, write_table, invalidate_table, table_path
+from scripts.tableLock import table_lock
+
+# Columns the index is built from
+INDEXED_COLUMNS = ['BillID', 'DueDate', 'Status']
+
+# One bit per bill status; any other status gets OTHER_STATUS, and blank lines 0
+STATUS_BITS = {'Pending': 1, 'PartiallyPaid': 2, 'Late': 4, 'Past Due': 8, 'Paid': 16, 'Archived': 32}
+OTHER_STATUS = 128
+
+# Due day of a bill whose DueDate is not a YYYY-MM-DD date; sorts before every real date
+UNDATED = np.iinfo(np.int32).min
+
+# Sidecar header: signature of the indexed file and its record count (-1 if unindexable)
+HEADER = np.dtype([('mtime_ns', '<i8'), ('size', '<i8'), ('rows', '<i8')])
+
+# One record per line: due day (days since 1970-01-01), status bit, BillID, offset, length
+RECORD = np.dtype([('due', '<i4'), ('status', 'u1'), ('bill', '<i8'), ('offset', '<i8'), ('length', '<i8')])
+
+
+def status_mask(statuses) -> int:
+    """Returns the bitmap matching any of `statuses`."""
+    mask = 0
+    for status in statuses:
+        mask |= STATUS_BITS.get(status, OTHER_STATUS)
+    return mask
+
+
+def _day(value: date) -> int:
+    return (value - date(1970, 1, 1)).days
+
+
+def _line_ends(data) -> np.ndarray:
+    """Returns the position just past every newline in `data`."""
+    return np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n')) + 1
+
+
+def _describe(header: bytes, body: bytes):
+    """
+    Returns a record per line of `body` (rows of a file with this header),
+    with offsets relative to the start of `body`, or None if the lines are
+    not one row each.
+    """
+    ends = _line_ends(body)
+    if len(body) and (not len(ends) or ends[-1] != len(body)):
+        return None
+    records = np.zeros(len(ends), dtype=RECORD)
+    records['offset'] = np.concatenate([[0], ends[:-1]]) if len(ends) else ends
+    records['length'] = ends - records['offset']
+    first = np.frombuffer(body, dtype=np.uint8)[records['offset']] if len(ends) else ends
+    blank = (records['length'] == 1) | ((records['length'] == 2) & (first == ord('\r')))
+    records['due'] = UNDATED
+
+    fields = pd.read_csv(io.BytesIO(header + body), usecols=INDEXED_COLUMNS,
+                         dtype={'DueDate': str, 'Status': str}, keep_default_na=False)
+    if len(fields) != int((~blank).sum()):
+        return None
+    dueDates = pd.to_datetime(fields['DueDate'], format='%Y-%m-%d', errors='coerce')
+    days = dueDates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    rows = np.flatnonzero(~blank)
+    records['due'][rows] = np.where(dueDates.isna().to_numpy(), UNDATED, days)
+    # A bill book has a handful of distinct statuses, so each is looked up once
+    codes, statuses = pd.factorize(fields['Status'])
+    bits = np.array([STATUS_BITS.get(status.replace('\n', '').strip(), OTHER_STATUS) for status in statuses] + [OTHER_STATUS],
+                    dtype=np.uint8)
+    records['status'][rows] = bits[codes]
+    records['bill'][rows] = pd.to_numeric(fields['BillID'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+    return records
+
+
+def _sorted(records: np.ndarray) -> np.ndarray:
+    """Orders records in file order by due date, keeping file order within a day."""
+    return records[np.argsort(records['due'], kind='stable')]
+
+
+class BillIndex:
+    """
+    Sidecar due-date index for one bills file.
+
+    Parameters
+    ----------
+    csv_path : str, optional
+        The indexed CSV file (bills.csv by default). The index is stored next
+        to it with an .idx suffix.
+    """
+
+    def __init__(self, csv_path: str = None):
+        self.csv_path = csv_path or table_path('bills.csv')
+        self.idx_path = self.csv_path + '.idx'
+
+    # ------------------------------------------------------------------
+    # Sidecar file
+    # ------------------------------------------------------------------
+    def _signature(self) -> tuple:
+        st = os.stat(self.csv_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_sidecar(self):
+        """Returns (fresh, records); records is None if the file is unindexable."""
+        try:
+            with open(self.idx_path, 'rb') as f:
+                head = np.fromfile(f, dtype=HEADER, count=1)
+                records = np.fromfile(f, dtype=RECORD)
+        except OSError:
+            return False, None
+        if len(head) != 1 or (int(head['mtime_ns'][0]), int(head['size'][0])) != self._signature():
+            return False, None
+        rows = int(head['rows'][0])
+        if rows < 0:
+            return True, None
+        return len(records) == rows, records
+
+    def _save(self, records) -> None:
+        head = np.array([self._signature() + (-1 if records is None else len(records),)], dtype=HEADER)
+        tmpPath = f'{self.idx_path}.{os.getpid()}.tmp'
+        with open(tmpPath, 'wb') as f:
+            f.write(head.tobytes())
+            if records is not None:
+                f.write(records.tobytes())
+        os.replace(tmpPath, self.idx_path)
+
+    def _header(self) -> bytes:
+        with open(self.csv_path, 'rb') as f:
+            return f.readline()
+
+    @property
+    def columns(self) -> list:
+        """The column names in the header of the indexed file."""
+        return self._header().decode('utf-8').strip().split(',')
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def rebuild(self):
+        """
+        Re-creates the index from the whole file.
+
+        Returns
+        -------
+        int or None
+            The number of bills indexed, or None if the file is unindexable.
+        """
+        with table_lock(self.csv_path):
+            with open(self.csv_path, 'rb') as f:
+                data = f.read()
+            headerEnd = data.find(b'\n') + 1
+            records = None
+            if headerEnd and all(column in data[:headerEnd].decode('utf-8').strip().split(',')
+                                 for column in INDEXED_COLUMNS):
+                records = _describe(data[:headerEnd], data[headerEnd:])
+            if records is not None:
+                records['offset'] += headerEnd
+                records = _sorted(records)
+            self._save(records)
+        return None if records is None else int((records['status'] != 0).sum())
+
+    def records(self):
+        """Returns every record, rebuilding a stale index first, or None if the file is unindexable."""
+        with table_lock(self.csv_path):
+            fresh, records = self._read_sidecar()
+            if not fresh:
+                self.rebuild()
+                fresh, records = self._read_sidecar()
+        return records
+
+    def count(self) -> int:
+        """Returns the number of bills in the file (0 if it is unindexable)."""
+        records = self.records()
+        return 0 if records is None else int((records['status'] != 0).sum())
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def select(self, statuses=None, due_by: date = None, undated: bool = False):
+        """
+        Returns the records of the bills with one of `statuses` (any status if
+        None) due on or before `due_by` (any day if None), in file order.
+        With `undated`, bills whose DueDate is not a date are included whatever
+        their status. Returns None if the file is unindexable.
+        """
+        records = self.records()
+        if records is None:
+            return None
+        if due_by is not None:
+            # Undated bills sort first, so they are always inside this prefix
+            records = records[:np.searchsorted(records['due'], _day(due_by), side='right')]
+        statusBits = records['status']
+        keep = statusBits != 0 if statuses is None else (statusBits & status_mask(statuses)) != 0
+        if undated:
+            keep |= (records['due'] == UNDATED) & (statusBits != 0)
+        selected = records[keep]
+        return selected[np.argsort(selected['offset'], kind='stable')]
+
+    def _read_rows(self, selected: np.ndarray):
+        """Parses the rows of `selected`, or returns None if they are not the bills the index says."""
+        with open(self.csv_path, 'rb') as f:
+            header = f.readline()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                body = b''.join(data[offset:offset + length]
+                                for offset, length in zip(selected['offset'].tolist(), selected['length'].tolist()))
+        frame = pd.read_csv(io.BytesIO(header + body))
+        if len(frame) != len(selected):
+            return None
+        bills = pd.to_numeric(frame['BillID'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        return frame if np.array_equal(bills, selected['bill']) else None
+
+    def read_slice(self, statuses=None, due_by: date = None, undated: bool = False):
+        """
+        Reads the bills picked by select() (see there for the arguments).
+
+        Returns
+        -------
+        (ndarray, DataFrame) or None
+            The selected records and their rows, parsed as read_table would,
+            in file order; None if the file is unindexable.
+        """
+        return self._read_selected(lambda: self.select(statuses, due_by, undated))
+
+    def read_bills(self, bill_ids):
+        """
+        Reads the bills whose BillID is in `bill_ids`, as read_slice() does.
+
+        Returns
+        -------
+        (ndarray, DataFrame) or None
+            The selected records and their rows, in file order; None if the
+            file is unindexable.
+        """
+        wanted = pd.to_numeric(pd.Series(list(bill_ids), dtype=object), errors='coerce').dropna().astype(np.int64).to_numpy()
+
+        def select():
+            records = self.records()
+            if records is None:
+                return None
+            selected = records[(records['status'] != 0) & np.isin(records['bill'], wanted)]
+            return selected[np.argsort(selected['offset'], kind='stable')]
+        return self._read_selected(select)
+
+    def _read_selected(self, select):
+        with table_lock(self.csv_path):
+            for attempt in range(2):
+                selected = select()
+                if selected is None:
+                    return None
+                frame = self._read_rows(selected)
+                if frame is not None:
+                    return selected, frame
+                # A write that left the size and mtime unchanged; index it again
+                self.rebuild()
+        return None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def splice(self, selected: np.ndarray, frame: pd.DataFrame, new_rows: pd.DataFrame = None) -> None:
+        """
+        Writes back the rows read by read_slice() and appends `new_rows`.
+
+        Row i of `frame` replaces the row of record i of `selected`; every other
+        row is copied through byte for byte. Both frames must have the file's
+        columns, in order. The file is replaced atomically and the index is
+        patched rather than rebuilt. The caller must hold the bills table lock.
+        """
+        content, records = self.spliced(selected, frame, new_rows)
+        tmpPath = f'{self.csv_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmpPath, 'wb') as out:
+                out.write(content)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmpPath, self.csv_path)
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            invalidate_table(self.csv_path)
+        self.save_records(records)
+
+    def spliced(self, selected: np.ndarray, frame: pd.DataFrame, new_rows: pd.DataFrame = None):
+        """
+        Builds the file splice() would write, without writing it.
+
+        Returns
+        -------
+        (bytes, ndarray)
+            The new file and its index records, for save_records() once the
+            file is in place. The caller must hold the bills table lock
+            until then.
+        """
+        columns = self.columns
+        for rows in (frame, new_rows):
+            if rows is not None and list(rows.columns) != columns:
+                raise ValueError(f"Bill rows must have the columns of {os.path.basename(self.csv_path)}: {', '.join(columns)}")
+        fresh, records = self._read_sidecar()
+        if not fresh or records is None:
+            raise RuntimeError(f"{os.path.basename(self.csv_path)} changed since its bills were read.")
+
+        with open(self.csv_path, 'rb') as f:
+            data = f.read()
+        header = data[:data.find(b'\n') + 1]
+        terminator = '\r\n' if header.endswith(b'\r\n') else '\n'
+        order = np.argsort(selected['offset'], kind='stable')
+        selected = selected[order]
+        changedBody = frame.iloc[order].to_csv(index=False, header=False, lineterminator=terminator).encode('utf-8')
+        addedBody = b'' if new_rows is None or not len(new_rows) else \
+            new_rows.to_csv(index=False, header=False, lineterminator=terminator).encode('utf-8')
+        changed = _describe(header, changedBody)
+        added = _describe(header, addedBody)
+        if changed is None or added is None or len(changed) != len(selected):
+            raise ValueError("Bill rows must not contain line breaks.")
+
+        view = memoryview(data)
+        out = io.BytesIO()
+        position = 0
+        for i, (offset, length) in enumerate(zip(selected['offset'].tolist(), selected['length'].tolist())):
+            out.write(view[position:offset])
+            start = int(changed['offset'][i])
+            out.write(changedBody[start:start + int(changed['length'][i])])
+            position = offset + length
+        out.write(view[position:])
+        out.write(addedBody)
+
+        # Shift every row by the change in length of the rewritten rows before it
+        records = records[np.argsort(records['offset'], kind='stable')]
+        positions = np.searchsorted(records['offset'], selected['offset'])
+        shift = np.concatenate([[0], np.cumsum(changed['length'] - selected['length'])])
+        records['offset'] += shift[np.searchsorted(selected['offset'], records['offset'], side='left')]
+        changed['offset'] = records['offset'][positions]
+        records[positions] = changed
+        added['offset'] += len(data) + shift[-1]
+        return out.getvalue(), _sorted(np.concatenate([records, added]))
+
+    def save_records(self, records: np.ndarray) -> None:
+        """
+        Stamps `records`, from spliced(), as the index of the file now in
+        place. The caller must have held the bills table lock since spliced().
+        """
+        self._save(records)
+
+    def append(self, new_rows: pd.DataFrame) -> None:
+        """Appends bills with the file's columns, in order. The caller must hold the bills table lock."""
+        self.splice(np.empty(0, dtype=RECORD), pd.DataFrame(columns=self.columns), new_rows)
+
+
+def bill_index(csv_path: str = None):
+    """
+    Returns the due-date index of a bills file, or None when the file has to
+    be read whole (stored in SQLite, missing, or unindexable).
+    """
+    csv_path = csv_path or table_path('bills.csv')
+    if not reads_from_csv(csv_path) or not os.path.exists(csv_path):
+        return None
+    index = BillIndex(csv_path)
+    return index if index.records() is not None else None
+
+
+def write_bills(frame: pd.DataFrame, csv_path: str = None, **kwargs) -> None:
+    """Writes the whole bills table through write_table() and rebuilds its index."""
+    csv_path = csv_path or table_path('bills.csv')
+    with table_lock(csv_path):
+        write_table(frame, csv_path, **kwargs)
+        if reads_from_csv(csv_path) and os.path.exists(csv_path):
+            BillIndex(csv_path).rebuild()
+
+
+def rebuild_bill_index(csv_path: str = None) -> dict:
+    """
+    Rebuilds the due-date index of a bills file.
+
+    Returns
+    -------
+    dict
+        {"status": "success", "message": "..."} or an error dict.
+    """
+    index = BillIndex(csv_path)
+    if not os.path.exists(index.csv_path):
+        return {"status": "error", "message": f"{os.path.basename(index.csv_path)} not found."}
+    count = index.rebuild()
+    if count is None:
+        return {"status": "error", "message": f"{os.path.basename(index.csv_path)} cannot be indexed; it is read whole."}
+    return {"status": "success", "message": f"Indexed {count} bill(s) of {os.path.basename(index.csv_path)}."}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ['rebuild']:
+        print("Usage: python -m scripts.billIndex rebuild [path]")
+        sys.exit(1)
+    print(rebuild_bill_index(sys.argv[2] if len(sys.argv) > 2 else None)["message"])
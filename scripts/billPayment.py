@@ -1,39 +1,56 @@
 # Spring 2025 Authors: Sierra Yerges, Braden Doty, Bailee Segars
-from scripts.transactionLog import generate_transaction_ID
-from scripts.archive import archive
-import random
+from scripts.tableCache import table_path
+from scripts.tableLock import locks_tables
+from scripts.idAllocator import next_id, reserve_ids
+from scripts.money import NA_CENTS, to_cents, apply_rate, decimal_to_cents, format_cents, format_money_columns
+from scripts.transactionJournal import append_transaction_frame
+from scripts.billIndex import bill_index, write_bills
+from scripts.statementCycle import cohort_days, cohort_mask, cycle_index
+from scripts.billPaymentRules import RESCHEDULE_DAYS, pay_due_bills, next_bills
+import numpy as np
 import pandas as pd
+from scripts.tableCache import read_table, write_table
 from decimal import Decimal
 import os
 from datetime import date, timedelta
-from typing import Dict, List, Union, Optional
+from typing import Dict, List, Union
+
+# Bill statuses that still need paying
+UNPAID_STATUSES = ['Pending', 'PartiallyPaid']
+
+# Columns older bills files may lack, with the value a scheduled bill gets by default
+BILL_DEFAULTS = {'MinPayment': 0.0, 'BillType': 'Regular', 'IsRecurring': 0, 'Status': 'Pending'}
+
+# Bill statuses that keep a credit card from getting a new statement
+ACTIVE_BILL_STATUSES = ['Pending', 'PartiallyPaid', 'Late', 'Past Due']
+
+# Columns of a statement bill
+STATEMENT_COLUMNS = ['BillID', 'CustomerID', 'PayeeName', 'PayeeAddress', 'Amount', 'DueDate',
+                     'PaymentAccID', 'MinPayment', 'BillType', 'IsRecurring', 'Status']
+
+# Statement minimum payment: 2% of the balance, but at least $25
+STATEMENT_MIN_RATE = Decimal('0.02')
+STATEMENT_MIN_PAYMENT = Decimal('25.00')
+
+# Days from a statement to its due date
+STATEMENT_DUE_DAYS = 30
 
 # Standardized file path handling
 def get_file_path(relative_path: str) -> str:
     """Returns absolute path to a CSV file in the csvFiles directory"""
-    base_dir = os.path.dirname(os.path.realpath(__file__))
-    return os.path.abspath(os.path.join(base_dir, f'../csvFiles/{relative_path}'))
+    return table_path(relative_path)
 
 # Helper function to generate a unique bill ID
-def generate_unique_bill_id(bills_df: pd.DataFrame) -> int:
-    """Generate a unique bill ID that doesn't exist in the bills DataFrame"""
-    if bills_df.empty or 'BillID' not in bills_df.columns:
-        return 1
-    
-    max_attempts = 10
-    for _ in range(max_attempts):
-        bill_id = random.randint(1, 50000)
-        if bill_id not in bills_df['BillID'].values:
-            return bill_id
-    
-    # If we couldn't find a random unique ID, use max + 1
-    return bills_df['BillID'].max() + 1
+def generate_unique_bill_id(bills_df: pd.DataFrame = None) -> int:
+    """Generate a unique bill ID from the persistent 'bill' sequence"""
+    return next_id('bill')
 
 # Helper function to convert to Decimal with proper quantization
 def to_decimal(value) -> Decimal:
     """Convert a value to Decimal with 2 decimal places"""
     return Decimal(str(value)).quantize(Decimal('0.00'))
 
+@locks_tables('bills.csv')
 def scheduleBillPayment(
     customerID: int, 
     payeeName: str, 
@@ -78,10 +95,11 @@ def scheduleBillPayment(
           {"status": "error", "message": "Failure reason."}
     """
     billsPath = get_file_path('bills.csv')
+    index = bill_index(billsPath)
 
     # Load bills data
     try:
-        billsData = pd.read_csv(billsPath)
+        billsData = read_table(billsPath) if index is None else None
     except FileNotFoundError:
         billsData = pd.DataFrame(columns=[
             'BillID', 'CustomerID', 'PayeeName', 'PayeeAddress', 'Amount', 
@@ -115,8 +133,14 @@ def scheduleBillPayment(
         'Status': 'Pending'
     }
 
-    billsData = pd.concat([billsData, pd.DataFrame([newBillPayment])], ignore_index=True)
-    billsData.to_csv(billsPath, index=False)
+    if index is not None and set(newBillPayment) <= set(index.columns):
+        # Appended to the end of bills.csv, without reading or rewriting the other bills
+        index.append(pd.DataFrame([newBillPayment], columns=index.columns))
+    else:
+        if billsData is None:
+            billsData = read_table(billsPath)
+        billsData = pd.concat([billsData, pd.DataFrame([newBillPayment])], ignore_index=True)
+        write_bills(billsData, billsPath)
 
     return {"status": "success", "message": "Bill payment scheduled successfully."}
 
@@ -139,18 +163,30 @@ def viewScheduledBills(customerID: int) -> List[Dict]:
     if not os.path.exists(billsPath):
         return [{"status": "error", "message": "No scheduled bills found."}]
 
-    billsData = pd.read_csv(billsPath)
+    billsData = read_table(billsPath)
     customerBills = billsData[billsData['CustomerID'] == customerID].to_dict(orient='records')
 
     return customerBills if customerBills else [{"status": "error", "message": "No scheduled bills found for this customer."}]
 
+@locks_tables('accounts.csv', 'bills.csv', 'transactions.csv')
 def processScheduledBills() -> List[Dict[str, str]]:
     """
     Processes all scheduled bill payments due today or overdue.
     - Marks bills that are overdue as "Late"
-    - For recurring and mortgage bills: Makes payments from available accounts
+    - For bills due today: Makes payments from the payment account, or for
+      mortgage, credit card and recurring bills from the customer's checking
+      and savings accounts (see billPaymentRules.py)
+    - Schedules the next bill of a recurring bill once it is paid
     - Handles bill payment transactions
-    
+
+    Only unpaid bills due today or earlier are read, through the due-date
+    index (see billIndex.py), and only they are written back; the rest of
+    bills.csv is copied through unchanged. Due dates are parsed once and
+    bills are classified with masks. Funding accounts come from a CustomerID
+    map built once, and balances, bill statuses and new bills are written
+    back in one write per table, with the payment postings appended in one
+    write.
+
     Returns
     -------
     list
@@ -158,88 +194,135 @@ def processScheduledBills() -> List[Dict[str, str]]:
     """
     accountsPath = get_file_path('accounts.csv')
     billsPath = get_file_path('bills.csv')
-    transPath = get_file_path('transactions.csv')
-    archivedBillsPath = get_file_path('archivedBills.csv')
 
     if not os.path.exists(billsPath):
         return [{"status": "error", "message": "No scheduled bills to process."}]
 
-    accountsData = pd.read_csv(accountsPath)
-    billsData = pd.read_csv(billsPath)
-    transData = pd.read_csv(transPath) if os.path.exists(transPath) else pd.DataFrame()
-    archivedBillsData = pd.read_csv(archivedBillsPath) if os.path.exists(archivedBillsPath) else pd.DataFrame()
-
     today = date.today()
-    results = []
-
-    # Convert to decimal for precise calculations
-    accountsData['CurrBal'] = accountsData['CurrBal'].apply(to_decimal)
-    billsData['Amount'] = billsData['Amount'].apply(to_decimal)
-    billsData['MinPayment'] = billsData['MinPayment'].apply(to_decimal)
-
-    for index, bill in billsData.iterrows():
-        try:
-            # Parse the due date
-            dueDate = date.fromisoformat(bill['DueDate'])
-        except (ValueError, TypeError) as e:
-            results.append({
-                "status": "error",
-                "message": f"Invalid date format for bill {bill.get('BillID', 'unknown')}: {str(e)}"
-            })
-            continue
-
-        # 1) Purely overdue & still unpaid → mark Late and skip payment logic
-        if dueDate < today and bill['Status'] in ['Pending', 'PartiallyPaid']:
-            billsData.at[index, 'Status'] = 'Late'
-            results.append({
-                "status": "error",
-                "message": f"Bill {bill['BillID']} is overdue. Marked as Late."
-            })
-            continue
-
-        # 2) Bills due today & still unpaid = handle payments or auto-pay logic
-        if dueDate == today and bill['Status'] in ['Pending', 'PartiallyPaid']:
-            # Get bill details
-            bill_id = bill['BillID']
-            custID = bill['CustomerID']
-            payee_name = bill['PayeeName']
-            payee_address = bill['PayeeAddress']
-            payment_account_id = bill['PaymentAccID']
-            bill_amount = to_decimal(bill['Amount'])  # This is negative (money owed)
-            min_payment = to_decimal(bill['MinPayment'])  # This is negative (money owed)
-            bill_type = bill['BillType']
-            is_recurring = bill['IsRecurring']
-
-            # Locate payment account
-            accIndex = accountsData[accountsData['AccountID'] == payment_account_id].index
-            if accIndex.empty:
-                results.append({"status": "error", "message": f"Payment account {payment_account_id} not found."})
-                continue
-
-            account_row = accountsData.iloc[accIndex[0]]
-            balance = to_decimal(account_row['CurrBal'])
-
-            # Process by bill type
-            if bill_type == 'Mortgage' or is_recurring == 1:
-                payment_sources = accountsData[
-                    (accountsData['CustomerID'] == custID) &
-                    (accountsData['AccountType'].isin(['Checking', 'Savings']))
-                ]
-                
-    # Finalize data
-    billsData['Status'] = billsData['Status'].astype(str).str.replace('\n', '', regex=False).str.strip()
-    billsData.to_csv(billsPath, index=False, lineterminator='\n')
-    accountsData.to_csv(accountsPath, index=False)
-    if not transData.empty:
-        transData.to_csv(transPath, index=False)
+    accountsData = read_table(accountsPath)
+    # Only unpaid bills due by today, and bills without a valid due date, are read;
+    # files still missing a column are read whole so the column can be added
+    index = bill_index(billsPath)
+    sliced = None
+    if index is not None and all(column in index.columns for column in BILL_DEFAULTS):
+        sliced = index.read_slice(UNPAID_STATUSES, due_by=today, undated=True)
+    if sliced is not None:
+        selected, billsData = sliced
+    else:
+        billsData = read_table(billsPath)
+
+    results, nextBills, journalRows = process_bills_frame(accountsData, billsData, today)
+
+    # Write back the bills, then the balances, then the postings
+    if sliced is not None:
+        if len(billsData) or nextBills is not None:
+            index.splice(selected, billsData, nextBills)
+    else:
+        if nextBills is not None and len(nextBills):
+            billsData = pd.concat([billsData, nextBills], ignore_index=True)
+        write_bills(billsData, billsPath, lineterminator='\n')
+    write_table(accountsData, accountsPath)
+    if len(journalRows):
+        append_transaction_frame(journalRows)
 
     return results
 
+def process_bills_frame(accountsData: pd.DataFrame, billsData: pd.DataFrame, today: date, since: date = None):
+    """
+    Processes the bills in `billsData` as of `today`, updating both frames in place.
+
+    Bill statuses, due dates and money columns, any missing BILL_DEFAULTS
+    columns, and the CurrBal column of `accountsData` are rewritten; nothing
+    is read from or written to disk.
+
+    `since` is the last day that was already processed (the day before
+    `today` by default). When nights were missed, the bills that fell due
+    after it are handled as the nightly runs would have: paid in due-date
+    order and posted on their due date, and marked Late if they could not be
+    paid before `today`. A next recurring bill is due a month after the one
+    it follows, so spans longer than a month are processed a month at a time
+    with the next bills added in between (see nightlyBatch.py).
+
+    Returns
+    -------
+    (list of dict, DataFrame or None, DataFrame)
+        The result messages in bill order, the next bills of the paid
+        recurring bills, and the payment rows to append to transactions.csv.
+    """
+    for column, default in BILL_DEFAULTS.items():
+        if column not in billsData.columns:
+            billsData[column] = default
+
+    billIDs = billsData['BillID'].to_numpy()
+    results = {}
+
+    # Parse the due dates once
+    dueDates = pd.to_datetime(billsData['DueDate'], format='%Y-%m-%d', errors='coerce')
+    invalid = np.flatnonzero(dueDates.isna().to_numpy())
+    for b, value in zip(invalid, billsData['DueDate'].to_numpy()[invalid]):
+        results[b] = {"status": "error", "message": f"Invalid date format for bill {billIDs[b]}: {value!r}"}
+
+    billsData['Status'] = billsData['Status'].astype(str).str.replace('\n', '', regex=False).str.strip()
+    unpaid = billsData['Status'].isin(UNPAID_STATUSES).to_numpy()
+    todayStamp = pd.Timestamp(today)
+    sinceStamp = pd.Timestamp(since) if since is not None else todayStamp - pd.Timedelta(days=1)
+
+    # 1) Purely overdue & still unpaid → mark Late and skip payment logic
+    overdue = np.flatnonzero(unpaid & (dueDates <= sinceStamp).to_numpy())
+    billsData.loc[billsData.index[overdue], 'Status'] = 'Late'
+    for b in overdue:
+        results[b] = {"status": "error", "message": f"Bill {billIDs[b]} is overdue. Marked as Late."}
+
+    # 2) Bills due since the last run & still unpaid = handle payments or auto-pay logic, oldest first
+    due = np.flatnonzero(unpaid & ((dueDates > sinceStamp) & (dueDates <= todayStamp)).to_numpy())
+    due = due[np.argsort(dueDates.to_numpy()[due], kind='stable')]
+    balances = to_cents(accountsData['CurrBal'])
+    postings = []
+    if len(due):
+        payments = pay_due_bills(accountsData, billsData, due, balances, postings)
+        results.update(payments['results'])
+        billsData.loc[billsData.index[payments['paid']], 'Status'] = 'Paid'
+        rescheduled = payments['rescheduled']
+        billsData.loc[billsData.index[rescheduled], 'DueDate'] = \
+            (dueDates.iloc[rescheduled] + pd.Timedelta(days=RESCHEDULE_DAYS)).dt.strftime('%Y-%m-%d').to_numpy()
+        # Bills that could not be paid on a missed day would have gone Late the day after
+        lapsed = np.setdiff1d(due[(dueDates.to_numpy()[due] < todayStamp.to_datetime64())],
+                              payments['paid'] + rescheduled)
+        billsData.loc[billsData.index[lapsed], 'Status'] = 'Late'
+        for b in lapsed:
+            results[b] = {"status": "error", "message": f"{results[b]['message']} Marked as Late."}
+        nextBills = next_bills(billsData, dueDates, payments['recurring'])
+    else:
+        nextBills = None
+
+    # Finalize data
+    format_money_columns(billsData, 'Amount', 'MinPayment')
+    accountsData['CurrBal'] = format_cents(balances)
+    journalRows = pd.DataFrame(postings, columns=['AccountID', 'TransactionType', 'Amount', 'Bill'])
+    if postings:
+        ids = reserve_ids('transaction', len(postings))
+        journalRows.insert(0, 'TransactionID', np.arange(ids.start, ids.stop, dtype=np.int64))
+        journalRows['Amount'] = format_cents(journalRows['Amount'].to_numpy(dtype=np.int64))
+        journalRows['TransDate'] = dueDates.iloc[journalRows['Bill'].to_numpy()].dt.strftime('%Y-%m-%d').to_numpy()
+    journalRows = journalRows.drop(columns='Bill')
+
+    return [results[b] for b in sorted(results)], nextBills, journalRows
+
+@locks_tables('accounts.csv', 'bills.csv')
 def generate_monthly_credit_card_statements() -> Dict[str, str]:
     """
     Generates monthly statements for credit card accounts by creating bills
     for accounts open for at least 1 month without active bills
-    
+
+    Only the cards whose statement cycle day is today are billed (see
+    statementCycle.py), and with the cycle-day index only their rows of
+    accounts.csv are read. The accounts that already have an active bill are
+    collected once, the eligible accounts are picked with balance and date
+    masks, and all new statement bills are built as one frame and appended in
+    one write. With the due-date index (see billIndex.py) only the active
+    bills are read and the new bills are appended to bills.csv without
+    rewriting it.
+
     Returns
     -------
     dict
@@ -253,92 +336,89 @@ def generate_monthly_credit_card_statements() -> Dict[str, str]:
     if not os.path.exists(accounts_path) or not os.path.exists(bills_path):
         return {"status": "error", "message": "Required CSV file(s) not found."}
 
-    # Load data
-    accounts_df = pd.read_csv(accounts_path)
-    bills_df = pd.read_csv(bills_path)
-
-
-    accounts_df['CurrBal'] = accounts_df['CurrBal'].apply(to_decimal)
-    bills_df['Amount'] = bills_df['Amount'].apply(to_decimal)
-    bills_df['MinPayment'] = bills_df['MinPayment'].apply(to_decimal)
-    
-    # Convert DueDate to datetime.date objects
-    if 'DueDate' in bills_df.columns and not bills_df.empty:
-        bills_df['DueDate'] = pd.to_datetime(bills_df['DueDate'], errors='coerce').dt.date
-    
-    # Set time references
+    # Load data; with the indexes only today's cycle cohort and the active bills are read
     today = date.today()
-    one_month_ago = today - timedelta(days=30)
-    
-    # Find all credit card accounts
-    credit_card_accounts = accounts_df[accounts_df['AccountType'] == 'Credit Card']
-    
-    # Create new bills for credit card accounts without active bills
-    bills_created = 0
-    
-    for _, account in credit_card_accounts.iterrows():
-        account_id = account['AccountID']
-        customer_id = account['CustomerID']
-        current_balance = to_decimal(account['CurrBal'])
-        
-        # Credit card accounts have negative balances when money is owed
-        if current_balance >= Decimal('0.00'):
-            continue
-        
-        # Check account opening date
-        if 'DateOpened' in account and pd.notna(account['DateOpened']):
-            try:
-                date_opened = pd.to_datetime(account['DateOpened']).date()
-                
-                # Skip if account is less than a month old
-                if date_opened > one_month_ago:
-                    continue
-            except Exception:
-                # If there's any error parsing the date, skip this account
-                continue
-        else:
-            # Skip if DateOpened is missing
-            continue
-        
-        # Check for existing active bills
-        # Convert PaymentAccID to string for comparison if it's not already
-        if 'PaymentAccID' in bills_df.columns:
-            bills_df['PaymentAccID'] = bills_df['PaymentAccID'].astype(str)
-            account_bills = bills_df[
-                (bills_df['PaymentAccID'] == str(account_id)) & 
-                (bills_df['Status'].isin(['Pending', 'PartiallyPaid', 'Late', 'Past Due']))
-            ]
-            
-            # Only create a new bill if no active bills exist
-            if account_bills.empty:
-                # Calculate minimum payment (2% of balance or $25, whichever is greater)
-                # Note: current_balance is negative, so we need abs() to get the positive amount owed
-                min_payment = max(Decimal('25.00'), abs(current_balance) * Decimal('0.02')).quantize(Decimal('0.00'))
-                
-                # Create new bill - make sure amount is negative (money owed)
-                bill_id = generate_unique_bill_id(bills_df)
-                new_bill = {
-                    'BillID': bill_id,
-                    'CustomerID': customer_id,
-                    'PayeeName': "Evergreen Bank",
-                    'PayeeAddress': "Somewhere In The World",
-                    'Amount': float(current_balance),  # Already negative
-                    'DueDate': (today + timedelta(days=30)).isoformat(),
-                    'PaymentAccID': account_id,
-                    'MinPayment': float(min_payment),  # Negative
-                    'BillType': 'CreditCard',
-                    'IsRecurring': 1,
-                    'Status': 'Pending'
-                }
-                
-                # Append the new bill
-                bills_df = pd.concat([bills_df, pd.DataFrame([new_bill])], ignore_index=True)
-                bills_created += 1
-        
-    # Save bills data
-    bills_df.to_csv(bills_path, index=False)
-    
+    cycles = cycle_index(accounts_path)
+    accounts_df = cycles.read_cohort(cohort_days(today)) if cycles is not None else None
+    if accounts_df is None:
+        accounts_df = read_table(accounts_path)
+    index = bill_index(bills_path)
+    sliced = index.read_slice(ACTIVE_BILL_STATUSES) if index is not None else None
+    bills_df = sliced[1] if sliced is not None else read_table(bills_path)
+
+    new_bills = statement_bills_frame(accounts_df, bills_df, today)
+    bills_created = len(new_bills)
+
+    # Save bills data: new statements are appended to bills.csv when it is indexed
+    if sliced is not None and set(new_bills.columns) <= set(index.columns):
+        if bills_created:
+            index.append(new_bills.reindex(columns=index.columns))
+    else:
+        if sliced is not None:
+            bills_df = read_table(bills_path)
+        format_money_columns(bills_df, 'Amount', 'MinPayment')
+        if bills_created:
+            bills_df = pd.concat([bills_df, new_bills], ignore_index=True)
+        write_bills(bills_df, bills_path)
+
     return {
-        "status": "success", 
+        "status": "success",
         "message": f"Created {bills_created} new credit card bill(s)."
-    }
\ No newline at end of file
+    }
+
+def statement_bills_frame(accounts_df: pd.DataFrame, bills_df: pd.DataFrame, today: date,
+                          since: date = None) -> pd.DataFrame:
+    """
+    Returns the statement bills due for the credit card accounts in
+    `accounts_df` as of `today`, given the bills in `bills_df` (only its active
+    bills matter). Only cards whose cycle day falls after `since` (the day
+    before `today` by default) are billed. Nothing is read from or written to disk.
+    """
+    # Set time references
+    one_month_ago = pd.Timestamp(today - timedelta(days=30))
+
+    # Credit card accounts have negative balances when money is owed, and must be at least a month old
+    balances = to_cents(accounts_df['CurrBal'])
+    if 'DateOpened' in accounts_df.columns:
+        opened = pd.to_datetime(accounts_df['DateOpened'], errors='coerce', format='mixed').dt.normalize()
+        old_enough = (opened <= one_month_ago).to_numpy()
+    else:
+        old_enough = np.zeros(len(accounts_df), dtype=bool)
+    eligible = ((accounts_df['AccountType'] == 'Credit Card').to_numpy()
+                & (balances != NA_CENTS) & (balances < 0) & old_enough
+                & cohort_mask(accounts_df, today, since))
+
+    # Only accounts without an active bill get a new one
+    if 'PaymentAccID' in bills_df.columns:
+        active = bills_df['Status'].isin(ACTIVE_BILL_STATUSES).to_numpy()
+        billed = bills_df['PaymentAccID'].astype(str)[active]
+        account_keys = accounts_df['AccountID'].astype(str)
+        eligible &= ~account_keys.isin(billed).to_numpy()
+        # A duplicated account row is billed once, for its first eligible row
+        eligible[eligible] = ~account_keys[eligible].duplicated().to_numpy()
+    else:
+        eligible[:] = False
+
+    statement = np.flatnonzero(eligible)
+    if not len(statement):
+        return pd.DataFrame(columns=STATEMENT_COLUMNS)
+    owed = balances[statement]
+    # Calculate minimum payment (2% of balance or $25, whichever is greater)
+    min_payments = np.maximum(decimal_to_cents(STATEMENT_MIN_PAYMENT), apply_rate(np.abs(owed), STATEMENT_MIN_RATE))
+    ids = reserve_ids('bill', len(statement))
+    new_bills = pd.DataFrame({
+        'BillID': np.arange(ids.start, ids.stop, dtype=np.int64),
+        'CustomerID': accounts_df['CustomerID'].to_numpy()[statement],
+        'PayeeName': "Evergreen Bank",
+        'PayeeAddress': "Somewhere In The World",
+        'Amount': owed,  # Already negative
+        'DueDate': (today + timedelta(days=STATEMENT_DUE_DAYS)).isoformat(),
+        'PaymentAccID': accounts_df['AccountID'].to_numpy()[statement],
+        'MinPayment': min_payments,
+        'BillType': 'CreditCard',
+        'IsRecurring': 1,
+        'Status': 'Pending'
+    })
+    new_bills['Amount'] = format_cents(owed)
+    new_bills['MinPayment'] = format_cents(min_payments)
+    return new_bills
@@ -0,0 +1,162 @@
+# billPaymentRules.py
+"""
+The rules that move money when a scheduled bill falls due.
+
+processScheduledBills() and the nightly batch find the bills due and write
+the results back (see billPayment.py); the rules for paying them are here:
+
+    - mortgage and credit card bills (LOAN_BILL_TYPES) are paid into their
+      PaymentAccID account from the customer's checking or savings
+      (FUNDING_TYPES), the first with enough money, and both sides are
+      posted
+    - other bills are drawn from PaymentAccID; a recurring one falls back to
+      the customer's other checking and savings accounts
+    - a bill charged to a credit card that would pass its credit limit is
+      not paid: the card is charged OVER_LIMIT_FEE and the bill is moved
+      RESCHEDULE_DAYS later
+    - a paid recurring bill gets a next bill due one month later, except a
+      card bill (statements replace it) or a mortgage that is paid off
+
+Nothing here reads or writes a table.
+"""
+import numpy as np
+import pandas as pd
+from decimal import Decimal
+from typing import Dict, List
+from scripts.idAllocator import reserve_ids
+from scripts.money import NA_CENTS, to_cents, decimal_to_cents, format_cents
+
+# Accounts automatic payments are drawn from, in the order they are tried
+FUNDING_TYPES = ['Checking', 'Savings']
+
+# Bills that pay down the PaymentAccID account, and the posting recorded on it
+LOAN_BILL_TYPES = {'Mortgage': 'Loan Payment Received', 'CreditCard': 'Payment Received'}
+
+# Charged when paying a bill from a credit card would pass its credit limit
+OVER_LIMIT_FEE = Decimal('35.00')
+
+# Days a bill is moved back after an over-limit fee
+RESCHEDULE_DAYS = 30
+
+
+def funding_map(accountsData: pd.DataFrame) -> Dict[int, List[int]]:
+    """Maps each CustomerID to the positions of their checking and savings accounts, in file order."""
+    isFunding = accountsData['AccountType'].isin(FUNDING_TYPES).to_numpy()
+    positions = np.flatnonzero(isFunding)
+    customers = pd.to_numeric(accountsData['CustomerID'], errors='coerce').to_numpy()[positions]
+    known = ~np.isnan(customers)
+    positions, customers = positions[known], customers[known].astype(np.int64)
+    order = np.argsort(customers, kind='stable')
+    owners, starts = np.unique(customers[order], return_index=True)
+    return dict(zip(owners.tolist(), (group.tolist() for group in np.split(positions[order], starts[1:]))))
+
+
+def pay_due_bills(accountsData: pd.DataFrame, billsData: pd.DataFrame, due: np.ndarray,
+                  balances: np.ndarray, postings: list) -> dict:
+    """
+    Pays the bills at positions `due`, in bill order.
+
+    Balances (in cents) are updated in place and the postings are added to
+    `postings` as (AccountID, TransactionType, cents, bill position) tuples. Bills drawing on
+    the same account are paid one after another so each sees the balance the
+    previous one left, which is why this walks the due bills rather than the
+    whole table.
+
+    Returns
+    -------
+    dict
+        "results" maps bill positions to their result messages; "paid",
+        "rescheduled" and "recurring" are lists of bill positions that were
+        paid, are to be moved RESCHEDULE_DAYS later after an over-limit fee,
+        and need a next bill.
+    """
+    ids = pd.to_numeric(accountsData['AccountID'], errors='coerce')
+    accountIDs = ids.fillna(-1).astype(np.int64).tolist()
+    accountTypes = accountsData['AccountType'].tolist()
+    creditLimits = to_cents(accountsData['CreditLimit']).tolist() if 'CreditLimit' in accountsData.columns \
+        else [0] * len(accountsData)
+    # The first row of a duplicated AccountID is the account, as elsewhere
+    first = (ids.notna() & ~ids.duplicated()).to_numpy()
+    accountIndex = dict(zip(ids[first].astype(np.int64).tolist(), np.flatnonzero(first).tolist()))
+    funding = funding_map(accountsData)
+    # Plain ints are much faster than numpy scalars for the per-bill arithmetic below
+    current = balances.tolist()
+
+    amounts = to_cents(billsData['Amount']).take(due)
+    missingAmounts = (amounts == NA_CENTS).tolist()
+    amounts = np.abs(np.where(missingAmounts, 0, amounts))
+    amountText = format_cents(amounts).tolist()
+    amounts = amounts.tolist()
+    billIDs = billsData['BillID'].to_numpy()[due].tolist()
+    customers = pd.to_numeric(billsData['CustomerID'], errors='coerce').to_numpy()[due]
+    customers = np.where(np.isnan(customers), -1, customers).astype(np.int64).tolist()
+    paymentAccounts = billsData['PaymentAccID'].to_numpy()[due].tolist()
+    billTypes = billsData['BillType'].to_numpy()[due].tolist()
+    recurringFlags = (pd.to_numeric(billsData['IsRecurring'], errors='coerce').fillna(0).to_numpy()[due] == 1).tolist()
+    payees = billsData['PayeeName'].to_numpy()[due].tolist() if 'PayeeName' in billsData.columns else [''] * len(due)
+
+    results, paid, rescheduled, recurring = {}, [], [], []
+    for i, b in enumerate(due.tolist()):
+        amount = amounts[i]
+        accID = paymentAccounts[i]
+        target = accountIndex.get(int(accID)) if pd.notna(accID) else None
+        if target is None:
+            results[b] = {"status": "error", "message": f"Payment account {accID} not found."}
+            continue
+        if missingAmounts[i]:
+            results[b] = {"status": "error", "message": f"Bill {billIDs[i]} has no amount to pay."}
+            continue
+
+        customerSources = funding.get(customers[i], [])
+        receivedType = LOAN_BILL_TYPES.get(billTypes[i])
+        if receivedType is None and accountTypes[target] == 'Credit Card':
+            # Charged to a credit card: the amount owed may not pass the credit limit
+            owed = abs(current[target]) + amount
+            limit = creditLimits[target] if creditLimits[target] != NA_CENTS else 0
+            if owed > limit:
+                fee = decimal_to_cents(OVER_LIMIT_FEE)
+                current[target] -= fee
+                postings.append((accountIDs[target], 'Over-limit Fee', -fee, b))
+                rescheduled.append(b)
+                results[b] = {"status": "error", "message": f"Bill {billIDs[i]} would exceed the credit limit of account {accountIDs[target]}. "
+                                                          f"Over-limit fee of ${OVER_LIMIT_FEE} charged and the bill rescheduled for next month."}
+                continue
+            source = target
+        else:
+            # Loan and card bills are paid into the PaymentAccID account from the customer's checking or savings;
+            # other bills are drawn from PaymentAccID, falling back to the customer's other accounts if recurring
+            if receivedType is not None:
+                sources = customerSources
+            else:
+                sources = [target] + ([pos for pos in customerSources if pos != target] if recurringFlags[i] else [])
+            source = next((pos for pos in sources if current[pos] != NA_CENTS and current[pos] >= amount), None)
+            if source is None:
+                results[b] = {"status": "error", "message": f"Insufficient funds to pay bill {billIDs[i]} of ${amountText[i]}."}
+                continue
+
+        current[source] -= amount
+        postings.append((accountIDs[source], f"Bill Payment to {payees[i]}", -amount, b))
+        if receivedType is not None:
+            current[target] += amount
+            postings.append((accountIDs[target], receivedType, amount, b))
+        paid.append(b)
+        # A mortgage stops billing once it is paid off; card bills come from the monthly statements
+        if recurringFlags[i] and billTypes[i] != 'CreditCard' and not (billTypes[i] == 'Mortgage' and current[target] >= 0):
+            recurring.append(b)
+        results[b] = {"status": "success",
+                      "message": f"Bill {billIDs[i]} processed successfully. Paid ${amountText[i]} from account {accountIDs[source]}."}
+
+    balances[:] = current
+    return {"results": results, "paid": paid, "rescheduled": rescheduled, "recurring": recurring}
+
+
+def next_bills(billsData: pd.DataFrame, dueDates: pd.Series, recurring: list) -> pd.DataFrame:
+    """Copies the paid recurring bills at `recurring` as Pending bills due one month later."""
+    if not recurring:
+        return None
+    nextBills = billsData.iloc[recurring].copy()
+    ids = reserve_ids('bill', len(recurring))
+    nextBills['BillID'] = np.arange(ids.start, ids.stop, dtype=np.int64)
+    nextBills['DueDate'] = (dueDates.iloc[recurring] + pd.DateOffset(months=1)).dt.strftime('%Y-%m-%d').to_numpy()
+    nextBills['Status'] = 'Pending'
+    return nextBills
@@ -1,18 +1,40 @@
 # Spring 2025 Authors: Sierra Yerges, Bailee Segars, Braden Doty
 import pandas as pd
-import time
-from datetime import date
-from decimal import Decimal
+import numpy as np
+from scripts.tableCache import STORAGE_BACKEND, reads_from_csv, table_path
+from scripts.tableLock import table_lock
+from scripts.money import NA_CENTS, to_cents, apply_rate, format_cents
+from scripts.idAllocator import reserve_ids
+from decimal import Decimal, InvalidOperation
 from datetime import date, timedelta
 import os
-from scripts.transactionLog import generate_transaction_ID
+from scripts.repository import CsvRepository, get_repository
+from scripts.billIndex import BillIndex
 
-def calculateCreditInterest():
+CREDIT_TYPES = ['Credit Card', 'Mortgage Loan']
+
+# Columns bills.csv needs for interest to be charged on its late bills
+BILL_COLUMNS = ['Amount', 'MinPayment', 'PaymentAccID', 'Status', 'BillID', 'DueDate']
+
+# Minimum payment on a credit card bill, as a share of the amount owed
+MIN_PAYMENT_RATE = Decimal('0.03')
+
+def calculateCreditInterest(csv_dir: str = None):
     """
     Calculates monthly interest on unpaid balances for all credit card
     & home mortgage loan accounts, using APR values assigned during account creation.
     Also updates late bills to pending status, interest is only added to the account balance without changing the bill amount or minimum payment.
 
+    Late bills are matched to their accounts in one join on PaymentAccID, and the interest for
+    every account and bill is computed over whole columns of integer cents. The new balances,
+    the updated bills and the 'Interest Charged' rows are written together in one repository
+    commit (see repository.py), so a failure leaves all three tables as they were.
+
+    Parameters
+    ----------
+    csv_dir: string, optional
+        Directory holding the accounts, bills and transactions tables (csvFiles/ by default).
+
     Returns
     -------
     dict
@@ -22,181 +44,189 @@ def calculateCreditInterest():
         Updates 'accounts.csv' with new balances including accrued interest.
         Updates 'bills.csv' to change status from 'Late' to 'Pending'.
     """
-    # Get absolute path for accounts.csv
-    accountsPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/accounts.csv'))
-    transPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/transactions.csv'))
-    billsPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/bills.csv'))
+    repository = CsvRepository(csv_dir) if csv_dir else get_repository()
+    paths = {table: os.path.join(csv_dir, f'{table}.csv') if csv_dir else table_path(f'{table}.csv')
+             for table in ('accounts', 'transactions', 'bills')}
 
     # Check if files exist
-    for filepath, filename in [(accountsPath, 'accounts.csv'), (transPath, 'transactions.csv'), (billsPath, 'bills.csv')]:
+    for table, filepath in paths.items():
         if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
-            return [{"status": "error", "message": f"File {filename} does not exist or is empty."}]
-    
-    try:
-        time.sleep(0.1) 
-
-        accountsData = pd.read_csv(accountsPath)
-        if accountsData.empty:
-            return [{"status": "info", "message": "No accounts found. No interest applied."}]
-        accountsData['CurrBal'] = accountsData['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        
-        # Load transaction data
-        transData = pd.read_csv(transPath)
-        
-        # Load bills data - handle potential empty files with proper error messages
+            return [{"status": "error", "message": f"File {table}.csv does not exist or is empty."}]
+
+    with table_lock(*paths.values()):
         try:
-            billsData = pd.read_csv(billsPath)
-        except pd.errors.EmptyDataError:
-            return [{"status": "info", "message": "Bills file is empty. No interest applied."}]
+            repository.recover()
+            accountsData = repository.load('accounts')
+            if accountsData.empty:
+                return [{"status": "info", "message": "No accounts found. No interest applied."}]
+
+            # Load bills data - handle potential empty files with proper error messages
+            try:
+                billsData = repository.load('bills')
+            except pd.errors.EmptyDataError:
+                return [{"status": "info", "message": "Bills file is empty. No interest applied."}]
+            except Exception as e:
+                return [{"status": "error", "message": f"Error reading bills.csv: {str(e)}"}]
         except Exception as e:
-            return [{"status": "error", "message": f"Error reading bills.csv: {str(e)}"}]
-    except Exception as e:
-        return [{"status": "error", "message": f"Error loading data: {str(e)}"}]
-    
-    # Check if bills.csv is empty - if so, do nothing and return
-    if billsData.empty:
-        return [{"status": "info", "message": "No bills found. No interest applied."}]
-    
-    # Check if the DataFrame has the expected columns
-    expected_columns = ['Amount', 'MinPayment', 'PaymentAccID', 'Status', 'BillID', 'DueDate']
-    missing_columns = [col for col in expected_columns if col not in billsData.columns]
-    
-    if missing_columns:
-        return [{"status": "error", "message": f"Missing columns in bills.csv: {', '.join(missing_columns)}"}]
-    
-    try:
-        billsData['Amount'] = billsData['Amount'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        billsData['MinPayment'] = billsData['MinPayment'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-    except Exception as e:
-        return [{"status": "error", "message": f"Error processing bills data: {str(e)}"}]
+            return [{"status": "error", "message": f"Error loading data: {str(e)}"}]
 
-    # Identify all credit accounts (credit cards and home mortgage loans)
-    creditAccounts = accountsData[(accountsData['AccountType'] == 'Credit Card') | (accountsData['AccountType'] == 'Mortgage Loan')]
+        # Check if bills.csv is empty - if so, do nothing and return
+        if billsData.empty:
+            return [{"status": "info", "message": "No bills found. No interest applied."}]
 
-    results = []
+        results, interestLogs = charge_credit_interest(accountsData, billsData, date.today())
+        if results and results[0]["status"] == "error":
+            return results
+
+        # Only save if changes were made
+        if results:
+            try:
+                repository.commit({'accounts': accountsData, 'bills': billsData}, {'transactions': interestLogs})
+            except Exception as e:
+                return [{"status": "error", "message": f"Error saving updated data: {str(e)}"}]
+            # Online requests read the bills index as soon as the locks are released
+            if (csv_dir or STORAGE_BACKEND == 'csv') and reads_from_csv(paths['bills']):
+                BillIndex(paths['bills']).rebuild()
 
-    # Apply interest calculation for each account
-    for index, account in creditAccounts.iterrows():
-        unpaidBalance = Decimal(str(account['CurrBal']))
-        apr = Decimal(str(account['APR']))
-        accID = account['AccountID']
-        accType = account['AccountType']
-        custID = account['CustomerID']
-
-        # Check if there are any bills associated with this account
-        # Convert PaymentAccID to string for comparison if it's not already
-        if 'PaymentAccID' in billsData.columns:
-            billsData['PaymentAccID'] = billsData['PaymentAccID'].astype(str)
-            account_bills = billsData[billsData['PaymentAccID'] == str(accID)]
-            if account_bills.empty:
-                continue  # Skip this account if no bills are associated with it
-        else:
-            continue  # Skip if PaymentAccID column is missing
-
-        monthlyInterestRate = apr / Decimal(100) / Decimal(12)
-        
-        late_bills = account_bills[account_bills['Status'] == 'Late'] if 'Status' in account_bills.columns else pd.DataFrame()
-        
-        # Apply interest only when there are late bills
-        if not late_bills.empty:
-            # Initialize total account interest
-            total_account_interest = Decimal('0.00')
-            
-            # Handle Mortgage and Credit Card accounts differently
-            if accType == 'Mortgage Loan':
-                # For mortgage loans, calculate interest once based on entire account balance
-                interest = (unpaidBalance * monthlyInterestRate).quantize(Decimal('0.00'))
-                total_account_interest = interest
-                # Update all late bills for this mortgage account
-                for bill_idx, bill in late_bills.iterrows():
-                    # Only update due date and status for mortgage bills
-                    billsData.at[bill_idx, 'DueDate'] = (date.today() + timedelta(days=30)).isoformat()
-                    billsData.at[bill_idx, 'Status'] = 'Pending'
-                    
-                    results.append({
-                        "status": "success",
-                        "message": f"Mortgage Bill ID {bill['BillID']} updated: Status changed from Late to Pending, due date extended."
-                    })
-            else:
-                # Process each late bill for credit card accounts
-                for bill_idx, bill in late_bills.iterrows():
-                    # Original logic for credit cards
-                    original_amount = Decimal(str(bill['Amount']))  # Should be negative (money owed)
-                    
-                    # Calculate bill interest (will be negative since original_amount is negative)
-                    bill_interest = (original_amount * monthlyInterestRate).quantize(Decimal('0.00'))
-                    
-                    # Make bill amount more negative by adding negative interest
-                    new_amount = (original_amount + bill_interest).quantize(Decimal('0.00'))
-                    
-                    # Update minimum payment (use 3% of abs of the new balance, keep positive)
-                    new_min_payment = (abs(new_amount) * Decimal('0.03')).quantize(Decimal('0.00'))
-                    
-                    # Update the bills dataframe
-                    billsData.at[bill_idx, 'Amount'] = new_amount
-                    billsData.at[bill_idx, 'MinPayment'] = new_min_payment
-                    billsData.at[bill_idx, 'DueDate'] = (date.today() + timedelta(days=30)).isoformat()
-                    billsData.at[bill_idx, 'Status'] = 'Pending'
-                    
-                    # Add this bill's interest to total account interest (make positive for accounting)
-                    total_account_interest += abs(bill_interest)
-                    
-                    results.append({
-                        "status": "success",
-                        "message": f"Bill ID {bill['BillID']} updated: Status changed from Late to Pending, new amount ${abs(new_amount)}, new minimum payment ${abs(new_min_payment)}."
-                    })
-            
-            # Update account balance with total interest from all bills (both mortgage and credit cards)
-            if abs(total_account_interest) > Decimal('0.00'):
-                # Update balance by subtracting interest (making balance more negative)
-                if accType == 'Mortgage Loan':
-                    # For mortgage loans, make sure interest makes the balance more negative
-                    updatedBalance = (unpaidBalance - abs(total_account_interest)).quantize(Decimal('0.00'))
-                else:
-                    # For credit cards, use the current approach
-                    updatedBalance = (unpaidBalance - total_account_interest).quantize(Decimal('0.00'))
-                
-                # Update account balance in the dataframe - THIS IS THE CRITICAL STEP!
-                accountsData.at[index, 'CurrBal'] = updatedBalance
-                
-                # Generate transaction ID and log the transaction
-                transactionID = generate_transaction_ID(transData)
-                newLog = {
-                    'TransactionID': transactionID,
-                    'AccountID': accID,
-                    'TransactionType': 'Interest Charged',
-                    'Amount': Decimal(total_account_interest).quantize(Decimal('0.00')),
-                    'TransDate': date.today()
-                }
-                transData.loc[len(transData)] = newLog
-                
-                results.append({
-                    "status": "success",
-                    "message": f"Interest of ${total_account_interest} applied to AccountID {accID}."
-                })
-        else:
-            continue  # No interest applied to accounts with no late bills
-
-    # Only save if changes were made
-    if results:
-        try:
-            # Save updated balances to accounts.csv
-            accountsData.to_csv(accountsPath, index=False)
-            
-            # Save updated transaction logs
-            transData['Amount'] = transData['Amount'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-            transData.to_csv(transPath, index=False)
-            
-            # Save updated bills
-            billsData.to_csv(billsPath, index=False)
-        except Exception as e:
-            return [{"status": "error", "message": f"Error saving updated data: {str(e)}"}]
-    
     # If no interest was applied, add an informative message
     if not results:
         results.append({
-            "status": "info", 
+            "status": "info",
             "message": "No interest applied. Either all accounts are paid or there are no late bills."
         })
 
-    return results
\ No newline at end of file
+    return results
+
+def charge_credit_interest(accountsData: pd.DataFrame, billsData: pd.DataFrame, today: date):
+    """
+    Applies interest for the late bills in `billsData` as of `today`, updating
+    both frames in place (see _charge_late_bills). Nothing is read from or
+    written to disk.
+
+    Returns
+    -------
+    (list of dict, DataFrame)
+        The result messages and the 'Interest Charged' rows. A bills table
+        with missing columns or malformed amounts gives a single error
+        message and is left unchanged.
+    """
+    # Check if the DataFrame has the expected columns
+    missing_columns = [col for col in BILL_COLUMNS if col not in billsData.columns]
+    if missing_columns:
+        return [{"status": "error", "message": f"Missing columns in bills.csv: {', '.join(missing_columns)}"}], pd.DataFrame()
+
+    billAmounts = to_cents(billsData['Amount'])
+    billMinimums = to_cents(billsData['MinPayment'])
+    for column, cents in (('Amount', billAmounts), ('MinPayment', billMinimums)):
+        invalid = (cents == NA_CENTS) & billsData[column].notna().to_numpy()
+        if invalid.any():
+            return [{"status": "error", "message": f"Error processing bills data: invalid {column} {billsData[column][invalid].iloc[0]!r}"}], pd.DataFrame()
+
+    return _charge_late_bills(accountsData, billsData, billAmounts, billMinimums, today)
+
+def _monthly_rate(apr):
+    """Returns APR / 100 / 12 as a Decimal, or None if the APR is missing or malformed."""
+    try:
+        rate = Decimal(str(apr)) / Decimal(100) / Decimal(12)
+    except (InvalidOperation, ValueError):
+        return None
+    return rate if rate.is_finite() else None
+
+def _charge_late_bills(accountsData: pd.DataFrame, billsData: pd.DataFrame, billAmounts: np.ndarray, billMinimums: np.ndarray,
+                       today: date):
+    """
+    Applies interest for every late bill, updating both frames in place.
+
+    Mortgage loans are charged once on the whole account balance. Credit card bills are each
+    charged on their own amount; the bill grows by its interest, its minimum payment is reset
+    to 3% of the new amount, and the account is charged the sum. Every late bill becomes
+    Pending and is due in 30 days.
+
+    Returns
+    -------
+    (list of dict, DataFrame)
+        The per-bill and per-account result messages, in account order, and the
+        'Interest Charged' journal rows.
+    """
+    # Account IDs are matched as text, so '5016' and 5016 are the same account
+    accountTypes = accountsData['AccountType'].to_numpy()
+    accountKeys = accountsData['AccountID'].astype(str)
+    credit = np.flatnonzero(np.isin(accountTypes, CREDIT_TYPES))
+    # A duplicated account row only ever sees its bills once, the first time
+    credit = credit[~accountKeys.iloc[credit].duplicated().to_numpy()]
+    accountPosition = pd.Series(credit, index=accountKeys.to_numpy()[credit])
+
+    late = np.flatnonzero((billsData['Status'] == 'Late').to_numpy())
+    billAccount = billsData['PaymentAccID'].astype(str).to_numpy()[late]
+    billPosition = accountPosition.reindex(billAccount).to_numpy()
+    matched = ~np.isnan(billPosition)
+    late, billPosition = late[matched], billPosition[matched].astype(np.int64)
+    if not len(late):
+        return [], pd.DataFrame()
+
+    # Group the late bills by account, in account order, keeping bill order within an account
+    order = np.argsort(billPosition, kind='stable')
+    late, billPosition = late[order], billPosition[order]
+    charged, firstBill = np.unique(billPosition, return_index=True)
+
+    balances = to_cents(accountsData['CurrBal'])
+    rates = np.array([_monthly_rate(apr) for apr in accountsData['APR'].to_numpy()[charged]], dtype=object)
+    hasRate = np.array([rate is not None for rate in rates], dtype=bool)
+    rates[~hasRate] = Decimal(0)
+    isMortgage = accountTypes[charged] == 'Mortgage Loan'
+
+    # Credit card bills: each bill is charged on its own amount
+    billAccountIndex = np.repeat(np.arange(len(charged)), np.diff(np.append(firstBill, len(late))))
+    isCardBill = ~isMortgage[billAccountIndex]
+    amounts = billAmounts[late]
+    billInterest = np.where(isCardBill & hasRate[billAccountIndex] & (amounts != NA_CENTS),
+                            apply_rate(np.where(amounts == NA_CENTS, 0, amounts), rates[billAccountIndex]), 0)
+    newAmounts = np.where(amounts == NA_CENTS, amounts, amounts + billInterest)
+    newMinimums = apply_rate(np.abs(np.where(newAmounts == NA_CENTS, 0, newAmounts)), MIN_PAYMENT_RATE)
+    cardInterest = np.bincount(billAccountIndex, weights=np.abs(billInterest), minlength=len(charged)).astype(np.int64)
+
+    # Mortgage loans: interest once on the whole balance
+    accountBalances = balances[charged]
+    usable = isMortgage & hasRate & (accountBalances != NA_CENTS)
+    mortgageInterest = np.where(usable, apply_rate(np.where(usable, accountBalances, 0), rates), 0)
+
+    totalInterest = np.where(isMortgage, mortgageInterest, cardInterest)
+    updated = totalInterest != 0
+    balances[charged[updated]] = accountBalances[updated] - np.abs(totalInterest[updated])
+
+    cardBills = late[isCardBill]
+    billAmounts[cardBills] = newAmounts[isCardBill]
+    billMinimums[cardBills] = newMinimums[isCardBill]
+    billsData['Amount'], billsData['MinPayment'] = format_cents(billAmounts), format_cents(billMinimums)
+    billsData.loc[billsData.index[late], 'DueDate'] = (today + timedelta(days=30)).isoformat()
+    billsData.loc[billsData.index[late], 'Status'] = 'Pending'
+    accountsData['CurrBal'] = format_cents(balances)
+
+    interestText = format_cents(totalInterest)
+    ids = reserve_ids('transaction', int(updated.sum())) if updated.any() else range(0)
+    interestLogs = pd.DataFrame({
+        'TransactionID': np.arange(ids.start, ids.stop, dtype=np.int64),
+        'AccountID': accountsData['AccountID'].to_numpy()[charged[updated]],
+        'TransactionType': 'Interest Charged',
+        'Amount': interestText[updated],
+        'TransDate': today.isoformat()
+    })
+
+    results = []
+    billIDs = billsData['BillID'].to_numpy()[late]
+    accountIDs = accountsData['AccountID'].to_numpy()[charged]
+    newAmountText = format_cents(np.abs(newAmounts))
+    newMinimumText = format_cents(newMinimums)
+    bounds = np.append(firstBill, len(late))
+    for i in range(len(charged)):
+        for b in range(bounds[i], bounds[i + 1]):
+            if isMortgage[i]:
+                message = f"Mortgage Bill ID {billIDs[b]} updated: Status changed from Late to Pending, due date extended."
+            else:
+                message = (f"Bill ID {billIDs[b]} updated: Status changed from Late to Pending, "
+                           f"new amount ${newAmountText[b]}, new minimum payment ${newMinimumText[b]}.")
+            results.append({"status": "success", "message": message})
+        if updated[i]:
+            results.append({"status": "success", "message": f"Interest of ${interestText[i]} applied to AccountID {accountIDs[i]}."})
+
+    return results, interestLogs
@@ -1,9 +1,28 @@
 # Spring 2025 Authors: Bailee Segars, Sierra Yerges, Braden Doty
+import os
+import time
 import pandas as pd
+import numpy as np
+from scripts.tableCache import STORAGE_BACKEND, read_table, write_table, invalidate_table, table_path
+from scripts.tableLock import table_lock
+from scripts.money import NA_CENTS, to_cents, apply_rate, format_cents
+from scripts.idAllocator import reserve_ids
+from scripts.memoryUsage import peak_rss, format_bytes
+from scripts.transactionJournal import TransactionJournal, append_transaction_frame
+from datetime import date
 from decimal import Decimal
-import os
 
-def accrue_interest(accType):
+# Monthly growth factor applied to each interest-bearing account type
+MONTHLY_RATES = {
+    'Savings': (Decimal('0.04')/Decimal(12)) + 1,
+    'Money Market': (Decimal('0.03')/Decimal(12)) + 1
+}
+
+# Accounts rows read at a time by the streaming accrual; unset or 0 accrues in memory
+CHUNK_SIZE = int(os.environ.get('INTEREST_CHUNK_SIZE', '0') or 0)
+
+def accrue_interest(accTypes=None, transDate=None, accounts_path: str = None, journal_path: str = None,
+                    chunk_size: int = None) -> dict:
     """
     Calculates interest accrued on balance in savings accounts and money market accounts, then updates the account information in the csv.
 
@@ -11,16 +30,202 @@ def accrue_interest(accType):
 
     Money Market accounts have a fixed 3.0% APY and compound daily.
 
+    Every requested type is accrued in one pass over accounts.csv: balances are converted to
+    integer cents once, each type's rate is applied to its rows with a mask, and the file is
+    written once. Each account that earned interest gets an 'Interest Earned' row in
+    transactions.csv; the rows are appended in one write.
+
+    With a chunk size the accounts file is streamed instead, so memory stays flat however many
+    accounts there are (see _accrue_streaming).
+
     Parameters
     ----------
-    accType: string {Savings, Money Market}
-        Account type to determine APY and compound rate.
+    accTypes: string or list of string {Savings, Money Market}, optional
+        Account types to accrue. Defaults to every type in MONTHLY_RATES.
+    transDate: date, optional
+        Date recorded on the journal rows (today by default).
+    accounts_path, journal_path: string, optional
+        The accounts and transactions tables (csvFiles/ by default).
+    chunk_size: int, optional
+        Accounts rows read at a time. Defaults to INTEREST_CHUNK_SIZE; 0 reads the whole table.
+
+    Returns
+    -------
+    dict
+        {"status": "success", "message": "Accrued {total} of interest on {n} accounts."}
+        or {"status": "error", "message": "Unknown account type ..."}. A streamed run also
+        reports "chunks", "seconds", "peak_rss" (bytes, or None where unsupported) and
+        "peak_rss_growth" (see _accrue_streaming).
+    """
+    if accTypes is None:
+        accTypes = list(MONTHLY_RATES)
+    elif isinstance(accTypes, str):
+        accTypes = [accTypes]
+    unknown = [accType for accType in accTypes if accType not in MONTHLY_RATES]
+    if unknown:
+        return {"status": "error", "message": f"Unknown account type {', '.join(unknown)}. Use one of {', '.join(MONTHLY_RATES)}."}
+
+    accPath = accounts_path or table_path('accounts.csv')
+    transPath = journal_path or table_path('transactions.csv')
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    # Tables kept in SQLite are not files that can be streamed
+    if chunk_size > 0 and (accounts_path or STORAGE_BACKEND == 'csv'):
+        return _accrue_streaming(accTypes, transDate, accPath, transPath, bool(journal_path), chunk_size)
+
+    with table_lock(accPath, transPath):
+        accInfo = read_table(accPath)
+        previous = accInfo['CurrBal'].copy()
+        result, postings = accrue_frame(accInfo, accTypes, transDate)
+        if not len(postings):
+            return result
+        write_table(accInfo, accPath)
+
+        try:
+            if journal_path:
+                TransactionJournal(transPath).append_frame(postings)
+            else:
+                append_transaction_frame(postings)
+        except Exception:
+            accInfo['CurrBal'] = previous
+            write_table(accInfo, accPath)
+            raise
+
+    return result
+
+
+def accrue_frame(accInfo: pd.DataFrame, accTypes: list, transDate=None, periods: int = 1):
     """
-    accPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/accounts.csv'))
-    accInfo = pd.read_csv(accPath)
-    accInfo['CurrBal'] = accInfo['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
+    Accrues interest on the accounts in `accInfo`, updating CurrBal in place.
+
+    With `periods` > 1 that many months are compounded at once with the
+    closed form rate ** periods and rounded to cents once, so each account
+    gets a single 'Interest Earned' row for the whole span.
+
+    Returns
+    -------
+    (dict, DataFrame)
+        The result message, as accrue_interest returns it, and the
+        'Interest Earned' rows to append to transactions.csv.
+    """
+    accrued, interest = _accrue(accInfo, accTypes, periods)
+    earned = np.flatnonzero(interest != 0)
+    if not len(earned):
+        return {"status": "success", "message": "No interest to accrue."}, pd.DataFrame()
+
+    accInfo['CurrBal'] = format_cents(accrued)
+    postings = _postings(accInfo['AccountID'].to_numpy()[earned], interest[earned], transDate)
+    total = format_cents(np.array([interest[earned].sum()]))[0]
+    span = f" over {periods} months" if periods > 1 else ""
+    return {"status": "success", "message": f"Accrued {total} of interest on {len(earned)} accounts{span}."}, postings
+
+
+def _accrue(accInfo: pd.DataFrame, accTypes: list, periods: int = 1):
+    """Returns (new balances, interest) in cents for the rows of `accInfo`, compounded `periods` months."""
+    balances = to_cents(accInfo['CurrBal'])
+    accrued = balances.copy()
+
+    # Compound each type's rows with its own rate, in cents, over the whole column at once
+    accountTypes = accInfo['AccountType'].to_numpy()
+    for accType in accTypes:
+        isType = accountTypes == accType
+        accrued[isType] = apply_rate(balances[isType], MONTHLY_RATES[accType] ** periods)
+
+    interest = np.where(balances == NA_CENTS, 0, accrued - balances)
+    return accrued, interest
+
+
+def _postings(accountIDs: np.ndarray, interest: np.ndarray, transDate) -> pd.DataFrame:
+    """Returns one 'Interest Earned' row per account."""
+    ids = reserve_ids('transaction', len(accountIDs))
+    return pd.DataFrame({
+        'TransactionID': np.arange(ids.start, ids.stop, dtype=np.int64),
+        'AccountID': accountIDs,
+        'TransactionType': 'Interest Earned',
+        'Amount': format_cents(interest),
+        'TransDate': (transDate or date.today()).isoformat()
+    })
+
+
+def _append_postings(accountIDs: np.ndarray, interest: np.ndarray, transDate, journal_path: str = None) -> None:
+    """Appends one 'Interest Earned' row per account in a single write."""
+    postings = _postings(accountIDs, interest, transDate)
+    if journal_path:
+        TransactionJournal(journal_path).append_frame(postings)
+    else:
+        append_transaction_frame(postings)
+
+
+def _accrue_streaming(accTypes: list, transDate, accPath: str, transPath: str, own_journal: bool, chunk_size: int) -> dict:
+    """
+    Accrues interest while reading accounts.csv `chunk_size` rows at a time.
+
+    Each chunk is read as text, only the rows of the requested types are rewritten (every other
+    field is copied through unchanged) and the chunk is written to a temporary file next to
+    accounts.csv; its journal rows are appended as it goes. Once every chunk has been written the
+    temporary file is fsynced and renamed over accounts.csv, so readers see either the old or the
+    new balances. On failure the temporary file is removed and the journal is truncated back.
+
+    The process's peak RSS is read before and after the run without resetting it, which would
+    change the figures of the whole process. When the run raised the peak ("peak_rss_growth"
+    above 0), "peak_rss" is the run's own peak; otherwise the run stayed below it.
+    """
+    start = time.perf_counter()
+    peakBefore = peak_rss()
+    tmpPath = f'{accPath}.{os.getpid()}.tmp'
+    accounts = chunks = 0
+    total = 0
+
+    with table_lock(accPath, transPath):
+        journalSize = os.path.getsize(transPath) if os.path.exists(transPath) else 0
+        try:
+            with open(tmpPath, 'w', newline='') as out:
+                reader = pd.read_csv(accPath, dtype=str, keep_default_na=False, chunksize=chunk_size)
+                for chunk in reader:
+                    chunks += 1
+                    accrued, interest = _accrue(chunk, accTypes)
+                    earned = np.flatnonzero(interest != 0)
+                    if len(earned):
+                        balanceColumn = chunk['CurrBal'].to_numpy(dtype=object)
+                        balanceColumn[earned] = format_cents(accrued[earned])
+                        chunk['CurrBal'] = balanceColumn
+                        _append_postings(pd.to_numeric(chunk['AccountID'].to_numpy()[earned]), interest[earned],
+                                         transDate, transPath if own_journal else None)
+                        accounts += len(earned)
+                        total += int(interest[earned].sum())
+                    chunk.to_csv(out, header=chunks == 1, index=False)
+                out.flush()
+                os.fsync(out.fileno())
+
+            if accounts:
+                os.replace(tmpPath, accPath)
+                _fsync_dir(accPath)
+        except Exception:
+            if os.path.exists(transPath) and os.path.getsize(transPath) > journalSize:
+                os.truncate(transPath, journalSize)
+                invalidate_table(transPath)
+            raise
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            invalidate_table(accPath)
+
+    peak = peak_rss()
+    result = {"status": "success", "chunks": chunks, "seconds": round(time.perf_counter() - start, 3),
+              "peak_rss": peak, "peak_rss_growth": None if peak is None or peakBefore is None else peak - peakBefore}
+    if not accounts:
+        result["message"] = "No interest to accrue."
+    else:
+        amount = format_cents(np.array([total]))[0]
+        result["message"] = (f"Accrued {amount} of interest on {accounts} accounts "
+                             f"in {chunks} chunks (peak RSS {format_bytes(peak)}).")
+    return result
 
-    monthlyRate = ((Decimal(0.04)/Decimal(12)) + 1) if accType == 'Savings' else ((Decimal(0.03)/Decimal(12)) + 1)
 
-    accInfo['CurrBal'] = accInfo.apply(lambda row: Decimal(row['CurrBal']*monthlyRate).quantize(Decimal('0.00')) if row['AccountType'] == accType else row['CurrBal'], axis=1)
-    accInfo.to_csv(accPath, index=False)
\ No newline at end of file
+def _fsync_dir(path: str) -> None:
+    """Makes a rename in the directory of `path` durable."""
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -1,13 +1,18 @@
 # Spring 2025 Authors: Sierra Yerges, Bailee Segars
 import pandas as pd
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
+from scripts.idAllocator import next_id
+from scripts.statementCycle import assign_cycle_day
 import random
-import os
 from datetime import date
 from decimal import Decimal
 
+@locks_tables('accounts.csv', 'logs.csv', reads=('customers.csv',))
 def openCreditCardAccount(customerID: int) -> dict:
     """
-    Opens a new credit card account with APR assigned based on APR range ID.
+    Opens a new credit card account with APR assigned based on APR range ID
+    and the least used statement cycle day.
 
     Parameters
     ----------
@@ -23,17 +28,17 @@ def openCreditCardAccount(customerID: int) -> dict:
           {"status": "error", "message": "Customer {customerID} not found."}
     """
     # Get absolute path for accounts.csv file
-    accountsPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/accounts.csv'))
+    accountsPath = table_path('accounts.csv')
     # Get absolute path for customer.csv file
-    customerPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/customers.csv'))
+    customerPath = table_path('customers.csv')
     # Get absolute path for transactions.csv file
-    log_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/logs.csv'))
+    log_path = table_path('logs.csv')
 
     # Load all existing log data
-    log_df = pd.read_csv(log_path)
+    log_df = read_table(log_path)
     
     # Load all existing account data into a DataFrame
-    customerData = pd.read_csv(customerPath)
+    customerData = read_table(customerPath)
 
     # Filter the DataFrame for the user with the specified customerID
     userRow = customerData[customerData['CustomerID'] == customerID]
@@ -58,15 +63,13 @@ def openCreditCardAccount(customerID: int) -> dict:
     apr = round(random.uniform(*apr_range), 2)
 
     # Load all existing account data into a DataFrame
-    accountsData = pd.read_csv(accountsPath)
+    accountsData = read_table(accountsPath)
 
     # Filter the DataFrame for the user with the specified customerID
     userRow = accountsData[accountsData['CustomerID'] == customerID]
 
     # Generate a unique Account ID that does not conflict with existing IDs
-    accountID = random.randint(5000, 9999)
-    while accountID in accountsData['AccountID'].values:
-        accountID = random.randint(5000, 9999)
+    accountID = next_id('account')
 
     limit = random.choice([1000, 3000, 7000, 15000])
 
@@ -78,7 +81,9 @@ def openCreditCardAccount(customerID: int) -> dict:
         "CurrBal": Decimal('0.00'),
         "DateOpened": date.today(),
         "CreditLimit": Decimal(limit).quantize(Decimal('0.00')),
-        "APR": apr
+        "APR": apr,
+        # Billed on the statement cycle day with the fewest cards, to spread statements over the month
+        "StatementDay": assign_cycle_day(accountsData)
     }
 
     # Append the new account details to the DataFrame and save back to CSV
@@ -89,18 +94,16 @@ def openCreditCardAccount(customerID: int) -> dict:
         accountsData = pd.concat([accountsData, newAccountDf], ignore_index=True)
     accountsData["CurrBal"] = accountsData["CurrBal"].apply(lambda x: f"{Decimal(x):.2f}")
     accountsData["CreditLimit"] = accountsData["CreditLimit"].apply(lambda x: f"{Decimal(x):.2f}")
-    accountsData.to_csv(accountsPath, index=False)
+    write_table(accountsData, accountsPath)
 
-    log_id = random.randint(1299, 5999)
-    while log_id in log_df['LogID'].values:
-        log_id = random.randint(1299, 5999)
+    log_id = next_id('log')
 
 
     newLog = {'LogID': log_id, 'UserID': customerID, 'LogMessage': 'Opened a Credit Card'}
 
     log_df.loc[len(log_df)] = newLog
 
-    log_df.to_csv(log_path, index=False)
+    write_table(log_df, log_path)
 
     # Return a success message with account details
     return {"status": "success", "message": f"Credit card account {accountID} created with a {apr}% APR."}
\ No newline at end of file
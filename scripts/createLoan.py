@@ -1,11 +1,15 @@
 # Spring 2025 Authors: Sierra Yerges, Bailee Segars, Braden Doty
 import pandas as pd
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
+from scripts.idAllocator import next_id
+from scripts.money import format_money_columns
 import random
-import os
 from decimal import Decimal
 from datetime import date, timedelta
 from scripts.billPayment import scheduleBillPayment
 
+@locks_tables('accounts.csv', 'bills.csv', 'logs.csv', reads=('customers.csv',))
 def createMortgageLoanAccount(customerID: int, loanAmount: Decimal, termYears: int) -> dict:
     """
     Creates a home mortgage loan account and schedules the first monthly payment bill.
@@ -28,16 +32,16 @@ def createMortgageLoanAccount(customerID: int, loanAmount: Decimal, termYears: i
           {"status": "error", "message": "Customer {customerID} not found."}
     """
     # Get absolute path for accounts.csv
-    accountsPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/accounts.csv'))
+    accountsPath = table_path('accounts.csv')
     # Get absolute path for customer.csv file
-    customerPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/customers.csv'))
+    customerPath = table_path('customers.csv')
     # Get absolute path for logs.csv file
-    logPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/logs.csv'))
+    logPath = table_path('logs.csv')
 
     # Load account data
-    accountsData = pd.read_csv(accountsPath)
-    customerData = pd.read_csv(customerPath)
-    logData = pd.read_csv(logPath)
+    accountsData = read_table(accountsPath)
+    customerData = read_table(customerPath)
+    logData = read_table(logPath)
 
     # Validate customer existence
     customerRow = customerData[customerData['CustomerID'] == customerID]
@@ -57,15 +61,39 @@ def createMortgageLoanAccount(customerID: int, loanAmount: Decimal, termYears: i
     apr_range = apr_ranges.get(apr_range_id, (3.0, 4.0))
     interestRate = round(random.uniform(*apr_range), 2)
 
-    # Generate a unique Account ID (between 10000-19999 for mortgage loans)
-    accountID = random.randint(10000, 19999)
-    while accountID in accountsData['AccountID'].values:
-        accountID = random.randint(10000, 19999)
+    # Generate a unique Account ID
+    accountID = next_id('account')
 
     # Set the start and end date for the loan
     startDate = date.today()
     endDate = startDate + timedelta(days=termYears * 365)
 
+    # Calculate monthly payment (principal + interest)
+    monthly_interest_rate = Decimal(interestRate) / Decimal(100) / Decimal(12)
+    total_payments = termYears * 12
+    monthly_payment = (
+        Decimal(loanAmount) * 
+        (monthly_interest_rate * (1 + monthly_interest_rate) ** total_payments) / 
+        ((1 + monthly_interest_rate) ** total_payments - 1)
+    ).quantize(Decimal('0.01'))
+    
+    # Schedule the first monthly payment bill before writing the account, so a
+    # failure cannot leave a loan account without its bill
+    first_bill_due_date = (date.today() + timedelta(days=30)).isoformat()
+    bill_result = scheduleBillPayment(
+        customerID=customerID,
+        payeeName="Evergreen Bank Mortgage",
+        payeeAddress="Somewhere In The World",
+        amount=monthly_payment,
+        dueDate=first_bill_due_date,
+        paymentAccID=accountID,
+        minPayment=monthly_payment,  # Minimum payment is the monthly payment
+        billType='Mortgage',
+        isRecurring=1  # Mortgage bills are recurring
+    )
+    if bill_result["status"] != "success":
+        return bill_result
+
     # Create a dictionary with new mortgage loan account details
     newLoanAccount = {
         "AccountID": accountID,
@@ -83,43 +111,14 @@ def createMortgageLoanAccount(customerID: int, loanAmount: Decimal, termYears: i
         accountsData = newLoanDf
     else:
         accountsData = pd.concat([accountsData, newLoanDf], ignore_index=True)
-    accountsData['CurrBal'] = accountsData['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-    accountsData['CreditLimit'] = accountsData['CreditLimit'].apply(
-        lambda x: Decimal(str(x)).quantize(Decimal('0.00')) if pd.notna(x) and str(x) not in ["", "None"] else None
-    )
-    accountsData.to_csv(accountsPath, index=False)
+    format_money_columns(accountsData, 'CurrBal', 'CreditLimit')
+    write_table(accountsData, accountsPath)
 
-    log_id = random.randint(1299, 5999)
-    while log_id in logData['LogID'].values:
-        log_id = random.randint(1299, 5999)
+    log_id = next_id('log')
 
     newLog = {'LogID': log_id, 'UserID': customerID, 'LogMessage': 'Opened a Mortgage Loan Account'}
     logData.loc[len(logData)] = newLog
-    logData.to_csv(logPath, index=False)
+    write_table(logData, logPath)
 
-    # Calculate monthly payment (principal + interest)
-    monthly_interest_rate = Decimal(interestRate) / Decimal(100) / Decimal(12)
-    total_payments = termYears * 12
-    monthly_payment = (
-        Decimal(loanAmount) * 
-        (monthly_interest_rate * (1 + monthly_interest_rate) ** total_payments) / 
-        ((1 + monthly_interest_rate) ** total_payments - 1)
-    ).quantize(Decimal('0.01'))
-    
-    # Schedule the first monthly payment bill
-    first_bill_due_date = (date.today() + timedelta(days=30)).isoformat()
-    
-    bill_result = scheduleBillPayment(
-        customerID=customerID,
-        payeeName="Evergreen Bank Mortgage",
-        payeeAddress="Somewhere In The World",
-        amount=monthly_payment,
-        dueDate=first_bill_due_date,
-        paymentAccID=accountID,
-        minPayment=monthly_payment,  # Minimum payment is the monthly payment
-        billType='Mortgage',
-        isRecurring=1  # Mortgage bills are recurring
-    )
-    
     # Return success message with account details
     return {"status": "success", "message": f"Mortgage loan account {accountID} created with an interest rate of {interestRate}% for {termYears} years. Monthly payment: ${monthly_payment}. First payment due on {first_bill_due_date}."}
\ No newline at end of file
@@ -1,8 +1,9 @@
 # Spring 2025 Authors: Bailee Segars, Taiyo Hino, Sierra Yerges
-import pandas as pd
-import random
-import os
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
+from scripts.idAllocator import next_id
 
+@locks_tables('employees.csv', 'logs.csv')
 def create_teller(firstName, lastName):
     """
     Creates a new teller account.
@@ -12,14 +13,12 @@ def create_teller(firstName, lastName):
     name: string
         Employee's name.
     """
-    employeePath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/employees.csv'))
-    logPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/logs.csv'))
-    employeeInfo = pd.read_csv(employeePath)
-    logData = pd.read_csv(logPath)
+    employeePath = table_path('employees.csv')
+    logPath = table_path('logs.csv')
+    employeeInfo = read_table(employeePath)
+    logData = read_table(logPath)
 
-    employeeID = random.randint(1299, 5999)
-    while employeeID in employeeInfo['EmployeeID'].values:
-        employeeID = random.randint(1299, 5999)
+    employeeID = next_id('person')
 
     username = str(firstName + '.' + lastName)
     username = username.lower()
@@ -28,13 +27,11 @@ def create_teller(firstName, lastName):
                       'Position': 'Teller'}
     
     employeeInfo.loc[len(employeeInfo)] = newEmployeeRow
-    employeeInfo.to_csv(employeePath, index=False)
+    write_table(employeeInfo, employeePath)
 
-    log_id = random.randint(1299, 5999)
-    while log_id in logData['LogID'].values:
-        log_id = random.randint(1299, 5999)
+    log_id = next_id('log')
 
     newLog = {'LogID': log_id, 'UserID': employeeID, 'LogMessage': 'Created a New Teller Account'}
     logData.loc[len(logData)] = newLog
 
-    logData.to_csv(logPath, index=False)
+    write_table(logData, logPath)
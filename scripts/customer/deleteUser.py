@@ -1,18 +1,12 @@
 # Spring 2025 Authors: Sierra Yerges, Bailee Segars
 import os
-import random
-import pandas as pd
+from scripts.idAllocator import next_id
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
 from Crypto.PublicKey import ECC
 
-# Define CSV file paths
-customers_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/customers.csv'))
-employees_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/employees.csv'))
-persons_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/persons.csv'))
-accounts_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/accounts.csv'))
-bills_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/bills.csv'))
-log_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/logs.csv'))
-
 
+@locks_tables('accounts.csv', 'bills.csv', 'customers.csv', 'employees.csv', 'logs.csv', 'persons.csv')
 def delete_user_button_pressed(user_type: str, user_id: int, password: str = None, is_admin: bool = False) -> dict:
     """
     Deletes a customer or teller account if they have no active accounts or bills.
@@ -34,13 +28,20 @@ def delete_user_button_pressed(user_type: str, user_id: int, password: str = Non
     dict
         A result dictionary with status and message.
     """
+    # Define CSV file paths
+    customers_path = table_path('customers.csv')
+    employees_path = table_path('employees.csv')
+    persons_path = table_path('persons.csv')
+    accounts_path = table_path('accounts.csv')
+    bills_path = table_path('bills.csv')
+    log_path = table_path('logs.csv')
 
     # Load CSVs
     try:
-        persons_df = pd.read_csv(persons_path)
-        accounts_df = pd.read_csv(accounts_path)
-        bills_df = pd.read_csv(bills_path)
-        log_df = pd.read_csv(log_path)
+        persons_df = read_table(persons_path)
+        accounts_df = read_table(accounts_path)
+        bills_df = read_table(bills_path)
+        log_df = read_table(log_path)
     except Exception as e:
         return {"status": "error", "message": f"Failed to load required files: {e}"}
 
@@ -63,26 +64,26 @@ def delete_user_button_pressed(user_type: str, user_id: int, password: str = Non
     # Remove from persons.csv
     persons_df = persons_df[persons_df['ID'] != user_id]
     try:
-        persons_df.to_csv(persons_path, index=False)
+        write_table(persons_df, persons_path)
     except Exception as e:
         return {"status": "error", "message": f"Failed to update persons.csv: {e}"}
 
     # Remove from customer or employee file
     if user_type == 'Customer':
         try:
-            cust_df = pd.read_csv(customers_path)
+            cust_df = read_table(customers_path)
             cust_df = cust_df[cust_df['CustomerID'] != user_id]
-            cust_df.to_csv(customers_path, index=False)
+            write_table(cust_df, customers_path)
 
             accounts_df = accounts_df[accounts_df['CustomerID'] != user_id]
-            accounts_df.to_csv(accounts_path, index=False)
+            write_table(accounts_df, accounts_path)
         except Exception as e:
             return {"status": "error", "message": f"Failed to update customers.csv: {e}"}
     elif user_type == 'Teller':
         try:
-            emp_df = pd.read_csv(employees_path)
+            emp_df = read_table(employees_path)
             emp_df = emp_df[emp_df['EmployeeID'] != user_id]
-            emp_df.to_csv(employees_path, index=False)
+            write_table(emp_df, employees_path)
         except Exception as e:
             return {"status": "error", "message": f"Failed to update employees.csv: {e}"}
 
@@ -94,13 +95,11 @@ def delete_user_button_pressed(user_type: str, user_id: int, password: str = Non
         except Exception as e:
             return {"status": "error", "message": f"Failed to delete PEM file: {e}"}
     
-    log_id = random.randint(1299, 5999)
-    while log_id in log_df['LogID'].values:
-        log_id = random.randint(1299, 5999)
+    log_id = next_id('log')
 
     newLog = {'LogID': log_id, 'UserID': user_id, 'LogMessage': 'Deleted User Account'}
     log_df.loc[len(log_df)] = newLog
 
-    log_df.to_csv(log_path, index=False)
+    write_table(log_df, log_path)
 
     return {"status": "success", "message": f"{user_type} account {user_id} successfully deleted."}
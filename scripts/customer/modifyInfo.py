@@ -1,12 +1,13 @@
 # Spring 2025 Authors: Bailee Segars, Braden Doty
-import pandas as pd
-import os
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
 
+@locks_tables('persons.csv')
 def modify_info(userID: int, modifyReq: dict) -> dict:
-    perPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/persons.csv'))
+    perPath = table_path('persons.csv')
 
     # Load person data
-    perInfo = pd.read_csv(perPath)
+    perInfo = read_table(perPath)
 
     userIndex = perInfo.loc[perInfo['ID'] == userID].index[0]
 
@@ -17,5 +18,5 @@ def modify_info(userID: int, modifyReq: dict) -> dict:
             return {"status": "error", "message": f"{key} not found."}
         
      # Save once after all updates
-    perInfo.to_csv(perPath, index=False)
+    write_table(perInfo, perPath)
     return {"status": "success", "message": f"{key} successfully changed to {value}."}
\ No newline at end of file
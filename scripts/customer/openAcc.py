@@ -1,30 +1,30 @@
 # Spring 2025 Authors: Bailee Segars, Sierra Yerges
 from datetime import date
 from decimal import Decimal
-import pandas as pd
-import random
-import os
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
+from scripts.money import format_money_columns
+from scripts.idAllocator import next_id
 
-def generate_account_ID(accInfo):
+def generate_account_ID(accInfo=None):
     """
     Generates a unique account ID for each new account.
 
     Parameters
     ----------
-    accInfo: dataframe
-        Dataframe of log information from accounts.csv.
+    accInfo: dataframe, optional
+        Unused. IDs come from the persistent 'account' sequence, so the
+        existing IDs no longer need to be checked.
 
     Returns
     -------
     accID: int
         ID associated with the account.
     """
-    accID = random.randint(200, 999) # generates a random ID
-    if accID not in accInfo:
-        return accID
-    generate_account_ID(accInfo)
+    return next_id('account')
 
 
+@locks_tables('accounts.csv', 'logs.csv')
 def open_account(custID, accType, depositAmnt):
     """
     Allows customers to open an account (checking, savings, money market, etc).
@@ -39,11 +39,11 @@ def open_account(custID, accType, depositAmnt):
         Amount of money user wants to initially deposit. Can be 0
     """
     # Creates dataframe with current csv data
-    accPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/accounts.csv'))
-    accInfo = pd.read_csv(accPath)
+    accPath = table_path('accounts.csv')
+    accInfo = read_table(accPath)
 
-    log_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/logs.csv'))
-    log_df = pd.read_csv(log_path)
+    log_path = table_path('logs.csv')
+    log_df = read_table(log_path)
 
     if depositAmnt >= 0:
         accID = generate_account_ID(accInfo)
@@ -63,17 +63,15 @@ def open_account(custID, accType, depositAmnt):
                     'CreditLimit': None,
                     'APR': apr}
         accInfo.loc[len(accInfo)] = newAccRow
-        accInfo['CurrBal'] = accInfo['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-        accInfo.to_csv(accPath, index=False)
+        format_money_columns(accInfo, 'CurrBal')
+        write_table(accInfo, accPath)
 
-        log_id = random.randint(1299, 5999)
-        while log_id in log_df['LogID'].values:
-            log_id = random.randint(1299, 5999)
+        log_id = next_id('log')
 
         newLog = {'LogID': log_id, 'UserID': custID, 'LogMessage': f'Opened {accType} Account'}
         log_df.loc[len(log_df)] = newLog
 
-        log_df.to_csv(log_path, index=False)
+        write_table(log_df, log_path)
 
         return {"status": "success", "message": f"{accType} account {accID} created."}
     else:
@@ -1,8 +1,7 @@
 # Spring 2025 Authors: Bailee Segars
 from Crypto.PublicKey import ECC
-import pandas as pd
+from scripts.tableCache import read_table, table_path
 import hashlib
-import os
 
 def forgot_password(userID, q1, q2, newPwd):
     """
@@ -33,8 +32,8 @@ def forgot_password(userID, q1, q2, newPwd):
         If at least one of the answers is incorrect:
         - {"status": "error", "message": "Incorrect answer to at least one security question"}
     """
-    perPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/persons.csv'))
-    userInfo = pd.read_csv(perPath)
+    perPath = table_path('persons.csv')
+    userInfo = read_table(perPath)
 
     if userID not in userInfo['ID'].values:
         return {"status": "error", "message": f"Source account {userID} not found."}
@@ -1,10 +1,11 @@
 # Spring 2025 Authors: Bailee Segars, Sierra Yerges, Braden Doty
 from Crypto.PublicKey import ECC
-import pandas as pd
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
 import hashlib
-import random
-import os
+from scripts.idAllocator import next_id
 
+@locks_tables('customers.csv', 'employees.csv', 'logs.csv', 'persons.csv')
 def login_page_button_pressed(new_or_returning, type, username: str, password, *argv):
     """
     Handles user account creation and login authentication.
@@ -26,10 +27,10 @@ def login_page_button_pressed(new_or_returning, type, username: str, password, *
     Digital signature standard at D.1.2: https://nvlpubs.nist.gov/nistpubs/FIPS/NIST.FIPS.186-4.pdf
 
     """
-    custPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/customers.csv'))
-    perPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/persons.csv'))
-    employeePath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/employees.csv'))
-    logsPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../csvFiles/logs.csv'))
+    custPath = table_path('customers.csv')
+    perPath = table_path('persons.csv')
+    employeePath = table_path('employees.csv')
+    logsPath = table_path('logs.csv')
 
     def new_account(userID) -> dict:
         """
@@ -38,7 +39,7 @@ def login_page_button_pressed(new_or_returning, type, username: str, password, *
         Parameters
         ----------
         userID: int
-            Random number between 200-999 generated when a user creates an account.
+            ID drawn from the shared person sequence when a user creates an account.
 
         Returns
         -------
@@ -76,27 +77,21 @@ def login_page_button_pressed(new_or_returning, type, username: str, password, *
                         'CustomerID': newID,
                         'APRRangeID': aprRangeID}        # creates dict of new user information
             custInfo.loc[len(custInfo)] = newCustRow     # adds information from dict to end of dataframe
-            custInfo.to_csv(custPath, index=False)       # exports dataframe to customer.csv to overwrite with new information
+            write_table(custInfo, custPath)       # exports dataframe to customer.csv to overwrite with new information
 
-            logID = random.randint(1299, 5999)
-            while logID in logInfo['LogID'].values:
-                logID = random.randint(1299, 5999)
-
-            print(logID)
+            logID = next_id('log')
             newLogRow = {'LogID': logID, 'UserID': newID, 'LogMessage': 'New Customer Created'}
             logInfo.loc[len(logInfo)] = newLogRow
-            logInfo.to_csv(logsPath, index=False)
+            write_table(logInfo, logsPath)
         else:
             employeeIndex = employeeInfo[(employeeInfo['EmployeeID'] == newID)]
             if employeeIndex.empty:
                 return {"status": "error", "message": "Cannot create user account until employee account has been created by the administrator."}
 
-            logID = random.randint(1299, 5999)
-            while logID in logInfo['LogID'].values:
-                logID = random.randint(1299, 5999)
+            logID = next_id('log')
             newLogRow = {'LogID': logID, 'UserID': newID, 'LogMessage': 'Teller Has Set Up Log In'}
             logInfo.loc[len(logInfo)] = newLogRow
-            logInfo.to_csv(logsPath, index=False)
+            write_table(logInfo, logsPath)
             
         newPerRow = {'UserType': type,
                      'ID': newID,
@@ -108,7 +103,7 @@ def login_page_button_pressed(new_or_returning, type, username: str, password, *
                      'Question1': hashlib.sha512(q1.encode()).hexdigest(),
                      'Question2': hashlib.sha512(q2.encode()).hexdigest()}
         perInfo.loc[len(perInfo)] = newPerRow
-        perInfo.to_csv(perPath, index=False)
+        write_table(perInfo, perPath)
         return {"status": "success", "message": "Successfully created account"}
 
     def existing_account(userID) -> dict:
@@ -140,10 +135,10 @@ def login_page_button_pressed(new_or_returning, type, username: str, password, *
         return {"status": "success", "message": f"Successfully logged in as {username}"}   
 
     # Imports customer csv as a dataframe
-    perInfo = pd.read_csv(perPath)
-    custInfo = pd.read_csv(custPath)
-    employeeInfo = pd.read_csv(employeePath)
-    logInfo = pd.read_csv(logsPath)
+    perInfo = read_table(perPath)
+    custInfo = read_table(custPath)
+    employeeInfo = read_table(employeePath)
+    logInfo = read_table(logsPath)
 
     # Create account
     if new_or_returning == 1:
@@ -156,9 +151,7 @@ def login_page_button_pressed(new_or_returning, type, username: str, password, *
         q1 = argv[6]
         q2 = argv[7]
         if type == 'Customer':
-            newID = random.randint(200, 999) # generates a random ID
-            while newID in perInfo['ID'].values:
-                newID = random.randint(200, 999)
+            newID = next_id('person')
         else:
             newID = employeeInfo.loc[employeeInfo['Username'] == username, 'EmployeeID'].iloc[0]
         return new_account(newID)     # generates a new private key
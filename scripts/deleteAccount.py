@@ -1,8 +1,11 @@
 # Spring 2025 Authors: Sierra Yerges, Bailee Segars
 import pandas as pd
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
 import os
-from scripts.transactionLog import generate_transaction_ID
+from scripts.idAllocator import next_id
 
+@locks_tables('accounts.csv', 'logs.csv')
 def deleteAcc(custID: int, accID: int, performedByID: int) -> dict:
     """
     Deletes an account if the balance is zero and logs the deletion.
@@ -35,18 +38,18 @@ def deleteAcc(custID: int, accID: int, performedByID: int) -> dict:
     """
 
     # Define file paths
-    accPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '../csvFiles/accounts.csv'))
-    logPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '../csvFiles/logs.csv'))
+    accPath = table_path('accounts.csv')
+    logPath = table_path('logs.csv')
 
     # Load account data
-    accInfo = pd.read_csv(accPath)
+    accInfo = read_table(accPath)
     
     # Ensure 'CurrBal' is treated as a numeric value for proper comparisons
     accInfo['CurrBal'] = pd.to_numeric(accInfo['CurrBal'], errors='coerce')
 
     # Ensure logs.csv exists and has required columns
     if os.path.exists(logPath) and os.stat(logPath).st_size > 0:
-        logInfo = pd.read_csv(logPath)
+        logInfo = read_table(logPath)
     else:
         logInfo = pd.DataFrame(columns=["LogID", "UserID","LogMessage"])
 
@@ -61,8 +64,8 @@ def deleteAcc(custID: int, accID: int, performedByID: int) -> dict:
     if accInfo.loc[accIndex, 'CurrBal'].values[0] != 0:
         return {"status": "error", "message": f"Account {accID} cannot be deleted because it has a non-zero balance."}
 
-    # Generate a transaction ID
-    logID = generate_transaction_ID(logInfo)
+    # Generate a log ID
+    logID = next_id('log')
 
     # Log account deletion
     log_entry = pd.DataFrame([{
@@ -73,10 +76,10 @@ def deleteAcc(custID: int, accID: int, performedByID: int) -> dict:
 
     # Append log entry and save
     logInfo = pd.concat([logInfo, log_entry], ignore_index=True)
-    logInfo.to_csv(logPath, index=False)
+    write_table(logInfo, logPath)
 
     # Remove account from dataset
     accInfo.drop(accIndex, inplace=True)
-    accInfo.to_csv(accPath, index=False)
+    write_table(accInfo, accPath)
 
     return {"status": "success", "message": f"Account {accID} successfully deleted."}
@@ -1,13 +1,11 @@
 # Spring 2025 Authors: Sierra Yerges, Braden Doty
-import pandas as pd
-import os
 from decimal import Decimal
-from scripts.withdrawMoney import withdraw
-from scripts.makeDeposit import deposit
+from scripts.ledger import post
+from scripts.tableCache import read_table, table_path
 
 def transferFunds(srcAccID: int, destAccID: int, amount: Decimal) -> dict:
     """
-    Transfers funds between two accounts by withdrawing from one and depositing into another.
+    Transfers funds between two accounts as a single posting: a withdrawal from one and a deposit into the other.
 
     Parameters
     ----------
@@ -40,43 +38,38 @@ def transferFunds(srcAccID: int, destAccID: int, amount: Decimal) -> dict:
 
     Process
     -------
-    1. Validates if both the source and destination accounts exist.
-    2. Ensures the transfer amount is a positive value.
-    3. Attempts to withdraw the specified amount from the source account.
-    4. If the withdrawal is successful, deposits the amount into the destination account.
-    5. If the deposit fails, reverses the withdrawal to maintain account balances.
+    1. Validates that both accounts exist, then that the transfer amount is a positive value.
+    2. Validates both legs against one read of `accounts.csv`: that the source can be withdrawn
+       from and has sufficient funds, and that the destination accepts deposits.
+    3. Writes both balances and appends both journal rows in one locked commit.
 
     Notes
     -----
-    - The function interacts with `accounts.csv` located in `../csvFiles/`.
-    - This ensures **transaction integrity** by rolling back withdrawals if deposits fail.
+    - The legs are posted through `scripts.ledger.post`, so either both are recorded or neither is;
+      no compensating deposit is needed when the second leg is rejected.
     """
-    # Get absolute path for accounts.csv
-    accPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/accounts.csv'))
-    
-    # Load account data
-    accInfo = pd.read_csv(accPath)
-
-    # Validate that both accounts exist
-    if srcAccID not in accInfo['AccountID'].values:
-        return {"status": "error", "message": f"Source account {srcAccID} not found."}
-    if destAccID not in accInfo['AccountID'].values:
-        return {"status": "error", "message": f"Destination account {destAccID} not found."}
-
-    # Ensure the transfer amount is valid
+    # Ensure the transfer amount is valid; missing accounts are reported first
     if amount <= Decimal('0.00'):
+        accountIDs = read_table(table_path('accounts.csv'))['AccountID'].values
+        if srcAccID not in accountIDs:
+            return {"status": "error", "message": f"Source account {srcAccID} not found."}
+        if destAccID not in accountIDs:
+            return {"status": "error", "message": f"Destination account {destAccID} not found."}
         return {"status": "error", "message": "Transfer amount must be positive."}
 
-    # Attempt to withdraw from the source account
-    withdraw_result = withdraw(srcAccID, amount)
-    if next(iter(withdraw_result.values())) == 'success':
-        # If withdrawal succeeds, attempt to deposit into the destination account
-        deposit_result = deposit(destAccID, amount)
-        if next(iter(deposit_result.values())) == 'success':
-            return {"status": "success", "message": f"Successfully transferred ${amount} from Account {srcAccID} to Account {destAccID}."}
-        else:
-            # Rollback withdrawal if deposit fails
-            deposit(srcAccID, amount)  # Refund the withdrawn amount
-            return {"status": "error", "message": "Deposit failed. Transaction rolled back."}
-    else:
-        return {"status": "error", "message": withdraw_result.get("message")}
+    result = post(transfer_legs(srcAccID, destAccID, amount))
+    return transfer_outcome(result, srcAccID, destAccID, amount)
+
+def transfer_legs(srcAccID: int, destAccID: int, amount: Decimal) -> list:
+    """Returns the ledger legs of a transfer: a withdrawal then a deposit."""
+    return [('withdrawal', srcAccID, amount), ('deposit', destAccID, amount)]
+
+def transfer_outcome(result: dict, srcAccID: int, destAccID: int, amount: Decimal) -> dict:
+    """Turns the ledger's result for a transfer's legs into transferFunds' result."""
+    if result["status"] == "success":
+        return {"status": "success", "message": f"Successfully transferred ${amount} from Account {srcAccID} to Account {destAccID}."}
+    if result["reason"] == 'notFound':
+        return {"status": "error", "message": result["message"]}
+    if result["leg"] == 0:
+        return {"status": "error", "message": "Withdrawal failed. Transfer aborted."}
+    return {"status": "error", "message": "Deposit failed. Transaction rolled back."}
@@ -0,0 +1,224 @@
+# idAllocator.py
+"""
+Sequence-based ID allocation for accounts, people, transactions, logs and bills.
+
+Each entity has one persistent sequence in csvFiles/sequences.json holding the
+next ID nobody has reserved yet. A process reserves a block of IDs at a time
+(under the sequences file's table lock) and hands them out from memory, so
+drawing an ID is O(1) and gunicorn workers only touch the file once per block.
+
+The reservation is written (and fsynced) before any ID from the block is
+used, so a crash can leave gaps but never hands out an ID twice. A block is
+dropped when the process forks, so workers never share one.
+
+Work whose IDs are only known once it has finished (a partition of the
+nightly batch, see nightlyBatch.py) runs under scoped_allocator() with a
+ProvisionalAllocator, and the rows get their real IDs afterwards.
+
+When a sequence does not exist yet it starts after the largest ID already in
+the tables that use it. Customers and employees share the 'person' sequence
+because both are keyed by persons.csv's ID column.
+"""
+import os
+import csv
+import json
+import threading
+from contextlib import contextmanager
+from scripts.tableCache import CSV_DIR, STORAGE_BACKEND
+from scripts.tableLock import table_lock
+
+# IDs reserved per trip to the sequences file
+DEFAULT_BLOCK_SIZE = int(os.environ.get('ID_BLOCK_SIZE', '50'))
+
+# IDs are stored as signed 64-bit integers
+MAX_ID = 2**63 - 1
+
+# Entity -> (first ID, [(table, ID column), ...] scanned to seed the sequence)
+SEQUENCES = {
+    'account': (200, [('accounts', 'AccountID'), ('archivedLoans', 'AccountID'),
+                      ('transactions', 'AccountID')]),
+    'person': (200, [('persons', 'ID'), ('customers', 'CustomerID'), ('employees', 'EmployeeID')]),
+    'transaction': (1000, [('transactions', 'TransactionID')]),
+    'log': (1300, [('logs', 'LogID')]),
+    'bill': (1, [('bills', 'BillID'), ('archivedBills', 'BillID')]),
+}
+
+
+def _column_max(csv_dir: str, table: str, column: str) -> int:
+    """Returns the largest integer ID in one column of a table, or 0."""
+    if STORAGE_BACKEND != 'csv':
+        from scripts.repository import get_repository
+        try:
+            values = get_repository().load(table)[column]
+        except (KeyError, FileNotFoundError):
+            return 0
+        return max((_as_int(v) for v in values), default=0)
+
+    path = os.path.join(csv_dir, f'{table}.csv')
+    if not os.path.exists(path):
+        return 0
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if column not in header:
+            return 0
+        position = header.index(column)
+        return max((_as_int(row[position]) for row in reader if len(row) > position), default=0)
+
+
+def _as_int(value) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+class IdAllocator:
+    """
+    Hands out IDs from block-reserved persistent sequences.
+
+    Parameters
+    ----------
+    csv_dir : str, optional
+        Directory holding the tables and sequences.json (csvFiles/ by default).
+    block_size : int, optional
+        IDs reserved at a time (ID_BLOCK_SIZE, 50 by default).
+    """
+
+    def __init__(self, csv_dir: str = None, block_size: int = None):
+        self.csv_dir = csv_dir or CSV_DIR
+        self.path = os.path.join(self.csv_dir, 'sequences.json')
+        self.block_size = max(1, block_size or DEFAULT_BLOCK_SIZE)
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, sequences: dict) -> None:
+        """Replaces the sequences file atomically and durably."""
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(sequences, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(os.path.dirname(self.path), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _seed(self, entity: str) -> int:
+        first, sources = SEQUENCES[entity]
+        return max([first] + [_column_max(self.csv_dir, table, column) + 1 for table, column in sources])
+
+    def _reserve(self, entity: str, count: int) -> range:
+        """Reserves `count` consecutive IDs in the sequences file."""
+        if entity not in SEQUENCES:
+            raise KeyError(f"Unknown ID sequence '{entity}'.")
+        with table_lock(self.path):
+            sequences = self._read()
+            start = sequences.get(entity)
+            if start is None:
+                start = self._seed(entity)
+            end = start + count
+            if end - 1 > MAX_ID:
+                raise OverflowError(f"The '{entity}' ID sequence is exhausted.")
+            sequences[entity] = end
+            self._write(sequences)
+        return range(start, end)
+
+    def _check_fork(self) -> None:
+        # A forked worker must not hand out IDs from its parent's blocks
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._blocks.clear()
+
+    def next_id(self, entity: str) -> int:
+        """Returns the next unused ID of an entity ('account', 'person', ...)."""
+        return self.reserve(entity, 1)[0]
+
+    def reserve(self, entity: str, count: int) -> range:
+        """
+        Returns `count` consecutive unused IDs of an entity, e.g. for a batch
+        of postings.
+        """
+        with self._lock:
+            self._check_fork()
+            block = self._blocks.get(entity, range(0))
+            if len(block) < count:
+                # Leftover IDs of a too-small block are skipped, not reused
+                block = self._reserve(entity, count + self.block_size - 1)
+            self._blocks[entity] = block[count:]
+            return block[:count]
+
+
+class ProvisionalAllocator:
+    """
+    Hands out placeholder IDs for every entity without touching
+    sequences.json. They are negative, so a placeholder that reaches a
+    message or a log cannot be taken for a real ID; each block still counts
+    up. The caller replaces them with real IDs.
+    """
+
+    def __init__(self):
+        self._next = {}
+
+    def next_id(self, entity: str) -> int:
+        return self.reserve(entity, 1)[0]
+
+    def reserve(self, entity: str, count: int) -> range:
+        if entity not in SEQUENCES:
+            raise KeyError(f"Unknown ID sequence '{entity}'.")
+        stop = self._next.get(entity, 0)
+        self._next[entity] = stop - count
+        return range(stop - count, stop)
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+# Allocator set by scoped_allocator() for the current thread only
+_scoped = threading.local()
+
+
+@contextmanager
+def scoped_allocator(allocator):
+    """
+    Makes next_id() and reserve_ids() draw from `allocator` in the current
+    thread for the duration of the block. Other threads keep the shared one.
+    """
+    previous = getattr(_scoped, 'allocator', None)
+    _scoped.allocator = allocator
+    try:
+        yield allocator
+    finally:
+        _scoped.allocator = previous
+
+
+def get_allocator() -> IdAllocator:
+    """Returns the allocator of the current thread, or the process-wide one."""
+    global _allocator
+    scoped = getattr(_scoped, 'allocator', None)
+    if scoped is not None:
+        return scoped
+    with _allocator_lock:
+        if _allocator is None:
+            _allocator = IdAllocator()
+        return _allocator
+
+
+def next_id(entity: str) -> int:
+    """Returns the next unused ID of an entity from the shared allocator."""
+    return get_allocator().next_id(entity)
+
+
+def reserve_ids(entity: str, count: int) -> range:
+    """Returns `count` consecutive unused IDs of an entity from the shared allocator."""
+    return get_allocator().reserve(entity, count)
@@ -0,0 +1,96 @@
+# interestBenchmark.py
+"""
+Times monthly interest accrual over a synthetic accounts file.
+
+Compares the vectorized accrue_interest (one read, one write and a bulk
+journal append for every type) with the previous row-by-row approach (one
+read, a per-row apply and one write per account type), and checks that both
+produce the same balances. With --chunk-size the accounts file is streamed
+in chunks of that many rows instead, and the peak RSS of the run is shown.
+
+Run from the root dir:
+    python -m scripts.interestBenchmark [accounts] [--no-compare] [--chunk-size=<rows>]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from scripts.calcInterest import MONTHLY_RATES, accrue_interest
+from scripts.memoryUsage import reset_peak_rss, peak_rss, format_bytes
+
+ACCOUNT_TYPES = ['Checking', 'Savings', 'Money Market', 'Credit Card', 'Mortgage Loan']
+
+def write_accounts(path: str, rows: int, seed: int = 0) -> None:
+    """Writes a synthetic accounts.csv with `rows` accounts of mixed types."""
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        'AccountID': np.arange(1000, 1000 + rows),
+        'CustomerID': rng.integers(200, 200 + max(1, rows // 3), rows),
+        'AccountType': rng.choice(ACCOUNT_TYPES, rows),
+        'CurrBal': np.round(rng.uniform(0, 50_000, rows), 2),
+        'DateOpened': '2025-01-01',
+        'CreditLimit': '',
+        'APR': ''
+    }).to_csv(path, index=False)
+
+def _row_by_row(path: str) -> None:
+    """The accrual as it was done before: one pass and one rewrite per account type."""
+    for accType, monthlyRate in MONTHLY_RATES.items():
+        accInfo = pd.read_csv(path)
+        accInfo['CurrBal'] = accInfo['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
+        accInfo['CurrBal'] = accInfo.apply(lambda row: Decimal(row['CurrBal']*monthlyRate).quantize(Decimal('0.00'))
+                                           if row['AccountType'] == accType else row['CurrBal'], axis=1)
+        accInfo.to_csv(path, index=False)
+
+def run_benchmark(rows: int = 1_000_000, compare: bool = True, chunk_size: int = 0) -> dict:
+    """
+    Accrues one month of interest on `rows` synthetic accounts.
+
+    Returns
+    -------
+    dict
+        Seconds taken and peak RSS of the vectorized accrual (streamed if
+        `chunk_size`), the seconds taken by the row-by-row one if `compare`,
+        and the number of balances on which they disagree.
+    """
+    tmpdir = tempfile.mkdtemp()
+    try:
+        accounts = os.path.join(tmpdir, 'accounts.csv')
+        journal = os.path.join(tmpdir, 'transactions.csv')
+        write_accounts(accounts, rows)
+        if compare:
+            shutil.copy(accounts, accounts + '.orig')
+
+        reset_peak_rss()
+        start = time.perf_counter()
+        accrue_interest(accounts_path=accounts, journal_path=journal, chunk_size=chunk_size)
+        result = {"rows": rows, "vectorized_seconds": round(time.perf_counter() - start, 3),
+                  "peak_rss": peak_rss()}
+        with open(journal) as f:
+            result["journal_rows"] = sum(1 for _ in f) - 1
+
+        if compare:
+            start = time.perf_counter()
+            _row_by_row(accounts + '.orig')
+            result["row_by_row_seconds"] = round(time.perf_counter() - start, 3)
+            expected = pd.read_csv(accounts + '.orig')['CurrBal'].round(2)
+            actual = pd.read_csv(accounts)['CurrBal'].round(2)
+            result["mismatches"] = int((expected != actual).sum())
+        return result
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    chunk_size = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--chunk-size=')), 0)
+    result = run_benchmark(int(args[0]) if args else 1_000_000, compare='--no-compare' not in sys.argv,
+                           chunk_size=chunk_size)
+    mode = f"streamed in chunks of {chunk_size}" if chunk_size else "vectorized"
+    print(f"{result['rows']} accounts: {mode} {result['vectorized_seconds']}s "
+          f"({result['journal_rows']} journal rows, peak RSS {format_bytes(result['peak_rss'])})")
+    if "row_by_row_seconds" in result:
+        print(f"row by row {result['row_by_row_seconds']}s, {result['mismatches']} mismatches")
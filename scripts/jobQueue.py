@@ -0,0 +1,205 @@
+# jobQueue.py
+"""
+Durable queue of batch jobs, shared by the web workers and the batch worker.
+
+The scheduler and the admin "run now" API enqueue jobs; the batch worker
+(scripts/batchWorker.py) claims them one at a time in a process of its own,
+so the nightly stages never run on a thread of a web worker. Jobs live in a
+SQLite database (csvFiles/jobQueue.db by default), so queued jobs survive a
+restart and any process can enqueue or claim them: claiming happens in an
+immediate transaction, so two workers never get the same job.
+
+Every job records when it was queued, started and finished, which worker ran
+it, how long it took and the message it ended with:
+
+    queued -> running -> succeeded | failed
+
+A job left running by a worker that died is queued again when a worker on
+the same host starts (see requeue_abandoned); the nightly batch resumes from
+its checkpoints, so running it again is safe.
+"""
+import os
+import json
+import socket
+import sqlite3
+from datetime import datetime
+from scripts.tableLock import CSV_DIR
+
+# Default queue database
+QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH', os.path.join(CSV_DIR, 'jobQueue.db'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+JOB_COLUMNS = ['JobID', 'Kind', 'Params', 'Source', 'Status', 'EnqueuedAt', 'StartedAt', 'FinishedAt',
+               'Seconds', 'Worker', 'Message']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    JobID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Kind TEXT NOT NULL,
+    Params TEXT NOT NULL,
+    Source TEXT,
+    Status TEXT NOT NULL,
+    EnqueuedAt TEXT NOT NULL,
+    StartedAt TEXT,
+    FinishedAt TEXT,
+    Seconds REAL,
+    Worker TEXT,
+    Message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (Status, JobID);
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def worker_name() -> str:
+    """Identifies this process in the Worker column: host:pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """
+    A first-in first-out queue of batch jobs in a SQLite database.
+
+    Parameters
+    ----------
+    path : str, optional
+        The database file (JOB_QUEUE_PATH or csvFiles/jobQueue.db by default).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or QUEUE_PATH
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _job(row) -> dict:
+        job = dict(row)
+        job['Params'] = json.loads(job['Params'])
+        return job
+
+    def enqueue(self, kind: str, params: dict = None, source: str = None) -> int:
+        """
+        Queues a job and returns its ID. If the same job (kind and params) is
+        already waiting, that job's ID is returned instead of queueing it twice.
+        """
+        encoded = json.dumps(params or {}, sort_keys=True)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute("SELECT JobID FROM jobs WHERE Status = ? AND Kind = ? AND Params = ?",
+                               (QUEUED, kind, encoded)).fetchone()
+            if row is not None:
+                conn.execute('COMMIT')
+                return row['JobID']
+            cursor = conn.execute("INSERT INTO jobs (Kind, Params, Source, Status, EnqueuedAt) VALUES (?, ?, ?, ?, ?)",
+                                  (kind, encoded, source, QUEUED, _now()))
+            conn.execute('COMMIT')
+            return cursor.lastrowid
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, worker: str = None) -> dict:
+        """
+        Marks the oldest queued job as running for `worker` and returns it,
+        or returns None if the queue is empty.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute("SELECT JobID FROM jobs WHERE Status = ? ORDER BY JobID LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute("UPDATE jobs SET Status = ?, StartedAt = ?, Worker = ? WHERE JobID = ?",
+                         (RUNNING, _now(), worker or worker_name(), row['JobID']))
+            job = conn.execute("SELECT * FROM jobs WHERE JobID = ?", (row['JobID'],)).fetchone()
+            conn.execute('COMMIT')
+            return self._job(job)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def finish(self, job_id: int, succeeded: bool, message: str, seconds: float) -> None:
+        """Records how a running job ended."""
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE jobs SET Status = ?, FinishedAt = ?, Seconds = ?, Message = ? WHERE JobID = ?",
+                         (SUCCEEDED if succeeded else FAILED, _now(), round(seconds, 3), message, job_id))
+        finally:
+            conn.close()
+
+    def requeue_abandoned(self) -> list:
+        """
+        Queues again the jobs left running by workers on this host that no
+        longer exist. Returns their IDs.
+        """
+        host = socket.gethostname()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            abandoned = []
+            for row in conn.execute("SELECT JobID, Worker FROM jobs WHERE Status = ?", (RUNNING,)).fetchall():
+                workerHost, _, pid = (row['Worker'] or '').rpartition(':')
+                if workerHost == host and pid.isdigit() and not _alive(int(pid)):
+                    abandoned.append(row['JobID'])
+            for jobId in abandoned:
+                conn.execute("UPDATE jobs SET Status = ?, StartedAt = NULL, Worker = NULL WHERE JobID = ?",
+                             (QUEUED, jobId))
+            conn.execute('COMMIT')
+            return abandoned
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id: int) -> dict:
+        """Returns one job, or None if there is no such job."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE JobID = ?", (job_id,)).fetchone()
+            return self._job(row) if row is not None else None
+        finally:
+            conn.close()
+
+    def jobs(self, limit: int = 50) -> list:
+        """Returns the most recent jobs, newest first."""
+        conn = self._connect()
+        try:
+            return [self._job(row) for row in
+                    conn.execute("SELECT * FROM jobs ORDER BY JobID DESC LIMIT ?", (limit,)).fetchall()]
+        finally:
+            conn.close()
+
+
+def _alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,170 @@
+# leaderLease.py
+"""
+Leader election between the processes of a multi-worker deployment.
+
+Every gunicorn worker imports the app, but the scheduled batch jobs must run
+in exactly one of them. The workers compete for a lease stored in
+csvFiles/schedulerLease.json: the holder's identity and the time the lease
+expires. Reading and replacing the lease happens under the file's table
+lock (see tableLock.py), so two workers can never both take it.
+
+The leader renews the lease every LEASE_SECONDS / 3 seconds. If it dies or
+hangs, the lease runs out and the next worker to try takes over; a leader
+that finds its lease taken when it tries to renew steps down. A worker that
+exits releases its lease so another can take over straight away.
+
+LeaderElector runs that loop on a daemon thread and calls back when this
+process becomes or stops being the leader.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+from scripts.tableLock import CSV_DIR, table_lock
+
+# Seconds a lease lasts without renewal
+LEASE_SECONDS = float(os.environ.get('SCHEDULER_LEASE_SECONDS', '30'))
+
+# Default lease file
+LEASE_PATH = os.path.join(CSV_DIR, 'schedulerLease.json')
+
+
+class LeaderLease:
+    """
+    A renewable lease that at most one process holds at a time.
+
+    Parameters
+    ----------
+    path : str, optional
+        The lease file (csvFiles/schedulerLease.json by default).
+    lease_seconds : float, optional
+        How long the lease lasts without renewal (SCHEDULER_LEASE_SECONDS, 30 by default).
+    holder : str, optional
+        This process's identity (host, pid and a random suffix by default).
+    clock : callable, optional
+        Returns the current time in seconds (time.time by default).
+    """
+
+    def __init__(self, path: str = None, lease_seconds: float = None, holder: str = None, clock=time.time):
+        self.path = path or LEASE_PATH
+        self.lease_seconds = lease_seconds or LEASE_SECONDS
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.clock = clock
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, lease: dict) -> None:
+        tmpPath = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmpPath, 'w') as f:
+            json.dump(lease, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath, self.path)
+
+    def current(self) -> dict:
+        """Returns the lease as stored: {"holder", "expires", "acquired"}, or {} if there is none."""
+        return self._read()
+
+    def acquire(self) -> bool:
+        """
+        Takes or renews the lease. Returns True if this process holds it
+        afterwards, False if another process holds an unexpired lease.
+        """
+        with table_lock(self.path):
+            lease = self._read()
+            now = self.clock()
+            if lease and lease.get('holder') != self.holder and lease.get('expires', 0) > now:
+                return False
+            acquired = lease.get('acquired', now) if lease.get('holder') == self.holder else now
+            self._write({'holder': self.holder, 'expires': now + self.lease_seconds, 'acquired': acquired})
+            return True
+
+    def renew(self) -> bool:
+        """
+        Extends the lease if this process still holds it. Returns False if
+        it expired and another process has taken it since.
+        """
+        with table_lock(self.path):
+            lease = self._read()
+            if lease.get('holder') not in (None, self.holder):
+                return False
+            return self.acquire()
+
+    def release(self) -> None:
+        """Gives the lease up if this process holds it."""
+        with table_lock(self.path):
+            if self._read().get('holder') == self.holder:
+                os.remove(self.path)
+
+
+class LeaderElector:
+    """
+    Keeps trying for a lease on a daemon thread and reports changes.
+
+    Parameters
+    ----------
+    lease : LeaderLease
+        The lease to compete for.
+    on_elected, on_deposed : callable
+        Called with no arguments when this process becomes the leader and
+        when it stops being the leader.
+    interval : float, optional
+        Seconds between attempts (a third of the lease by default).
+    """
+
+    def __init__(self, lease: LeaderLease, on_elected, on_deposed, interval: float = None):
+        self.lease = lease
+        self.on_elected = on_elected
+        self.on_deposed = on_deposed
+        self.interval = interval or lease.lease_seconds / 3
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def step(self) -> bool:
+        """Makes one attempt to take or renew the lease. Returns whether this process leads."""
+        try:
+            leading = self.lease.renew() if self.is_leader else self.lease.acquire()
+        except Exception as e:
+            # A lease we cannot renew is a lease we may have lost
+            logging.error("Leader lease %s failed: %s", self.lease.path, e)
+            leading = False
+        if leading and not self.is_leader:
+            self.is_leader = True
+            logging.info("Elected scheduler leader (%s).", self.lease.holder)
+            self.on_elected()
+        elif not leading and self.is_leader:
+            self.is_leader = False
+            logging.warning("Lost the scheduler lease (%s); stepping down.", self.lease.holder)
+            self.on_deposed()
+        return self.is_leader
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.step()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Starts competing for the lease in the background."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='leader-elector', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stops competing, steps down if leading and releases the lease."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 1)
+        if self.is_leader:
+            self.is_leader = False
+            self.on_deposed()
+        self.lease.release()
@@ -0,0 +1,188 @@
+# ledger.py
+"""
+Posting engine for balance changes.
+
+A posting is a list of legs, each a (kind, accID, amount) tuple:
+
+    - 'withdrawal': debits a checking, savings or money market account
+    - 'deposit': credits a checking or savings account, or pays down a
+      credit card or mortgage loan
+    - 'directDeposit': credits a checking or savings account
+
+post() reads accounts.csv once, applies the legs in order to in-memory
+balances (so several legs on one account see each other's effect) and
+validates every leg before anything is written. It then reserves the journal
+IDs and commits the new balances and one journal row per leg together
+through the repository's staged commit (see repository.py), so either every
+leg is recorded or none is, even if the process dies part way.
+
+post_many() does the same for a list of postings, committing all the
+accepted ones in a single write.
+"""
+import pandas as pd
+from datetime import date
+from scripts.idAllocator import reserve_ids
+from scripts.money import to_money, format_money_columns
+from scripts.repository import get_repository
+from scripts.tableCache import read_table, table_path
+from scripts.tableLock import locks_tables
+
+# Validation rules and messages for each kind of leg
+LEG_RULES = {
+    'withdrawal': {
+        'accountTypes': ('Checking', 'Savings', 'Money Market'),
+        'sign': -1,
+        'checkFunds': True,
+        'notFound': "Source account {accID} not found.",
+        'wrongType': "Incorrect account type selected. Cannot withdraw {amount} from account {accID}.",
+        'insufficient': "Insufficient funds. Cannot withdraw {amount} from account {accID}."
+    },
+    'deposit': {
+        'accountTypes': ('Checking', 'Savings', 'Credit Card', 'Mortgage Loan'),
+        'sign': 1,
+        'checkFunds': False,
+        'notFound': "Destination account {accID} not found.",
+        'wrongType': "Incorrect account type selected. Cannot deposit {amount} to account {accID}."
+    },
+    'directDeposit': {
+        'accountTypes': ('Checking', 'Savings'),
+        'sign': 1,
+        'checkFunds': False,
+        'notFound': "Source account {accID} not found.",
+        'wrongType': "Incorrect account type selected. Cannot deposit {amount} to account {accID}."
+    }
+}
+
+def transaction_type(kind: str, accType: str) -> str:
+    """Returns the TransactionType recorded for a leg on an account type."""
+    if kind == 'withdrawal':
+        return 'Withdrawal'
+    if kind == 'directDeposit':
+        return 'Direct Deposit'
+    if accType == 'Credit Card':
+        return 'Payment to Credit Card'
+    if accType == 'Mortgage Loan':
+        return 'Payment to Mortgage Loan'
+    return 'Deposit'
+
+def _rejected(leg: int, reason: str, rule: dict, accID, amount) -> dict:
+    return {"status": "error", "message": rule[reason].format(accID=accID, amount=amount),
+            "leg": leg, "reason": reason}
+
+def _apply_legs(legs, accInfo, rows: dict, balances: dict):
+    """
+    Validates one posting's legs against the running balances.
+
+    Returns (entries, changes) with the posting's journal entries and the
+    balances it would change, or a rejection dict. `balances` is not modified.
+    """
+    changes = {}
+    entries = []
+    for leg, (kind, accID, amount) in enumerate(legs):
+        rule = LEG_RULES[kind]
+        if accID not in rows:
+            return _rejected(leg, 'notFound', rule, accID, amount)
+        index = rows[accID]
+        accType = accInfo.at[index, 'AccountType']
+        if accType not in rule['accountTypes']:
+            return _rejected(leg, 'wrongType', rule, accID, amount)
+
+        balance = changes.get(accID, balances.get(accID))
+        if balance is None:
+            balance = to_money(accInfo.at[index, 'CurrBal'])
+        if rule['checkFunds'] and amount > balance:
+            return _rejected(leg, 'insufficient', rule, accID, amount)
+
+        value = to_money(amount)
+        changes[accID] = balance + rule['sign'] * value
+        entries.append((accID, transaction_type(kind, accType), value))
+    return entries, changes
+
+def _commit(accInfo, rows: dict, balances: dict, entries: list, transDate) -> list:
+    """Reserves the journal IDs, then commits the balances and journal rows as one unit."""
+    transactionIDs = list(reserve_ids('transaction', len(entries)))
+    transDate = (transDate or date.today()).isoformat()
+    journal = pd.DataFrame([{'TransactionID': transactionID, 'AccountID': accID, 'TransactionType': transType,
+                             'Amount': str(value), 'TransDate': transDate}
+                            for transactionID, (accID, transType, value) in zip(transactionIDs, entries)])
+
+    format_money_columns(accInfo, 'CurrBal', 'CreditLimit')
+    for accID, balance in balances.items():
+        accInfo.at[rows[accID], 'CurrBal'] = str(balance)
+    get_repository().commit({'accounts': accInfo}, {'transactions': journal})
+    return transactionIDs
+
+@locks_tables('accounts.csv', 'transactions.csv')
+def post_many(postings, transDate=None) -> list:
+    """
+    Validates and records several postings against one snapshot of accounts.csv.
+
+    Postings are applied in order, each seeing the balances left by the
+    earlier ones. A rejected posting is skipped without affecting the others,
+    and everything accepted is committed together in one write.
+
+    Parameters
+    ----------
+    postings : list of list of tuple
+        The legs of each posting, as for post().
+    transDate : date, optional
+        Date recorded on the journal rows (today by default).
+
+    Returns
+    -------
+    list of dict
+        One result per posting, in the shape returned by post().
+    """
+    postings = [list(legs) for legs in postings]
+    accPath = table_path('accounts.csv')
+    accInfo = read_table(accPath)
+
+    # First row of each account the postings touch
+    involved = {accID for legs in postings for _, accID, _ in legs}
+    accountIDs = accInfo['AccountID']
+    rows = {}
+    for index, accID in accountIDs[accountIDs.isin(involved)].items():
+        rows.setdefault(accID, index)
+
+    balances = {}
+    entries = []
+    accepted = []
+    results = []
+    for legs in postings:
+        outcome = _apply_legs(legs, accInfo, rows, balances)
+        if isinstance(outcome, dict):
+            results.append(outcome)
+            continue
+        postingEntries, changes = outcome
+        balances.update(changes)
+        accepted.append((len(results), len(entries), len(postingEntries)))
+        entries.extend(postingEntries)
+        results.append(None)
+
+    transactionIDs = _commit(accInfo, rows, balances, entries, transDate) if entries else []
+    for position, first, count in accepted:
+        results[position] = {"status": "success", "message": f"Posted {count} entries.",
+                             "transactionIDs": transactionIDs[first:first + count]}
+    return results
+
+def post(legs, transDate=None) -> dict:
+    """
+    Validates and records a set of legs as one all-or-nothing posting.
+
+    Parameters
+    ----------
+    legs : list of tuple
+        (kind, accID, amount) for each leg, where kind is a key of LEG_RULES
+        and amount is a positive Decimal.
+    transDate : date, optional
+        Date recorded on the journal rows (today by default).
+
+    Returns
+    -------
+    dict
+        - If every leg is valid and recorded:
+          {"status": "success", "message": "Posted {n} entries.", "transactionIDs": [...]}
+        - If a leg is rejected (nothing is written):
+          {"status": "error", "message": "...", "leg": index, "reason": "notFound" | "wrongType" | "insufficient"}
+    """
+    return post_many([legs], transDate)[0]
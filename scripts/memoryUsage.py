@@ -0,0 +1,49 @@
+# memoryUsage.py
+"""
+Peak resident memory (RSS) of the current process.
+
+On Linux the peak is read from /proc/self/status (VmHWM) and can be reset
+with reset_peak_rss(), so it can be measured per run. Resetting writes to
+/proc/self/clear_refs and changes the whole process's figures, so only the
+benchmark scripts call it; the streamed interest accrual reads the peak before
+and after its run instead. Elsewhere the peak falls back to getrusage, which
+reports the peak since the process started, and to None where neither is
+available (Windows).
+"""
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def reset_peak_rss() -> bool:
+    """Resets the peak RSS to the current RSS. Returns False where unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss() -> int:
+    """Returns the peak RSS in bytes, or None if it cannot be measured."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def format_bytes(size: int) -> str:
+    """Formats a byte count as MiB ('n/a' for None)."""
+    return 'n/a' if size is None else f'{size / 2**20:.1f} MiB'
@@ -0,0 +1,162 @@
+# money.py
+"""
+Integer-cents money codec for DataFrame columns.
+
+Money columns (CurrBal, CreditLimit, Amount, MinPayment) used to be converted
+with `.apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))`, a Python
+call per row on every operation. This module converts a whole column to int64
+cents with numpy, does arithmetic on the cents, and formats them back to
+two-decimal strings only when the table is written.
+
+Rounding matches Decimal.quantize(Decimal('0.00')) with the default context
+(ROUND_HALF_EVEN): values are rounded with numpy's round-half-even, and the
+rare values that land within floating-point error of a half cent are
+re-rounded exactly with Decimal.
+"""
+from decimal import Decimal, InvalidOperation
+import numpy as np
+import pandas as pd
+
+CENT = Decimal('0.00')
+
+# Marks a missing amount (NaN/empty) in a cents array
+NA_CENTS = np.iinfo(np.int64).min
+
+# Relative error allowed for float64 products before falling back to Decimal
+_FLOAT_TOLERANCE = 4e-16
+
+
+def to_money(value) -> Decimal:
+    """Rounds one amount to cents, as Decimal(str(x)).quantize(Decimal('0.00'))."""
+    return Decimal(str(value)).quantize(CENT)
+
+
+def _decimal_cents(value) -> int:
+    """Exact conversion of one value to cents, or NA_CENTS."""
+    try:
+        quantized = Decimal(str(value)).quantize(CENT)
+    except (InvalidOperation, ValueError):
+        return NA_CENTS
+    if not quantized.is_finite():
+        return NA_CENTS
+    return int(quantized.scaleb(2))
+
+
+def _round_half_even(scaled: np.ndarray, exact) -> np.ndarray:
+    """
+    Rounds scaled amounts (already in cents) half-to-even. Entries within
+    float error of a half cent are recomputed with exact(i) instead.
+    """
+    rounded = np.rint(scaled)
+    distance = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+    ambiguous = np.flatnonzero(distance <= np.abs(scaled) * _FLOAT_TOLERANCE + 1e-9)
+    result = rounded.astype(np.int64)
+    for i in ambiguous:
+        result[i] = exact(i)
+    return result
+
+
+def to_cents(values) -> np.ndarray:
+    """
+    Converts a column of amounts to int64 cents.
+
+    Parameters
+    ----------
+    values : Series, array or list
+        Floats (as parsed from CSV), numeric strings or Decimals. Missing or
+        unparseable values become NA_CENTS.
+
+    Returns
+    -------
+    ndarray of int64
+    """
+    series = pd.Series(values, copy=False) if not isinstance(values, pd.Series) else values
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype) or series.dtype.kind in 'OSU':
+        if series.map(lambda v: isinstance(v, Decimal)).any():
+            return np.fromiter((_decimal_cents(v) for v in series), dtype=np.int64, count=len(series))
+        numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        numbers = series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    missing = ~np.isfinite(numbers)
+    scaled = np.where(missing, 0.0, numbers) * 100
+    originals = series.to_numpy()
+    cents = _round_half_even(scaled, lambda i: _decimal_cents(originals[i]))
+    cents[missing] = NA_CENTS
+    return cents
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """Returns one cents value as a two-decimal Decimal (NaN if missing)."""
+    if cents == NA_CENTS:
+        return Decimal('NaN')
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def decimal_to_cents(value) -> int:
+    """Returns one amount as int cents, rounded like quantize."""
+    return _decimal_cents(value)
+
+
+def apply_rate(cents: np.ndarray, rate) -> np.ndarray:
+    """
+    Multiplies cents by a rate and rounds half-to-even to whole cents.
+
+    Matches (Decimal(balance) * rate).quantize(Decimal('0.00')) for each
+    element. Missing values stay missing.
+
+    Parameters
+    ----------
+    cents : ndarray of int64
+    rate : Decimal or float, or an array of them
+        Multiplier, e.g. Decimal('1.0033') for one month of interest. An
+        array gives each element its own rate.
+    """
+    cents = np.asarray(cents, dtype=np.int64)
+    missing = cents == NA_CENTS
+    if np.ndim(rate):
+        rates = np.asarray(rate, dtype=object)
+        factors = rates.astype(np.float64)
+        exact_rate = lambda i: rates[i] if isinstance(rates[i], Decimal) else Decimal(str(rates[i]))
+    else:
+        exact = rate if isinstance(rate, Decimal) else Decimal(str(rate))
+        factors = float(exact)
+        exact_rate = lambda i: exact
+    scaled = np.where(missing, 0, cents).astype(np.float64) * factors
+    result = _round_half_even(
+        scaled, lambda i: int((cents_to_decimal(cents[i]) * exact_rate(i)).quantize(CENT).scaleb(2))
+    )
+    result[missing] = NA_CENTS
+    return result
+
+
+def format_cents(cents: np.ndarray, missing: str = '') -> np.ndarray:
+    """
+    Formats cents as two-decimal strings ('-12.05'); missing values become `missing`.
+    """
+    cents = np.asarray(cents, dtype=np.int64)
+    if cents.size == 0:
+        return np.empty(0, dtype=object)
+    na = cents == NA_CENTS
+    magnitude = np.abs(np.where(na, 0, cents))
+    whole = (magnitude // 100).astype(str)
+    frac = np.char.zfill((magnitude % 100).astype(str), 2)
+    sign = np.where(np.where(na, 0, cents) < 0, '-', '')
+    text = np.char.add(np.char.add(np.char.add(sign, whole), '.'), frac)
+    return np.where(na, missing, text).astype(object)
+
+
+def format_money(values) -> np.ndarray:
+    """Rounds a whole column to cents and formats it for writing."""
+    return format_cents(to_cents(values))
+
+
+def format_money_columns(df: pd.DataFrame, *columns) -> pd.DataFrame:
+    """
+    Formats the given money columns of `df` in place as two-decimal strings,
+    ready to write. Columns that are not present are skipped.
+    """
+    for column in columns:
+        if column in df.columns:
+            df[column] = format_money(df[column])
+    return df
@@ -0,0 +1,65 @@
+# moneyBenchmark.py
+"""
+Compares per-row Decimal conversion of a money column with the integer-cents
+codec in money.py.
+
+Run from the root dir:
+    python -m scripts.moneyBenchmark [rows]
+"""
+import sys
+import time
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from scripts.money import to_cents, apply_rate, format_cents
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def run_benchmark(rows: int = 1_000_000, seed: int = 0) -> dict:
+    """
+    Rounds, accrues interest on and formats a random balance column both ways.
+
+    Parameters
+    ----------
+    rows : int
+        Number of balances to generate.
+    seed : int
+        Seed for the random balances.
+
+    Returns
+    -------
+    dict
+        Seconds taken by each approach, the speedup and the number of rows
+        whose results differ (expected to be 0).
+    """
+    rng = np.random.default_rng(seed)
+    balances = pd.Series(np.round(rng.uniform(-50_000, 50_000, rows), 2))
+    rate = Decimal('1.0033')
+
+    def decimal_path():
+        quantized = balances.apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
+        accrued = quantized.apply(lambda x: (x * rate).quantize(Decimal('0.00')))
+        return accrued.astype(str).to_numpy()
+
+    def cents_path():
+        return format_cents(apply_rate(to_cents(balances), rate))
+
+    expected, decimal_seconds = _timed(decimal_path)
+    actual, cents_seconds = _timed(cents_path)
+    return {
+        "rows": rows,
+        "decimal_seconds": round(decimal_seconds, 3),
+        "cents_seconds": round(cents_seconds, 3),
+        "speedup": round(decimal_seconds / cents_seconds, 1) if cents_seconds else float('inf'),
+        "mismatches": int((expected != actual).sum())
+    }
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    result = run_benchmark(rows)
+    print(f"{result['rows']} rows: Decimal apply {result['decimal_seconds']}s, "
+          f"int cents {result['cents_seconds']}s ({result['speedup']}x), "
+          f"{result['mismatches']} mismatches")
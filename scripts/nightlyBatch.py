@@ -0,0 +1,743 @@
+# nightlyBatch.py
+"""
+Nightly batch pipeline.
+
+The nightly jobs used to be separate cron jobs that each read and rewrote
+accounts.csv, bills.csv and transactions.csv on their own, and the two
+midnight jobs could interleave on the same files. run_nightly_batch() locks
+the three tables, loads accounts and bills once and runs every stage in
+STAGES order on those in-memory tables.
+
+The stages run per partition: accounts and bills are split by a hash of
+CustomerID (a bill goes with its customer and the owner of its payment
+account), so every join a stage makes stays inside one partition. With
+NIGHTLY_WORKERS > 1 the partitions run in a process pool.
+
+The partitions' outputs are merged, in partition order, and committed once
+with the repository's commit(): the accounts and bills rows, the new bills
+and postings with real IDs drawn at that point, and one checkpoint row per
+partition in the batchRuns table naming the run, the partition and the
+run's partition map (which hash buckets were merged into which partition,
+fixed when the run starts so a bill added since cannot move rows). The
+commit is atomic, so the partitions are either fully applied and
+checkpointed or not at all. When a partition fails, the partitions before
+it are still committed and checkpointed, in one commit. The next call for
+the same run date resumes the run with the same run ID, stages and
+partition map, skipping the partitions already committed; a run date
+whose stages all completed is not run again.
+Every account is therefore charged interest or auto-paid at most once per
+run date. The commit depends on the number of partitions but not on the
+number of workers or on which worker finishes first.
+
+A throttled run (NIGHTLY_THROTTLE=1, or a BatchThrottle passed in) does
+not hold the table locks for the whole run: before each partition it waits
+for the web app to be within its latency targets (scripts/batchThrottle.py),
+then locks the tables, reads that partition's rows by ID, runs it, commits
+only those rows (bills through the bills index, which is patched rather than
+rebuilt) and unlocks them again, so online requests wait for one slice at
+most. The tables are loaded and partitioned once, when the run starts.
+Partitions then hold about NIGHTLY_SLICE_ROWS accounts each and run one at a
+time in this process.
+
+When nights were missed (the app was down over midnight), the scheduler
+calls catch_up_missed_runs() at startup. It finds the last date each stage
+finished in batchRuns and runs the missed span as one run for today:
+monthly interest compounds every missed 1st of the month in one step, and
+the bills that fell due are paid in due-date order, as the missed runs
+would have, with a single load and a single commit.
+
+Stages, in order:
+    monthly_interest   - savings and money market interest (1st of the month)
+    bill_processing    - overdue bills marked Late, bills due today paid
+    credit_statements  - statement bills for credit cards on their cycle day without an active bill
+    credit_interest    - interest on late credit card and mortgage bills
+
+Run `python -m scripts.nightlyBatch [YYYY-MM-DD] [--workers=<n>] [--catch-up]` from the root dir to run
+it by hand.
+"""
+import os
+import re
+import sys
+import math
+import time
+import uuid
+import multiprocessing
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from scripts.tableCache import STORAGE_BACKEND, reads_from_csv, table_path
+from scripts.tableLock import table_lock
+from scripts.repository import CsvRepository, get_repository
+from scripts.transactionJournal import TRANSACTION_COLUMNS
+from scripts.idAllocator import IdAllocator, ProvisionalAllocator, get_allocator, scoped_allocator
+from scripts.billIndex import BillIndex
+from scripts.money import format_money_columns
+from scripts.calcInterest import MONTHLY_RATES, accrue_frame
+from scripts.billPayment import STATEMENT_COLUMNS, process_bills_frame, statement_bills_frame
+from scripts.calcCreditInterest import charge_credit_interest
+from scripts.batchThrottle import NIGHTLY_THROTTLE, BatchThrottle
+
+# Worker processes for the partitions (1 runs them one after another in this process)
+NIGHTLY_WORKERS = int(os.environ.get('NIGHTLY_WORKERS', '1'))
+
+# Number of CustomerID partitions, each checkpointed on its own; 0 means one per worker
+NIGHTLY_PARTITIONS = int(os.environ.get('NIGHTLY_PARTITIONS', '0'))
+
+# Accounts per partition of a throttled run, when the partition count is not set
+NIGHTLY_SLICE_ROWS = int(os.environ.get('NIGHTLY_SLICE_ROWS', '10000'))
+
+# Columns of the batchRuns table: one checkpoint row per committed partition.
+# Remaining is the number of partitions of the run still to commit after it.
+# Since is the last day already processed before the run (the day before RunDate unless nights were missed).
+# PartitionMap is the run's partition_map, fixed when the run starts, as ';'-separated partition numbers.
+RUN_COLUMNS = ['CheckpointID', 'RunID', 'RunDate', 'Since', 'Stages', 'Partitions', 'Partition', 'Remaining',
+               'CommittedAt', 'PartitionMap']
+
+
+class BatchSnapshot:
+    """
+    The tables one nightly run, or one partition of it, works on.
+
+    Attributes
+    ----------
+    run_date : date
+        The day being processed.
+    since : date
+        The last day processed before this run; the run covers the days
+        after it up to and including `run_date`.
+    accounts, bills : DataFrame
+        The accounts and bills tables, updated in place by the stages. New
+        bills are appended after the first `loaded_bills` rows, where later
+        stages see (and may update) them.
+    postings : list of DataFrame
+        Rows for transactions.csv, in the order the stages produced them.
+    """
+
+    def __init__(self, run_date: date, accounts: pd.DataFrame, bills: pd.DataFrame, since: date = None):
+        self.run_date = run_date
+        self.since = since or run_date - timedelta(days=1)
+        self.accounts = accounts
+        self.bills = bills
+        self.loaded_bills = len(bills)
+        self.postings = []
+
+    def add_bills(self, bills: pd.DataFrame) -> None:
+        if bills is not None and len(bills):
+            self.bills = pd.concat([self.bills, bills], ignore_index=True)
+
+    def post(self, rows: pd.DataFrame) -> None:
+        if rows is not None and len(rows):
+            self.postings.append(rows)
+
+
+def _months_between(since: date, run_date: date) -> int:
+    """Number of 1sts of the month after `since`, up to and including `run_date`."""
+    return (run_date.year * 12 + run_date.month) - (since.year * 12 + since.month)
+
+
+def _monthly_interest(snapshot: BatchSnapshot):
+    months = _months_between(snapshot.since, snapshot.run_date)
+    if months < 1:
+        return None
+    result, postings = accrue_frame(snapshot.accounts, list(MONTHLY_RATES), snapshot.run_date, periods=months)
+    snapshot.post(postings)
+    return [result]
+
+
+def _bill_processing(snapshot: BatchSnapshot):
+    # A month at a time, so the next bill of a bill paid in one month is paid in its turn in the next
+    results, since = [], snapshot.since
+    while since < snapshot.run_date:
+        until = min((pd.Timestamp(since) + pd.DateOffset(months=1)).date(), snapshot.run_date)
+        monthResults, nextBills, postings = process_bills_frame(snapshot.accounts, snapshot.bills, until, since)
+        snapshot.add_bills(nextBills)
+        snapshot.post(postings)
+        results += monthResults
+        since = until
+    return results
+
+
+def _credit_statements(snapshot: BatchSnapshot):
+    newBills = statement_bills_frame(snapshot.accounts, snapshot.bills, snapshot.run_date, snapshot.since)
+    snapshot.add_bills(newBills)
+    return [{"status": "success", "message": f"Created {len(newBills)} new credit card bill(s)."}]
+
+
+def _credit_interest(snapshot: BatchSnapshot):
+    results, interestLogs = charge_credit_interest(snapshot.accounts, snapshot.bills, snapshot.run_date)
+    snapshot.post(interestLogs)
+    return results or [{"status": "info", "message": "No interest applied. Either all accounts are paid or there are no late bills."}]
+
+
+# The stages of a nightly run, in the order they run. Each takes the snapshot,
+# updates it in place and returns its result messages, or None if it has
+# nothing to do on the run date.
+STAGES = [
+    ('monthly_interest', _monthly_interest),
+    ('bill_processing', _bill_processing),
+    ('credit_statements', _credit_statements),
+    ('credit_interest', _credit_interest),
+]
+
+
+def _load(repository, table: str, columns: list = None) -> pd.DataFrame:
+    """Loads a table, or returns an empty one with `columns` if it does not exist yet."""
+    try:
+        df = repository.load(table)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        df = pd.DataFrame()
+    return df if len(df.columns) or not columns else pd.DataFrame(columns=columns)
+
+
+def _read_rows(repository, table: str, ids, columns: list = None) -> pd.DataFrame:
+    """Reads the rows of a table with these IDs, or returns an empty frame with `columns` if it does not exist yet."""
+    try:
+        df = repository.read_rows(table, ids)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        df = pd.DataFrame()
+    return df if len(df.columns) or not columns else pd.DataFrame(columns=columns)
+
+
+def _int_keys(values: pd.Series) -> np.ndarray:
+    keys = pd.to_numeric(values, errors='coerce')
+    return keys.fillna(-1).astype(np.int64).to_numpy()
+
+
+def _hashed_rows(accounts: pd.DataFrame, bills: pd.DataFrame, partitions: int):
+    """Returns the CustomerID hash bucket of each account row and of each bill row."""
+    def hashed(keys):
+        return (pd.util.hash_array(keys) % np.uint64(partitions)).astype(np.int64)
+
+    accountParts = hashed(_int_keys(accounts['CustomerID'])) if 'CustomerID' in accounts.columns \
+        else np.zeros(len(accounts), dtype=np.int64)
+    billParts = hashed(_int_keys(bills['CustomerID'])) if 'CustomerID' in bills.columns \
+        else np.zeros(len(bills), dtype=np.int64)
+    return accountParts, billParts
+
+
+def partition_map(accounts: pd.DataFrame, bills: pd.DataFrame, partitions: int) -> np.ndarray:
+    """
+    Returns the partition each of the `partitions` CustomerID hash buckets is
+    merged into. Buckets that a bill's payment account or a duplicated
+    AccountID would connect are merged, so a stage never needs a row from
+    another partition.
+    """
+    if partitions == 1:
+        return np.zeros(1, dtype=np.int64)
+    accountIDs = _int_keys(accounts['AccountID']) if 'AccountID' in accounts.columns else np.full(len(accounts), -1)
+    accountParts, billParts = _hashed_rows(accounts, bills, partitions)
+
+    # Pairs of partitions that have to be processed together
+    owners = pd.DataFrame({'AccountID': accountIDs, 'part': accountParts})
+    owners = owners[owners['AccountID'] != -1]
+    links = [owners.groupby('AccountID')['part'].transform('min').to_numpy(), owners['part'].to_numpy()]
+    if 'PaymentAccID' in bills.columns:
+        paid = pd.DataFrame({'AccountID': _int_keys(bills['PaymentAccID']), 'bill': billParts})
+        paid = paid.merge(owners, on='AccountID')
+        links = [np.concatenate([links[0], paid['bill'].to_numpy()]), np.concatenate([links[1], paid['part'].to_numpy()])]
+
+    root = np.arange(partitions)
+
+    def find(p):
+        while root[p] != p:
+            p = root[p]
+        return p
+
+    for a, b in set(zip(links[0].tolist(), links[1].tolist())):
+        a, b = find(a), find(b)
+        if a != b:
+            root[max(a, b)] = min(a, b)
+    return np.array([find(p) for p in range(partitions)])
+
+
+def partition_rows(accounts: pd.DataFrame, bills: pd.DataFrame, partitions: int, roots: np.ndarray = None):
+    """
+    Assigns every account and bill row to one of `partitions` partitions.
+
+    Rows go by a hash of CustomerID, and the hash buckets are merged as
+    `roots` says (see partition_map; computed from these rows by default).
+    A run computes its map once and keeps it, so a row stays in the same
+    partition however the tables change while the run is under way.
+
+    Returns
+    -------
+    (ndarray, ndarray)
+        The partition number of each account row and of each bill row.
+    """
+    roots = partition_map(accounts, bills, partitions) if roots is None else np.asarray(roots, dtype=np.int64)
+    accountParts, billParts = _hashed_rows(accounts, bills, partitions)
+    return roots[accountParts], roots[billParts]
+
+
+def _run_partition(run_date: date, since: date, names: list, accounts: pd.DataFrame, bills: pd.DataFrame) -> dict:
+    """
+    Runs the named stages on one partition. Runs in a worker process when
+    the pool is used, so it only works on the frames it is given; IDs are
+    provisional (negative) and replaced when the partitions are merged.
+    """
+    snapshot = BatchSnapshot(run_date, accounts, bills, since)
+    report = []
+    stages = dict(STAGES)
+    with scoped_allocator(ProvisionalAllocator()):
+        for name in names:
+            stageStart = time.perf_counter()
+            try:
+                results = stages[name](snapshot)
+            except Exception as e:
+                report.append({"stage": name, "status": "failed", "seconds": time.perf_counter() - stageStart,
+                               "results": [{"status": "error", "message": str(e)}]})
+                return {"report": report, "error": f"Stage {name} failed: {e}"}
+            report.append({"stage": name, "status": "skipped" if results is None else "done",
+                           "seconds": time.perf_counter() - stageStart, "results": results or []})
+    return {"report": report, "error": None, "accounts": snapshot.accounts,
+            "bills": snapshot.bills.iloc[:snapshot.loaded_bills], "new_bills": snapshot.bills.iloc[snapshot.loaded_bills:],
+            "postings": snapshot.postings}
+
+
+def _pool_context():
+    # Never fork: the scheduler calls this from a thread of a multi-threaded app
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _merge_report(names: list, outcomes: list) -> list:
+    """Combines the partitions' stage reports; a stage's seconds are summed over the partitions."""
+    report = []
+    for name in names:
+        entries = [entry for outcome in outcomes for entry in outcome["report"] if entry["stage"] == name]
+        if not entries:
+            break
+        statuses = {entry["status"] for entry in entries}
+        status = "failed" if "failed" in statuses else "done" if "done" in statuses else "skipped"
+        report.append({"stage": name, "status": status, "seconds": round(sum(entry["seconds"] for entry in entries), 3),
+                       "results": [line for entry in entries for line in entry["results"]]})
+    return report
+
+
+def _ordered(frames: list, positions: list) -> pd.DataFrame:
+    """Concatenates partition frames and puts their rows back at their original positions."""
+    kept = [(frame, pos) for frame, pos in zip(frames, positions) if len(frame)] or list(zip(frames, positions))[:1]
+    merged = pd.concat([frame for frame, _ in kept], ignore_index=True)
+    merged.index = np.concatenate([pos for _, pos in kept])
+    return merged.sort_index().reset_index(drop=True)
+
+
+# A provisional (negative) bill ID in a stage's result message
+_PROVISIONAL_BILL = re.compile(r'\b([Bb]ill(?: ID)?) (-\d+)\b')
+
+
+def _relabel_bills(outcomes: list, newBills: pd.DataFrame) -> None:
+    """
+    Puts the real IDs that _renumber gave the partitions' new bills (in
+    `outcomes` order) into their stage results in place of the provisional
+    ones, e.g. for next bills paid later in a catch-up run.
+    """
+    start = 0
+    for outcome in outcomes:
+        count = len(outcome["new_bills"])
+        if not count:
+            continue
+        real = dict(zip(outcome["new_bills"]['BillID'].tolist(), newBills['BillID'].iloc[start:start + count].tolist()))
+        start += count
+
+        def relabel(match):
+            return f"{match.group(1)} {real.get(int(match.group(2)), match.group(2))}"
+
+        for entry in outcome["report"]:
+            for line in entry["results"]:
+                if isinstance(line.get("message"), str):
+                    line["message"] = _PROVISIONAL_BILL.sub(relabel, line["message"])
+
+
+def _renumber(frames: list, column: str, entity: str, allocator, columns: list = None) -> pd.DataFrame:
+    """Concatenates `frames` and gives their rows consecutive real IDs in `column`."""
+    if not frames:
+        return pd.DataFrame(columns=columns) if columns else None
+    merged = pd.concat(frames, ignore_index=True)
+    if columns:
+        merged = merged.reindex(columns=columns)
+    ids = allocator.reserve(entity, len(merged))
+    merged[column] = np.arange(ids.start, ids.stop, dtype=np.int64)
+    return merged
+
+
+def _checkpoint(runs: pd.DataFrame, run_id: str, run_date: date, since: date, stages: list, roots: np.ndarray,
+                part: int, remaining: int) -> pd.DataFrame:
+    """Returns the batchRuns table with the checkpoint row of one committed partition added."""
+    checkpoint = pd.DataFrame([[f"{run_id}-{part}", run_id, run_date.isoformat(), since.isoformat(), ';'.join(stages),
+                                len(roots), part, remaining, datetime.now().isoformat(timespec='seconds'),
+                                ';'.join(str(root) for root in roots.tolist())]],
+                              columns=RUN_COLUMNS)
+    return pd.concat([frame for frame in (runs, checkpoint) if len(frame)], ignore_index=True)
+
+
+def _plan(runs: pd.DataFrame, run_date: date, selected: list, partitions: int, since: date) -> dict:
+    """
+    Decides what a call for `run_date` has to do, given the batchRuns table:
+    resume the run left incomplete for that date, start a new run for the
+    selected stages that have not completed yet, or nothing.
+    """
+    runs = runs[runs['RunDate'].astype(str) == run_date.isoformat()]
+    finished = set(runs.loc[pd.to_numeric(runs['Remaining'], errors='coerce') == 0, 'RunID'])
+    unfinished = runs[~runs['RunID'].isin(finished)]
+    if len(unfinished):
+        first = unfinished.iloc[0]
+        started = pd.to_datetime(first.get('Since'), errors='coerce')
+        # Checkpoints written before the map was recorded leave it to be computed again
+        roots = first.get('PartitionMap')
+        roots = np.array([int(root) for root in str(roots).split(';')], dtype=np.int64) if pd.notna(roots) else None
+        return {"run_id": first['RunID'], "stages": str(first['Stages']).split(';'), "partitions": int(first['Partitions']),
+                "committed": set(unfinished.loc[unfinished['RunID'] == first['RunID'], 'Partition'].astype(int)),
+                "since": since if pd.isna(started) else started.date(), "roots": roots, "resumed": True}
+    done = {stage for stages in runs['Stages'].astype(str) for stage in stages.split(';')}
+    return {"run_id": f"{run_date:%Y%m%d}-{uuid.uuid4().hex[:8]}", "stages": [name for name in selected if name not in done],
+            "partitions": partitions, "committed": set(), "since": since, "roots": None, "resumed": False}
+
+
+def run_nightly_batch(run_date: date = None, stages: list = None, csv_dir: str = None,
+                      workers: int = None, partitions: int = None, since: date = None,
+                      throttle: BatchThrottle = None) -> dict:
+    """
+    Runs the nightly stages on one snapshot of the tables, committing and
+    checkpointing each partition, or resumes the run left incomplete for
+    `run_date`.
+
+    Parameters
+    ----------
+    run_date : date, optional
+        The day to process (today by default).
+    stages : list of str, optional
+        Names of the stages to run, in STAGES order whatever order they are
+        given in. Defaults to every stage. Stages already completed for
+        `run_date` are left out, and an incomplete run is resumed with the
+        stages it was started with.
+    csv_dir : str, optional
+        Directory holding the CSV tables (csvFiles/, or STORAGE_BACKEND, by
+        default). New IDs are then drawn from that directory's sequences.
+    workers : int, optional
+        Worker processes to run the partitions in (NIGHTLY_WORKERS by default).
+    partitions : int, optional
+        Number of CustomerID partitions (NIGHTLY_PARTITIONS, or one per
+        worker). A resumed run keeps the number it was started with.
+    since : date, optional
+        The last day already processed, when nights were missed (the day
+        before `run_date` by default). Monthly interest is compounded for
+        every 1st after it and bills due after it are paid in due-date
+        order; see catch_up_missed_runs. A resumed run keeps its own.
+    throttle : BatchThrottle, optional
+        Runs the partitions one slice at a time, locking the tables per
+        slice and waiting on the throttle before each (a BatchThrottle from
+        the environment when NIGHTLY_THROTTLE=1). `workers` is then ignored.
+
+    Returns
+    -------
+    dict
+        {"status": "success", "message": "...", "run_id": "...", "resumed": bool,
+         "run_date": "YYYY-MM-DD",
+         "stages": [{"stage": name, "status": "done" or "skipped", "seconds": s, "results": [...]}],
+         "partitions": n, "committed": n, "workers": n, "load_seconds": s,
+         "compute_seconds": s, "commit_seconds": s, "seconds": s}, plus
+        "throttle" (see BatchThrottle.summary) and "max_lock_seconds", the
+        longest a slice held the table locks, for a throttled run,
+        {"status": "info", "message": "..."} if every stage already ran for
+        `run_date`, or {"status": "error", "message": "...", "stages": [...]}
+        if a stage failed. Partitions committed before the failure stay
+        committed and the next call resumes from the failed one. A stage's
+        seconds are summed over the partitions; compute_seconds is the wall
+        time of all of them.
+    """
+    run_date = run_date or date.today()
+    names = [name for name, _ in STAGES]
+    unknown = [name for name in stages or [] if name not in names]
+    if unknown:
+        return {"status": "error", "message": f"Unknown stage {', '.join(unknown)}. Use one of {', '.join(names)}."}
+    selected = [name for name in names if stages is None or name in stages]
+    workers = max(1, workers or NIGHTLY_WORKERS)
+    since = since or run_date - timedelta(days=1)
+    if since >= run_date:
+        return {"status": "error", "message": f"The last processed day {since.isoformat()} is not before {run_date.isoformat()}."}
+
+    repository = CsvRepository(csv_dir) if csv_dir else get_repository()
+    allocator = IdAllocator(csv_dir) if csv_dir else get_allocator()
+    paths = {table: os.path.join(csv_dir, f'{table}.csv') if csv_dir else table_path(f'{table}.csv')
+             for table in ('accounts', 'bills', 'transactions', 'batchRuns')}
+
+    throttle = throttle if throttle is not None else BatchThrottle() if NIGHTLY_THROTTLE else None
+    if throttle is not None:
+        return _run_throttled(run_date, selected, since, partitions, repository, allocator, paths, csv_dir, throttle)
+
+    started = time.perf_counter()
+    with table_lock(*paths.values()):
+        repository.recover()
+        runs = _load(repository, 'batchRuns', RUN_COLUMNS)
+        plan = _plan(runs, run_date, selected, max(1, partitions or NIGHTLY_PARTITIONS or workers), since)
+        if not plan["stages"]:
+            return {"status": "info", "message": f"Nightly batch for {run_date.isoformat()} already ran.",
+                    "run_date": run_date.isoformat(), "stages": []}
+        runID, selected, partitions, since = plan["run_id"], plan["stages"], plan["partitions"], plan["since"]
+        accounts = _load(repository, 'accounts')
+        bills = _load(repository, 'bills', STATEMENT_COLUMNS)
+        loadSeconds = round(time.perf_counter() - started, 3)
+
+        computeStart = time.perf_counter()
+        roots = plan["roots"] if plan["roots"] is not None else partition_map(accounts, bills, partitions)
+        accountParts, billParts = partition_rows(accounts, bills, partitions, roots)
+        # Every partition with rows, in order; committed ones are carried through unchanged
+        parts = [part for part in np.unique(np.concatenate([accountParts, billParts])).tolist()] or [0]
+        rows = [(np.flatnonzero(accountParts == part), np.flatnonzero(billParts == part)) for part in parts]
+        current = [[accounts.iloc[accountRows].reset_index(drop=True), bills.iloc[billRows].reset_index(drop=True)]
+                   for accountRows, billRows in rows]
+        pending = [k for k, part in enumerate(parts) if part not in plan["committed"]]
+
+        outcomes, finished, failure = [], [], None
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=_pool_context()) \
+            if workers > 1 and len(pending) > 1 else None
+        try:
+            if pool is not None:
+                futures = [pool.submit(_run_partition, run_date, since, selected, *current[k]) for k in pending]
+                results = (future.result() for future in futures)
+            else:
+                results = (_run_partition(run_date, since, selected, *current[k]) for k in pending)
+
+            for k, outcome in zip(pending, results):
+                outcomes.append(outcome)
+                if outcome["error"]:
+                    failure = f"{outcome['error']} (partition {parts[k]})"
+                    # Run in this process, the stages may have changed its rows before failing
+                    current[k] = [accounts.iloc[rows[k][0]].reset_index(drop=True), bills.iloc[rows[k][1]].reset_index(drop=True)]
+                    break
+                current[k] = [outcome["accounts"], outcome["bills"]]
+                finished.append(k)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        computeSeconds = round(time.perf_counter() - computeStart, 3)
+
+        # The partitions that finished, before a failure or all of them, are merged and
+        # committed once, together with one checkpoint row per partition
+        commitStart = time.perf_counter()
+        if finished:
+            done = [outcomes[position] for position in range(len(finished))]
+            newBills = _renumber([outcome["new_bills"] for outcome in done if len(outcome["new_bills"])],
+                                 'BillID', 'bill', allocator)
+            if newBills is not None:
+                _relabel_bills(done, newBills)
+            journalRows = _renumber([rows for outcome in done for rows in outcome["postings"]],
+                                    'TransactionID', 'transaction', allocator, TRANSACTION_COLUMNS)
+            for position, k in enumerate(finished):
+                runs = _checkpoint(runs, runID, run_date, since, selected, roots, parts[k],
+                                   len(pending) - position - 1)
+            # Partitions not run (or committed by an earlier call) still hold the
+            # parsed money columns, so they are formatted like the stages format theirs
+            accountsTable = format_money_columns(_ordered([part[0] for part in current], [r[0] for r in rows]),
+                                                 'CurrBal')
+            billsTable = format_money_columns(pd.concat([_ordered([part[1] for part in current], [r[1] for r in rows])]
+                                                        + ([newBills] if newBills is not None else []), ignore_index=True),
+                                              'Amount', 'MinPayment')
+            repository.commit({'accounts': accountsTable, 'bills': billsTable, 'batchRuns': runs},
+                              {'transactions': journalRows})
+            if (csv_dir or STORAGE_BACKEND == 'csv') and reads_from_csv(paths['bills']):
+                BillIndex(paths['bills']).rebuild()
+        commitSeconds = round(time.perf_counter() - commitStart, 3)
+
+    report = _merge_report(selected, outcomes)
+    if failure:
+        return {"status": "error", "run_id": runID, "run_date": run_date.isoformat(), "stages": report,
+                "message": f"{failure}. {len(finished)} partition(s) of run {runID} were committed; "
+                           f"the next run for {run_date.isoformat()} resumes from here."}
+    seconds = round(time.perf_counter() - started, 3)
+    ran = sum(1 for stage in report if stage["status"] == "done")
+    action = "resumed and committed" if plan["resumed"] else "committed"
+    return {"status": "success",
+            "message": f"Nightly batch for {run_date.isoformat()} {action}: {ran} stage(s) in {seconds}s.",
+            "run_id": runID, "resumed": plan["resumed"], "run_date": run_date.isoformat(), "stages": report,
+            "partitions": len(parts), "committed": len(pending), "workers": workers,
+            "load_seconds": loadSeconds, "compute_seconds": computeSeconds,
+            "commit_seconds": commitSeconds, "seconds": seconds}
+
+
+def _run_throttled(run_date: date, selected: list, since: date, partitions: int, repository, allocator,
+                   paths: dict, csv_dir: str, throttle: BatchThrottle) -> dict:
+    """
+    run_nightly_batch for a throttled run: one partition at a time, each
+    under its own table locks, after waiting on the throttle.
+
+    The tables are loaded and partitioned once, when the run starts, and the
+    partition map is stored with each checkpoint, so a bill added online
+    between slices cannot move rows into a partition that was already
+    committed or is still to come. A slice then reads only its own accounts
+    and bills, by ID, as they are at that point (online changes in between
+    are kept), and commits only those rows: the accounts rows are rewritten
+    in place, and the bills through the bills index (BillIndex.spliced),
+    which is patched rather than rebuilt. Rows added online after the run
+    started are left to the next run.
+    """
+    started = time.perf_counter()
+    with table_lock(*paths.values()):
+        repository.recover()
+        runs = _load(repository, 'batchRuns', RUN_COLUMNS)
+        accounts = _load(repository, 'accounts')
+        count = max(1, partitions or NIGHTLY_PARTITIONS or math.ceil(len(accounts) / max(1, NIGHTLY_SLICE_ROWS)))
+        plan = _plan(runs, run_date, selected, count, since)
+        if not plan["stages"]:
+            return {"status": "info", "message": f"Nightly batch for {run_date.isoformat()} already ran.",
+                    "run_date": run_date.isoformat(), "stages": []}
+        bills = _load(repository, 'bills', STATEMENT_COLUMNS)
+    runID, selected, count, since = plan["run_id"], plan["stages"], plan["partitions"], plan["since"]
+    roots = plan["roots"] if plan["roots"] is not None else partition_map(accounts, bills, count)
+    accountParts, billParts = partition_rows(accounts, bills, count, roots)
+    parts = np.unique(np.concatenate([accountParts, billParts])).tolist() or [0]
+    pending = [part for part in parts if part not in plan["committed"]]
+    members = {part: (accounts.loc[accountParts == part, 'AccountID'] if 'AccountID' in accounts.columns else [],
+                      bills.loc[billParts == part, 'BillID'] if 'BillID' in bills.columns else [])
+               for part in pending}
+    indexed = (csv_dir or STORAGE_BACKEND == 'csv') and reads_from_csv(paths['bills'])
+    loadSeconds = round(time.perf_counter() - started, 3)
+
+    outcomes, computeSeconds, commitSeconds, maxLock = [], 0.0, 0.0, 0.0
+    for position, part in enumerate(pending):
+        throttle.wait(f"partition {part} ({position + 1} of {len(pending)}) of run {runID}")
+        with table_lock(*paths.values()):
+            lockStart = time.perf_counter()
+            repository.recover()
+            runs = _load(repository, 'batchRuns', RUN_COLUMNS)
+            accountIDs, billIDs = members[part]
+            index = BillIndex(paths['bills']) if indexed and os.path.exists(paths['bills']) else None
+            sliced = index.read_bills(billIDs) if index is not None else None
+            accounts = _read_rows(repository, 'accounts', accountIDs)
+            bills = sliced[1] if sliced is not None else _read_rows(repository, 'bills', billIDs, STATEMENT_COLUMNS)
+
+            computeStart = time.perf_counter()
+            outcome = _run_partition(run_date, since, selected, accounts, bills)
+            computeSeconds += time.perf_counter() - computeStart
+            outcomes.append(outcome)
+            if outcome["error"]:
+                return {"status": "error", "run_id": runID, "run_date": run_date.isoformat(),
+                        "stages": _merge_report(selected, outcomes), "throttle": throttle.summary(),
+                        "message": f"{outcome['error']} (partition {part}). {position} partition(s) of run "
+                                   f"{runID} were committed; the next run for {run_date.isoformat()} resumes from here."}
+
+            commitStart = time.perf_counter()
+            added = _renumber([outcome["new_bills"]] if len(outcome["new_bills"]) else [], 'BillID', 'bill', allocator)
+            if added is not None:
+                _relabel_bills([outcome], added)
+            journalRows = _renumber(outcome["postings"], 'TransactionID', 'transaction', allocator, TRANSACTION_COLUMNS)
+            runs = _checkpoint(runs, runID, run_date, since, selected, roots, part, len(pending) - position - 1)
+            accountRows = format_money_columns(outcome["accounts"], 'CurrBal')
+            billRows = format_money_columns(outcome["bills"], 'Amount', 'MinPayment')
+            if added is not None:
+                added = format_money_columns(added, 'Amount', 'MinPayment')
+            if sliced is not None:
+                columns = index.columns
+                content, records = index.spliced(sliced[0], billRows.reindex(columns=columns),
+                                                 None if added is None else added.reindex(columns=columns))
+                repository.commit({'bills': content, 'batchRuns': runs}, {'transactions': journalRows},
+                                  {'accounts': accountRows})
+                # Online requests read the bills index as soon as the locks are released
+                index.save_records(records)
+            else:
+                repository.commit({'batchRuns': runs},
+                                  {'transactions': journalRows, 'bills': added if added is not None else []},
+                                  {'accounts': accountRows, 'bills': billRows})
+            commitSeconds += time.perf_counter() - commitStart
+            maxLock = max(maxLock, time.perf_counter() - lockStart)
+
+    report = _merge_report(selected, outcomes)
+    seconds = round(time.perf_counter() - started, 3)
+    ran = sum(1 for stage in report if stage["status"] == "done")
+    action = "resumed and committed" if plan["resumed"] else "committed"
+    return {"status": "success",
+            "message": f"Nightly batch for {run_date.isoformat()} {action} in {len(pending)} throttled slice(s): "
+                       f"{ran} stage(s) in {seconds}s.",
+            "run_id": runID, "resumed": plan["resumed"], "run_date": run_date.isoformat(), "stages": report,
+            "partitions": len(parts), "committed": len(pending), "workers": 1,
+            "load_seconds": loadSeconds, "compute_seconds": round(computeSeconds, 3),
+            "commit_seconds": round(commitSeconds, 3), "seconds": seconds,
+            "throttle": throttle.summary(), "max_lock_seconds": round(maxLock, 3)}
+
+
+def _last_run_dates(runs: pd.DataFrame) -> dict:
+    """Maps each stage to the latest run date of a finished run that included it."""
+    finished = runs[runs['RunID'].isin(runs.loc[pd.to_numeric(runs['Remaining'], errors='coerce') == 0, 'RunID'])]
+    last = {}
+    for runDate, stages in zip(finished['RunDate'].astype(str), finished['Stages'].astype(str)):
+        day = date.fromisoformat(runDate)
+        for stage in stages.split(';'):
+            last[stage] = max(last.get(stage, day), day)
+    return last
+
+
+def catch_up_missed_runs(today: date = None, csv_dir: str = None, workers: int = None, partitions: int = None,
+                         throttle: BatchThrottle = None) -> dict:
+    """
+    Runs the nights missed while the app was down as one run for `today`.
+
+    Runs left incomplete on earlier dates are resumed first. Then, for each
+    stage, the last date it finished is looked up in batchRuns and every
+    stage behind `today` runs once with that date as `since`: monthly
+    interest is compounded in closed form for the 1sts that were missed and
+    the bills that fell due are paid in due-date order (see
+    run_nightly_batch). Nothing is run if no nightly run was ever recorded.
+
+    Returns
+    -------
+    dict
+        {"status": "success" | "info" | "error", "message": "...",
+         "runs": [run_nightly_batch results]}
+    """
+    today = today or date.today()
+    repository = CsvRepository(csv_dir) if csv_dir else get_repository()
+    options = {"csv_dir": csv_dir, "workers": workers, "partitions": partitions, "throttle": throttle}
+    runs = _load(repository, 'batchRuns', RUN_COLUMNS)
+    results = []
+
+    # Finish interrupted runs first, so none of their partitions is processed twice
+    finished = set(runs.loc[pd.to_numeric(runs['Remaining'], errors='coerce') == 0, 'RunID'])
+    unfinished = sorted(set(runs.loc[~runs['RunID'].isin(finished), 'RunDate'].astype(str)))
+    for runDate in (day for day in unfinished if day < today.isoformat()):
+        results.append(run_nightly_batch(date.fromisoformat(runDate), **options))
+        if results[-1]["status"] == "error":
+            return {"status": "error", "message": results[-1]["message"], "runs": results}
+    if unfinished:
+        runs = _load(repository, 'batchRuns', RUN_COLUMNS)
+
+    last = _last_run_dates(runs)
+    if not last:
+        return {"status": "info", "message": "No nightly run recorded yet; nothing to catch up.", "runs": results}
+    behind = {}
+    for name, _ in STAGES:
+        if name in last and last[name] < today:
+            behind.setdefault(last[name], []).append(name)
+    if not behind:
+        return {"status": "info", "message": "The nightly batch is up to date.", "runs": results}
+
+    for since in sorted(behind):
+        results.append(run_nightly_batch(today, stages=behind[since], since=since, **options))
+        if results[-1]["status"] == "error":
+            return {"status": "error", "message": results[-1]["message"], "runs": results}
+    first = min(behind) + timedelta(days=1)
+    return {"status": "success", "runs": results,
+            "message": f"Caught up the nightly batch for {first.isoformat()} to {today.isoformat()} in one run."}
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    workers = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--workers=')), None)
+    runDate = date.fromisoformat(args[0]) if args else None
+    if '--catch-up' in sys.argv:
+        outcome = catch_up_missed_runs(runDate, workers=workers)
+        results = outcome["runs"]
+    else:
+        outcome = run_nightly_batch(runDate, workers=workers)
+        results = [outcome]
+    for result in results:
+        for stage in result.get("stages", []):
+            print(f"{stage['stage']}: {stage['status']} in {stage['seconds']}s")
+            for line in stage["results"]:
+                print(f"    {line['status'].upper()}: {line['message']}")
+        if result["status"] == "success":
+            print(f"run {result['run_id']}, {result['committed']} of {result['partitions']} partition(s) on "
+                  f"{result['workers']} worker(s): load {result['load_seconds']}s, "
+                  f"stages {result['compute_seconds']}s, commit {result['commit_seconds']}s")
+    print(outcome["message"])
@@ -0,0 +1,111 @@
+# nightlyBenchmark.py
+"""
+Times the nightly batch over synthetic customers with one worker and with
+a process pool.
+
+Both runs use the same CustomerID partitions, so they must commit the same
+bytes; the benchmark checks that and reports the speedup of the stages and
+of the whole run.
+
+Run from the root dir:
+    python -m scripts.nightlyBenchmark [customers] [--workers=<n>]
+"""
+import os
+import sys
+import time
+import shutil
+import filecmp
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import date
+from scripts.nightlyBatch import run_nightly_batch
+
+RUN_DATE = date(2025, 3, 1)
+
+def write_tables(directory: str, customers: int, seed: int = 0) -> None:
+    """
+    Writes accounts.csv, bills.csv and an empty transactions.csv for
+    `customers` customers, each with a checking, a savings and a credit card
+    account, a utility bill due on RUN_DATE and a card bill that is either
+    Late or Paid.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(200, 200 + customers)
+    accounts = pd.DataFrame({
+        'AccountID': np.concatenate([ids * 10 + 1, ids * 10 + 2, ids * 10 + 3]),
+        'CustomerID': np.tile(ids, 3),
+        'AccountType': np.repeat(['Checking', 'Savings', 'Credit Card'], customers),
+        'CurrBal': np.concatenate([np.round(rng.uniform(0, 5_000, customers), 2),
+                                   np.round(rng.uniform(0, 50_000, customers), 2),
+                                   -np.round(rng.uniform(0, 2_000, customers), 2)]),
+        'DateOpened': '2025-01-01',
+        'CreditLimit': np.concatenate([np.full(2 * customers, np.nan), np.full(customers, 5_000.0)]),
+        'APR': np.concatenate([np.full(2 * customers, np.nan), np.full(customers, 21.0)])
+    }).sort_values('CustomerID', kind='stable')
+    accounts.to_csv(os.path.join(directory, 'accounts.csv'), index=False)
+
+    amounts = np.round(rng.uniform(10, 300, customers), 2)
+    cardBalances = -accounts.loc[accounts['AccountType'] == 'Credit Card', 'CurrBal'].to_numpy()
+    pd.DataFrame({
+        'BillID': np.arange(1, 2 * customers + 1),
+        'CustomerID': np.concatenate([ids, ids]),
+        'PayeeName': np.repeat(['Power Co', 'Evergreen Bank'], customers),
+        'PayeeAddress': 'Somewhere',
+        'Amount': np.concatenate([-amounts, -cardBalances]),
+        'DueDate': np.repeat([RUN_DATE.isoformat(), '2025-02-01'], customers),
+        'PaymentAccID': np.concatenate([ids * 10 + 1, ids * 10 + 3]),
+        'MinPayment': np.concatenate([amounts, np.full(customers, 25.0)]),
+        'BillType': np.repeat(['Regular', 'CreditCard'], customers),
+        'IsRecurring': 1,
+        'Status': np.concatenate([np.full(customers, 'Pending'), rng.choice(['Late', 'Paid'], customers)])
+    }).to_csv(os.path.join(directory, 'bills.csv'), index=False)
+
+    with open(os.path.join(directory, 'transactions.csv'), 'w') as f:
+        f.write('TransactionID,AccountID,TransactionType,Amount,TransDate\n')
+
+def run_benchmark(customers: int = 200_000, workers: int = None) -> dict:
+    """
+    Runs the nightly batch for RUN_DATE on one worker and on `workers`
+    (the CPU count by default), each over the same number of partitions.
+
+    Returns
+    -------
+    dict
+        Stage and total seconds of both runs, their speedups, and whether the
+        two runs committed identical files.
+    """
+    workers = workers or os.cpu_count() or 1
+    tmpdir = tempfile.mkdtemp()
+    try:
+        result = {"customers": customers, "workers": workers}
+        for label, count in (("serial", 1), ("parallel", workers)):
+            directory = os.path.join(tmpdir, label)
+            os.mkdir(directory)
+            write_tables(directory, customers)
+            start = time.perf_counter()
+            run = run_nightly_batch(RUN_DATE, csv_dir=directory, workers=count, partitions=workers)
+            if run["status"] != "success":
+                raise RuntimeError(run["message"])
+            result[f"{label}_seconds"] = round(time.perf_counter() - start, 3)
+            result[f"{label}_stage_seconds"] = run["compute_seconds"]
+            result["partitions"] = run["partitions"]
+
+        result["stage_speedup"] = round(result["serial_stage_seconds"] / result["parallel_stage_seconds"], 2)
+        result["speedup"] = round(result["serial_seconds"] / result["parallel_seconds"], 2)
+        result["identical"] = all(filecmp.cmp(os.path.join(tmpdir, 'serial', name), os.path.join(tmpdir, 'parallel', name),
+                                              shallow=False)
+                                  for name in ('accounts.csv', 'bills.csv', 'transactions.csv'))
+        return result
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    workers = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--workers=')), None)
+    result = run_benchmark(int(args[0]) if args else 200_000, workers)
+    print(f"{result['customers']} customers, {result['partitions']} partitions")
+    print(f"1 worker: stages {result['serial_stage_seconds']}s, total {result['serial_seconds']}s")
+    print(f"{result['workers']} workers: stages {result['parallel_stage_seconds']}s, total {result['parallel_seconds']}s")
+    print(f"speedup: stages {result['stage_speedup']}x, total {result['speedup']}x, "
+          f"identical output: {result['identical']}")
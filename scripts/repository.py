@@ -0,0 +1,676 @@
+# repository.py
+"""
+Repository layer over the bank's tables.
+
+Each table (accounts, transactions, bills, archivedBills, archivedLoans,
+persons, customers, employees, logs, batchRuns) is addressed by name. Two
+backends are available and picked with the STORAGE_BACKEND environment
+variable:
+
+    csv     - the files in csvFiles/, read and written through the table cache
+              exactly as before (default)
+    sqlite  - one SQLite database (SQLITE_PATH, csvFiles/bank.db by default)
+              with indexes on AccountID, CustomerID, PaymentAccID, Status,
+              DueDate and each table's ID column
+
+With the sqlite backend, read_table()/write_table() calls for files in
+csvFiles/ are routed here, so existing call sites keep working unchanged.
+Point lookups (get/find) use the indexes instead of loading the whole table.
+
+commit() replaces some tables, rewrites some rows of others and appends rows
+to others as one unit: in one SQL transaction with sqlite, and through a
+commit record that recover() rolls forward after a crash with csv. With csv,
+rewritten rows are spliced into the file and every other row is copied
+through as raw bytes, so a few rows of a large table are written without
+parsing it; read_rows() reads rows by ID the same way.
+
+Run `python -m scripts.repository migrate` from the root dir to copy csvFiles/
+into the SQLite database.
+"""
+import io
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from scripts.tableCache import CSV_DIR, STORAGE_BACKEND, get_cache
+from scripts.tableLock import table_lock
+
+# Table name -> column holding the table's ID
+TABLES = {
+    'accounts': 'AccountID',
+    'transactions': 'TransactionID',
+    'bills': 'BillID',
+    'archivedBills': 'BillID',
+    'archivedLoans': 'AccountID',
+    'persons': 'ID',
+    'customers': 'CustomerID',
+    'employees': 'EmployeeID',
+    'logs': 'LogID',
+    'batchRuns': 'CheckpointID',
+}
+
+# Columns indexed in every table that has them
+INDEXED_COLUMNS = ('AccountID', 'CustomerID', 'PaymentAccID', 'Status', 'DueDate')
+
+# Record of a CSV commit whose files are staged but not all in place yet
+COMMIT_RECORD = 'pendingCommit.json'
+
+BACKENDS = ('csv', 'sqlite')
+DEFAULT_SQLITE_PATH = os.path.join(CSV_DIR, 'bank.db')
+
+
+def _check_table(table: str) -> None:
+    if table not in TABLES:
+        raise KeyError(f"Unknown table '{table}'.")
+
+
+def _row_spans(data: bytes, key: str):
+    """
+    Splits a CSV file's bytes into its header and one line per row, and
+    returns (header, ids, offsets, lengths), the ID column as numbers. Returns
+    None if the rows cannot be told apart by line breaks (a quoted field with
+    a newline in it).
+    """
+    headerEnd = data.find(b'\n') + 1
+    if not headerEnd:
+        return None
+    header, body = data[:headerEnd], data[headerEnd:]
+    ends = np.flatnonzero(np.frombuffer(body, dtype=np.uint8) == ord('\n')) + 1
+    if len(body) and (not len(ends) or ends[-1] != len(body)):
+        ends = np.append(ends, len(body))
+    offsets = np.concatenate([[0], ends[:-1]]).astype(np.int64) if len(ends) else ends
+    try:
+        keys = pd.read_csv(io.BytesIO(header + body), usecols=[key], dtype=str, keep_default_na=False,
+                           skip_blank_lines=False)[key]
+    except (ValueError, pd.errors.EmptyDataError):
+        return None
+    if len(keys) != len(ends):
+        return None
+    return header, pd.to_numeric(keys, errors='coerce').to_numpy(), offsets + headerEnd, ends - offsets
+
+
+def _id_mask(values, ids) -> np.ndarray:
+    """Marks the values found in `ids`, comparing them as numbers."""
+    wanted = pd.to_numeric(pd.Series(list(ids), dtype=object), errors='coerce').dropna().unique()
+    return np.isin(pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(), wanted)
+
+
+def _replace_rows(df: pd.DataFrame, rows: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Returns `df` with each of `rows` in place of the row with its `key`."""
+    positions = pd.Series(np.arange(len(df)), index=pd.to_numeric(df[key], errors='coerce').to_numpy())
+    positions = positions[~positions.index.duplicated()]
+    rowKeys = pd.to_numeric(rows[key], errors='coerce')
+    found = rowKeys.isin(positions.index).to_numpy()
+    replaced = df.astype(object)
+    replaced.iloc[positions.loc[rowKeys[found].to_numpy()].to_numpy()] = rows[found].astype(object).to_numpy()
+    return replaced
+
+
+def _filter(df: pd.DataFrame, criteria: dict) -> pd.DataFrame:
+    """Applies equality (scalar) or membership (list) criteria to a frame."""
+    mask = pd.Series(True, index=df.index)
+    for column, value in criteria.items():
+        if isinstance(value, (list, tuple, set)):
+            mask &= df[column].isin(list(value))
+        else:
+            mask &= df[column] == value
+    return df[mask].copy()
+
+
+class CsvRepository:
+    """
+    Tables stored as CSV files, matching the app's existing behaviour.
+
+    Parameters
+    ----------
+    csv_dir : str, optional
+        Directory holding the CSV files (csvFiles/ by default).
+    """
+    backend = 'csv'
+
+    def __init__(self, csv_dir: str = None):
+        self.csv_dir = csv_dir or CSV_DIR
+
+    def path(self, table: str) -> str:
+        """Returns the CSV file backing a table."""
+        _check_table(table)
+        return os.path.join(self.csv_dir, f"{table}.csv")
+
+    def load(self, table: str, **kwargs) -> pd.DataFrame:
+        """Returns the whole table. kwargs are passed to pandas.read_csv."""
+        return get_cache().read(self.path(table), **kwargs)
+
+    def save(self, table: str, df: pd.DataFrame) -> None:
+        """Replaces the whole table with `df`."""
+        get_cache().write(df, self.path(table))
+
+    def append(self, table: str, rows) -> None:
+        """Adds rows (a list of dicts) to the end of the table."""
+        rows = list(rows)
+        if not rows:
+            return
+        if table == 'transactions':
+            from scripts.transactionJournal import TransactionJournal, get_journal
+            journal = get_journal() if self.csv_dir == CSV_DIR else TransactionJournal(self.path(table))
+            journal.append(rows)
+            return
+        df = self.load(table)
+        get_cache().write(pd.concat([df, pd.DataFrame(rows)], ignore_index=True), self.path(table))
+
+    def find(self, table: str, **criteria) -> pd.DataFrame:
+        """Returns the rows matching every column=value (or column=[values]) criterion."""
+        return _filter(self.load(table), criteria)
+
+    def read_rows(self, table: str, ids) -> pd.DataFrame:
+        """
+        Returns the rows whose ID is in `ids`, in table order, parsing only
+        those rows and the ID column. The caller should hold the table lock.
+        """
+        with open(self.path(table), 'rb') as f:
+            data = f.read()
+        spans = _row_spans(data, TABLES[table])
+        if spans is None:
+            df = self.load(table)
+            return df[_id_mask(df[TABLES[table]], ids)].reset_index(drop=True)
+        header, keys, offsets, lengths = spans
+        picked = np.flatnonzero(_id_mask(keys, ids))
+        view = memoryview(data)
+        body = b''.join(view[offset:offset + length] for offset, length in
+                        zip(offsets[picked].tolist(), lengths[picked].tolist()))
+        return pd.read_csv(io.BytesIO(header + body))
+
+    def _updated(self, table: str, rows: pd.DataFrame, added: pd.DataFrame = None) -> bytes:
+        """
+        Returns the table's file with each of `rows` in place of the row with
+        its ID and `added` appended. Every other row is copied through as raw
+        bytes, unless rows cannot be told apart by line breaks.
+        """
+        key = TABLES[table]
+        with open(self.path(table), 'rb') as f:
+            data = f.read()
+        spans = _row_spans(data, key)
+        if spans is None:
+            df = self.load(table)
+            columns = list(df.columns)
+            df = _replace_rows(df, rows.reindex(columns=columns), key)
+            if added is not None and len(added):
+                df = pd.concat([df, added.reindex(columns=columns)], ignore_index=True)
+            return df.to_csv(index=False).encode('utf-8')
+
+        header, keys, offsets, lengths = spans
+        columns = header.decode('utf-8').strip().split(',')
+        terminator = '\r\n' if header.endswith(b'\r\n') else '\n'
+        rows = rows.reindex(columns=columns)
+        changed = {}
+        for rowID, line in zip(pd.to_numeric(rows[key], errors='coerce').tolist(),
+                               rows.to_csv(index=False, header=False, lineterminator=terminator).encode('utf-8')
+                               .splitlines(keepends=True)):
+            changed[rowID] = line
+        out = io.BytesIO()
+        view = memoryview(data)
+        position = 0
+        for i in np.flatnonzero(_id_mask(keys, changed)).tolist():
+            out.write(view[position:offsets[i]])
+            out.write(changed[keys[i]])
+            position = int(offsets[i] + lengths[i])
+        out.write(view[position:])
+        if len(data) and not data.endswith(b'\n'):
+            out.write(terminator.encode('utf-8'))
+        if added is not None and len(added):
+            out.write(added.reindex(columns=columns).to_csv(index=False, header=False, lineterminator=terminator)
+                      .encode('utf-8'))
+        return out.getvalue()
+
+    def commit(self, saves: dict, appends: dict = None, updates: dict = None) -> None:
+        """
+        Replaces the tables in `saves`, rewrites the rows in `updates` and
+        appends rows to the tables in `appends` (table name -> DataFrame) as
+        one unit. A table in `saves` may also be given as the bytes of its new
+        file. Rows in `updates` replace the rows with the same ID; rows with
+        an ID the table does not have are dropped.
+
+        Each new table and each block of appended rows is first written to a
+        staging file next to its table and fsynced; a table with updated rows
+        is staged whole, its other rows copied through as raw bytes, together
+        with any rows appended to it. A commit record naming them is then
+        written, and only after that are the staging files renamed into place
+        and the rows appended. If the process dies part way, recover()
+        finishes the commit from the record, so either every change lands or
+        none does. The tables stay locked throughout.
+        """
+        appends = {table: rows for table, rows in (appends or {}).items() if len(rows)}
+        updates = {table: rows for table, rows in (updates or {}).items() if len(rows)}
+        tables = list(dict.fromkeys(list(saves) + list(updates) + list(appends)))
+        while True:
+            # Finish an interrupted commit before locking: its record may name
+            # tables this commit does not lock, which sort before the record
+            self.recover()
+            with table_lock(*(self.path(table) for table in tables), self._record_path()):
+                # One that was interrupted while we waited is finished on the next pass
+                if os.path.exists(self._record_path()):
+                    continue
+                record = {'replace': {}, 'append': {}}
+                try:
+                    for table, df in saves.items():
+                        staged = self._stage(df, self.path(table))
+                        record['replace'][table] = staged
+                    for table, rows in updates.items():
+                        content = self._updated(table, rows, appends.pop(table, None))
+                        record['replace'][table] = self._stage(content, self.path(table))
+                    for table, rows in appends.items():
+                        path = self.path(table)
+                        staged = self._stage(rows, path)
+                        record['append'][table] = {'rows': staged, 'size': os.path.getsize(path) if os.path.exists(path) else 0}
+                    tmpPath = f'{self._record_path()}.{os.getpid()}.tmp'
+                    with open(tmpPath, 'w') as f:
+                        json.dump(record, f)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmpPath, self._record_path())
+                    _fsync_dir(self.csv_dir)
+                except Exception:
+                    for staged in list(record['replace'].values()) + [entry['rows'] for entry in record['append'].values()]:
+                        if os.path.exists(staged):
+                            os.remove(staged)
+                    raise
+                self.recover()
+            return
+
+    def recover(self) -> bool:
+        """
+        Finishes a commit that was interrupted after its record was written.
+        Returns True if there was one.
+
+        Appended rows whose ID is already in the table (they were appended
+        before the interruption) are not appended again, and staging files
+        that are gone were already renamed into place.
+        """
+        recordPath = self._record_path()
+        if not os.path.exists(recordPath):
+            return False
+        with open(recordPath) as f:
+            record = json.load(f)
+        tables = list(record['replace']) + list(record['append'])
+        with table_lock(*(self.path(table) for table in tables), recordPath):
+            # Another worker may have finished it while we waited for the locks
+            if not os.path.exists(recordPath):
+                return False
+            with open(recordPath) as f:
+                record = json.load(f)
+            for table, entry in record['append'].items():
+                if os.path.exists(entry['rows']):
+                    rows = pd.read_csv(entry['rows'], dtype=str, keep_default_na=False)
+                    rows = rows[~rows[TABLES[table]].isin(self._appended_ids(table, entry['size']))]
+                    self._append_rows(table, rows)
+                    os.remove(entry['rows'])
+            for table, staged in record['replace'].items():
+                if os.path.exists(staged):
+                    os.replace(staged, self.path(table))
+                get_cache().invalidate(self.path(table))
+            _fsync_dir(self.csv_dir)
+            os.remove(recordPath)
+        return True
+
+    def _record_path(self) -> str:
+        return os.path.join(self.csv_dir, COMMIT_RECORD)
+
+    @staticmethod
+    def _stage(df, path: str) -> str:
+        """Writes `df` (a DataFrame, or a file's bytes) to a staging file next to `path` and fsyncs it."""
+        staged = f'{path}.{os.getpid()}.commit'
+        if isinstance(df, bytes):
+            with open(staged, 'wb') as f:
+                f.write(df)
+                f.flush()
+                os.fsync(f.fileno())
+            return staged
+        with open(staged, 'w', newline='') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        return staged
+
+    def _appended_ids(self, table: str, size: int) -> list:
+        """Returns the IDs of the rows added to a table past byte `size`."""
+        path = self.path(table)
+        if not os.path.exists(path) or os.path.getsize(path) <= size:
+            return []
+        with open(path, 'rb') as f:
+            header = f.readline()
+            f.seek(max(size, len(header)))
+            tail = f.read()
+        try:
+            added = pd.read_csv(io.BytesIO(header + tail), dtype=str, keep_default_na=False)
+        except pd.errors.EmptyDataError:
+            return []
+        return added[TABLES[table]].tolist() if TABLES[table] in added.columns else []
+
+    def _append_rows(self, table: str, rows: pd.DataFrame) -> None:
+        if not len(rows):
+            return
+        if table == 'transactions':
+            from scripts.transactionJournal import TransactionJournal, get_journal
+            journal = get_journal() if self.csv_dir == CSV_DIR else TransactionJournal(self.path(table))
+            journal.append_frame(rows)
+            return
+        self.save(table, pd.concat([self.load(table), rows], ignore_index=True))
+
+    def get(self, table: str, key):
+        """Returns the row whose ID column equals `key`, or None."""
+        rows = self.find(table, **{TABLES[table]: key})
+        return None if rows.empty else rows.iloc[0]
+
+
+def _to_sql_value(value):
+    """Converts a DataFrame cell to the value SQLite stores for it."""
+    if value is None:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value))
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (datetime, date)):
+        return str(value)
+    return str(value)
+
+
+def _lookup_values(value) -> list:
+    """
+    Returns the stored forms a lookup value may have.
+
+    Migrated rows keep the CSV text ('7001') while rows saved from a frame keep
+    their type (7001), so lookups match either form.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return [str(bool(value))]
+    if isinstance(value, (int, np.integer)) or (isinstance(value, (float, np.floating)) and float(value).is_integer()):
+        number = int(value)
+        return [number, str(number), f"{number}.0"]
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.lstrip('-').isdigit():
+            return [value, int(stripped), f"{int(stripped)}.0"]
+        return [value]
+    return [_to_sql_value(value)]
+
+
+def _infer_column(values: pd.Series) -> pd.Series:
+    """Gives a column the dtype read_csv would have inferred from its text."""
+    present = values.dropna()
+    if present.empty:
+        # read_csv gives an all-empty column float NaNs
+        return values.astype(float)
+    if present.map(lambda v: isinstance(v, str) and v in ('True', 'False')).all():
+        if len(present) == len(values):
+            return values.map({'True': True, 'False': False})
+        return values.map(lambda v: {'True': True, 'False': False}.get(v, v))
+    try:
+        return pd.to_numeric(values)
+    except (ValueError, TypeError):
+        return values.infer_objects()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteRepository:
+    """
+    Tables stored in a single SQLite database.
+
+    Columns are declared without a type so every value keeps the type it was
+    saved with, and loads convert columns the way read_csv would.
+
+    Parameters
+    ----------
+    db_path : str, optional
+        Database file (SQLITE_PATH or csvFiles/bank.db by default).
+    """
+    backend = 'sqlite'
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.environ.get('SQLITE_PATH', DEFAULT_SQLITE_PATH)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    @staticmethod
+    def _columns(conn, table: str) -> list:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    @staticmethod
+    def _create(conn, table: str, columns) -> None:
+        """Creates a table with the given columns and its indexes."""
+        conn.execute(f"CREATE TABLE {_quote(table)} ({', '.join(_quote(c) for c in columns)})")
+        for column in dict.fromkeys((TABLES[table],) + INDEXED_COLUMNS):
+            if column in columns:
+                conn.execute(f"CREATE INDEX {_quote(f'idx_{table}_{column}')} "
+                             f"ON {_quote(table)} ({_quote(column)})")
+
+    def _insert(self, conn, table: str, columns, records) -> None:
+        placeholders = ', '.join('?' for _ in columns)
+        conn.executemany(
+            f"INSERT INTO {_quote(table)} ({', '.join(_quote(c) for c in columns)}) VALUES ({placeholders})",
+            ([_to_sql_value(record.get(c)) for c in columns] for record in records)
+        )
+
+    def _frame(self, cursor, columns, kwargs: dict) -> pd.DataFrame:
+        """Builds a DataFrame from query rows, honouring common read_csv options."""
+        df = pd.DataFrame(cursor.fetchall(), columns=columns, dtype=object)
+        if kwargs.get('dtype') is str:
+            df = df.apply(lambda col: col.map(lambda v: v if v is None else str(v))).infer_objects()
+        else:
+            df = df.apply(_infer_column) if not df.empty else df
+        if kwargs.get('keep_default_na') is False:
+            df = df.fillna('')
+        return df
+
+    def load(self, table: str, **kwargs) -> pd.DataFrame:
+        """Returns the whole table. dtype=str and keep_default_na are honoured."""
+        _check_table(table)
+        conn = self._connect()
+        try:
+            columns = self._columns(conn, table)
+            if not columns:
+                return pd.DataFrame()
+            cursor = conn.execute(f"SELECT * FROM {_quote(table)} ORDER BY rowid")
+            return self._frame(cursor, columns, kwargs)
+        finally:
+            conn.close()
+
+    def _replace(self, conn, table: str, df: pd.DataFrame) -> None:
+        columns = [str(c) for c in df.columns]
+        if self._columns(conn, table) != columns:
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            self._create(conn, table, columns)
+        else:
+            conn.execute(f"DELETE FROM {_quote(table)}")
+        self._insert(conn, table, columns, df.to_dict(orient='records'))
+
+    def _add(self, conn, table: str, rows: list) -> None:
+        columns = self._columns(conn, table)
+        if not columns:
+            columns = list(dict.fromkeys(c for row in rows for c in row))
+            self._create(conn, table, columns)
+        self._insert(conn, table, columns, rows)
+
+    def save(self, table: str, df: pd.DataFrame) -> None:
+        """Replaces the whole table with `df` in one transaction."""
+        _check_table(table)
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    self._replace(conn, table, df)
+            finally:
+                conn.close()
+
+    def append(self, table: str, rows) -> None:
+        """Adds rows (a list of dicts) to the end of the table."""
+        _check_table(table)
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    self._add(conn, table, rows)
+            finally:
+                conn.close()
+
+    def _update(self, conn, table: str, rows: pd.DataFrame) -> None:
+        key = TABLES[table]
+        columns = [c for c in self._columns(conn, table) if c in rows.columns and c != key]
+        if not columns:
+            return
+        assignments = ', '.join(f"{_quote(c)} = ?" for c in columns)
+        for record in rows.to_dict(orient='records'):
+            lookups = _lookup_values(record[key])
+            conn.execute(f"UPDATE {_quote(table)} SET {assignments} WHERE {_quote(key)} IN ({', '.join('?' for _ in lookups)})",
+                         [_to_sql_value(record[c]) for c in columns] + lookups)
+
+    def commit(self, saves: dict, appends: dict = None, updates: dict = None) -> None:
+        """
+        Replaces the tables in `saves`, rewrites the rows in `updates` (by
+        ID) and appends rows to the tables in `appends` (table name ->
+        DataFrame) in one transaction.
+        """
+        appends = {table: rows for table, rows in (appends or {}).items() if len(rows)}
+        updates = {table: rows for table, rows in (updates or {}).items() if len(rows)}
+        for table in list(saves) + list(updates) + list(appends):
+            _check_table(table)
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    for table, df in saves.items():
+                        self._replace(conn, table, df)
+                    for table, rows in updates.items():
+                        self._update(conn, table, rows)
+                    for table, rows in appends.items():
+                        self._add(conn, table, rows.to_dict(orient='records'))
+            finally:
+                conn.close()
+
+    def recover(self) -> bool:
+        """SQLite commits cannot be left half done; always False."""
+        return False
+
+    def find(self, table: str, **criteria) -> pd.DataFrame:
+        """Returns the rows matching every column=value (or column=[values]) criterion."""
+        _check_table(table)
+        conn = self._connect()
+        try:
+            columns = self._columns(conn, table)
+            if not columns:
+                return pd.DataFrame()
+            clauses, params = [], []
+            for column, value in criteria.items():
+                values = value if isinstance(value, (list, tuple, set)) else [value]
+                lookups = [v for item in values for v in _lookup_values(item)]
+                clauses.append(f"{_quote(column)} IN ({', '.join('?' for _ in lookups)})")
+                params.extend(lookups)
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+            cursor = conn.execute(f"SELECT * FROM {_quote(table)}{where} ORDER BY rowid", params)
+            return self._frame(cursor, columns, {})
+        finally:
+            conn.close()
+
+    def read_rows(self, table: str, ids) -> pd.DataFrame:
+        """Returns the rows whose ID is in `ids`, in table order."""
+        ids = list(ids)
+        # A few hundred IDs per query keeps under SQLite's limit on bound parameters
+        chunks = [self.find(table, **{TABLES[table]: ids[start:start + 500]}) for start in range(0, len(ids), 500)]
+        return pd.concat(chunks, ignore_index=True) if chunks else self.find(table, **{TABLES[table]: []})
+
+    def get(self, table: str, key):
+        """Returns the row whose ID column equals `key`, or None."""
+        rows = self.find(table, **{TABLES[table]: key})
+        return None if rows.empty else rows.iloc[0]
+
+
+def _fsync_dir(directory: str) -> None:
+    """Makes renames in `directory` durable."""
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_repository():
+    """Returns the process-wide repository for STORAGE_BACKEND."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            if STORAGE_BACKEND not in BACKENDS:
+                raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}'. Use one of {', '.join(BACKENDS)}.")
+            _repository = SqliteRepository() if STORAGE_BACKEND == 'sqlite' else CsvRepository()
+        return _repository
+
+
+def migrate_csv_to_sqlite(csv_dir: str = None, db_path: str = None) -> dict:
+    """
+    Copies every table in csvFiles/ into a SQLite database.
+
+    Values are copied as the text stored in the CSV files. Tables that already
+    exist in the database are replaced, so the migration can be re-run.
+
+    Parameters
+    ----------
+    csv_dir : str, optional
+        Directory holding the CSV files (csvFiles/ by default).
+    db_path : str, optional
+        Destination database (SQLITE_PATH or csvFiles/bank.db by default).
+
+    Returns
+    -------
+    dict
+        {"status": "success", "message": "..."} with the rows copied per table.
+    """
+    source = CsvRepository(csv_dir)
+    target = SqliteRepository(db_path)
+    copied = []
+    for table in TABLES:
+        path = source.path(table)
+        if not os.path.exists(path):
+            continue
+        try:
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        except pd.errors.EmptyDataError:
+            continue
+        # Empty CSV fields become NULL, as read_csv would see them
+        df = df.astype(object).where(df != '', None)
+        target.save(table, df)
+        copied.append(f"{table}: {len(df)}")
+
+    if not copied:
+        return {"status": "error", "message": "No CSV tables found to migrate."}
+    return {"status": "success", "message": f"Migrated to {target.db_path} ({', '.join(copied)})."}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ['migrate']:
+        print("Usage: python -m scripts.repository migrate [db_path]")
+        sys.exit(1)
+    print(migrate_csv_to_sqlite(db_path=sys.argv[2] if len(sys.argv) > 2 else None)["message"])
@@ -0,0 +1,221 @@
+# requestStats.py
+"""
+Online request load, published by the web workers for the batch worker.
+
+install_request_stats(app) counts the requests a web worker is handling and
+times them. Once a second (REQUEST_STATS_PUBLISH), and as soon as the worker
+goes idle, a background thread of the worker writes its in-flight count and
+the p95 latency of the requests it finished in the last REQUEST_STATS_WINDOW
+seconds to csvFiles/requestStats/<host>-<pid>.json, so any process on the
+host can see how busy the web app is without asking it; requests never wait
+on the write. read_request_load() combines the workers' files. A worker
+removes its file when it exits (close_request_stats, from gunicorn's
+worker_exit); a file not written for a whole window, or left by a process of
+this host that is gone, belongs to an idle or stopped worker and is ignored.
+
+The batch throttle (scripts/batchThrottle.py) backs off while the web app is
+over its latency or in-flight targets.
+"""
+import os
+import json
+import time
+import socket
+import threading
+from collections import deque
+from scripts.tableLock import CSV_DIR
+
+# Seconds of finished requests the p95 covers
+STATS_WINDOW = float(os.environ.get('REQUEST_STATS_WINDOW', '30'))
+
+# Seconds between writes of a worker's stats file
+PUBLISH_INTERVAL = float(os.environ.get('REQUEST_STATS_PUBLISH', '1'))
+
+# Where the web workers publish their stats
+STATS_DIR = os.path.join(CSV_DIR, 'requestStats')
+
+# Most recent request latencies kept per worker
+_MAX_SAMPLES = 4096
+
+
+def _p95(values: list) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+class RequestStats:
+    """
+    In-flight count and recent latencies of one web worker.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Where to publish (csvFiles/requestStats/ by default).
+    clock : callable, optional
+        Returns the current time in seconds (time.time by default).
+    """
+
+    def __init__(self, directory: str = None, clock=time.time):
+        self.directory = directory or STATS_DIR
+        self.clock = clock
+        self.in_flight = 0
+        self._latencies = deque(maxlen=_MAX_SAMPLES)
+        self._lock = threading.Lock()
+        self._published = 0.0
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._publisher = None
+        self._publisher_pid = None
+
+    @property
+    def path(self) -> str:
+        # Looked up on use: an app created before gunicorn forks belongs to each worker
+        return os.path.join(self.directory, f"{socket.gethostname()}-{os.getpid()}.json")
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            # Threads do not survive gunicorn's fork, so each worker starts its own on its first request
+            if self._publisher_pid != os.getpid() and not self._closed.is_set():
+                self._publisher_pid = os.getpid()
+                self._publisher = threading.Thread(target=self._publish_loop, name='request-stats', daemon=True)
+                self._publisher.start()
+
+    def finished(self, seconds: float) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._latencies.append((self.clock(), seconds))
+            idle = self.in_flight == 0
+        # Going idle is published straight away, so a stale file never shows requests in flight
+        if idle:
+            self._wake.set()
+
+    def _publish_loop(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(PUBLISH_INTERVAL)
+            self._wake.clear()
+            if not self._closed.is_set():
+                self.publish(force=True)
+
+    def close(self) -> None:
+        """Stops publishing and removes this worker's stats file."""
+        self._closed.set()
+        self._wake.set()
+        if self._publisher is not None and self._publisher_pid == os.getpid():
+            self._publisher.join(PUBLISH_INTERVAL + 1)
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def snapshot(self) -> dict:
+        """Returns {"in_flight", "p95_ms", "requests", "updated"} for the current window."""
+        now = self.clock()
+        with self._lock:
+            recent = [seconds for finished, seconds in self._latencies if finished >= now - STATS_WINDOW]
+            inFlight = self.in_flight
+        return {"in_flight": inFlight, "p95_ms": round(_p95(recent) * 1000, 1), "requests": len(recent),
+                "updated": now}
+
+    def publish(self, force: bool = False) -> None:
+        """Writes the snapshot to this worker's stats file, at most once per PUBLISH_INTERVAL."""
+        now = self.clock()
+        if not force and now - self._published < PUBLISH_INTERVAL:
+            return
+        self._published = now
+        path = self.path
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmpPath = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmpPath, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmpPath, path)
+        except OSError:
+            # Stats are advisory; a request never fails because of them
+            pass
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_request_load(directory: str = None, now: float = None) -> dict:
+    """
+    Combines the stats the web workers published in the last window. Files
+    left by processes of this host that are gone are removed.
+
+    Returns
+    -------
+    dict
+        {"in_flight": requests in flight across workers,
+         "p95_ms": the highest worker p95, "workers": workers reporting}
+    """
+    directory = directory or STATS_DIR
+    now = time.time() if now is None else now
+    load = {"in_flight": 0, "p95_ms": 0.0, "workers": 0}
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith('.json')]
+    except FileNotFoundError:
+        return load
+    host = socket.gethostname()
+    for name in names:
+        owner, _, pid = name[:-len('.json')].rpartition('-')
+        if owner == host and pid.isdigit() and not _alive(int(pid)):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if stats.get('updated', 0) < now - STATS_WINDOW:
+            continue
+        load["in_flight"] += int(stats.get('in_flight', 0))
+        load["p95_ms"] = max(load["p95_ms"], float(stats.get('p95_ms', 0.0)))
+        load["workers"] += 1
+    return load
+
+
+_stats = None
+
+
+def install_request_stats(app) -> RequestStats:
+    """Times every request of a Flask app and publishes the worker's load."""
+    from flask import g
+
+    global _stats
+    _stats = RequestStats()
+
+    @app.before_request
+    def _count_request():
+        g.request_started = time.perf_counter()
+        _stats.started()
+
+    @app.teardown_request
+    def _time_request(exc=None):
+        started = g.pop('request_started', None)
+        if started is not None:
+            _stats.finished(time.perf_counter() - started)
+
+    return _stats
+
+
+def close_request_stats() -> None:
+    """Stops this worker's stats publisher and removes its file (from gunicorn's worker_exit)."""
+    if _stats is not None:
+        _stats.close()
+
+
+def request_stats() -> dict:
+    """This worker's current snapshot, or {} if the app does not record stats."""
+    return _stats.snapshot() if _stats is not None else {}
@@ -0,0 +1,240 @@
+# statementCycle.py
+"""
+Statement cycle days for credit cards.
+
+Every credit card is billed on its own day of the month, its StatementDay in
+accounts.csv, so the statement job handles one cohort a night instead of
+every card opened around the same date at once. The days cards may be given
+are STATEMENT_CYCLE_DAYS (1-28 by default, e.g. "1,8,15,22" or "1-28").
+
+    - openCreditCardAccount() stores the least used cycle day
+      (assign_cycle_day)
+    - a card without a StatementDay (opened before cycles existed) gets a
+      day derived from its AccountID (derived_cycle_days), which spreads
+      existing cards evenly over the cycle days
+    - a cycle day past the end of a short month is billed on its last day
+
+The sidecar index accounts.csv.cycle.idx holds one record per credit card row
+of accounts.csv: (cycle day, AccountID, byte offset, byte length), sorted by
+day. read_cohort() parses only the rows of the cards billed on the given days.
+Like the bills index (billIndex.py) it is stamped with the size and mtime of
+the file it describes and rebuilt when a reader finds it stale.
+"""
+import io
+import os
+import mmap
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from scripts.tableCache import reads_from_csv, table_path
+from scripts.tableLock import table_lock
+from scripts.billIndex import HEADER
+
+
+def parse_cycle_days(spec: str) -> list:
+    """Parses "1-28" or "1,8,15,22" into a sorted list of days of the month."""
+    days = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        days.update(range(int(first), int(last or first) + 1))
+    if not days or min(days) < 1 or max(days) > 31:
+        raise ValueError(f"Statement cycle days must be days of the month, got '{spec}'.")
+    return sorted(days)
+
+
+# Days of the month cards are billed on
+CYCLE_DAYS = parse_cycle_days(os.environ.get('STATEMENT_CYCLE_DAYS', '1-28'))
+
+# One record per credit card row: cycle day, AccountID, offset, length
+RECORD = np.dtype([('day', 'u1'), ('account', '<i8'), ('offset', '<i8'), ('length', '<i8')])
+
+
+def derived_cycle_days(account_ids) -> np.ndarray:
+    """The cycle day of cards that have none stored, spread over CYCLE_DAYS by AccountID."""
+    ids = pd.to_numeric(pd.Series(account_ids), errors='coerce').fillna(0).astype(np.int64).to_numpy()
+    return np.asarray(CYCLE_DAYS, dtype=np.int64)[ids % len(CYCLE_DAYS)]
+
+
+def cycle_days(accounts_df: pd.DataFrame) -> np.ndarray:
+    """Returns the cycle day of every row: its StatementDay, or the derived day if it has none."""
+    days = derived_cycle_days(accounts_df['AccountID'])
+    if 'StatementDay' in accounts_df.columns:
+        stored = pd.to_numeric(accounts_df['StatementDay'], errors='coerce').to_numpy()
+        valid = (stored >= 1) & (stored <= 31)
+        days[valid] = stored[valid].astype(np.int64)
+    return days
+
+
+def assign_cycle_day(accounts_df: pd.DataFrame) -> int:
+    """Returns the cycle day with the fewest credit cards (the earliest on a tie), for a new card."""
+    cards = accounts_df[accounts_df['AccountType'] == 'Credit Card'] if 'AccountType' in accounts_df.columns \
+        else accounts_df.iloc[0:0]
+    counts = pd.Series(cycle_days(cards) if len(cards) else [], dtype=np.int64).value_counts()
+    return min(CYCLE_DAYS, key=lambda day: (counts.get(day, 0), day))
+
+
+def cohort_days(today: date, since: date = None) -> list:
+    """
+    Returns the cycle days billed on the days after `since` up to and
+    including `today` (just `today` by default). On the last day of a month
+    the days it does not have are billed too.
+    """
+    since = since or today - timedelta(days=1)
+    days = set()
+    day = since + timedelta(days=1)
+    while day <= today and len(days) < 31:
+        days.add(day.day)
+        if (day + timedelta(days=1)).day == 1:
+            days.update(range(day.day + 1, 32))
+        day += timedelta(days=1)
+    return sorted(days)
+
+
+def cohort_mask(accounts_df: pd.DataFrame, today: date, since: date = None) -> np.ndarray:
+    """Marks the rows whose cycle day is billed between `since` and `today` (see cohort_days)."""
+    return np.isin(cycle_days(accounts_df), cohort_days(today, since))
+
+
+class StatementCycleIndex:
+    """
+    Sidecar cycle-day index of the credit cards in one accounts file.
+
+    Parameters
+    ----------
+    csv_path : str, optional
+        The indexed CSV file (accounts.csv by default). The index is stored
+        next to it with a .cycle.idx suffix.
+    """
+
+    def __init__(self, csv_path: str = None):
+        self.csv_path = csv_path or table_path('accounts.csv')
+        self.idx_path = self.csv_path + '.cycle.idx'
+
+    def _signature(self) -> tuple:
+        st = os.stat(self.csv_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_sidecar(self):
+        """Returns (fresh, records); records is None if the file is unindexable."""
+        try:
+            with open(self.idx_path, 'rb') as f:
+                head = np.fromfile(f, dtype=HEADER, count=1)
+                records = np.fromfile(f, dtype=RECORD)
+        except OSError:
+            return False, None
+        if len(head) != 1 or (int(head['mtime_ns'][0]), int(head['size'][0])) != self._signature():
+            return False, None
+        rows = int(head['rows'][0])
+        if rows < 0:
+            return True, None
+        return len(records) == rows, records
+
+    def _save(self, records) -> None:
+        head = np.array([self._signature() + (-1 if records is None else len(records),)], dtype=HEADER)
+        tmpPath = f'{self.idx_path}.{os.getpid()}.tmp'
+        with open(tmpPath, 'wb') as f:
+            f.write(head.tobytes())
+            if records is not None:
+                f.write(records.tobytes())
+        os.replace(tmpPath, self.idx_path)
+
+    def rebuild(self):
+        """
+        Re-creates the index from the whole file.
+
+        Returns
+        -------
+        int or None
+            The number of credit cards indexed, or None if the file is unindexable.
+        """
+        with table_lock(self.csv_path):
+            with open(self.csv_path, 'rb') as f:
+                data = f.read()
+            headerEnd = data.find(b'\n') + 1
+            records = None
+            columns = data[:headerEnd].decode('utf-8').strip().split(',') if headerEnd else []
+            body = data[headerEnd:]
+            ends = np.flatnonzero(np.frombuffer(body, dtype=np.uint8) == ord('\n')) + 1
+            if {'AccountID', 'AccountType'} <= set(columns) and (not len(body) or (len(ends) and ends[-1] == len(body))):
+                starts = np.concatenate([[0], ends[:-1]]) if len(ends) else ends
+                lengths = ends - starts
+                first = np.frombuffer(body, dtype=np.uint8)[starts] if len(ends) else ends
+                rows = np.flatnonzero(~((lengths == 1) | ((lengths == 2) & (first == ord('\r')))))
+                fields = pd.read_csv(io.BytesIO(data), usecols=[c for c in ('AccountID', 'AccountType', 'StatementDay')
+                                                                if c in columns],
+                                     dtype={'AccountType': str}, keep_default_na=False)
+                if len(fields) == len(rows):
+                    cards = (fields['AccountType'] == 'Credit Card').to_numpy()
+                    records = np.zeros(int(cards.sum()), dtype=RECORD)
+                    records['day'] = cycle_days(fields[cards])
+                    records['account'] = pd.to_numeric(fields['AccountID'][cards], errors='coerce') \
+                        .fillna(-1).to_numpy(dtype=np.int64)
+                    records['offset'] = starts[rows[cards]] + headerEnd
+                    records['length'] = lengths[rows[cards]]
+                    records = records[np.argsort(records['day'], kind='stable')]
+            self._save(records)
+        return None if records is None else len(records)
+
+    def records(self):
+        """Returns every record, rebuilding a stale index first, or None if the file is unindexable."""
+        with table_lock(self.csv_path):
+            fresh, records = self._read_sidecar()
+            if not fresh:
+                self.rebuild()
+                fresh, records = self._read_sidecar()
+        return records
+
+    def select(self, days):
+        """Returns the records of the cards billed on any of `days`, in file order, or None if unindexable."""
+        records = self.records()
+        if records is None:
+            return None
+        selected = records[np.isin(records['day'], list(days))]
+        return selected[np.argsort(selected['offset'], kind='stable')]
+
+    def _read_rows(self, selected: np.ndarray):
+        """Parses the rows of `selected`, or returns None if they are not the cards the index says."""
+        with open(self.csv_path, 'rb') as f:
+            header = f.readline()
+            if not len(selected):
+                return pd.read_csv(io.BytesIO(header))
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                body = b''.join(data[offset:offset + length]
+                                for offset, length in zip(selected['offset'].tolist(), selected['length'].tolist()))
+        frame = pd.read_csv(io.BytesIO(header + body))
+        if len(frame) != len(selected):
+            return None
+        accounts = pd.to_numeric(frame['AccountID'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        return frame if np.array_equal(accounts, selected['account']) else None
+
+    def read_cohort(self, days):
+        """
+        Reads the credit card rows billed on any of `days`, parsed as
+        read_table would, in file order; None if the file is unindexable.
+        """
+        with table_lock(self.csv_path):
+            for attempt in range(2):
+                selected = self.select(days)
+                if selected is None:
+                    return None
+                frame = self._read_rows(selected)
+                if frame is not None:
+                    return frame
+                # A write that left the size and mtime unchanged; index it again
+                self.rebuild()
+        return None
+
+
+def cycle_index(csv_path: str = None):
+    """
+    Returns the cycle-day index of an accounts file, or None when the file has
+    to be read whole (stored in SQLite, missing, or unindexable).
+    """
+    csv_path = csv_path or table_path('accounts.csv')
+    if not reads_from_csv(csv_path) or not os.path.exists(csv_path):
+        return None
+    index = StatementCycleIndex(csv_path)
+    return index if index.records() is not None else None
@@ -0,0 +1,274 @@
+# tableCache.py
+"""
+Shared in-process cache for the CSV tables stored in csvFiles/.
+
+Every table read in the app and in scripts/ goes through read_table(), which
+hands out a private copy of the parsed DataFrame for a path and only re-parses
+the file when its st_mtime_ns, st_size or inode has changed. Table writes go
+through write_table(), which writes a new file and renames it over the table,
+so every write gives the table a new inode even when the timestamp and size
+happen to match the old file's. It also drops the cached entry, so the next
+read parses exactly what was written. Hit/miss counters are available from
+cache_stats().
+
+Tables of at least TABLE_SIDECAR_MIN_BYTES also keep their parse in a binary
+sidecar next to the CSV (see tableSidecar.py), so a miss in a freshly started
+worker maps that instead of parsing the file again.
+
+read_table() holds a shared lock on the table while it reads and
+write_table() an exclusive one while it writes (see tableLock.py), so a
+reader in another worker never parses a half-written file.
+
+When STORAGE_BACKEND selects another backend (see scripts/repository.py),
+read_table() and write_table() hand tables in csvFiles/ to that repository.
+"""
+import os
+import threading
+import pandas as pd
+from scripts.tableLock import table_lock
+from scripts.tableSidecar import SIDECAR_ENABLED, SIDECAR_MIN_BYTES, load_sidecar, save_sidecar
+
+# Directory holding every table the application reads and writes
+CSV_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles'))
+
+# Set TABLE_CACHE_ENABLED=0 to parse the CSV on every read (old behaviour)
+CACHE_ENABLED = os.environ.get('TABLE_CACHE_ENABLED', '1') != '0'
+
+# Storage backend for the tables in csvFiles/: 'csv' (default) or 'sqlite'
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'csv').lower()
+
+
+def table_path(filename: str) -> str:
+    """Returns the absolute path to a table in the csvFiles directory."""
+    return os.path.join(CSV_DIR, filename)
+
+
+def _file_signature(path: str):
+    """Returns (st_mtime_ns, st_size, st_ino) for a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class TableCache:
+    """
+    Parsed-DataFrame cache keyed by absolute file path and read_csv options.
+
+    Each entry remembers the file signature it was parsed from. A read whose
+    signature still matches is a hit and returns a copy of the cached frame;
+    anything else is a miss and re-parses the file.
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        False parses the file on every read.
+    sidecars : bool, optional
+        True loads a miss from the table's binary sidecar when it matches the
+        file, and writes one after parsing (see tableSidecar.py).
+    sidecar_min_bytes : int, optional
+        Smallest file given a sidecar (TABLE_SIDECAR_MIN_BYTES by default).
+    """
+
+    def __init__(self, enabled: bool = True, sidecars: bool = False, sidecar_min_bytes: int = None):
+        self.enabled = enabled
+        self.sidecars = sidecars
+        self.sidecar_min_bytes = SIDECAR_MIN_BYTES if sidecar_min_bytes is None else sidecar_min_bytes
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.invalidations = 0
+        self.sidecar_hits = 0
+        self.sidecar_writes = 0
+
+    @staticmethod
+    def _key(path: str, kwargs: dict) -> tuple:
+        options = tuple(sorted((name, repr(value)) for name, value in kwargs.items()))
+        return (os.path.normcase(os.path.abspath(path)), options)
+
+    def read(self, path: str, **kwargs) -> pd.DataFrame:
+        """
+        Returns the parsed table at `path`, parsing it only when it changed.
+
+        Parameters
+        ----------
+        path : str
+            Path to the CSV file.
+        **kwargs
+            Passed through to pandas.read_csv and made part of the cache key.
+
+        Returns
+        -------
+        DataFrame
+            A copy the caller is free to modify.
+        """
+        if not self.enabled:
+            return pd.read_csv(path, **kwargs)
+
+        signature = _file_signature(path)
+        if signature is None:
+            # Let pandas raise the usual FileNotFoundError for callers that handle it
+            self.invalidate(path)
+            return pd.read_csv(path, **kwargs)
+
+        key = self._key(path, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1].copy()
+            self.misses += 1
+
+        useSidecar = self.sidecars and signature[1] >= self.sidecar_min_bytes
+        parsed = load_sidecar(path, key[1], signature) if useSidecar else None
+        if parsed is not None:
+            with self._lock:
+                self.sidecar_hits += 1
+                self._entries[key] = (signature, parsed)
+            return parsed.copy()
+
+        parsed = pd.read_csv(path, **kwargs)
+
+        # Only keep the parse if the file did not change underneath us
+        if _file_signature(path) == signature:
+            if useSidecar and save_sidecar(path, key[1], signature, parsed):
+                with self._lock:
+                    self.sidecar_writes += 1
+            with self._lock:
+                self._entries[key] = (signature, parsed)
+            return parsed.copy()
+        return parsed
+
+    def write(self, df: pd.DataFrame, path: str, **kwargs) -> None:
+        """
+        Writes `df` to `path` as CSV and drops any cached parse of that file.
+
+        The CSV is written next to `path` and renamed over it, so readers see
+        the old or the new table, never part of one, and the table's inode
+        changes with every write.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The table to write.
+        path : str
+            Destination CSV file.
+        **kwargs
+            Passed through to DataFrame.to_csv (index defaults to False).
+        """
+        kwargs.setdefault('index', False)
+        tmpPath = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            df.to_csv(tmpPath, **kwargs)
+            os.replace(tmpPath, path)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+        finally:
+            self.invalidate(path)
+            with self._lock:
+                self.writes += 1
+
+    def invalidate(self, path: str = None) -> None:
+        """Drops cached entries for `path`, or every entry if no path is given."""
+        with self._lock:
+            if path is None:
+                dropped = list(self._entries)
+            else:
+                target = os.path.normcase(os.path.abspath(path))
+                dropped = [key for key in self._entries if key[0] == target]
+            for key in dropped:
+                del self._entries[key]
+            self.invalidations += len(dropped)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss/write counters and the number of cached tables."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "writes": self.writes,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "sidecars": self.sidecars,
+                "sidecar_hits": self.sidecar_hits,
+                "sidecar_writes": self.sidecar_writes,
+            }
+
+    def reset_stats(self) -> None:
+        """Zeroes the counters without dropping cached tables."""
+        with self._lock:
+            self.hits = self.misses = self.writes = self.invalidations = 0
+            self.sidecar_hits = self.sidecar_writes = 0
+
+
+# Process-wide cache shared by the blueprints and scripts/
+_cache = TableCache(enabled=CACHE_ENABLED, sidecars=SIDECAR_ENABLED)
+
+
+def get_cache() -> TableCache:
+    """Returns the process-wide table cache."""
+    return _cache
+
+
+def _routed_table(path: str):
+    """Returns (repository, table) when `path` is stored outside CSV, else None."""
+    if STORAGE_BACKEND == 'csv' or os.path.dirname(os.path.abspath(path)) != CSV_DIR:
+        return None
+    from scripts.repository import TABLES, get_repository
+    table, ext = os.path.splitext(os.path.basename(path))
+    if ext != '.csv' or table not in TABLES:
+        return None
+    return get_repository(), table
+
+
+def read_table(path: str, **kwargs) -> pd.DataFrame:
+    """Reads a CSV table through the shared cache. See TableCache.read."""
+    routed = _routed_table(path)
+    if routed is not None:
+        repository, table = routed
+        return repository.load(table, **kwargs)
+    with table_lock(path, exclusive=False):
+        return _cache.read(path, **kwargs)
+
+
+def write_table(df: pd.DataFrame, path: str, **kwargs) -> None:
+    """Writes a CSV table through the shared cache. See TableCache.write."""
+    routed = _routed_table(path)
+    if routed is not None:
+        repository, table = routed
+        repository.save(table, df)
+        return
+    with table_lock(path):
+        _cache.write(df, path, **kwargs)
+
+
+def reads_from_csv(path: str) -> bool:
+    """
+    Returns True when read_table(path) parses the CSV file itself, so byte
+    offsets into that file (see billIndex.py) describe what a read would
+    return.
+    """
+    return _routed_table(path) is None
+
+
+def invalidate_table(path: str = None) -> None:
+    """Drops the shared cache's entries for `path` (or all entries)."""
+    _cache.invalidate(path)
+
+
+def cache_stats() -> dict:
+    """Returns the shared cache's counters."""
+    return _cache.stats()
+
+
+def reset_cache_stats() -> None:
+    """Zeroes the shared cache's counters."""
+    _cache.reset_stats()
@@ -0,0 +1,267 @@
+# tableLock.py
+"""
+Cross-process locks for the tables in csvFiles/.
+
+Every table has a lock file next to it (accounts.csv -> accounts.csv.lock)
+that is locked with fcntl.flock: shared while a table is being read and
+exclusive while it is being written or read-modified-written. flock locks
+belong to an open file, so they exclude other threads of the same process as
+well as other gunicorn workers.
+
+Wrap a read-modify-write in table_lock() (or decorate the function with
+locks_tables()) so no other worker can change the tables in between:
+
+    with table_lock('accounts.csv', 'transactions.csv'):
+        ...
+
+Locks are re-entrant per thread, so a locked function may call another
+locked function. Two rules keep workers from deadlocking each other, and
+breaking either raises LockOrderError:
+
+    - locks are taken in one global order, also across nested
+      table_lock() calls: the .csv tables by path, then the bookkeeping
+      files (sequences.json, pendingCommit.json, ...). While holding
+      bills.csv a thread may not newly lock accounts.csv, but it may take
+      sequences.json. table_lock() sorts the tables it is given, so lock
+      every table a function needs in one call, up front, passing the
+      tables it only reads as `reads`.
+    - a shared lock is never upgraded to an exclusive one. flock would drop
+      the shared lock before waiting for the exclusive one, and two
+      upgrading readers would wait on each other until LockTimeout. Take the
+      exclusive lock up front, or release the shared lock and start over.
+
+Waiting longer than the timeout raises LockTimeout. Wait-time statistics are
+available from lock_stats().
+
+On platforms without fcntl (Windows) the locks only cover threads of the
+current process.
+"""
+import os
+import time
+import threading
+import functools
+from contextlib import contextmanager, ExitStack
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+CSV_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles'))
+
+# Seconds to wait for a lock before giving up
+DEFAULT_TIMEOUT = float(os.environ.get('TABLE_LOCK_TIMEOUT', '10'))
+
+# Poll interval bounds while waiting for a contended lock
+_MIN_BACKOFF = 0.001
+_MAX_BACKOFF = 0.05
+
+SHARED = 'shared'
+EXCLUSIVE = 'exclusive'
+
+
+class LockTimeout(TimeoutError):
+    """Raised when a table lock cannot be acquired within the timeout."""
+
+
+class LockOrderError(RuntimeError):
+    """Raised when a thread takes a table lock out of order or upgrades a shared lock."""
+
+
+def lock_path(table: str) -> str:
+    """Returns the lock file for a table name ('accounts.csv') or path."""
+    return os.path.abspath(os.path.join(CSV_DIR, table)) + '.lock'
+
+
+def lock_order(path: str) -> tuple:
+    """Sort key of a lock file: tables before bookkeeping files, each by path."""
+    return (not path.endswith('.csv.lock'), path)
+
+
+class _Held:
+    """A lock this thread holds: its file descriptor, mode and nesting depth."""
+
+    def __init__(self, fd, mode):
+        self.fd = fd
+        self.mode = mode
+        self.depth = 1
+
+
+class LockManager:
+    """
+    Hands out shared/exclusive table locks and records how long callers waited.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # Serializes threads of this process when fcntl is unavailable
+        self._fallback = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    def _held(self) -> dict:
+        if not hasattr(self._local, 'held'):
+            self._local.held = {}
+        return self._local.held
+
+    def _record(self, path: str, mode: str, waited: float, contended: bool, timed_out: bool = False) -> None:
+        name = os.path.basename(path)[:-len('.lock')]
+        with self._stats_lock:
+            entry = self._stats.setdefault(name, {
+                "shared": 0, "exclusive": 0, "contended": 0,
+                "timeouts": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0
+            })
+            if timed_out:
+                entry["timeouts"] += 1
+            else:
+                entry[mode] += 1
+            entry["contended"] += int(contended)
+            entry["total_wait_ms"] += waited * 1000
+            entry["max_wait_ms"] = max(entry["max_wait_ms"], waited * 1000)
+
+    def _flock(self, fd: int, mode: str, path: str, timeout: float) -> None:
+        """Locks `fd`, polling with backoff until `timeout` seconds have passed."""
+        if fcntl is None:
+            lock = self._fallback.setdefault(path, threading.RLock())
+            start = time.monotonic()
+            acquired = lock.acquire(timeout=timeout)
+            waited = time.monotonic() - start
+            if not acquired:
+                self._record(path, mode, waited, True, timed_out=True)
+                raise LockTimeout(f"Timed out after {timeout}s waiting for {os.path.basename(path)}.")
+            self._record(path, mode, waited, waited > _MIN_BACKOFF)
+            return
+
+        operation = fcntl.LOCK_EX if mode == EXCLUSIVE else fcntl.LOCK_SH
+        start = time.monotonic()
+        backoff = _MIN_BACKOFF
+        contended = False
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                break
+            except (BlockingIOError, PermissionError):
+                contended = True
+                waited = time.monotonic() - start
+                if waited >= timeout:
+                    self._record(path, mode, waited, True, timed_out=True)
+                    raise LockTimeout(f"Timed out after {timeout}s waiting for a {mode} lock on "
+                                      f"{os.path.basename(path)[:-len('.lock')]}.")
+                time.sleep(min(backoff, timeout - waited))
+                backoff = min(backoff * 2, _MAX_BACKOFF)
+        self._record(path, mode, time.monotonic() - start, contended)
+
+    def acquire(self, table: str, mode: str = EXCLUSIVE, timeout: float = None) -> None:
+        """Acquires (or re-enters) the lock on one table for this thread."""
+        timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        path = lock_path(table)
+        held = self._held()
+        entry = held.get(path)
+        if entry is not None:
+            if mode == EXCLUSIVE and entry.mode == SHARED:
+                raise LockOrderError(f"Cannot upgrade the shared lock on {os.path.basename(path)[:-len('.lock')]} "
+                                     f"to an exclusive one; take the exclusive lock up front.")
+            entry.depth += 1
+            return
+        last = max(held, key=lock_order) if held else None
+        if last is not None and lock_order(path) < lock_order(last):
+            raise LockOrderError(f"Cannot lock {os.path.basename(path)[:-len('.lock')]} while holding "
+                                 f"{os.path.basename(last)[:-len('.lock')]}; lock both tables in one "
+                                 f"table_lock() call.")
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._flock(fd, mode, path, timeout)
+        except BaseException:
+            os.close(fd)
+            raise
+        held[path] = _Held(fd, mode)
+
+    def release(self, table: str) -> None:
+        """Releases one level of this thread's lock on a table."""
+        path = lock_path(table)
+        held = self._held()
+        entry = held.get(path)
+        if entry is None:
+            return
+        entry.depth -= 1
+        if entry.depth:
+            return
+        del held[path]
+        try:
+            if fcntl is None:
+                self._fallback[path].release()
+            else:
+                fcntl.flock(entry.fd, fcntl.LOCK_UN)
+        finally:
+            os.close(entry.fd)
+
+    def stats(self) -> dict:
+        """Returns per-table lock counts and wait times in milliseconds."""
+        with self._stats_lock:
+            return {name: {key: round(value, 3) if isinstance(value, float) else value
+                           for key, value in entry.items()}
+                    for name, entry in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats.clear()
+
+
+_manager = LockManager()
+
+
+@contextmanager
+def table_lock(*tables, exclusive: bool = True, timeout: float = None, reads: tuple = ()):
+    """
+    Holds locks on one or more tables for the duration of a with-block.
+
+    Parameters
+    ----------
+    *tables : str
+        Table file names in csvFiles/ (e.g. 'accounts.csv') or paths.
+    exclusive : bool
+        Exclusive (write) lock if True, shared (read) lock otherwise.
+    timeout : float, optional
+        Seconds to wait for each lock (TABLE_LOCK_TIMEOUT by default).
+    reads : tuple of str, optional
+        More tables to hold a shared lock on, taken in order with `tables`.
+
+    Raises
+    ------
+    LockTimeout
+        If a lock cannot be acquired in time.
+    LockOrderError
+        If this thread already holds a lock that sorts after one of these,
+        or holds a shared lock on a table locked exclusively here.
+    """
+    mode = EXCLUSIVE if exclusive else SHARED
+    modes = {lock_path(table): (table, SHARED) for table in reads}
+    modes.update({lock_path(table): (table, mode) for table in tables})
+    with ExitStack() as stack:
+        for path in sorted(modes, key=lock_order):
+            table, tableMode = modes[path]
+            _manager.acquire(table, tableMode, timeout)
+            stack.callback(_manager.release, table)
+        yield
+
+
+def locks_tables(*tables, exclusive: bool = True, timeout: float = None, reads: tuple = ()):
+    """Decorator form of table_lock() for functions that read-modify-write tables."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with table_lock(*tables, exclusive=exclusive, timeout=timeout, reads=reads):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def lock_stats() -> dict:
+    """Returns the process's lock wait statistics per table."""
+    return _manager.stats()
+
+
+def reset_lock_stats() -> None:
+    """Clears the lock wait statistics."""
+    _manager.reset_stats()
@@ -0,0 +1,204 @@
+# tableSidecar.py
+"""
+Binary sidecars of parsed tables, so a parse survives a restart.
+
+The in-process table cache (tableCache.py) is empty in a freshly started
+worker, so its first read of every table pays the full CSV parse. For tables
+of at least TABLE_SIDECAR_MIN_BYTES (1 MiB by default) the cache also keeps
+the parsed DataFrame next to the CSV, in <table>.csv.<options>.frame, and a
+later miss in any process loads that instead of parsing again.
+
+A sidecar holds each column as an .npy array and describes them in a JSON
+schema at the end of the file:
+
+    magic | .npy arrays (64-byte aligned) | JSON schema | schema length | magic
+
+Numeric and boolean columns are stored as they are. Text columns are stored
+factorized: a code per row (-1 where the value is missing) and the distinct
+values as one UTF-8 string with their character offsets, so loading decodes
+each distinct value once. Nothing is unpickled: the arrays are
+read with numpy's .npy header parser and object arrays are refused. Frames
+with other kinds of column, column names other than text or integers, or a
+non-default index get no sidecar.
+
+The schema stamps the CSV's st_mtime_ns, st_size and st_ino, and a sidecar is
+only used while all three still match the CSV; otherwise the table is parsed
+again and the sidecar rewritten. Every writer of a table renames a new file
+over it (a new inode) or appends to it (a new size), so the signature is
+enough without hashing the file's bytes. Loading maps the file, so the
+numeric columns of a loaded frame live in the page cache shared by every
+worker on the host.
+
+Set TABLE_SIDECAR_ENABLED=0 to turn them off; deleting them is always safe.
+"""
+import io
+import os
+import json
+import mmap
+import struct
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Set TABLE_SIDECAR_ENABLED=0 to never read or write sidecars
+SIDECAR_ENABLED = os.environ.get('TABLE_SIDECAR_ENABLED', '1') != '0'
+
+# Smaller tables parse about as fast as their sidecar loads; skip them
+SIDECAR_MIN_BYTES = int(os.environ.get('TABLE_SIDECAR_MIN_BYTES', str(1024 * 1024)))
+
+_MAGIC = b'TBLFRAME2\n'
+_LENGTH = struct.Struct('<Q')
+_ALIGN = 64
+# Longest .npy header read when loading an array
+_NPY_HEADER = 64 * 1024
+
+
+def sidecar_path(path: str, options: tuple) -> str:
+    """Returns the sidecar file of `path` parsed with read_csv `options` (see TableCache._key)."""
+    tag = hashlib.blake2b(repr(options).encode('utf-8'), digest_size=4).hexdigest()
+    return f'{path}.{tag}.frame'
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGN
+
+
+def _column_arrays(values: pd.Series):
+    """
+    Returns (kind, arrays) storing one column: ("array", [values]) for numeric,
+    boolean and datetime columns, ("text", [codes, offsets, UTF-8 bytes]) for
+    text columns, or None for anything else.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+        return "array", [values.to_numpy()]
+    if values.dtype != object and not pd.api.types.is_string_dtype(values.dtype):
+        return None
+    codes, uniques = pd.factorize(values)
+    uniques = list(uniques)
+    if not all(isinstance(text, str) for text in uniques):
+        return None
+    lengths = np.fromiter((len(text) for text in uniques), dtype=np.int64, count=len(uniques))
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    return "text", [codes.astype(np.int64), offsets, np.frombuffer(''.join(uniques).encode('utf-8'), dtype=np.uint8)]
+
+
+def save_sidecar(path: str, options: tuple, signature: tuple, frame: pd.DataFrame) -> bool:
+    """
+    Writes the sidecar of `frame`, parsed from `path` while it had `signature`
+    (st_mtime_ns, st_size, st_ino).
+
+    Returns
+    -------
+    bool
+        True if it was written; False if a column (or its name, unless text
+        or an integer) cannot be stored or the directory is not writable. A sidecar is never required.
+    """
+    if not isinstance(frame.index, pd.RangeIndex) or frame.index.start != 0 or frame.index.step != 1:
+        return False
+    columns = []
+    for position in range(frame.shape[1]):
+        stored = _column_arrays(frame.iloc[:, position])
+        if stored is None:
+            return False
+        name = frame.columns[position]
+        if isinstance(name, np.integer):
+            name = int(name)
+        # Text and integer names (header=None) keep their type in the JSON schema
+        if isinstance(name, bool) or not isinstance(name, (str, int)):
+            return False
+        columns.append((name, str(frame.dtypes.iloc[position])) + stored)
+
+    target = sidecar_path(path, options)
+    tmpPath = f'{target}.{os.getpid()}.tmp'
+    schema = {"signature": list(signature), "options": repr(options), "rows": len(frame), "columns": []}
+    try:
+        with open(tmpPath, 'wb') as f:
+            f.write(_MAGIC)
+            for name, dtype, kind, arrays in columns:
+                blocks = []
+                for array in arrays:
+                    f.write(b'\0' * _padding(f.tell()))
+                    start = f.tell()
+                    np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+                    blocks.append([start, f.tell() - start])
+                schema["columns"].append({"name": name, "dtype": dtype, "kind": kind, "blocks": blocks})
+            encoded = json.dumps(schema).encode('utf-8')
+            f.write(encoded + _LENGTH.pack(len(encoded)) + _MAGIC)
+        os.replace(tmpPath, target)
+    except (OSError, ValueError):
+        try:
+            os.remove(tmpPath)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def _read_array(data, start: int, length: int) -> np.ndarray:
+    """Returns a read-only view of the .npy array stored at data[start:start + length]."""
+    header = io.BytesIO(data[start:start + min(length, _NPY_HEADER)])
+    version = np.lib.format.read_magic(header)
+    if version not in ((1, 0), (2, 0)):
+        raise ValueError(f"Unsupported .npy version {version}.")
+    readHeader = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    shape, fortran, dtype = readHeader(header)
+    if dtype.hasobject or fortran or len(shape) != 1:
+        raise ValueError("Sidecar arrays hold plain 1-d values only.")
+    offset = start + header.tell()
+    if offset + shape[0] * dtype.itemsize > start + length:
+        raise ValueError("Sidecar array runs past its block.")
+    return np.frombuffer(data, dtype=dtype, count=shape[0], offset=offset)
+
+
+def load_sidecar(path: str, options: tuple, signature: tuple):
+    """
+    Returns the frame stored for `path` and `options`, or None if there is no
+    sidecar or it was made from another version of the file. The frame's
+    numeric columns are read-only views of the mapped sidecar.
+    """
+    try:
+        with open(sidecar_path(path, options), 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 2 * len(_MAGIC) + _LENGTH.size:
+                return None
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        view = memoryview(data)
+        trailer = len(view) - len(_MAGIC)
+        if bytes(view[:len(_MAGIC)]) != _MAGIC or bytes(view[trailer:]) != _MAGIC:
+            return None
+        schemaLength, = _LENGTH.unpack_from(view, trailer - _LENGTH.size)
+        schemaStart = trailer - _LENGTH.size - schemaLength
+        if schemaStart < len(_MAGIC):
+            return None
+        schema = json.loads(bytes(view[schemaStart:schemaStart + schemaLength]))
+        if tuple(schema["signature"]) != tuple(signature) or schema["options"] != repr(options):
+            return None
+
+        columns = {}
+        for position, column in enumerate(schema["columns"]):
+            if any(start + length > schemaStart for start, length in column["blocks"]):
+                return None
+            arrays = [_read_array(data, start, length) for start, length in column["blocks"]]
+            if len(arrays[0]) != schema["rows"]:
+                return None
+            if column["kind"] == "text":
+                codes, offsets, encoded = arrays
+                text = encoded.tobytes().decode('utf-8')
+                bounds = offsets.tolist()
+                if bounds[-1] != len(text) or (len(codes) and not -1 <= codes.min() <= codes.max() < len(bounds) - 1):
+                    return None
+                # Missing values have code -1, which picks the NaN put last
+                uniques = [text[start:end] for start, end in zip(bounds[:-1], bounds[1:])] + [np.nan]
+                columns[position] = pd.Series(np.array(uniques, dtype=object).take(codes), dtype=column["dtype"])
+            else:
+                # The frame keeps the mapping alive through these views
+                columns[position] = pd.Series(arrays[0], dtype=column["dtype"], copy=False)
+        frame = pd.DataFrame(columns, index=pd.RangeIndex(schema["rows"]), copy=False)
+        frame.columns = [column["name"] for column in schema["columns"]]
+        return frame
+    except Exception:
+        # A damaged sidecar is only a miss; the CSV is parsed instead
+        return None
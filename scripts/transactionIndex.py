@@ -0,0 +1,340 @@
+# transactionIndex.py
+"""
+Per-account offset index for transactions.csv.
+
+The sidecar file transactions.csv.idx holds one fixed-size record per row of
+transactions.csv: (AccountID, byte offset, byte length), as little-endian
+int64s. Fetching one account's history then means selecting its records and
+seeking straight to those rows, instead of parsing the whole file.
+
+The file is kept in append order so the journal can extend it cheaply.
+Readers hold its records sorted by AccountID in memory, merging in records
+appended since their last read, and find an account's run with
+numpy.searchsorted instead of scanning every record.
+
+The index is kept up to date in three ways:
+    - the transaction journal records each appended row as it writes it
+    - a reader that finds rows past the end of the index indexes just that
+      tail before answering. Readers share the table lock; only one that has
+      to extend the index releases it and takes the exclusive lock
+    - a row that no longer sits at its recorded offset (e.g. after the file
+      was compacted or rewritten) makes the reader rebuild the index
+
+Run `python -m scripts.transactionIndex rebuild` from the root dir to rebuild
+it by hand.
+"""
+import io
+import os
+import csv
+import sys
+import threading
+import numpy as np
+import pandas as pd
+from scripts.tableCache import STORAGE_BACKEND, table_path
+from scripts.tableLock import table_lock
+
+# One record per row: AccountID, offset, length
+RECORD = np.dtype([('account', '<i8'), ('offset', '<i8'), ('length', '<i8')])
+
+# Bytes read at a time when indexing the tail of the journal
+SCAN_CHUNK_SIZE = 1 << 20
+
+
+def _parse_account_id(line: bytes, column: int):
+    """Returns the AccountID field of a CSV row as an int, or None."""
+    try:
+        fields = next(csv.reader([line.decode('utf-8')]))
+        return int(float(fields[column]))
+    except (StopIteration, IndexError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def _merge(records: np.ndarray, tail: np.ndarray) -> np.ndarray:
+    """
+    Merges records appended to the file into `records`, which are sorted by
+    account and in file order within an account.
+    """
+    tail = tail[np.argsort(tail['account'], kind='stable')]
+    # Appended rows come after every known row of their account
+    return np.insert(records, np.searchsorted(records['account'], tail['account'], side='right'), tail)
+
+
+def _as_account_id(value) -> int:
+    """Returns an AccountID as an int, or -1 if it is not numeric."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return -1
+
+
+class TransactionIndex:
+    """
+    Sidecar AccountID -> row offset index for one transactions file.
+
+    Parameters
+    ----------
+    csv_path : str, optional
+        The indexed CSV file (transactions.csv by default). The index is
+        stored next to it with an .idx suffix.
+    """
+
+    def __init__(self, csv_path: str = None):
+        self.csv_path = csv_path or table_path('transactions.csv')
+        self.idx_path = self.csv_path + '.idx'
+        self._lock = threading.Lock()
+        self._records = np.empty(0, dtype=RECORD)
+        self._inode = None
+
+    # ------------------------------------------------------------------
+    # Sidecar file
+    # ------------------------------------------------------------------
+    def _load(self) -> np.ndarray:
+        """Brings the in-memory records, sorted by account, up to date with the sidecar file."""
+        try:
+            st = os.stat(self.idx_path)
+        except OSError:
+            self._records = np.empty(0, dtype=RECORD)
+            return self._records
+        size = st.st_size - st.st_size % RECORD.itemsize
+        known = len(self._records) * RECORD.itemsize
+        if st.st_ino != self._inode or size < known:
+            # Rebuilt (possibly by another process) since we last read it
+            known = 0
+            self._records = np.empty(0, dtype=RECORD)
+            self._inode = st.st_ino
+        if size > known:
+            count = (size - known) // RECORD.itemsize
+            with open(self.idx_path, 'rb') as f:
+                f.seek(known)
+                tail = np.fromfile(f, dtype=RECORD, count=count)
+            self._records = _merge(self._records, tail)
+        return self._records
+
+    def _last(self):
+        """Returns the sidecar's last record, or None if it is empty."""
+        try:
+            size = os.path.getsize(self.idx_path)
+        except OSError:
+            return None
+        if size < RECORD.itemsize:
+            return None
+        with open(self.idx_path, 'rb') as f:
+            f.seek(size - size % RECORD.itemsize - RECORD.itemsize)
+            return np.frombuffer(f.read(RECORD.itemsize), dtype=RECORD)[0]
+
+    def _covered(self) -> int:
+        """Returns the byte position in the CSV up to which rows are indexed."""
+        last = self._last()
+        return 0 if last is None else int(last['offset'] + last['length'])
+
+    def _write(self, records: np.ndarray) -> None:
+        with open(self.idx_path, 'ab') as f:
+            f.write(records.tobytes())
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def record(self, account_ids, offsets, lengths) -> None:
+        """
+        Adds rows just appended to the CSV. Called by the transaction journal
+        while it holds the table's lock.
+
+        The rows are only recorded when the index already reaches up to them;
+        otherwise the next reader indexes the gap together with these rows.
+        """
+        if not offsets or self._covered() != offsets[0]:
+            return
+        records = np.empty(len(offsets), dtype=RECORD)
+        account_ids = np.asarray(account_ids)
+        if account_ids.dtype.kind in 'iu':
+            records['account'] = account_ids
+        else:
+            records['account'] = [_as_account_id(a) for a in account_ids]
+        records['offset'] = offsets
+        records['length'] = lengths
+        self._write(records)
+
+    def _account_column(self, handle) -> int:
+        handle.seek(0)
+        header = handle.readline().decode('utf-8').strip().split(',')
+        return header.index('AccountID')
+
+    def catch_up(self) -> int:
+        """
+        Indexes rows past the end of the index. Returns the number added.
+        The caller must hold the transactions table lock.
+        """
+        if not os.path.exists(self.csv_path):
+            return 0
+        covered = self._covered()
+        size = os.path.getsize(self.csv_path)
+        if size < covered:
+            return self.rebuild()
+        if size == covered:
+            return 0
+
+        added = 0
+        with open(self.csv_path, 'rb') as f:
+            try:
+                column = self._account_column(f)
+            except ValueError:
+                return 0
+            if covered and not self._last_row_matches(f, column):
+                # The file was rewritten rather than appended to
+                f.close()
+                return self.rebuild()
+            position = f.tell() if covered == 0 else covered
+            f.seek(position)
+            pending = b''
+            while True:
+                chunk = f.read(SCAN_CHUNK_SIZE)
+                if not chunk:
+                    break
+                data = pending + chunk
+                lines = data.split(b'\n')
+                pending = lines.pop()  # Unterminated remainder
+                batch = []
+                for line in lines:
+                    length = len(line) + 1
+                    if line.strip():
+                        account = _parse_account_id(line, column)
+                        batch.append((-1 if account is None else account, position, length))
+                    else:
+                        batch.append((-1, position, length))
+                    position += length
+                if batch:
+                    self._write(np.array(batch, dtype=RECORD))
+                    added += len(batch)
+        # A final row without a trailing newline is left for the next append,
+        # which terminates it before writing
+        return added
+
+    def _last_row_matches(self, handle, column: int) -> bool:
+        """Checks that the last indexed row is still where the index says."""
+        last = self._last()
+        handle.seek(int(last['offset']))
+        line = handle.read(int(last['length']))
+        if not line.endswith(b'\n') or len(line) != last['length']:
+            return False
+        account = _parse_account_id(line, column) if line.strip() else None
+        return (-1 if account is None else account) == last['account']
+
+    def rebuild(self) -> int:
+        """Re-creates the index from scratch. Returns the number of rows indexed."""
+        with self._lock:
+            if os.path.exists(self.idx_path):
+                os.remove(self.idx_path)
+            self._records = np.empty(0, dtype=RECORD)
+        return self.catch_up()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def _rows(self, account_ids):
+        """Returns (header, [row bytes]) or None if the index is stale."""
+        with self._lock:
+            records = self._load()
+        accounts = np.unique(np.asarray(account_ids, dtype=np.int64))
+        starts = np.searchsorted(records['account'], accounts, side='left')
+        ends = np.searchsorted(records['account'], accounts, side='right')
+        selected = np.concatenate([records[start:end] for start, end in zip(starts, ends)] + [records[:0]])
+        selected = selected[np.argsort(selected['offset'], kind='stable')]
+        size = os.path.getsize(self.csv_path)
+        rows = []
+        with open(self.csv_path, 'rb') as f:
+            header = f.readline()
+            if not header.endswith(b'\n'):
+                header += b'\n'
+            column = header.decode('utf-8').strip().split(',').index('AccountID')
+            for account, offset, length in selected:
+                if offset + length > size:
+                    return None
+                f.seek(offset)
+                line = f.read(length)
+                if not line.endswith(b'\n') or _parse_account_id(line, column) != account:
+                    return None
+                rows.append(line)
+        return header, rows
+
+    def read_accounts(self, account_ids) -> pd.DataFrame:
+        """
+        Returns the transactions of the given accounts, parsed as read_table would.
+
+        Parameters
+        ----------
+        account_ids : list of int
+            Accounts to fetch.
+
+        Returns
+        -------
+        DataFrame
+            The matching rows in file order.
+        """
+        account_ids = [int(a) for a in account_ids]
+        with table_lock(self.csv_path, exclusive=False):
+            indexed = self._covered() == os.path.getsize(self.csv_path)
+            result = self._rows(account_ids) if indexed else None
+        if result is None:
+            # Extending the index writes the sidecar, and a shared lock is never
+            # upgraded: start over under the exclusive lock
+            with table_lock(self.csv_path):
+                self.catch_up()
+                result = self._rows(account_ids)
+                if result is None:
+                    self.rebuild()
+                    result = self._rows(account_ids)
+        header, rows = result
+        return pd.read_csv(io.BytesIO(header + b''.join(rows)))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(csv_path: str = None) -> TransactionIndex:
+    """Returns the process-wide index for a transactions file."""
+    csv_path = os.path.abspath(csv_path or table_path('transactions.csv'))
+    with _indexes_lock:
+        if csv_path not in _indexes:
+            _indexes[csv_path] = TransactionIndex(csv_path)
+        return _indexes[csv_path]
+
+
+def read_account_transactions(account_ids) -> pd.DataFrame:
+    """
+    Returns the transactions for one account ID or a list of them.
+
+    Uses the offset index for CSV storage and an indexed query otherwise.
+    """
+    if not isinstance(account_ids, (list, tuple, set)):
+        account_ids = [account_ids]
+    if STORAGE_BACKEND != 'csv':
+        from scripts.repository import get_repository
+        return get_repository().find('transactions', AccountID=list(account_ids))
+    if not os.path.exists(table_path('transactions.csv')):
+        return pd.DataFrame(columns=['TransactionID', 'AccountID', 'TransactionType', 'Amount', 'TransDate'])
+    return index_for().read_accounts(account_ids)
+
+
+def rebuild_transaction_index(csv_path: str = None) -> dict:
+    """
+    Rebuilds the sidecar index of a transactions file.
+
+    Returns
+    -------
+    dict
+        {"status": "success", "message": "..."} or an error dict.
+    """
+    index = index_for(csv_path)
+    if not os.path.exists(index.csv_path):
+        return {"status": "error", "message": f"{os.path.basename(index.csv_path)} not found."}
+    with table_lock(index.csv_path):
+        count = index.rebuild()
+    return {"status": "success", "message": f"Indexed {count} row(s) of {os.path.basename(index.csv_path)}."}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ['rebuild']:
+        print("Usage: python -m scripts.transactionIndex rebuild [path]")
+        sys.exit(1)
+    print(rebuild_transaction_index(sys.argv[2] if len(sys.argv) > 2 else None)["message"])
@@ -0,0 +1,320 @@
+# transactionJournal.py
+"""
+Append-only writer for transactions.csv.
+
+Postings used to read the whole transaction history, add one row and rewrite
+the file, so each posting cost O(total history). The journal instead appends
+the new rows to the end of the file in the existing CSV schema, so a posting
+costs the same at 10 rows or 10 million. compact_transactions() rewrites the
+file in canonical form and is meant to be run offline.
+
+Run `python -m scripts.transactionJournal compact` from the root dir to compact.
+"""
+import io
+import os
+import csv
+import sys
+import time
+import threading
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+import numpy as np
+import pandas as pd
+from scripts.tableCache import STORAGE_BACKEND, read_table, invalidate_table, table_path
+from scripts.tableLock import table_lock
+from scripts.transactionIndex import index_for
+
+TRANSACTION_COLUMNS = ['TransactionID', 'AccountID', 'TransactionType', 'Amount', 'TransDate']
+
+# Durability policies for appended rows:
+#   flush    - hand the bytes to the OS on every append (default)
+#   fsync    - also fsync the file on every append
+#   interval - fsync at most once every JOURNAL_FSYNC_INTERVAL seconds
+SYNC_FLUSH = 'flush'
+SYNC_FSYNC = 'fsync'
+SYNC_INTERVAL = 'interval'
+SYNC_POLICIES = (SYNC_FLUSH, SYNC_FSYNC, SYNC_INTERVAL)
+
+DEFAULT_SYNC = os.environ.get('TRANSACTION_JOURNAL_SYNC', SYNC_FLUSH)
+DEFAULT_FSYNC_INTERVAL = float(os.environ.get('JOURNAL_FSYNC_INTERVAL', '1.0'))
+
+
+def format_amount(value) -> str:
+    """Formats an amount the way postings store it: two decimal places."""
+    return str(Decimal(str(value)).quantize(Decimal('0.00')))
+
+
+def format_trans_date(value) -> str:
+    """Formats a transaction date as YYYY-MM-DD."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_rows(rows, columns) -> bytes:
+    """Renders journal rows as CSV text in the table's column order."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in rows:
+        values = []
+        for column in columns:
+            value = row.get(column, '')
+            if column == 'Amount' and value not in ('', None):
+                try:
+                    value = format_amount(value)
+                except InvalidOperation:
+                    pass  # Leave malformed amounts as they were written
+            elif column == 'TransDate' and value not in ('', None):
+                value = format_trans_date(value)
+            values.append('' if value is None else value)
+        writer.writerow(values)
+    return buffer.getvalue().encode('utf-8')
+
+
+class TransactionJournal:
+    """
+    Appends posting rows to a CSV table without reading or rewriting it.
+
+    Parameters
+    ----------
+    path : str
+        The CSV file to append to (transactions.csv by default).
+    sync : str {'flush', 'fsync', 'interval'}
+        Durability policy applied after each append.
+    fsync_interval : float
+        Minimum seconds between fsyncs under the 'interval' policy.
+    """
+
+    def __init__(self, path: str = None, sync: str = DEFAULT_SYNC,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL, columns=None):
+        if sync not in SYNC_POLICIES:
+            raise ValueError(f"Unknown journal sync policy '{sync}'. Use one of {', '.join(SYNC_POLICIES)}.")
+        self.path = path or table_path('transactions.csv')
+        self.sync = sync
+        self.fsync_interval = fsync_interval
+        self.columns = list(columns or TRANSACTION_COLUMNS)
+        self._last_fsync = 0.0
+        self._lock = threading.Lock()
+
+    def append(self, rows) -> list:
+        """
+        Appends rows to the end of the journal file.
+
+        Parameters
+        ----------
+        rows : list of dict
+            One dict per posting, keyed by column name.
+
+        Returns
+        -------
+        list
+            The byte offset at which each appended row starts.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        account_ids = [row.get('AccountID') for row in rows] if 'AccountID' in self.columns else None
+        return self._append_payload(_encode_rows(rows, self.columns), account_ids)
+
+    def append_frame(self, frame: pd.DataFrame) -> list:
+        """
+        Appends the rows of a DataFrame, for bulk postings.
+
+        Values are written as they are, so Amount should already be formatted
+        with two decimal places and TransDate as YYYY-MM-DD. Missing columns
+        are left empty.
+
+        Returns
+        -------
+        list
+            The byte offset at which each appended row starts.
+        """
+        if frame.empty:
+            return []
+        blank = [''] * len(frame)
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(
+            zip(*(frame[column].tolist() if column in frame.columns else blank for column in self.columns)))
+        payload = buffer.getvalue().encode('utf-8')
+        account_ids = frame['AccountID'].to_numpy() if 'AccountID' in self.columns else None
+        return self._append_payload(payload, account_ids)
+
+    def _append_payload(self, payload: bytes, account_ids) -> list:
+        """Writes encoded rows in one append and records them in the index."""
+        with self._lock, table_lock(self.path):
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                prefix = b''
+                if size == 0:
+                    prefix = (','.join(self.columns) + '\n').encode('utf-8')
+                else:
+                    os.lseek(fd, size - 1, os.SEEK_SET)
+                    if os.read(fd, 1) != b'\n':
+                        # Files written by hand or by older code may lack a final newline
+                        prefix = b'\n'
+                start = size + len(prefix)
+                os.write(fd, prefix + payload)
+                self._sync(fd)
+            finally:
+                os.close(fd)
+
+            # Row boundaries: every newline ends a row
+            ends = np.flatnonzero(np.frombuffer(payload, dtype=np.uint8) == ord('\n')) + 1
+            starts = np.concatenate(([0], ends[:-1]))
+            offsets = (starts + start).tolist()
+            lengths = (ends - starts).tolist()
+            if account_ids is not None:
+                index_for(self.path).record(account_ids, offsets, lengths)
+
+        invalidate_table(self.path)
+        return offsets
+
+    def _sync(self, fd: int) -> None:
+        if self.sync == SYNC_FSYNC:
+            os.fsync(fd)
+        elif self.sync == SYNC_INTERVAL:
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(fd)
+                self._last_fsync = now
+
+
+# Shared journal for transactions.csv
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> TransactionJournal:
+    """Returns the process-wide journal for transactions.csv."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = TransactionJournal()
+        return _journal
+
+
+def append_transactions(rows) -> list:
+    """
+    Appends transaction rows to transactions.csv.
+
+    Parameters
+    ----------
+    rows : list of dict
+        Rows with TransactionID, AccountID, TransactionType, Amount and TransDate.
+
+    Returns
+    -------
+    list
+        Byte offsets of the appended rows (empty when STORAGE_BACKEND is not csv).
+    """
+    if STORAGE_BACKEND != 'csv':
+        from scripts.repository import get_repository
+        get_repository().append('transactions', rows)
+        return []
+    return get_journal().append(rows)
+
+
+def append_transaction_frame(frame: pd.DataFrame) -> list:
+    """
+    Appends a DataFrame of transaction rows to transactions.csv in one write.
+
+    Amount must already be formatted with two decimal places and TransDate as
+    YYYY-MM-DD. See append_transactions for the return value.
+    """
+    if STORAGE_BACKEND != 'csv':
+        from scripts.repository import get_repository
+        get_repository().append('transactions', frame.to_dict(orient='records'))
+        return []
+    return get_journal().append_frame(frame)
+
+
+def log_transaction(transactionID, accID, transactionType, amount, transDate=None) -> None:
+    """
+    Appends a single posting to transactions.csv.
+
+    Parameters
+    ----------
+    transactionID : int
+        ID of the transaction.
+    accID : int
+        Account the posting belongs to.
+    transactionType : str
+        Description stored in TransactionType (e.g. 'Deposit').
+    amount : Decimal, float or str
+        Posted amount, stored with two decimal places.
+    transDate : date, optional
+        Posting date, defaults to today.
+    """
+    append_transactions([{
+        'TransactionID': transactionID,
+        'AccountID': accID,
+        'TransactionType': transactionType,
+        'Amount': amount,
+        'TransDate': transDate or date.today()
+    }])
+
+
+def compact_transactions(path: str = None) -> dict:
+    """
+    Rewrites the transaction journal in canonical form.
+
+    Drops blank rows, writes every Amount with two decimal places and every
+    TransDate as YYYY-MM-DD, and ends the file with a newline. The new file is
+    written next to the old one and atomically renamed over it. The table is
+    locked exclusively throughout, so postings wait rather than being lost.
+
+    Parameters
+    ----------
+    path : str, optional
+        Journal to compact (transactions.csv by default).
+
+    Returns
+    -------
+    dict
+        {"status": "success", "message": "..."} or an error dict.
+    """
+    path = path or table_path('transactions.csv')
+    if not os.path.exists(path):
+        return {"status": "error", "message": f"{os.path.basename(path)} not found."}
+
+    with table_lock(path):
+        return _compact(path)
+
+
+def _compact(path: str) -> dict:
+    """Rewrites the journal at `path`; the caller holds its exclusive lock."""
+    try:
+        transData = read_table(path, dtype=str, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        transData = pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    before = len(transData)
+    transData = transData[(transData != '').any(axis=1)] if not transData.empty else transData
+    columns = list(transData.columns) or TRANSACTION_COLUMNS
+
+    if 'TransDate' in transData.columns:
+        parsed = pd.to_datetime(transData['TransDate'], errors='coerce', format='mixed')
+        transData['TransDate'] = parsed.dt.strftime('%Y-%m-%d').where(parsed.notna(), transData['TransDate'])
+
+    tmpPath = f"{path}.compact.tmp"
+    with open(tmpPath, 'wb') as f:
+        f.write((','.join(columns) + '\n').encode('utf-8'))
+        f.write(_encode_rows(transData.to_dict(orient='records'), columns))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpPath, path)
+    invalidate_table(path)
+    index_for(path).rebuild()
+
+    dropped = before - len(transData)
+    return {"status": "success", "message": f"Compacted {len(transData)} transaction(s); dropped {dropped} blank row(s)."}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ['compact']:
+        print("Usage: python -m scripts.transactionJournal compact [path]")
+        sys.exit(1)
+    print(compact_transactions(sys.argv[2] if len(sys.argv) > 2 else None)["message"])
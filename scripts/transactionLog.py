@@ -1,22 +1,19 @@
 # Spring 2025 Authors: Bailee Segars, Sierra Yerges
-import pandas as pd
-import random
+from scripts.idAllocator import next_id
 
-def generate_transaction_ID(logInfo) -> int:
+def generate_transaction_ID(logInfo=None) -> int:
     """
     Generates a unique transaction ID for each transaction.
 
     Parameters
     ----------
-    logInfo: dataframe
-        Dataframe of log information from logs.csv.
+    logInfo: dataframe, optional
+        Unused. IDs come from the persistent 'transaction' sequence, so the
+        existing IDs no longer need to be checked.
 
     Returns
     -------
     transactionID: int
         ID associated with the transaction.
     """
-    transactionID = random.randint(999, 9999) # generates a random ID
-    if transactionID not in logInfo:
-        return transactionID
-    generate_transaction_ID(logInfo)
\ No newline at end of file
+    return next_id('transaction')
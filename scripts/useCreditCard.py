@@ -1,10 +1,13 @@
 # Spring 2025 Authors: Sierra Yerges
-import pandas as pd
+from scripts.tableCache import read_table, write_table, table_path
+from scripts.tableLock import locks_tables
+from scripts.money import to_money, format_money_columns
 from decimal import Decimal
 from datetime import date
-import os
-from transactionLog import generate_transaction_ID
+from scripts.transactionLog import generate_transaction_ID
+from scripts.transactionJournal import log_transaction
 
+@locks_tables('accounts.csv', 'transactions.csv')
 def useCreditCard(accID, amount) -> dict:
     """
     Use the credit card for purchases. Increases the amount owed (negative balance).
@@ -21,11 +24,9 @@ def useCreditCard(accID, amount) -> dict:
     dict
         Result message indicating success or failure.
     """
-    accPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/accounts.csv'))
-    transPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/transactions.csv'))
+    accPath = table_path('accounts.csv')
 
-    accInfo = pd.read_csv(accPath)
-    transInfo = pd.read_csv(transPath)
+    accInfo = read_table(accPath)
 
     if accID not in accInfo['AccountID'].values:
         return {"status": "error", "message": f"Credit card account {accID} not found."}
@@ -36,10 +37,8 @@ def useCreditCard(accID, amount) -> dict:
     if accType != 'Credit Card':
         return {"status": "error", "message": f"Account {accID} is not a credit card."}
 
-    accInfo['CurrBal'] = accInfo['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-    accInfo['CreditLimit'] = accInfo['CreditLimit'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-    currentBal = Decimal(accInfo.at[accIndex, 'CurrBal'])
-    creditLimit = Decimal(accInfo.at[accIndex, 'CreditLimit'])
+    currentBal = to_money(accInfo.at[accIndex, 'CurrBal'])
+    creditLimit = to_money(accInfo.at[accIndex, 'CreditLimit'])
 
     # Check if new balance exceeds credit limit
     proposed_balance = currentBal - Decimal(amount).quantize(Decimal('0.00'))
@@ -48,21 +47,12 @@ def useCreditCard(accID, amount) -> dict:
 
     # Apply the charge (increase owed amount)
     newBal = currentBal - Decimal(amount).quantize(Decimal('0.00'))
-    accInfo.at[accIndex, 'CurrBal'] = newBal
-    accInfo.to_csv(accPath, index=False)
+    format_money_columns(accInfo, 'CurrBal', 'CreditLimit')
+    accInfo.at[accIndex, 'CurrBal'] = str(newBal)
+    write_table(accInfo, accPath)
 
-    # Log the transaction
-    transactionID = generate_transaction_ID(transInfo)
-    newTrans = {
-        'TransactionID': transactionID,
-        'AccountID': accID,
-        'TransactionType': 'Credit Card Charge',
-        'Amount': Decimal(amount).quantize(Decimal('0.00')),
-        'TransDate': date.today()
-    }
-
-    transInfo.loc[len(transInfo)] = newTrans
-    transInfo['Amount'] = transInfo['Amount'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-    transInfo.to_csv(transPath, index=False)
+    # Append the transaction to the journal
+    transactionID = generate_transaction_ID()
+    log_transaction(transactionID, accID, 'Credit Card Charge', Decimal(amount).quantize(Decimal('0.00')), date.today())
 
     return {"status": "success", "message": f"Charged ${amount} to credit card account {accID}."}
@@ -1,9 +1,5 @@
 # Spring 2025 Authors: Bailee Segars, Sierra Yerges, Braden Doty
-from scripts.transactionLog import generate_transaction_ID
-from decimal import Decimal
-from datetime import date
-import pandas as pd
-import os
+from scripts.ledger import post
 
 def withdraw(accID, amount) -> dict:
     """
@@ -29,45 +25,8 @@ def withdraw(accID, amount) -> dict:
         - If withdrawal amount requested is larger than available balance:\n
         {"status": "error", "message": f"Insufficient funds. Cannot withdraw {amount} from account {accID}."}
     """
-    # Creates dataframe with csv data
-    # Gets row for requested customer
-    accPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/accounts.csv'))
-    transPath = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles/transactions.csv'))
-    accInfo = pd.read_csv(accPath)
-    transInfo = pd.read_csv(transPath)
+    result = post([('withdrawal', accID, amount)])
+    if result["status"] != "success":
+        return {"status": "error", "message": result["message"]}
 
-    if accID not in accInfo['AccountID'].values:
-        return {"status": "error", "message": f"Source account {accID} not found."}
-
-    accIndex = accInfo.loc[accInfo['AccountID'] == accID].index[0]
-    accType = accInfo.at[accIndex, 'AccountType']
-    custID = accInfo.at[accIndex, 'CustomerID']
-    accInfo['CurrBal'] = accInfo['CurrBal'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-    currentBal = Decimal(accInfo.at[accIndex, 'CurrBal'])
-
-    # Account type and balance validation
-    if accType != 'Checking' and accType != 'Savings' and accType != 'Money Market':
-        return {"status": "error", "message": f"Incorrect account type selected. Cannot withdraw {amount} from account {accID}."}
-    if amount > currentBal:
-        return {"status": "error", "message": f"Insufficient funds. Cannot withdraw {amount} from account {accID}."}
-
-    # Completes withdrawal and updates csv file
-    currentBal -= Decimal(amount).quantize(Decimal('0.00'))
-    accInfo['CreditLimit'] = accInfo['CreditLimit'].apply(lambda x: Decimal(str(x)).quantize(Decimal('0.00')))
-    accInfo.at[accIndex, 'CurrBal'] = Decimal(currentBal).quantize(Decimal('0.00'))
-    accInfo.to_csv(accPath, index=False)
-
-    # Generate transaction ID and log the transaction
-    transactionID = generate_transaction_ID(transInfo)
-    newTrans = {
-        'TransactionID': transactionID,
-        'AccountID': accID,
-        'TransactionType': 'Withdrawal',
-        'Amount': Decimal(amount).quantize(Decimal('0.00')),
-        'TransDate': date.today()
-    }
-
-    transInfo.loc[len(transInfo)] = newTrans
-    transInfo.to_csv(transPath, index=False)
-
-    return {"status": "success", "message": f"Withdrew {amount} from account {accID}."}
\ No newline at end of file
+    return {"status": "success", "message": f"Withdrew {amount} from account {accID}."}
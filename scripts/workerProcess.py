@@ -0,0 +1,119 @@
+# workerProcess.py
+"""
+Supervision of the batch worker process (scripts/batchWorker.py).
+
+gunicorn's master starts the batch worker next to the web workers (see
+gunicorn.conf.py), but only restarts its own web workers. WorkerProcess runs
+the batch worker as a child process and a thread of the master that checks on
+it every BATCH_WORKER_CHECK seconds. A worker that exited, for whatever
+reason, is started again after a wait that doubles, up to
+BATCH_WORKER_MAX_BACKOFF seconds, each time it exits soon after starting, so
+a worker that cannot start does not spin. A gunicorn reload restarts it too,
+so it runs the new code.
+
+Only the standard library is imported, as this module is loaded in the master.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import subprocess
+
+# Seconds between checks that the batch worker is still running
+BATCH_WORKER_CHECK = float(os.environ.get('BATCH_WORKER_CHECK', '5'))
+
+# Longest wait, in seconds, before starting an exited batch worker again
+BATCH_WORKER_MAX_BACKOFF = float(os.environ.get('BATCH_WORKER_MAX_BACKOFF', '60'))
+
+
+class WorkerProcess:
+    """
+    A child process that is started again whenever it exits.
+
+    Parameters
+    ----------
+    command : list, optional
+        The command line (python -m scripts.batchWorker by default).
+    cwd : str, optional
+        Directory to run it in.
+    log : logging.Logger, optional
+        Where starts and exits are logged (gunicorn passes its own).
+    check_interval : float, optional
+        Seconds between checks (BATCH_WORKER_CHECK by default).
+    max_backoff : float, optional
+        Longest wait before a restart (BATCH_WORKER_MAX_BACKOFF by default). A
+        process that ran at least this long is restarted after one check.
+    """
+
+    def __init__(self, command: list = None, cwd: str = None, log=None, check_interval: float = None,
+                 max_backoff: float = None):
+        self.command = command or [sys.executable, '-m', 'scripts.batchWorker']
+        self.cwd = cwd
+        self.log = log or logging.getLogger(__name__)
+        self.check_interval = BATCH_WORKER_CHECK if check_interval is None else check_interval
+        self.max_backoff = BATCH_WORKER_MAX_BACKOFF if max_backoff is None else max_backoff
+        self.process = None
+        self.starts = 0
+        self._started = 0.0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._watcher = None
+
+    def start(self) -> None:
+        """Starts the process and the thread that keeps it running."""
+        with self._lock:
+            self._spawn()
+        self._watcher = threading.Thread(target=self._watch, name='batch-worker-watch', daemon=True)
+        self._watcher.start()
+
+    def restart(self, grace: float) -> None:
+        """Stops the process, giving it `grace` seconds to finish its job, and starts it again."""
+        with self._lock:
+            self._terminate(grace)
+            if not self._stopping.is_set():
+                self._spawn()
+
+    def stop(self, grace: float) -> None:
+        """Stops the process for good, giving it `grace` seconds to finish its job."""
+        self._stopping.set()
+        with self._lock:
+            self._terminate(grace)
+        if self._watcher is not None and self._watcher is not threading.current_thread():
+            self._watcher.join(self.check_interval + 1)
+
+    def _spawn(self) -> None:
+        self.process = subprocess.Popen(self.command, cwd=self.cwd)
+        self._started = time.monotonic()
+        self.starts += 1
+        self.log.info("Started batch worker (pid %s).", self.process.pid)
+
+    def _terminate(self, grace: float) -> None:
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(grace)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def _watch(self) -> None:
+        backoff = 0.0
+        while not self._stopping.wait(self.check_interval):
+            with self._lock:
+                process = self.process
+                # gunicorn's master may reap the process first, and its exit code then reads as 0
+                code = process.poll()
+            if code is None:
+                continue
+            ran = time.monotonic() - self._started
+            backoff = 0.0 if ran >= self.max_backoff else min(self.max_backoff, backoff * 2 or self.check_interval)
+            self.log.warning("Batch worker (pid %s) exited with code %s after %.0fs; starting it again in %.1fs.",
+                             process.pid, code, ran, backoff)
+            if self._stopping.wait(backoff):
+                break
+            with self._lock:
+                # A reload may have started a new one in the meantime
+                if self.process is process and not self._stopping.is_set():
+                    self._spawn()
@@ -0,0 +1,11 @@
+# conftest.py
+"""Runs every test against a temporary copy of csvFiles/ (see tableSandbox.py)."""
+import pytest
+from tests.tableSandbox import TableSandbox
+
+
+@pytest.fixture(autouse=True)
+def table_sandbox():
+    sandbox = TableSandbox().start()
+    yield sandbox
+    sandbox.stop()
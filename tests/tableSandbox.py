@@ -0,0 +1,127 @@
+# tableSandbox.py
+"""
+Points every table path at a temporary copy of csvFiles/ for one test.
+
+Every suite derives from TableTestCase, which starts a sandbox in setUp, so a
+suite run directly with unittest is isolated too; tests/conftest.py also
+starts one around every test pytest collects. Inside a sandbox table_path(),
+the table locks, the repository, the ID allocator, the transaction journal
+and the batch/scheduler bookkeeping files all resolve into the temporary
+directory, so no test can change the tracked tables. Tests write their
+fixtures with TableSandbox.write and pick the next IDs with seed_ids instead
+of patching reserve_ids.
+"""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# The tracked tables every sandbox starts from
+SOURCE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../csvFiles'))
+
+
+class TableSandbox:
+    """
+    A temporary csvFiles/ directory and the patches that point the app at it.
+
+    Parameters
+    ----------
+    copy_tables : bool, optional
+        True (default) starts from a copy of the tracked CSV tables; False
+        starts from an empty directory.
+    """
+
+    def __init__(self, copy_tables: bool = True):
+        self.copy_tables = copy_tables
+        self.directory = None
+        self._patchers = []
+
+    def start(self) -> 'TableSandbox':
+        import scripts.tableLock
+        import scripts.tableCache
+        import scripts.repository
+        import scripts.idAllocator
+        import scripts.transactionJournal
+        import scripts.jobQueue
+        import scripts.leaderLease
+        import scripts.requestStats
+
+        self.directory = tempfile.mkdtemp()
+        if self.copy_tables:
+            for name in os.listdir(SOURCE_DIR):
+                if name.endswith('.csv'):
+                    shutil.copy(os.path.join(SOURCE_DIR, name), self.directory)
+
+        targets = [
+            (scripts.tableLock, 'CSV_DIR', self.directory),
+            (scripts.tableCache, 'CSV_DIR', self.directory),
+            (scripts.repository, 'CSV_DIR', self.directory),
+            (scripts.repository, 'DEFAULT_SQLITE_PATH', self.path('bank.db')),
+            (scripts.repository, '_repository', None),
+            (scripts.idAllocator, 'CSV_DIR', self.directory),
+            (scripts.idAllocator, '_allocator', None),
+            (scripts.transactionJournal, '_journal', None),
+            (scripts.jobQueue, 'QUEUE_PATH', self.path('jobQueue.db')),
+            (scripts.leaderLease, 'LEASE_PATH', self.path('schedulerLease.json')),
+            (scripts.requestStats, 'STATS_DIR', self.path('requestStats')),
+            (scripts.requestStats, '_stats', None),
+        ]
+        for module, name, value in targets:
+            patcher = patch.object(module, name, value)
+            patcher.start()
+            self._patchers.append(patcher)
+        scripts.tableCache.invalidate_table()
+        return self
+
+    def stop(self) -> None:
+        from scripts.tableCache import invalidate_table
+        while self._patchers:
+            self._patchers.pop().stop()
+        invalidate_table()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def path(self, *names: str) -> str:
+        """Returns the sandboxed path of a table or bookkeeping file."""
+        return os.path.join(self.directory, *names)
+
+    def write(self, filename: str, text: str) -> str:
+        """Replaces a sandboxed file with `text` and returns its path."""
+        from scripts.tableCache import invalidate_table
+        target = self.path(filename)
+        with open(target, 'w') as f:
+            f.write(text)
+        invalidate_table(target)
+        return target
+
+    def seed_ids(self, **next_ids) -> None:
+        """
+        Makes the allocator hand out the given IDs next, e.g.
+        seed_ids(transaction=500) before a posting expected to get ID 500.
+        """
+        import scripts.idAllocator
+        target = self.path('sequences.json')
+        sequences = {}
+        if os.path.exists(target):
+            with open(target) as f:
+                sequences = json.load(f)
+        sequences.update(next_ids)
+        with open(target, 'w') as f:
+            json.dump(sequences, f)
+        # Drop any block reserved before the seed
+        scripts.idAllocator._allocator = None
+
+
+class TableTestCase(unittest.TestCase):
+    """
+    Base class of the suites: each test runs in its own sandbox, available as
+    self.tables. Suites that build every table themselves set copy_tables to
+    False to start from an empty directory.
+    """
+
+    copy_tables = True
+
+    def setUp(self):
+        self.tables = TableSandbox(self.copy_tables).start()
+        self.addCleanup(self.tables.stop)
@@ -0,0 +1,100 @@
+# In root dir: python -m unittest tests/test_achImport.py
+import unittest
+import pandas as pd
+from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
+from scripts.achImport import import_deposits
+
+
+class TestAchImport(TableTestCase):
+    """
+    Unit tests for the direct-deposit importer in achImport.py.
+
+    This suite tests:
+    - Credits are summed per account and journaled once per account
+    - Bad lines go to the reject file with their line number and reason
+    - Chunk size does not change the outcome
+    - A failed journal append leaves balances and journal unchanged
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.accounts = self.tables.write("accounts.csv",
+                                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n"
+                                          "101,1,Checking,10.00,2025-01-01,,\n"
+                                          "202,1,Savings,0.50,2025-01-01,,4.0\n"
+                                          "303,2,Credit Card,-40.00,2025-01-01,1000.00,22.5\n")
+        self.journal = self.tables.write("transactions.csv",
+                                         "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+        self.input = self.tables.write("ach.csv",
+                                       "AccountID,Amount,TraceNumber\n"
+                                       "101,100.00,1\n"
+                                       "202,20.25,2\n"
+                                       "101,0.10,3\n"
+                                       "999,5.00,4\n"
+                                       "303,5.00,5\n"
+                                       "abc,5.00,6\n"
+                                       "202,-1.00,7\n"
+                                       "\n"
+                                       "202,1.x,9\n")
+        self.tables.seed_ids(transaction=500)
+
+    def _import(self, **kwargs):
+        return import_deposits(self.input, accounts_path=self.accounts, journal_path=self.journal, **kwargs)
+
+    def test_credits_are_aggregated(self):
+        """
+        Test that accepted lines are summed per account and written once.
+        """
+        result = self._import()
+        self.assertEqual(result["status"], "success")
+        self.assertEqual((result["lines"], result["accepted"], result["rejected"], result["accounts"]), (9, 3, 6, 2))
+        self.assertEqual(result["total"], "120.35")
+
+        accounts = pd.read_csv(self.accounts)
+        self.assertEqual(accounts["CurrBal"].tolist(), [110.10, 20.75, -40.00])
+        journal = pd.read_csv(self.journal)
+        self.assertEqual(journal[["TransactionID", "AccountID", "Amount"]].values.tolist(), [[500, 101, 100.10], [501, 202, 20.25]])
+        self.assertEqual(set(journal["TransactionType"]), {"Direct Deposit"})
+
+    def test_reject_file(self):
+        """
+        Test that each rejected line is reported with its line number and reason.
+        """
+        self._import()
+        rejects = pd.read_csv(self.input + ".rejects.csv", dtype=str, keep_default_na=False)
+        reasons = dict(zip(rejects["LineNumber"].astype(int), rejects["Reason"]))
+        self.assertEqual(reasons, {
+            5: "Account not found",
+            6: "Account does not accept direct deposits",
+            7: "Malformed account ID",
+            8: "Amount must be positive",
+            9: "Malformed account ID",
+            10: "Malformed amount",
+        })
+
+    def test_chunk_size_does_not_matter(self):
+        """
+        Test that a tiny chunk size gives the same balances as one chunk.
+        """
+        result = self._import(chunk_size=2)
+        self.assertEqual(result["accepted"], 3)
+        self.assertEqual(pd.read_csv(self.accounts)["CurrBal"].tolist(), [110.10, 20.75, -40.00])
+
+    def test_failed_append_rolls_back(self):
+        """
+        Test that balances and the journal are restored if appending fails.
+        """
+        with open(self.accounts) as f:
+            before = pd.read_csv(f)
+        with patch("scripts.achImport.TransactionJournal.append", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self._import()
+        self.assertEqual(pd.read_csv(self.accounts)["CurrBal"].tolist(), before["CurrBal"].tolist())
+        self.assertEqual(len(pd.read_csv(self.journal)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,10 @@
 import unittest
 from unittest.mock import patch
 import pandas as pd
+from tests.tableSandbox import TableTestCase
 from scripts.archive import archive, viewArchivedBills, viewArchivedLoans
 
-class TestArchiveFunctions(unittest.TestCase):
+class TestArchiveFunctions(TableTestCase):
     """
     Unit tests for archive and view functions in archive.py.
 
@@ -16,29 +17,31 @@ class TestArchiveFunctions(unittest.TestCase):
     """
 
     @patch("scripts.archive.os.path.exists", return_value=True)
-    @patch("scripts.archive.pd.read_csv")
-    @patch("scripts.archive.pd.DataFrame.to_csv")
-    def test_archive_valid_bill(self, mock_to_csv, mock_read_csv, mock_exists):
+    @patch("scripts.archive.read_table")
+    @patch("scripts.archive.write_table")
+    @patch("scripts.archive.write_bills")
+    def test_archive_valid_bill(self, mock_write_bills, mock_write_table, mock_read_table, mock_exists):
         """
         Test archiving a valid bill record.
 
         Verifies:
         - Correct bill is archived.
-        - Archived file is updated via to_csv.
+        - Archived file and bills file are both written.
         """
         mock_bills_df = pd.DataFrame([{"BillID": 1001, "CustomerID": 1, "Amount": "50.00"}])
         mock_archived_df = pd.DataFrame(columns=["BillID", "CustomerID", "Amount"])
-        mock_read_csv.side_effect = [mock_bills_df, mock_archived_df]
+        mock_read_table.side_effect = [mock_bills_df, mock_archived_df]
 
         result = archive("bill", 1001)
         self.assertEqual(result["status"], "success")
         self.assertIn("archived successfully", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
+        mock_write_bills.assert_called()
 
     @patch("scripts.archive.os.path.exists", return_value=True)
-    @patch("scripts.archive.pd.read_csv")
-    @patch("scripts.archive.pd.DataFrame.to_csv")
-    def test_archive_bill_not_found(self, mock_to_csv, mock_read_csv, mock_exists):
+    @patch("scripts.archive.read_table")
+    @patch("scripts.archive.write_table")
+    def test_archive_bill_not_found(self, mock_write_table, mock_read_table, mock_exists):
         """
         Test archiving a non-existent bill.
 
@@ -47,22 +50,22 @@ class TestArchiveFunctions(unittest.TestCase):
         """
         mock_bills_df = pd.DataFrame([{"BillID": 1002, "CustomerID": 1, "Amount": "75.00"}])
         mock_archived_df = pd.DataFrame(columns=["BillID", "CustomerID", "Amount"])
-        mock_read_csv.side_effect = [mock_bills_df, mock_archived_df]
+        mock_read_table.side_effect = [mock_bills_df, mock_archived_df]
 
         result = archive("bill", 9999)
         self.assertEqual(result["status"], "error")
         self.assertIn("not found", result["message"])
 
     @patch("scripts.archive.os.path.exists", side_effect=lambda path: "accounts.csv" in path or "archivedLoans.csv" in path)
-    @patch("scripts.archive.pd.read_csv")
-    @patch("scripts.archive.pd.DataFrame.to_csv")
-    def test_archive_valid_loan(self, mock_to_csv, mock_read_csv, mock_exists):
+    @patch("scripts.archive.read_table")
+    @patch("scripts.archive.write_table")
+    def test_archive_valid_loan(self, mock_write_table, mock_read_table, mock_exists):
         """
         Test archiving a valid mortgage loan with $0 balance.
 
         Verifies:
         - Loan is archived successfully.
-        - to_csv is called to persist archive.
+        - write_table is called to persist archive.
         """
         mock_loan_df = pd.DataFrame([{
             "AccountID": 5001,
@@ -73,16 +76,16 @@ class TestArchiveFunctions(unittest.TestCase):
             "CreditLimit": "0.00"
         }])
         mock_archived_df = pd.DataFrame(columns=["AccountID", "CustomerID", "AccountType", "CurrBal", "Amount", "CreditLimit"])
-        mock_read_csv.side_effect = [mock_loan_df, mock_archived_df]
+        mock_read_table.side_effect = [mock_loan_df, mock_archived_df]
 
         result = archive("loan", 5001)
         self.assertEqual(result["status"], "success")
         self.assertIn("archived successfully", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
     @patch("scripts.archive.os.path.exists", return_value=True)
-    @patch("scripts.archive.pd.read_csv")
-    def test_view_archived_bills(self, mock_read_csv, mock_exists):
+    @patch("scripts.archive.read_table")
+    def test_view_archived_bills(self, mock_read_table, mock_exists):
         """
         Test viewing archived bills for a customer with existing archived records.
         """
@@ -90,7 +93,7 @@ class TestArchiveFunctions(unittest.TestCase):
             {"BillID": 1001, "CustomerID": 1, "Amount": "50.00"},
             {"BillID": 1002, "CustomerID": 2, "Amount": "60.00"}
         ])
-        mock_read_csv.return_value = mock_archived
+        mock_read_table.return_value = mock_archived
 
         results = viewArchivedBills(1)
         self.assertIsInstance(results, list)
@@ -109,8 +112,8 @@ class TestArchiveFunctions(unittest.TestCase):
         self.assertIn("No archived bills", results[0]["message"])
 
     @patch("scripts.archive.os.path.exists", return_value=True)
-    @patch("scripts.archive.pd.read_csv")
-    def test_view_archived_loans_empty(self, mock_read_csv, mock_exists):
+    @patch("scripts.archive.read_table")
+    def test_view_archived_loans_empty(self, mock_read_table, mock_exists):
         """
         Test viewing archived loans returns error if no loans exist for the customer.
 
@@ -118,7 +121,7 @@ class TestArchiveFunctions(unittest.TestCase):
         - Even with correct columns, empty data returns an error response.
         """
         mock_archived = pd.DataFrame(columns=["AccountID", "CustomerID", "AccountType", "CurrBal", "Amount", "CreditLimit"])
-        mock_read_csv.return_value = mock_archived
+        mock_read_table.return_value = mock_archived
 
         results = viewArchivedLoans(999)
         self.assertEqual(results[0]["status"], "error")
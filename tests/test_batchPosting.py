@@ -0,0 +1,96 @@
+# In root dir: python -m unittest tests/test_batchPosting.py
+import unittest
+import pandas as pd
+from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
+from scripts.batchPosting import post_batch
+from scripts.repository import CsvRepository
+from scripts.tableCache import read_table
+
+
+class TestBatchPosting(TableTestCase):
+    """
+    Unit tests for post_batch in batchPosting.py.
+
+    This suite tests:
+    - Items are applied in order against one snapshot and committed in one write
+    - Rejected and malformed items get their own error without blocking the rest
+    - Invalid batches are refused
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.accounts = self.tables.write("accounts.csv",
+                                          "AccountID,CustomerID,AccountType,CurrBal\n"
+                                          "101,1,Checking,100.0\n"
+                                          "202,1,Savings,0.0\n"
+                                          "303,2,Credit Card,-40.0\n")
+        self.journal = self.tables.write("transactions.csv",
+                                         "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+        self.tables.seed_ids(transaction=1)
+        patches = [
+            patch("scripts.ledger.read_table", side_effect=read_table),
+            patch("scripts.repository.CsvRepository.commit", autospec=True, side_effect=CsvRepository.commit),
+        ]
+        self.read_table, self.commit = [p.start() for p in patches]
+        for p in patches:
+            self.addCleanup(p.stop)
+
+    def _journal(self):
+        return pd.read_csv(self.journal, dtype=str)
+
+    def test_items_apply_in_order_with_one_commit(self):
+        """
+        Test that later items see earlier ones and everything is written once.
+        """
+        result = post_batch([
+            {"type": "directDeposit", "accountId": "101", "amount": "50.00"},
+            {"type": "transfer", "sourceAccountId": 101, "destinationAccountId": 202, "amount": "150.00"},
+            {"type": "withdrawal", "accountId": 202, "amount": "25.00"},
+        ])
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["message"], "Posted 3 of 3 items.")
+        self.assertEqual(result["results"][1], {
+            "status": "success",
+            "message": "Successfully transferred $150.00 from Account 101 to Account 202."
+        })
+        self.assertEqual(self.commit.call_count, 1)
+        self.assertEqual(len(self._journal()), 4)
+        self.assertEqual(pd.read_csv(self.accounts, dtype=str)["CurrBal"].tolist(), ["0.00", "125.00", "-40.00"])
+
+    def test_rejected_items_do_not_block_others(self):
+        """
+        Test that invalid or rejected items report errors while valid items are posted.
+        """
+        result = post_batch([
+            {"type": "withdrawal", "accountId": 101, "amount": "500.00"},
+            {"type": "deposit", "accountId": 303, "amount": "40.00"},
+            {"type": "deposit", "accountId": 404, "amount": "1.00"},
+            {"type": "refund", "accountId": 101, "amount": "1.00"},
+            {"type": "deposit", "accountId": 101, "amount": "-5"},
+        ])
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["message"], "Posted 1 of 5 items.")
+        messages = [r["message"] for r in result["results"]]
+        self.assertEqual(messages[0], "Insufficient funds. Cannot withdraw 500.00 from account 101.")
+        self.assertEqual(messages[1], "40.00 deposited to account 303.")
+        self.assertEqual(messages[2], "Destination account 404 not found.")
+        self.assertIn("Unknown item type", messages[3])
+        self.assertEqual(messages[4], "Amount must be a positive number.")
+        journal = self._journal()
+        self.assertEqual(journal[["AccountID", "Amount"]].values.tolist(), [["303", "40.00"]])
+
+    def test_invalid_batch(self):
+        """
+        Test that empty or non-list batches are refused without reading any table.
+        """
+        for items in ([], None, {"type": "deposit"}):
+            with self.subTest(items=items):
+                self.assertEqual(post_batch(items)["status"], "error")
+        self.read_table.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
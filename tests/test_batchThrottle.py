@@ -0,0 +1,120 @@
+# In root dir: python -m unittest tests/test_batchThrottle.py
+import os
+import sys
+import json
+import time
+import socket
+import unittest
+import subprocess
+from tests.tableSandbox import TableTestCase
+from scripts.batchThrottle import BatchThrottle
+from scripts.requestStats import RequestStats, read_request_load, STATS_WINDOW
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestBatchThrottle(TableTestCase):
+    """
+    Unit tests for the batch throttle in batchThrottle.py and the request load in requestStats.py.
+
+    This suite tests:
+    - Slices go ahead at once while the web app is within its targets
+    - Back-off doubles while p95 latency or in-flight requests are over target, up to the maximum wait
+    - Web workers publish their in-flight count and p95 from a background thread, and idle or stopped workers are ignored
+    - A worker's file is removed when it exits, and files left by dead processes are ignored
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.sleeps = []
+
+    def _throttle(self, loads, **kwargs):
+        loads = iter(loads)
+        return BatchThrottle(target_p95_ms=200, max_in_flight=3, min_backoff=0.5, max_backoff=2,
+                             load=lambda: next(loads), sleep=self.sleeps.append, **kwargs)
+
+    def test_quiet_web_app(self):
+        """
+        Test that a slice goes ahead without waiting when the web app is within its targets.
+        """
+        throttle = self._throttle([{"in_flight": 3, "p95_ms": 200.0, "workers": 2}])
+        self.assertEqual(throttle.wait(), 0.0)
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual(throttle.summary(), {"slices": 1, "backoffs": 0, "waited_seconds": 0.0})
+
+    def test_backs_off_while_busy(self):
+        """
+        Test that back-off doubles up to its maximum and stops once the web app is quiet again.
+        """
+        busy = [{"in_flight": 0, "p95_ms": 800.0, "workers": 1}] * 3 + [{"in_flight": 9, "p95_ms": 10.0, "workers": 1}]
+        throttle = self._throttle(busy + [{"in_flight": 1, "p95_ms": 10.0, "workers": 1}], max_wait=60)
+        self.assertEqual(throttle.wait(), 5.5)
+        self.assertEqual(self.sleeps, [0.5, 1, 2, 2])
+
+    def test_gives_up_after_max_wait(self):
+        """
+        Test that a slice goes ahead after the maximum wait even if the web app stays busy.
+        """
+        throttle = self._throttle([{"in_flight": 10, "p95_ms": 900.0, "workers": 1}] * 10, max_wait=2)
+        self.assertEqual(throttle.wait(), 2.0)
+        self.assertEqual(self.sleeps, [0.5, 1, 0.5])
+
+    def test_published_request_load(self):
+        """
+        Test that workers' stats are combined and files older than the window are ignored.
+        """
+        clock = _Clock()
+        stats = RequestStats(self.tables.directory, clock=clock)
+        self.addCleanup(stats.close)
+        for seconds in [0.01] * 19 + [0.5]:
+            stats.started()
+            stats.finished(seconds)
+        stats.started()
+        stats.publish(force=True)
+        self.assertEqual((stats.snapshot()["in_flight"], stats.snapshot()["p95_ms"]), (1, 500.0))
+
+        with open(self.tables.path("other-1.json"), "w") as f:
+            json.dump({"in_flight": 2, "p95_ms": 40.0, "updated": clock.now}, f)
+        with open(self.tables.path("gone-2.json"), "w") as f:
+            json.dump({"in_flight": 5, "p95_ms": 9000.0, "updated": clock.now - STATS_WINDOW - 1}, f)
+        self.assertEqual(read_request_load(self.tables.directory, now=clock.now), {"in_flight": 3, "p95_ms": 500.0, "workers": 2})
+
+        # Finishing the last request has the publisher write the idle worker at once
+        stats.finished(0.01)
+        deadline = time.monotonic() + 5
+        while read_request_load(self.tables.directory, now=clock.now)["in_flight"] != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(read_request_load(self.tables.directory, now=clock.now)["in_flight"], 2)
+        self.assertEqual(read_request_load(self.tables.path("missing")),
+                         {"in_flight": 0, "p95_ms": 0.0, "workers": 0})
+
+    def test_stopped_workers_leave_no_load(self):
+        """
+        Test that close() removes the worker's file and that a file left by a dead process is ignored and removed.
+        """
+        stats = RequestStats(self.tables.directory)
+        stats.started()
+        stats.publish(force=True)
+        self.assertTrue(os.path.exists(stats.path))
+        stats.close()
+        self.assertFalse(os.path.exists(stats.path))
+
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        stale = self.tables.path(f"{socket.gethostname()}-{dead.pid}.json")
+        with open(stale, "w") as f:
+            json.dump({"in_flight": 4, "p95_ms": 900.0, "updated": time.time()}, f)
+        self.assertEqual(read_request_load(self.tables.directory), {"in_flight": 0, "p95_ms": 0.0, "workers": 0})
+        self.assertFalse(os.path.exists(stale))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+# In root dir: python -m unittest tests/test_batchWorker.py
+import os
+import sys
+import time
+import socket
+import logging
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
+from scripts.jobQueue import JobQueue, RUNNING, SUCCEEDED, FAILED
+from scripts.batchWorker import check_job, run_worker
+from scripts.workerProcess import WorkerProcess
+
+
+def _add(a, b=0):
+    return {"status": "success", "message": f"{a + b}"}
+
+
+def _refuse():
+    return {"status": "error", "message": "Nothing was committed."}
+
+
+def _crash():
+    raise RuntimeError("boom")
+
+
+JOBS = {"add": _add, "refuse": _refuse, "crash": _crash}
+
+
+class TestBatchWorker(TableTestCase):
+    """
+    Unit tests for the job queue in jobQueue.py and the worker in batchWorker.py.
+
+    This suite tests:
+    - Jobs are claimed oldest first, once each, and a waiting duplicate is not queued twice
+    - The worker records each job's status, message and duration
+    - Jobs left running by a worker that died are queued again
+    - Unknown jobs and arguments, and dates that are malformed or after today, are rejected
+    - The batch worker process is started again when it exits, restarted on reload and stopped for good
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.queue = JobQueue(self.tables.path("jobQueue.db"))
+
+    def _run(self):
+        with patch("scripts.batchWorker.get_repository"):
+            return run_worker(self.queue, once=True, jobs=JOBS)
+
+    def test_claim_order_and_dedupe(self):
+        """
+        Test that jobs are claimed in the order queued and a waiting duplicate returns the same job.
+        """
+        first = self.queue.enqueue("add", {"a": 1})
+        self.assertEqual(self.queue.enqueue("add", {"a": 1}), first)
+        second = self.queue.enqueue("add", {"a": 2})
+
+        other = JobQueue(self.queue.path)
+        self.assertEqual(self.queue.claim("w1")["JobID"], first)
+        claimed = other.claim("w2")
+        self.assertEqual((claimed["JobID"], claimed["Params"], claimed["Status"]), (second, {"a": 2}, RUNNING))
+        self.assertIsNone(self.queue.claim("w1"))
+
+        # Once the first job has started, the same job can be queued again
+        self.assertNotEqual(self.queue.enqueue("add", {"a": 1}), first)
+
+    def test_worker_records_outcomes(self):
+        """
+        Test that the worker runs every queued job and records its status, message and duration.
+        """
+        ok = self.queue.enqueue("add", {"a": 2, "b": 3}, source="admin:root")
+        refused = self.queue.enqueue("refuse")
+        crashed = self.queue.enqueue("crash")
+        unknown = self.queue.enqueue("nope")
+        self.assertEqual(self._run(), 4)
+
+        job = self.queue.get(ok)
+        self.assertEqual((job["Status"], job["Message"], job["Source"]), (SUCCEEDED, "5", "admin:root"))
+        self.assertIsNotNone(job["StartedAt"])
+        self.assertGreaterEqual(job["Seconds"], 0)
+        self.assertEqual(self.queue.get(refused)["Status"], FAILED)
+        self.assertEqual(self.queue.get(crashed)["Message"], "RuntimeError: boom")
+        self.assertIn("Unknown job", self.queue.get(unknown)["Message"])
+        self.assertEqual([j["JobID"] for j in self.queue.jobs()], [unknown, crashed, refused, ok])
+
+    def test_abandoned_jobs_requeued(self):
+        """
+        Test that a job left running by a process that no longer exists runs again.
+        """
+        job_id = self.queue.enqueue("add", {"a": 7})
+        self.queue.claim(f"{socket.gethostname()}:999999999")
+        live = self.queue.enqueue("add", {"a": 8})
+        self.queue.claim(f"{socket.gethostname()}:{os.getpid()}")
+
+        self.assertEqual(self._run(), 1)
+        self.assertEqual(self.queue.get(job_id)["Status"], SUCCEEDED)
+        self.assertEqual(self.queue.get(live)["Status"], RUNNING)
+
+    def test_check_job(self):
+        """
+        Test that unknown job kinds and parameters are rejected before queueing.
+        """
+        check_job("nightly_batch", {"run_date": "2025-03-01", "stages": ["bill_processing"]})
+        with self.assertRaises(ValueError):
+            check_job("defragment")
+        with self.assertRaises(ValueError):
+            check_job("catch_up", {"since": "2025-03-01"})
+        check_job("catch_up", {"today": date.today().isoformat()})
+        for run_date in ("2025-02-30", "03/01/2025", 20250301, (date.today() + timedelta(days=1)).isoformat()):
+            with self.assertRaises(ValueError):
+                check_job("nightly_batch", {"run_date": run_date})
+
+    def _worker_process(self, code):
+        process = WorkerProcess([sys.executable, "-c", code], log=logging.getLogger("test"),
+                                check_interval=0.05, max_backoff=0.2)
+        self.addCleanup(process.stop, 1)
+        return process
+
+    def test_exited_worker_is_started_again(self):
+        """
+        Test that a worker that keeps exiting is started again, and not once it is stopped.
+        """
+        process = self._worker_process("pass")
+        process.start()
+        deadline = time.monotonic() + 5
+        while process.starts < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertGreaterEqual(process.starts, 3)
+        process.stop(1)
+        starts = process.starts
+        time.sleep(0.3)
+        self.assertEqual(process.starts, starts)
+
+    def test_reload_restarts_worker(self):
+        """
+        Test that restart() replaces a running worker and stop() ends it.
+        """
+        process = self._worker_process("import time; time.sleep(60)")
+        process.start()
+        first = process.process
+        process.restart(1)
+        self.assertIsNotNone(first.poll())
+        self.assertIsNone(process.process.poll())
+        self.assertEqual(process.starts, 2)
+        process.stop(1)
+        self.assertIsNotNone(process.process.poll())
+
+
+if __name__ == "__main__":
+    unittest.main()
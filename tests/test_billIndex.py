@@ -0,0 +1,136 @@
+# In root dir: python -m unittest tests/test_billIndex.py
+import unittest
+import pandas as pd
+from datetime import date, timedelta
+from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
+from scripts.billIndex import BillIndex, bill_index, write_bills
+from scripts.billPayment import processScheduledBills
+
+
+class TestBillIndex(TableTestCase):
+    """
+    Unit tests for the bills due-date index in billIndex.py.
+
+    This suite tests:
+    - Bills are selected by due date and status, in file order
+    - Spliced rows are rewritten in place and the other rows copied through
+    - A stale index is rebuilt before it is used
+    - Files whose rows span lines are not indexed
+    - processScheduledBills gives the same result with and without the index
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        today = date.today()
+        self.today = today
+        self.yesterday = (today - timedelta(days=1)).isoformat()
+        self.tomorrow = (today + timedelta(days=1)).isoformat()
+        self.path = self.tables.write("bills.csv",
+                                      "BillID,CustomerID,PayeeName,PayeeAddress,Amount,DueDate,PaymentAccID,MinPayment,BillType,IsRecurring,Status\n"
+                                      f"1,1,Power,Addr,-100.00,{self.tomorrow},101,100.00,Regular,0,Pending\n"
+                                      f"2,1,Water,Addr,-80.00,{today.isoformat()},101,80.00,Regular,1,Pending\n"
+                                      f"3,2,Phone,Addr,-10.00,{self.yesterday},201,10.00,Regular,0,Paid\n"
+                                      f"4,2,Phone,Addr,-10.00,soon,201,10.00,Regular,0,Paid\n"
+                                      f"5,2,Card,Addr,-50.00,{self.yesterday},202,25.00,CreditCard,1,Late\n"
+                                      f"6,1,Gas,Addr,-20.00,{self.yesterday},101,20.00,Regular,0,PartiallyPaid\n")
+        self.index = BillIndex(self.path)
+
+    def test_select(self):
+        """
+        Test that bills are picked by due date and status and returned in file order.
+        """
+        self.assertEqual(self.index.count(), 6)
+        due = self.index.select(["Pending", "PartiallyPaid"], due_by=self.today)
+        self.assertEqual(due["bill"].tolist(), [2, 6])
+        due = self.index.select(["Pending", "PartiallyPaid"], due_by=self.today, undated=True)
+        self.assertEqual(due["bill"].tolist(), [2, 4, 6])
+        self.assertEqual(self.index.select(["Late"])["bill"].tolist(), [5])
+
+        selected, frame = self.index.read_slice(["Pending"])
+        self.assertEqual(frame["BillID"].tolist(), [1, 2])
+        self.assertEqual(frame.columns.tolist(), pd.read_csv(self.path).columns.tolist())
+
+    def test_splice(self):
+        """
+        Test that rewritten rows replace their lines and the index matches a rebuild.
+        """
+        with open(self.path, "rb") as f:
+            before = f.read().splitlines()
+        selected, frame = self.index.read_slice(["Pending", "PartiallyPaid"], due_by=self.today)
+        frame["Status"] = ["Paid", "Late"]
+        frame["PayeeName"] = ["Water and Sewer", "Gas"]
+        new_bill = frame.iloc[[0]].assign(BillID=7, Status="Pending")
+        self.index.splice(selected, frame, new_bill)
+
+        with open(self.path, "rb") as f:
+            after = f.read().splitlines()
+        self.assertEqual(len(after), 8)
+        self.assertEqual([after[i] for i in (0, 1, 3, 4, 5)], [before[i] for i in (0, 1, 3, 4, 5)])
+        bills = pd.read_csv(self.path)
+        self.assertEqual(bills["Status"].tolist(), ["Pending", "Paid", "Paid", "Paid", "Late", "Late", "Pending"])
+        self.assertEqual(bills["PayeeName"].tolist()[1], "Water and Sewer")
+
+        patched = self.index.records()
+        self.index.rebuild()
+        self.assertEqual(patched.tolist(), self.index.records().tolist())
+        self.assertEqual(self.index.select(["Late"])["bill"].tolist(), [5, 6])
+
+    def test_stale_index_is_rebuilt(self):
+        """
+        Test that a table rewritten without the index is indexed again before use.
+        """
+        self.assertEqual(self.index.count(), 6)
+        bills = pd.read_csv(self.path)
+        bills.loc[0, "Status"] = "Late"
+        bills.to_csv(self.path, index=False)
+        self.assertEqual(self.index.select(["Late"])["bill"].tolist(), [1, 5])
+
+        write_bills(bills.iloc[:2], self.path)
+        self.assertEqual(self.index.count(), 2)
+
+    def test_unindexable_file(self):
+        """
+        Test that a bill with a line break inside a field makes callers read the table whole.
+        """
+        bills = pd.read_csv(self.path)
+        bills.loc[0, "PayeeAddress"] = "1 Main St\nSuite 2"
+        bills.to_csv(self.path, index=False)
+        self.assertIsNone(bill_index(self.path))
+
+    def test_process_scheduled_bills_matches_full_read(self):
+        """
+        Test that processing bills through the index gives the same tables as reading them whole.
+        """
+        self.tables.write("accounts.csv",
+                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n"
+                          "101,1,Checking,150.00,2025-01-01,,\n"
+                          "201,2,Checking,20.00,2025-01-01,,\n"
+                          "202,2,Credit Card,-50.00,2025-01-01,500.00,22.5\n")
+        originals = {}
+        for name in ("accounts.csv", "bills.csv"):
+            with open(self.tables.path(name)) as f:
+                originals[name] = f.read()
+
+        def run(**patches):
+            for name, text in originals.items():
+                self.tables.write(name, text)
+            self.tables.seed_ids(bill=500)
+            with patch("scripts.billPayment.append_transaction_frame"):
+                if patches:
+                    with patch("scripts.billPayment.bill_index", **patches):
+                        results = processScheduledBills()
+                else:
+                    results = processScheduledBills()
+            return results, [pd.read_csv(self.tables.path(name)) for name in originals]
+
+        indexed, indexedTables = run()
+        whole, wholeTables = run(return_value=None)
+        self.assertEqual(indexed, whole)
+        for indexedTable, wholeTable in zip(indexedTables, wholeTables):
+            pd.testing.assert_frame_equal(indexedTable, wholeTable)
+
+if __name__ == "__main__":
+    unittest.main()
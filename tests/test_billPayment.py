@@ -4,14 +4,16 @@ import unittest
 from unittest.mock import patch
 from decimal import Decimal
 import pandas as pd
-from datetime import date
+from datetime import date, timedelta
+from tests.tableSandbox import TableTestCase
 from scripts.billPayment import (
     scheduleBillPayment,
     viewScheduledBills,
-    processScheduledBills
+    processScheduledBills,
+    generate_monthly_credit_card_statements
 )
 
-class TestBillPaymentFunctions(unittest.TestCase):
+class TestBillPaymentFunctions(TableTestCase):
     """
     Unit tests for the bill payment system functions:
     - scheduleBillPayment
@@ -19,13 +21,13 @@ class TestBillPaymentFunctions(unittest.TestCase):
     - processScheduledBills
     """
 
-    @patch("scripts.billPayment.pd.read_csv")
-    @patch("scripts.billPayment.pd.DataFrame.to_csv")
-    def test_schedule_bill_payment_success(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.billPayment.read_table")
+    @patch("scripts.billPayment.write_bills")
+    def test_schedule_bill_payment_success(self, mock_write_bills, mock_read_table):
         """
         Test successful scheduling of a bill payment.
         """
-        mock_read_csv.return_value = pd.DataFrame(columns=[
+        mock_read_table.return_value = pd.DataFrame(columns=[
             "BillID", "CustomerID", "PayeeName", "PayeeAddress", "Amount", "DueDate", "PaymentAccID"
         ])
         result = scheduleBillPayment(
@@ -33,7 +35,7 @@ class TestBillPaymentFunctions(unittest.TestCase):
         )
         self.assertEqual(result["status"], "success")
         self.assertIn("scheduled", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_bills.assert_called()
 
     @patch("scripts.billPayment.os.path.exists", return_value=False)
     def test_view_scheduled_bills_file_missing(self, mock_exists):
@@ -45,28 +47,29 @@ class TestBillPaymentFunctions(unittest.TestCase):
         self.assertIn("No scheduled bills", result[0]["message"])
 
     @patch("scripts.billPayment.os.path.exists", return_value=True)
-    @patch("scripts.billPayment.pd.read_csv")
-    def test_view_scheduled_bills_for_customer(self, mock_read_csv, mock_exists):
+    @patch("scripts.billPayment.read_table")
+    def test_view_scheduled_bills_for_customer(self, mock_read_table, mock_exists):
         """
         Test viewing scheduled bills for a customer with bills.
         """
-        mock_read_csv.return_value = pd.DataFrame([
+        mock_read_table.return_value = pd.DataFrame([
             {"BillID": 1, "CustomerID": 315, "PayeeName": "UAH", "PayeeAddress": "301 Sparkman", "Amount": "100.00", "DueDate": "2025-03-22", "PaymentAccID": 7001}
         ])
         result = viewScheduledBills(315)
         self.assertIsInstance(result, list)
         self.assertEqual(result[0]["CustomerID"], 315)
 
-    @patch("scripts.billPayment.pd.read_csv")
-    @patch("scripts.billPayment.generate_transaction_ID", return_value="TX999")
-    @patch("scripts.billPayment.pd.DataFrame.to_csv")
+    @patch("scripts.billPayment.reserve_ids", side_effect=lambda entity, count: range(1, 1 + count))
+    @patch("scripts.billPayment.append_transaction_frame")
+    @patch("scripts.billPayment.read_table")
+    @patch("scripts.billPayment.write_table")
     @patch("scripts.billPayment.os.path.exists", return_value=True)
-    def test_process_due_bill_success(self, mock_exists, mock_to_csv, mock_generate_txn, mock_read_csv):
+    def test_process_due_bill_success(self, mock_exists, mock_write_table, mock_read_table, mock_append, mock_reserve):
         """
         Test that a due bill is processed successfully (non-credit account).
         """
         today = date.today().isoformat()
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{
                 "AccountID": 7001,
                 "CustomerID": 315,
@@ -88,13 +91,16 @@ class TestBillPaymentFunctions(unittest.TestCase):
         result = processScheduledBills()
         self.assertEqual(result[0]["status"], "success")
         self.assertIn("processed successfully", result[0]["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
+        postings = mock_append.call_args[0][0]
+        self.assertEqual(postings[["AccountID", "Amount"]].values.tolist(), [[7001, "-100.00"]])
 
-    @patch("scripts.billPayment.pd.read_csv")
-    @patch("scripts.billPayment.generate_transaction_ID", return_value="TX999")
-    @patch("scripts.billPayment.pd.DataFrame.to_csv")
+    @patch("scripts.billPayment.reserve_ids", side_effect=lambda entity, count: range(1, 1 + count))
+    @patch("scripts.billPayment.append_transaction_frame")
+    @patch("scripts.billPayment.read_table")
+    @patch("scripts.billPayment.write_table")
     @patch("scripts.billPayment.os.path.exists", return_value=True)
-    def test_overlimit_fee_applied_on_credit_card(self, mock_exists, mock_to_csv, mock_generate_txn, mock_read_csv):
+    def test_overlimit_fee_applied_on_credit_card(self, mock_exists, mock_write_table, mock_read_table, mock_append, mock_reserve):
         """
         Test that over-limit fee is charged and re-billed when credit card limit exceeded.
 
@@ -104,7 +110,7 @@ class TestBillPaymentFunctions(unittest.TestCase):
         """
         today = date.today().isoformat()
 
-        # Initial call to read accounts.csv, bills.csv, logs.csv
+        # Initial reads of accounts.csv, bills.csv, logs.csv
         mock_accounts = pd.DataFrame([{
             "AccountID": 8888,
             "CustomerID": 222,
@@ -123,8 +129,8 @@ class TestBillPaymentFunctions(unittest.TestCase):
         }])
         mock_logs = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "TransactionID"])
 
-        # Provide mocks for all expected read_csv calls (including nested)
-        mock_read_csv.side_effect = [
+        # Provide mocks for all expected read_table calls (including nested)
+        mock_read_table.side_effect = [
             mock_accounts,  # accounts.csv
             mock_bills,     # bills.csv
             mock_logs,      # logs.csv
@@ -135,18 +141,19 @@ class TestBillPaymentFunctions(unittest.TestCase):
 
         self.assertEqual(result[0]["status"], "error")
         self.assertIn("Over-limit fee", result[0]["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
-    @patch("scripts.billPayment.pd.read_csv")
-    @patch("scripts.billPayment.generate_transaction_ID", return_value="TX999")
-    @patch("scripts.billPayment.pd.DataFrame.to_csv")
+    @patch("scripts.billPayment.reserve_ids", side_effect=lambda entity, count: range(1, 1 + count))
+    @patch("scripts.billPayment.append_transaction_frame")
+    @patch("scripts.billPayment.read_table")
+    @patch("scripts.billPayment.write_table")
     @patch("scripts.billPayment.os.path.exists", return_value=True)
-    def test_insufficient_funds_standard_account(self, mock_exists, mock_to_csv, mock_generate_txn, mock_read_csv):
+    def test_insufficient_funds_standard_account(self, mock_exists, mock_write_table, mock_read_table, mock_append, mock_reserve):
         """
         Test insufficient funds scenario for checking/savings account.
         """
         today = date.today().isoformat()
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{
                 "AccountID": 5555,
                 "CustomerID": 111,
@@ -168,6 +175,135 @@ class TestBillPaymentFunctions(unittest.TestCase):
         result = processScheduledBills()
         self.assertEqual(result[0]["status"], "error")
         self.assertIn("Insufficient funds", result[0]["message"])
+        mock_append.assert_not_called()
+
+
+class TestProcessScheduledBills(TableTestCase):
+    """
+    Tests for processScheduledBills on real files in a temporary directory.
+
+    This suite tests:
+    - Overdue bills are marked Late and bills with bad dates are reported
+    - Mortgage bills are paid from the customer's checking or savings
+    - Bills on the same account see each other's payments
+    - Paid recurring bills get a next bill one month later
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.tables.seed_ids(bill=500)
+        today = date.today()
+        self.today = today.isoformat()
+        yesterday = (today - timedelta(days=1)).isoformat()
+        self.tables.write("accounts.csv",
+                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n"
+                          "101,1,Checking,150.00,2025-01-01,,\n"
+                          "102,1,Savings,1000.00,2025-01-01,,4.0\n"
+                          "103,1,Mortgage Loan,-5000.00,2025-01-01,,6.75\n"
+                          "201,2,Checking,20.00,2025-01-01,,\n")
+        self.tables.write("bills.csv",
+                          "BillID,CustomerID,PayeeName,PayeeAddress,Amount,DueDate,PaymentAccID,MinPayment,BillType,IsRecurring,Status\n"
+                          f"1,1,Power,Addr,-100.00,{self.today},101,100.00,Regular,0,Pending\n"
+                          f"2,1,Water,Addr,-80.00,{self.today},101,80.00,Regular,1,Pending\n"
+                          f"3,1,Bank,Addr,-900.00,{self.today},103,900.00,Mortgage,1,Pending\n"
+                          f"4,2,Gym,Addr,-30.00,{self.today},201,30.00,Regular,0,Pending\n"
+                          f"5,2,Phone,Addr,-10.00,{yesterday},201,10.00,Regular,0,Pending\n"
+                          f"6,2,Phone,Addr,-10.00,soon,201,10.00,Regular,0,Pending\n"
+                          f"7,2,Phone,Addr,-10.00,{yesterday},201,10.00,Regular,0,Paid\n")
+        patcher = patch("scripts.billPayment.append_transaction_frame")
+        self.append = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bills_are_processed_in_order(self):
+        """
+        Test results, balances, bill statuses and postings after one run.
+        """
+        results = processScheduledBills()
+        self.assertEqual([r["message"] for r in results], [
+            "Bill 1 processed successfully. Paid $100.00 from account 101.",
+            "Bill 2 processed successfully. Paid $80.00 from account 102.",
+            "Bill 3 processed successfully. Paid $900.00 from account 102.",
+            "Insufficient funds to pay bill 4 of $30.00.",
+            "Bill 5 is overdue. Marked as Late.",
+            "Invalid date format for bill 6: 'soon'",
+        ])
+
+        accounts = pd.read_csv(self.tables.path("accounts.csv"))
+        self.assertEqual(accounts["CurrBal"].tolist(), [50.00, 20.00, -4100.00, 20.00])
+        bills = pd.read_csv(self.tables.path("bills.csv"))
+        self.assertEqual(bills["Status"].tolist()[:7], ["Paid", "Paid", "Paid", "Pending", "Late", "Pending", "Paid"])
+
+        # Bills 2 and 3 are recurring and get a next bill
+        nextBills = bills.iloc[7:]
+        self.assertEqual(nextBills["BillID"].tolist(), [500, 501])
+        self.assertEqual(nextBills["PayeeName"].tolist(), ["Water", "Bank"])
+        self.assertEqual(set(nextBills["Status"]), {"Pending"})
+        self.assertTrue(all(d > self.today for d in nextBills["DueDate"]))
+
+        postings = self.append.call_args[0][0]
+        self.assertEqual(postings[["AccountID", "TransactionType", "Amount"]].values.tolist(), [
+            [101, "Bill Payment to Power", "-100.00"],
+            [102, "Bill Payment to Water", "-80.00"],
+            [102, "Bill Payment to Bank", "-900.00"],
+            [103, "Loan Payment Received", "900.00"],
+        ])
+
+
+class TestCreditCardStatements(TableTestCase):
+    """
+    Tests for generate_monthly_credit_card_statements on real files in a temporary directory.
+
+    This suite tests:
+    - Cards on today's statement cycle day that owe money, are a month old and
+      have no active bill get one statement bill, due in STATEMENT_DUE_DAYS days
+    - The minimum payment is 2% of the balance but at least $25
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.tables.seed_ids(bill=500)
+        old = (date.today() - timedelta(days=60)).isoformat()
+        new = (date.today() - timedelta(days=5)).isoformat()
+        # Every card is in today's cycle cohort except 108
+        day = date.today().day
+        other = day % 28 + 1
+        self.tables.write("accounts.csv",
+                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR,StatementDay\n"
+                          f"101,1,Credit Card,-2500.00,{old},5000.00,20.0,{day}\n"
+                          f"102,1,Credit Card,-500.00,{old},5000.00,20.0,{day}\n"
+                          f"103,2,Credit Card,-900.00,{new},5000.00,20.0,{day}\n"
+                          f"104,2,Credit Card,0.00,{old},5000.00,20.0,{day}\n"
+                          f"105,3,Credit Card,-300.00,{old},5000.00,20.0,{day}\n"
+                          f"106,3,Checking,-300.00,{old},,,\n"
+                          f"107,3,Credit Card,-300.00,,5000.00,20.0,{day}\n"
+                          f"108,4,Credit Card,-300.00,{old},5000.00,20.0,{other}\n")
+        self.tables.write("bills.csv",
+                          "BillID,CustomerID,PayeeName,PayeeAddress,Amount,DueDate,PaymentAccID,MinPayment,BillType,IsRecurring,Status\n"
+                          "1,3,Evergreen Bank,Addr,-300.00,2025-01-01,105,25.00,CreditCard,1,Late\n"
+                          "2,1,Evergreen Bank,Addr,-100.00,2025-01-01,102,25.00,CreditCard,1,Paid\n")
+
+    def test_statements_created_once(self):
+        """
+        Test that only eligible cards are billed, in one append.
+        """
+        result = generate_monthly_credit_card_statements()
+        self.assertEqual(result, {"status": "success", "message": "Created 2 new credit card bill(s)."})
+
+        bills = pd.read_csv(self.tables.path("bills.csv"))
+        statements = bills.iloc[2:]
+        self.assertEqual(statements["BillID"].tolist(), [500, 501])
+        self.assertEqual(statements["PaymentAccID"].tolist(), [101, 102])
+        self.assertEqual(statements["Amount"].tolist(), [-2500.00, -500.00])
+        self.assertEqual(statements["MinPayment"].tolist(), [50.00, 25.00])
+        self.assertEqual(set(statements["Status"]), {"Pending"})
+        self.assertEqual(set(statements["DueDate"]), {(date.today() + timedelta(days=30)).isoformat()})
+
+        # A second run finds the new bills active and creates nothing
+        self.assertEqual(generate_monthly_credit_card_statements()["message"], "Created 0 new credit card bill(s).")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+# In root dir: python -m unittest tests/test_billPaymentRules.py
+import unittest
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from tests.tableSandbox import TableTestCase
+from scripts.money import to_cents, format_cents
+from scripts.billPayment import process_bills_frame
+from scripts.billPaymentRules import OVER_LIMIT_FEE, RESCHEDULE_DAYS, pay_due_bills, next_bills
+
+
+class TestBillPaymentRules(TableTestCase):
+    """
+    Unit tests for the money-moving rules in billPaymentRules.py.
+
+    This suite tests:
+    - A bill that would pass a card's credit limit costs OVER_LIMIT_FEE and moves RESCHEDULE_DAYS later
+    - Recurring bills fall back to the customer's other checking and savings accounts; one-off bills do not
+    - Mortgage and card bills are paid from checking or savings and posted on both accounts
+    - Paid recurring bills get a next bill a month later, unless the mortgage is paid off
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.tables.seed_ids(transaction=1, bill=900)
+        self.today = date(2025, 6, 15)
+        self.accounts = pd.DataFrame([
+            {"AccountID": 101, "CustomerID": 1, "AccountType": "Checking", "CurrBal": "50.00", "CreditLimit": ""},
+            {"AccountID": 102, "CustomerID": 1, "AccountType": "Savings", "CurrBal": "1000.00", "CreditLimit": ""},
+            {"AccountID": 103, "CustomerID": 1, "AccountType": "Mortgage Loan", "CurrBal": "-900.00", "CreditLimit": ""},
+            {"AccountID": 104, "CustomerID": 1, "AccountType": "Credit Card", "CurrBal": "-990.00", "CreditLimit": "1000.00"},
+        ])
+
+    def _bills(self, *rows):
+        """Bills due today from (PaymentAccID, Amount, BillType, IsRecurring) tuples."""
+        return pd.DataFrame([{
+            "BillID": i + 1, "CustomerID": 1, "PayeeName": "Payee", "PayeeAddress": "Addr", "Amount": amount,
+            "DueDate": self.today.isoformat(), "PaymentAccID": accountID, "MinPayment": "0.00",
+            "BillType": billType, "IsRecurring": recurring, "Status": "Pending"
+        } for i, (accountID, amount, billType, recurring) in enumerate(rows)])
+
+    def _pay(self, bills):
+        balances = to_cents(self.accounts["CurrBal"])
+        postings = []
+        payments = pay_due_bills(self.accounts, bills, np.arange(len(bills)), balances, postings)
+        return payments, format_cents(balances).tolist(), [(a, t, format_cents(np.array([c]))[0]) for a, t, c, _ in postings]
+
+    def test_over_limit_fee(self):
+        """
+        Test that a bill passing the credit limit is not paid and the card is charged the fee.
+        """
+        payments, balances, postings = self._pay(self._bills((104, "-20.00", "Regular", 0)))
+        self.assertEqual((payments["paid"], payments["rescheduled"]), ([], [0]))
+        self.assertEqual(balances[3], "-1025.00")
+        self.assertEqual(postings, [(104, "Over-limit Fee", f"-{OVER_LIMIT_FEE}")])
+        self.assertIn(f"Over-limit fee of ${OVER_LIMIT_FEE}", payments["results"][0]["message"])
+
+    def test_over_limit_bill_is_rescheduled(self):
+        """
+        Test that the pipeline moves an over-limit bill RESCHEDULE_DAYS later and leaves it Pending.
+        """
+        bills = self._bills((104, "-20.00", "Regular", 0))
+        process_bills_frame(self.accounts, bills, self.today)
+        self.assertEqual(bills["DueDate"].tolist(), [(self.today + timedelta(days=RESCHEDULE_DAYS)).isoformat()])
+        self.assertEqual(bills["Status"].tolist(), ["Pending"])
+
+    def test_recurring_bill_falls_back_to_other_accounts(self):
+        """
+        Test that only a recurring bill is drawn from savings when its payment account is short.
+        """
+        payments, balances, postings = self._pay(self._bills((101, "-80.00", "Regular", 1), (101, "-80.00", "Regular", 0)))
+        self.assertEqual(payments["paid"], [0])
+        self.assertEqual(balances[:2], ["50.00", "920.00"])
+        self.assertEqual(postings, [(102, "Bill Payment to Payee", "-80.00")])
+        self.assertEqual(payments["results"][1]["message"], "Insufficient funds to pay bill 2 of $80.00.")
+
+    def test_loan_bills_post_on_both_accounts(self):
+        """
+        Test that mortgage and card bills move money from checking or savings into the loan or card.
+        """
+        payments, balances, postings = self._pay(self._bills((103, "-500.00", "Mortgage", 1), (104, "-40.00", "CreditCard", 1)))
+        self.assertEqual(payments["paid"], [0, 1])
+        self.assertEqual(balances, ["10.00", "500.00", "-400.00", "-950.00"])
+        self.assertEqual(postings, [
+            (102, "Bill Payment to Payee", "-500.00"), (103, "Loan Payment Received", "500.00"),
+            (101, "Bill Payment to Payee", "-40.00"), (104, "Payment Received", "40.00"),
+        ])
+        # Card bills are followed by statements, not next bills
+        self.assertEqual(payments["recurring"], [0])
+
+    def test_next_bills(self):
+        """
+        Test that a paid recurring bill is copied as a Pending bill due a month later,
+        and that paying off a mortgage stops it.
+        """
+        bills = self._bills((102, "-100.00", "Regular", 1), (103, "-900.00", "Mortgage", 1))
+        payments, _, _ = self._pay(bills)
+        self.assertEqual(payments["paid"], [0, 1])
+        self.assertEqual(payments["recurring"], [0])
+        added = next_bills(bills, pd.to_datetime(bills["DueDate"]), payments["recurring"])
+        self.assertEqual(added[["BillID", "DueDate", "Status"]].values.tolist(), [[900, "2025-07-15", "Pending"]])
+        self.assertIsNone(next_bills(bills, pd.to_datetime(bills["DueDate"]), []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,11 @@ import unittest
 import pandas as pd
 from decimal import Decimal
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.calcCreditInterest import calculateCreditInterest
+from scripts.repository import CsvRepository
 
-class TestCreditCardInterestCalculation(unittest.TestCase):
+class TestCreditCardInterestCalculation(TableTestCase):
     """
     Unit tests for credit card interest calculation.
     
@@ -16,10 +18,27 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
     - Correct handling of over-limit balances.
     """
 
-    @patch("scripts.calcCreditInterest.pd.read_csv")
-    @patch("scripts.calcCreditInterest.pd.DataFrame.to_csv")
-    @patch("scripts.calcCreditInterest.generate_transaction_ID", return_value="TX12345")
-    def test_credit_card_interest_application(self, mock_generate_txn, mock_to_csv, mock_read_csv):
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch("scripts.repository.CsvRepository.commit", autospec=True, side_effect=CsvRepository.commit)
+        self.mock_commit = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write_tables(self, accounts_df):
+        """Writes `accounts_df`, one Late bill for the amount each account owes and an empty journal."""
+        self.tables.write("accounts.csv", accounts_df.to_csv(index=False))
+        bills = pd.DataFrame([{
+            "BillID": i + 1, "CustomerID": account["CustomerID"], "PayeeName": "Card", "PayeeAddress": "Addr",
+            "Amount": str(min(Decimal(account["CurrBal"]), Decimal("0.00"))), "DueDate": "2025-01-01",
+            "PaymentAccID": account["AccountID"], "MinPayment": "0.00", "BillType": "Credit Card",
+            "IsRecurring": False, "Status": "Late"
+        } for i, account in enumerate(accounts_df.to_dict("records"))])
+        self.tables.write("bills.csv", bills.to_csv(index=False))
+        self.tables.write("transactions.csv", "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+
+    def test_credit_card_interest_application(self):
         """
         Test that interest is correctly applied to credit card balances based on APR.
         
@@ -27,7 +46,7 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
         - The correct interest formula is used.
         - The calculated interest is added to the credit card balance.
         - A transaction log entry is created.
-        - The updated balance is saved to `accounts.csv`.
+        - The updated balance is committed to `accounts.csv`.
         """
         # Mock accounts.csv with a credit card that has an outstanding balance.
         mock_accounts_df = pd.DataFrame([{
@@ -38,11 +57,9 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             "CreditLimit": "5000.00",
             "APR": "24.99"
         }])
-        # Mock logs.csv as an empty transaction log.
-        mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "TransactionID"])
 
-        # Simulate behavior of `pd.read_csv`
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        # Write the account, a late bill for its balance and an empty journal
+        self._write_tables(mock_accounts_df)
 
         # Run interest calculation
         results = calculateCreditInterest()
@@ -52,7 +69,8 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
         expected_interest = abs(expected_interest.quantize(Decimal("0.00")))
 
         # Verify that the balance includes the calculated interest
-        new_balance = Decimal(mock_accounts_df.loc[mock_accounts_df['AccountID'] == 5016, 'CurrBal'].values[0])
+        accounts = pd.read_csv(self.tables.path('accounts.csv'), dtype=str)
+        new_balance = Decimal(accounts.loc[accounts['AccountID'] == '5016', 'CurrBal'].values[0])
         self.assertEqual(new_balance, Decimal("-2500.00") - expected_interest)
 
         # Verify that a log entry was created for the interest application
@@ -61,19 +79,17 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             results
         )
 
-        # Ensure to_csv was called but no changes should be made
-        mock_to_csv.assert_called()
+        # Ensure the late bill was still committed, once
+        self.mock_commit.assert_called_once()
 
-    @patch("scripts.calcCreditInterest.pd.read_csv")
-    @patch("scripts.calcCreditInterest.pd.DataFrame.to_csv")
-    def test_no_interest_on_zero_balance(self, mock_to_csv, mock_read_csv):
+    def test_no_interest_on_zero_balance(self):
         """
         Test that no interest is applied to credit cards with a zero balance.
         
         This test ensures:
         - No interest is added when the credit card balance is $0.00.
         - No transaction logs are created.
-        - The function still calls `to_csv()` to save data.
+        - The late bill is still committed.
         """
         # Mock accounts.csv with a credit card that has a zero balance.
         mock_accounts_df = pd.DataFrame([{
@@ -84,10 +100,9 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             "CreditLimit": "5000.00",
             "APR": "24.99"
         }])
-        # Mock logs.csv as an empty transaction log.
-        mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "TransactionID"])
 
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        # Write the account, a late bill for its balance and an empty journal
+        self._write_tables(mock_accounts_df)
 
         # Run interest calculation
         results = calculateCreditInterest()
@@ -98,12 +113,10 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             results
         )
 
-        # Ensure the function still attempts to save updates
-        mock_to_csv.assert_called()
+        # Ensure the late bill was still committed, once
+        self.mock_commit.assert_called_once()
 
-    @patch("scripts.calcCreditInterest.pd.read_csv")
-    @patch("scripts.calcCreditInterest.pd.DataFrame.to_csv")
-    def test_interest_on_over_limit_balance(self, mock_to_csv, mock_read_csv):
+    def test_interest_on_over_limit_balance(self):
         """
         Test that interest is correctly applied when the credit card balance exceeds the credit limit.
         
@@ -121,10 +134,9 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             "CreditLimit": "5000.00",
             "APR": "24.99"
         }])
-        # Mock logs.csv as an empty transaction log.
-        mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "TransactionID"])
 
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        # Write the account, a late bill for its balance and an empty journal
+        self._write_tables(mock_accounts_df)
 
         # Run interest calculation
         results = calculateCreditInterest()
@@ -134,7 +146,8 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
         expected_interest = abs(expected_interest.quantize(Decimal("0.00")))
 
         # Verify that the new balance includes interest applied
-        new_balance = Decimal(mock_accounts_df.loc[mock_accounts_df['AccountID'] == 5016, 'CurrBal'].values[0])
+        accounts = pd.read_csv(self.tables.path('accounts.csv'), dtype=str)
+        new_balance = Decimal(accounts.loc[accounts['AccountID'] == '5016', 'CurrBal'].values[0])
         self.assertEqual(new_balance, Decimal("-6000.00") - expected_interest)
 
         # Ensure interest was logged correctly
@@ -143,12 +156,10 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             results
         )
 
-        # Ensure to_csv was called but no changes should be made
-        mock_to_csv.assert_called()
+        # Ensure the late bill was still committed, once
+        self.mock_commit.assert_called_once()
 
-    @patch("scripts.calcCreditInterest.pd.read_csv")
-    @patch("scripts.calcCreditInterest.pd.DataFrame.to_csv")
-    def test_no_interest_on_overpaid_credit_card(self, mock_to_csv, mock_read_csv):
+    def test_no_interest_on_overpaid_credit_card(self):
         """
         Test that no interest is applied to credit cards with a negative balance (overpayment scenario).
 
@@ -156,7 +167,7 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
         - If a credit card has a negative balance (meaning the user overpaid their bill),
           no interest should be charged.
         - The function should not log an interest charge for overpaid accounts.
-        - The function still calls `to_csv()` to maintain transaction logging consistency.
+        - The late bill is still committed.
         """
         # Mock accounts.csv with a credit card that has an overpaid (negative) balance.
         mock_accounts_df = pd.DataFrame([{
@@ -167,11 +178,9 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             "CreditLimit": "5000.00",
             "APR": "24.99"
         }])
-        # Mock logs.csv as an empty transaction log.
-        mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "TransactionID"])
 
-        # Simulate behavior of `pd.read_csv`
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        # Write the account, a late bill for its balance and an empty journal
+        self._write_tables(mock_accounts_df)
 
         # Run interest calculation
         results = calculateCreditInterest()
@@ -182,8 +191,76 @@ class TestCreditCardInterestCalculation(unittest.TestCase):
             results
         )
 
-        # Ensure the function still attempts to save updates, even if no interest is applied
-        mock_to_csv.assert_called()
+        # Ensure the late bill was still committed, once
+        self.mock_commit.assert_called_once()
+
+
+class TestLateBillInterest(TableTestCase):
+    """
+    Tests for interest on late bills, run on real files in a temporary directory.
+
+    This suite tests:
+    - Credit card bills grow by their interest and the account is charged the sum
+    - Mortgage loans are charged once on the whole balance
+    - Late bills become Pending, other bills and accounts are untouched
+    - The 'Interest Charged' rows are appended together
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.paths = {name: self.tables.path(f"{name}.csv") for name in ("accounts", "bills", "transactions")}
+        self.tables.write("accounts.csv",
+                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n"
+                          "101,1,Checking,100.00,2025-01-01,,\n"
+                          "202,1,Credit Card,-2500.00,2025-01-01,5000.00,24.99\n"
+                          "303,2,Mortgage Loan,-300000.00,2025-01-01,,6.75\n"
+                          "404,2,Credit Card,-50.00,2025-01-01,1000.00,18.00\n")
+        self.tables.write("bills.csv",
+                          "BillID,CustomerID,PayeeName,PayeeAddress,Amount,DueDate,PaymentAccID,MinPayment,BillType,IsRecurring,Status\n"
+                          "1,1,Card,Addr,-1000.00,2025-01-01,202,30.00,Credit Card,False,Late\n"
+                          "2,2,Bank,Addr,-2000.00,2025-01-01,303,500.00,Mortgage,True,Late\n"
+                          "3,1,Card,Addr,-500.00,2025-01-01,202,15.00,Credit Card,False,Late\n"
+                          "4,2,Card,Addr,-50.00,2025-01-01,404,1.50,Credit Card,False,Pending\n")
+        self.tables.write("transactions.csv",
+                          "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+        self.tables.seed_ids(transaction=500)
+
+    def test_late_bills_are_charged(self):
+        """
+        Test balances, bills, messages and journal rows after one run.
+        """
+        results = calculateCreditInterest(self.tables.directory)
+        self.assertEqual([r["message"] for r in results], [
+            "Bill ID 1 updated: Status changed from Late to Pending, new amount $1020.82, new minimum payment $30.62.",
+            "Bill ID 3 updated: Status changed from Late to Pending, new amount $510.41, new minimum payment $15.31.",
+            "Interest of $31.23 applied to AccountID 202.",
+            "Mortgage Bill ID 2 updated: Status changed from Late to Pending, due date extended.",
+            "Interest of $-1687.50 applied to AccountID 303.",
+        ])
+
+        accounts = pd.read_csv(self.paths["accounts"])
+        self.assertEqual(accounts["CurrBal"].tolist(), [100.00, -2531.23, -301687.50, -50.00])
+        bills = pd.read_csv(self.paths["bills"])
+        self.assertEqual(bills["Amount"].tolist(), [-1020.82, -2000.00, -510.41, -50.00])
+        self.assertEqual(bills["Status"].tolist(), ["Pending", "Pending", "Pending", "Pending"])
+        self.assertEqual(bills["DueDate"].iloc[3], "2025-01-01")
+        journal = pd.read_csv(self.paths["transactions"])
+        self.assertEqual(journal[["TransactionID", "AccountID", "Amount"]].values.tolist(),
+                         [[500, 202, 31.23], [501, 303, -1687.50]])
+
+    def test_no_late_bills(self):
+        """
+        Test that nothing is written when no bill is late.
+        """
+        with open(self.paths["bills"]) as f:
+            text = f.read().replace("Late", "Paid")
+        with open(self.paths["bills"], "w") as f:
+            f.write(text)
+        results = calculateCreditInterest(self.tables.directory)
+        self.assertEqual(results[0]["status"], "info")
+        self.assertEqual(len(pd.read_csv(self.paths["transactions"])), 0)
 
 if __name__ == "__main__":
     unittest.main()
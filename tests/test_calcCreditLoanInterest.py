@@ -4,15 +4,34 @@ import unittest
 import pandas as pd
 from decimal import Decimal
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.calcCreditInterest import calculateCreditInterest
+from scripts.repository import CsvRepository
 
-class TestCreditLoanInterestCalculation(unittest.TestCase):
+class TestCreditLoanInterestCalculation(TableTestCase):
     """Unit tests for mortgage loan interest calculation."""
 
-    @patch("scripts.calcCreditInterest.pd.read_csv")
-    @patch("scripts.calcCreditInterest.pd.DataFrame.to_csv")
-    @patch("scripts.calcCreditInterest.generate_transaction_ID", return_value="TX12345")
-    def test_mortgage_loan_interest_application(self, mock_generate_txn, mock_to_csv, mock_read_csv):
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch("scripts.repository.CsvRepository.commit", autospec=True, side_effect=CsvRepository.commit)
+        self.mock_commit = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write_tables(self, accounts_df):
+        """Writes `accounts_df`, one Late bill for the amount each account owes and an empty journal."""
+        self.tables.write("accounts.csv", accounts_df.to_csv(index=False))
+        bills = pd.DataFrame([{
+            "BillID": i + 1, "CustomerID": account["CustomerID"], "PayeeName": "Bank", "PayeeAddress": "Addr",
+            "Amount": str(min(Decimal(account["CurrBal"]), Decimal("0.00"))), "DueDate": "2025-01-01",
+            "PaymentAccID": account["AccountID"], "MinPayment": "0.00", "BillType": "Mortgage",
+            "IsRecurring": False, "Status": "Late"
+        } for i, account in enumerate(accounts_df.to_dict("records"))])
+        self.tables.write("bills.csv", bills.to_csv(index=False))
+        self.tables.write("transactions.csv", "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+
+    def test_mortgage_loan_interest_application(self):
         """
         Test that interest is correctly applied to mortgage loan balances based on APR.
 
@@ -20,7 +39,7 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
         - Monthly interest is applied correctly based on the loan’s APR.
         - The updated balance includes the calculated interest.
         - The interest transaction is recorded in the logs.
-        - Data is saved using `to_csv()` to reflect the updates.
+        - The changes are committed in one repository commit.
         """
         # Mock data containing a mortgage loan account with a zero balance.
         mock_accounts_df = pd.DataFrame([{
@@ -32,11 +51,9 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
             "APR": "6.75"             # Annual Percentage Rate for interest calculation
         }])
 
-        # Mock empty log file
-        mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "CreditLimit", "TransactionID"])
 
-        # Assign mock data to read_csv calls
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        # Write the account, a late bill for its balance and an empty journal
+        self._write_tables(mock_accounts_df)
 
         # Execute interest calculation
         results = calculateCreditInterest()
@@ -46,28 +63,27 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
         expected_interest = abs(expected_interest.quantize(Decimal("0.00")))
 
         # Verify updated balance
-        new_balance = Decimal(mock_accounts_df.loc[mock_accounts_df['AccountID'] == 14233, 'CurrBal'].values[0])
+        accounts = pd.read_csv(self.tables.path('accounts.csv'), dtype=str)
+        new_balance = Decimal(accounts.loc[accounts['AccountID'] == '14233', 'CurrBal'].values[0])
         self.assertEqual(new_balance, Decimal("-300000.00") - expected_interest)
 
-        # Verify that the interest transaction was logged
+        # Verify that the interest transaction was logged, as the signed amount added to the balance
         self.assertIn(
-            {"status": "success", "message": f"Interest of ${expected_interest} applied to AccountID 14233."},
+            {"status": "success", "message": f"Interest of ${-expected_interest} applied to AccountID 14233."},
             results
         )
 
-        # Ensure to_csv was called but no changes should be made
-        mock_to_csv.assert_called()
+        # Ensure the late bill was still committed, once
+        self.mock_commit.assert_called_once()
 
-    @patch("scripts.calcCreditInterest.pd.read_csv")
-    @patch("scripts.calcCreditInterest.pd.DataFrame.to_csv")
-    def test_no_interest_on_paid_off_mortgage(self, mock_to_csv, mock_read_csv):
+    def test_no_interest_on_paid_off_mortgage(self):
         """
         Test that no interest is applied to fully paid-off mortgage loan accounts.
 
         This test verifies that:
         - No interest is added when the mortgage loan balance is $0.00.
         - The function does not generate any transaction logs for paid-off loans.
-        - The data is still saved using `to_csv()` (mocked to prevent actual file writes).
+        - The late bill is still committed.
         """
         # Mock data containing a mortgage loan account with a zero balance.
         mock_accounts_df = pd.DataFrame([{
@@ -79,11 +95,9 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
             "APR": "6.75"             # Annual Percentage Rate for interest calculation
         }])
 
-        # Mock empty log file
-        mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "CreditLimit", "TransactionID"])
 
-        # Assign mock data to read_csv calls
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        # Write the account, a late bill for its balance and an empty journal
+        self._write_tables(mock_accounts_df)
 
         # Execute interest calculation
         results = calculateCreditInterest()
@@ -92,12 +106,10 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
         self.assertNotIn(
             {"status": "success", "message": "Interest applied"}, results)
 
-        # Ensure to_csv was called but no changes should be made
-        mock_to_csv.assert_called()
+        # Ensure the late bill was still committed, once
+        self.mock_commit.assert_called_once()
 
-    @patch("scripts.calcCreditInterest.pd.read_csv")
-    @patch("scripts.calcCreditInterest.pd.DataFrame.to_csv")
-    def test_no_interest_on_overpaid_mortgage(self, mock_to_csv, mock_read_csv):
+    def test_no_interest_on_overpaid_mortgage(self):
         """
         Test that no interest is applied to mortgage loans with a positive balance (overpayment scenario).
 
@@ -105,7 +117,7 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
         - If a loan has a positive balance (meaning the user overpaid their bill),
           no interest should be charged.
         - The function should not log an interest charge for overpaid accounts.
-        - The function still calls `to_csv()` to maintain transaction logging consistency.
+        - The late bill is still committed.
         """
         # Mock accounts.csv with a credit card that has an overpaid (negative) balance.
         mock_accounts_df = pd.DataFrame([{
@@ -116,11 +128,9 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
             "CreditLimit": "0.00",        # Empty credit limit
             "APR": "6.75"             # Annual Percentage Rate for interest calculation
         }])
-        # Mock empty log file
-        mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "CreditLimit", "TransactionID"])
 
-        # Assign mock data to read_csv calls
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        # Write the account, a late bill for its balance and an empty journal
+        self._write_tables(mock_accounts_df)
 
         # Execute interest calculation
         results = calculateCreditInterest()
@@ -129,8 +139,8 @@ class TestCreditLoanInterestCalculation(unittest.TestCase):
         self.assertNotIn(
             {"status": "success", "message": "Interest applied"}, results)
 
-        # Ensure to_csv was called but no changes should be made
-        mock_to_csv.assert_called()
+        # Ensure the late bill was still committed, once
+        self.mock_commit.assert_called_once()
 
 if __name__ == "__main__":
     unittest.main()
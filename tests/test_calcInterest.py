@@ -1,12 +1,15 @@
 # Spring 2025 Authors: Bailee Segars
+import os
 import unittest
 import pandas as pd
 from decimal import Decimal
 from unittest.mock import patch
-from scripts.calcInterest import accrue_interest
+from datetime import date
+from tests.tableSandbox import TableTestCase
+from scripts.calcInterest import MONTHLY_RATES, accrue_frame, accrue_interest
 
 
-class TestDeposit(unittest.TestCase):
+class TestDeposit(TableTestCase):
     """
     Unit tests for the accrue_interest function in calcInterest.py.
 
@@ -16,12 +19,12 @@ class TestDeposit(unittest.TestCase):
 
     def _mock_accounts_df(self, accType="Savings", curr_bal="1000.00"):
         return pd.DataFrame([
-            {"AccountType": accType, "CurrBal": curr_bal}
+            {"AccountID": 101, "AccountType": accType, "CurrBal": curr_bal}
         ])
 
     
-    @patch("scripts.calcInterest.pd.read_csv")
-    def test_valid_account_types(self, mock_read_csv):
+    @patch("scripts.calcInterest.read_table")
+    def test_valid_account_types(self, mock_read_table):
         """
         Test that accrual succeeds with valid account type
         """
@@ -29,9 +32,130 @@ class TestDeposit(unittest.TestCase):
 
         for type in validTypes:
             with self.subTest(accType=type):
-                mock_read_csv.return_value = self._mock_accounts_df(type)
+                mock_read_table.return_value = self._mock_accounts_df(type)
 
                 accrue_interest(type)
 
+
+class TestAccrualPass(TableTestCase):
+    """
+    Tests for the single-pass accrual over real files in a temporary directory.
+
+    This suite tests:
+    - Every interest-bearing type is accrued in one write, other types untouched
+    - Each account that earned interest gets one 'Interest Earned' journal row
+    - Unknown account types are refused without touching the files
+    - Streaming in chunks gives the same balances and journal as one pass
+    - A failed streamed run leaves accounts and journal as they were
+    - Several missed months are compounded in one step
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.accounts = self.tables.write("accounts.csv",
+                                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n"
+                                          "101,1,Checking,100.00,2025-01-01,,\n"
+                                          "202,1,Savings,1000.00,2025-01-01,,4.0\n"
+                                          "303,2,Money Market,2000.00,2025-01-01,,3.0\n"
+                                          "404,2,Savings,0.00,2025-01-01,,4.0\n")
+        self.journal = self.tables.write("transactions.csv",
+                                         "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+        self.tables.seed_ids(transaction=500)
+
+    def test_all_types_in_one_pass(self):
+        """
+        Test that savings and money market balances grow by their monthly rates.
+        """
+        result = accrue_interest(accounts_path=self.accounts, journal_path=self.journal)
+        self.assertEqual(result, {"status": "success", "message": "Accrued 8.33 of interest on 2 accounts."})
+        self.assertEqual(pd.read_csv(self.accounts)["CurrBal"].tolist(), [100.00, 1003.33, 2005.00, 0.00])
+
+    def test_journal_rows(self):
+        """
+        Test that one 'Interest Earned' row is journaled per account that earned interest.
+        """
+        accrue_interest(accounts_path=self.accounts, journal_path=self.journal)
+        journal = pd.read_csv(self.journal)
+        self.assertEqual(journal[["TransactionID", "AccountID", "Amount"]].values.tolist(),
+                         [[500, 202, 3.33], [501, 303, 5.00]])
+        self.assertEqual(set(journal["TransactionType"]), {"Interest Earned"})
+
+    def test_missed_months_compound_at_once(self):
+        """
+        Test that three months are compounded with the closed form and journaled as one row per account.
+        """
+        accInfo = pd.read_csv(self.accounts)
+        result, postings = accrue_frame(accInfo, list(MONTHLY_RATES), date(2025, 3, 1), periods=3)
+        self.assertEqual(result["message"], "Accrued 25.07 of interest on 2 accounts over 3 months.")
+        self.assertEqual(accInfo["CurrBal"].tolist(), ["100.00", "1010.03", "2015.04", "0.00"])
+        self.assertEqual(postings[["AccountID", "Amount", "TransDate"]].values.tolist(),
+                         [[202, "10.03", "2025-03-01"], [303, "15.04", "2025-03-01"]])
+
+    def test_unknown_type(self):
+        """
+        Test that an unknown account type is refused.
+        """
+        with open(self.accounts) as f:
+            before = f.read()
+        result = accrue_interest("Checking", accounts_path=self.accounts, journal_path=self.journal)
+        self.assertEqual(result["status"], "error")
+        with open(self.accounts) as f:
+            self.assertEqual(f.read(), before)
+
+    def test_streaming_matches_single_pass(self):
+        """
+        Test that every chunk size produces the same files as the in-memory accrual.
+        """
+        with open(self.accounts) as f:
+            original = f.read()
+        accrue_interest(accounts_path=self.accounts, journal_path=self.journal, chunk_size=0)
+        expected = pd.read_csv(self.accounts), pd.read_csv(self.journal)
+
+        for chunk_size in (1, 3, 100):
+            with self.subTest(chunk_size=chunk_size):
+                with open(self.accounts, "w") as f:
+                    f.write(original)
+                with open(self.journal, "w") as f:
+                    f.write("TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+                self.tables.seed_ids(transaction=500)
+                result = accrue_interest(accounts_path=self.accounts, journal_path=self.journal, chunk_size=chunk_size)
+                self.assertEqual(result["status"], "success")
+                self.assertIn("Accrued 8.33 of interest on 2 accounts", result["message"])
+                self.assertEqual(result["chunks"], -(-4 // chunk_size))
+                self.assertIn("peak_rss", result)
+                self.assertIn("peak_rss_growth", result)
+                pd.testing.assert_frame_equal(pd.read_csv(self.accounts), expected[0])
+                pd.testing.assert_frame_equal(pd.read_csv(self.journal), expected[1])
+                self.assertFalse([name for name in os.listdir(self.tables.directory) if name.endswith(".tmp")])
+
+    def test_streaming_failure_rolls_back(self):
+        """
+        Test that a failed journal append leaves both files unchanged.
+        """
+        with open(self.accounts) as f:
+            before = f.read()
+        calls = []
+
+        def fail_second(frame):
+            calls.append(len(frame))
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return original(journal, frame)
+
+        from scripts.transactionJournal import TransactionJournal
+        original = TransactionJournal.append_frame
+        journal = TransactionJournal(self.journal)
+        with patch("scripts.calcInterest.TransactionJournal", return_value=journal), \
+                patch.object(journal, "append_frame", side_effect=fail_second):
+            with self.assertRaises(OSError):
+                accrue_interest(accounts_path=self.accounts, journal_path=self.journal, chunk_size=2)
+        with open(self.accounts) as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(len(pd.read_csv(self.journal)), 0)
+        self.assertFalse([name for name in os.listdir(self.tables.directory) if name.endswith(".tmp")])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
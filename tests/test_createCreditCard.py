@@ -3,19 +3,20 @@
 import unittest
 from unittest.mock import patch
 import pandas as pd
+from tests.tableSandbox import TableTestCase
 from scripts.createCreditCard import openCreditCardAccount
 
-class TestOpenCreditCardAccount(unittest.TestCase):
+class TestOpenCreditCardAccount(TableTestCase):
 
-    @patch("scripts.createCreditCard.pd.read_csv")
-    @patch("scripts.createCreditCard.pd.DataFrame.to_csv")
-    def test_valid_customer_credit_card_creation(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createCreditCard.read_table")
+    @patch("scripts.createCreditCard.write_table")
+    def test_valid_customer_credit_card_creation(self, mock_write_table, mock_read_table):
         """Test standard account creation for valid customer."""
         customer_df = pd.DataFrame([{"Username": "testuser", "CustomerID": 101, "APRRangeID": 1}])
         accounts_df = pd.DataFrame(columns=["AccountID", "CustomerID", "AccountType", "CurrBal", "DateOpened", "CreditLimit", "APR"])
         logs_df = pd.DataFrame(columns=["LogID", "UserID", "LogMessage"])
 
-        mock_read_csv.side_effect = lambda path: (
+        mock_read_table.side_effect = lambda path: (
             customer_df if "customers.csv" in path else
             accounts_df if "accounts.csv" in path else
             logs_df
@@ -25,15 +26,15 @@ class TestOpenCreditCardAccount(unittest.TestCase):
         self.assertEqual(result["status"], "success")
         self.assertIn("Credit card account", result["message"])
 
-    @patch("scripts.createCreditCard.pd.read_csv")
-    @patch("scripts.createCreditCard.pd.DataFrame.to_csv")
-    def test_unrecognized_apr_range_id_defaults(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createCreditCard.read_table")
+    @patch("scripts.createCreditCard.write_table")
+    def test_unrecognized_apr_range_id_defaults(self, mock_write_table, mock_read_table):
         """Test fallback to default APR range when APRRangeID is invalid."""
         customer_df = pd.DataFrame([{"Username": "testuser", "CustomerID": 102, "APRRangeID": 999}])
         accounts_df = pd.DataFrame(columns=["AccountID", "CustomerID", "AccountType", "CurrBal", "DateOpened", "CreditLimit", "APR"])
         logs_df = pd.DataFrame(columns=["LogID", "UserID", "LogMessage"])
 
-        mock_read_csv.side_effect = lambda path: (
+        mock_read_table.side_effect = lambda path: (
             customer_df if "customers.csv" in path else
             accounts_df if "accounts.csv" in path else
             logs_df
@@ -43,15 +44,15 @@ class TestOpenCreditCardAccount(unittest.TestCase):
         self.assertEqual(result["status"], "success")
         self.assertIn("Credit card account", result["message"])
 
-    @patch("scripts.createCreditCard.pd.read_csv")
-    @patch("scripts.createCreditCard.pd.DataFrame.to_csv")
-    def test_apr_range_bounds(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createCreditCard.read_table")
+    @patch("scripts.createCreditCard.write_table")
+    def test_apr_range_bounds(self, mock_write_table, mock_read_table):
         """Test APR assigned within expected bounds for APRRangeID = 4."""
         customer_df = pd.DataFrame([{"Username": "user103", "CustomerID": 103, "APRRangeID": 4}])
         accounts_df = pd.DataFrame(columns=["AccountID", "CustomerID", "AccountType", "CurrBal", "DateOpened", "CreditLimit", "APR"])
         logs_df = pd.DataFrame(columns=["LogID", "UserID", "LogMessage"])
 
-        mock_read_csv.side_effect = lambda path: (
+        mock_read_table.side_effect = lambda path: (
             customer_df if "customers.csv" in path else
             accounts_df if "accounts.csv" in path else
             logs_df
@@ -63,9 +64,9 @@ class TestOpenCreditCardAccount(unittest.TestCase):
         self.assertGreaterEqual(apr_value, 27.1)
         self.assertLessEqual(apr_value, 30)
 
-    @patch("scripts.createCreditCard.pd.read_csv")
-    @patch("scripts.createCreditCard.pd.DataFrame.to_csv")
-    def test_account_id_uniqueness_logic(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createCreditCard.read_table")
+    @patch("scripts.createCreditCard.write_table")
+    def test_account_id_uniqueness_logic(self, mock_write_table, mock_read_table):
         """Test account ID is generated uniquely even if many IDs already exist."""
         customer_df = pd.DataFrame([{"Username": "user104", "CustomerID": 104, "APRRangeID": 2}])
         accounts_df = pd.DataFrame([{"AccountID": i, "CustomerID": 999, "AccountType": "Credit Card",
@@ -73,7 +74,7 @@ class TestOpenCreditCardAccount(unittest.TestCase):
                                      "CreditLimit": 1000, "APR": 22.5} for i in range(5000, 9999)])
         logs_df = pd.DataFrame(columns=["LogID", "UserID", "LogMessage"])
 
-        mock_read_csv.side_effect = lambda path: (
+        mock_read_table.side_effect = lambda path: (
             customer_df if "customers.csv" in path else
             accounts_df if "accounts.csv" in path else
             logs_df
@@ -82,15 +83,15 @@ class TestOpenCreditCardAccount(unittest.TestCase):
         result = openCreditCardAccount(104)
         self.assertEqual(result["status"], "success")
 
-    @patch("scripts.createCreditCard.pd.read_csv")
-    @patch("scripts.createCreditCard.pd.DataFrame.to_csv")
-    def test_customer_not_found(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createCreditCard.read_table")
+    @patch("scripts.createCreditCard.write_table")
+    def test_customer_not_found(self, mock_write_table, mock_read_table):
         """Test error is returned when customer ID is not found."""
         customer_df = pd.DataFrame([{"Username": "user105", "CustomerID": 105, "APRRangeID": 3}])
         accounts_df = pd.DataFrame()
         logs_df = pd.DataFrame()
 
-        mock_read_csv.side_effect = lambda path: (
+        mock_read_table.side_effect = lambda path: (
             customer_df if "customers.csv" in path else
             accounts_df if "accounts.csv" in path else
             logs_df
@@ -100,15 +101,15 @@ class TestOpenCreditCardAccount(unittest.TestCase):
         self.assertEqual(result["status"], "error")
         self.assertIn("Customer 999 not found", result["message"])
 
-    @patch("scripts.createCreditCard.pd.read_csv")
-    @patch("scripts.createCreditCard.pd.DataFrame.to_csv")
-    def test_multiple_credit_card_creations(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createCreditCard.read_table")
+    @patch("scripts.createCreditCard.write_table")
+    def test_multiple_credit_card_creations(self, mock_write_table, mock_read_table):
         """Test multiple credit card creations for same customer (unique accounts)."""
         customer_df = pd.DataFrame([{"Username": "user106", "CustomerID": 106, "APRRangeID": 2}])
         accounts_df = pd.DataFrame(columns=["AccountID", "CustomerID", "AccountType", "CurrBal", "DateOpened", "CreditLimit", "APR"])
         logs_df = pd.DataFrame(columns=["LogID", "UserID", "LogMessage"])
 
-        mock_read_csv.side_effect = lambda path: (
+        mock_read_table.side_effect = lambda path: (
             customer_df if "customers.csv" in path else
             accounts_df if "accounts.csv" in path else
             logs_df
@@ -4,9 +4,10 @@ import unittest
 import pandas as pd
 from decimal import Decimal
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.createLoan import createMortgageLoanAccount
 
-class TestCreateMortgageLoanAccount(unittest.TestCase):
+class TestCreateMortgageLoanAccount(TableTestCase):
     """
     Unit tests for createMortgageLoanAccount function.
 
@@ -39,9 +40,9 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
             "APR": "0.00"
         }])
 
-    @patch("scripts.createLoan.pd.read_csv")
-    @patch("scripts.createLoan.pd.DataFrame.to_csv")
-    def test_valid_customer_creates_account(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createLoan.read_table")
+    @patch("scripts.createLoan.write_table")
+    def test_valid_customer_creates_account(self, mock_write_table, mock_read_table):
         """
         Test that a valid customer results in mortgage loan account creation.
 
@@ -50,7 +51,7 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
         - Loan is added to accounts.
         - Transaction is logged in logs.csv.
         """
-        mock_read_csv.side_effect = self.mock_csvs(
+        mock_read_table.side_effect = self.mock_csvs(
             accounts=self.default_accounts_df(),
             customer_data=pd.DataFrame([{"Username": "alice", "CustomerID": 123, "APRRangeID": 2}])
         )
@@ -58,10 +59,10 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
         self.assertEqual(result["status"], "success")
         self.assertIn("Mortgage loan account", result["message"])
         self.assertIn("30 years", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
-    @patch("scripts.createLoan.pd.read_csv")
-    def test_invalid_customer(self, mock_read_csv):
+    @patch("scripts.createLoan.read_table")
+    def test_invalid_customer(self, mock_read_table):
         """
         Test error is returned when customer ID does not exist.
 
@@ -69,7 +70,7 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
         - No match in customers.csv.
         - Proper error response.
         """
-        mock_read_csv.side_effect = self.mock_csvs(
+        mock_read_table.side_effect = self.mock_csvs(
             accounts=self.default_accounts_df(),
             customer_data=pd.DataFrame(columns=["Username", "CustomerID", "APRRangeID"])
         )
@@ -77,9 +78,9 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
         self.assertEqual(result["status"], "error")
         self.assertIn("Customer 999 not found", result["message"])
 
-    @patch("scripts.createLoan.pd.read_csv")
-    @patch("scripts.createLoan.pd.DataFrame.to_csv")
-    def test_zero_loan_amount(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createLoan.read_table")
+    @patch("scripts.createLoan.write_table")
+    def test_zero_loan_amount(self, mock_write_table, mock_read_table):
         """
         Test behavior when the loan amount is zero.
 
@@ -87,18 +88,18 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
         - Loan is still created if allowed.
         - System handles it without crashing.
         """
-        mock_read_csv.side_effect = self.mock_csvs(
+        mock_read_table.side_effect = self.mock_csvs(
             accounts=self.default_accounts_df(),
             customer_data=pd.DataFrame([{"Username": "bob", "CustomerID": 124, "APRRangeID": 1}])
         )
         result = createMortgageLoanAccount(124, Decimal("0.00"), 15)
         self.assertEqual(result["status"], "success")
         self.assertIn("Mortgage loan account", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
-    @patch("scripts.createLoan.pd.read_csv")
-    @patch("scripts.createLoan.pd.DataFrame.to_csv")
-    def test_negative_term_years(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createLoan.read_table")
+    @patch("scripts.createLoan.write_table")
+    def test_negative_term_years(self, mock_write_table, mock_read_table):
         """
         Test that negative term values are accepted (if no validation).
 
@@ -106,17 +107,17 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
         - Account is still created with negative years.
         - Message includes negative term.
         """
-        mock_read_csv.side_effect = self.mock_csvs(
+        mock_read_table.side_effect = self.mock_csvs(
             customer_data=pd.DataFrame([{"Username": "sam", "CustomerID": 125, "APRRangeID": 3}])
         )
         result = createMortgageLoanAccount(125, Decimal("-100000.00"), -5)
         self.assertEqual(result["status"], "success")
         self.assertIn("-5 years", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
-    @patch("scripts.createLoan.pd.read_csv")
-    @patch("scripts.createLoan.pd.DataFrame.to_csv")
-    def test_apr_range_selection(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.createLoan.read_table")
+    @patch("scripts.createLoan.write_table")
+    def test_apr_range_selection(self, mock_write_table, mock_read_table):
         """
         Test APR is assigned based on APRRangeID correctly.
 
@@ -124,7 +125,7 @@ class TestCreateMortgageLoanAccount(unittest.TestCase):
         - APRRangeID = 4 results in rate between 6.6 and 7.5.
         - Output message includes correct APR.
         """
-        mock_read_csv.side_effect = self.mock_csvs(
+        mock_read_table.side_effect = self.mock_csvs(
             accounts=self.default_accounts_df(),
             customer_data=pd.DataFrame([{"Username": "leo", "CustomerID": 126, "APRRangeID": 4}])
         )
@@ -3,9 +3,10 @@
 import unittest
 import pandas as pd
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.deleteAccount import deleteAcc
 
-class TestDeleteAccount(unittest.TestCase):
+class TestDeleteAccount(TableTestCase):
     """
     Unit tests for the deleteAccount function.
     
@@ -16,9 +17,9 @@ class TestDeleteAccount(unittest.TestCase):
     - Proper transaction logging in `logs.csv`.
     """
 
-    @patch("scripts.deleteAccount.pd.read_csv")
-    @patch("scripts.deleteAccount.pd.DataFrame.to_csv")
-    def test_delete_valid_account(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.deleteAccount.read_table")
+    @patch("scripts.deleteAccount.write_table")
+    def test_delete_valid_account(self, mock_write_table, mock_read_table):
         """
         Test that a valid account is successfully deleted from accounts.csv.
         
@@ -34,7 +35,7 @@ class TestDeleteAccount(unittest.TestCase):
             {"AccountID": 5000, "CustomerID": 315, "AccountType": "Credit Card", "CurrBal": "0.00"},
         ])
 
-        mock_read_csv.side_effect = lambda path: mock_accounts_df.copy() if "accounts.csv" in path else pd.DataFrame()
+        mock_read_table.side_effect = lambda path: mock_accounts_df.copy() if "accounts.csv" in path else pd.DataFrame()
 
         # Run delete function
         result1 = deleteAcc(315, 1000)
@@ -59,11 +60,11 @@ class TestDeleteAccount(unittest.TestCase):
         self.assertEqual(result4, {"status": "success", "message": "Account 5000 successfully deleted."})
 
         # Ensure accounts.csv was updated
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
-    @patch("scripts.deleteAccount.pd.read_csv")
-    @patch("scripts.deleteAccount.pd.DataFrame.to_csv")
-    def test_delete_account_with_negative_balance(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.deleteAccount.read_table")
+    @patch("scripts.deleteAccount.write_table")
+    def test_delete_account_with_negative_balance(self, mock_write_table, mock_read_table):
         """
         Test that an account with a negative balance cannot be deleted.
         
@@ -77,16 +78,16 @@ class TestDeleteAccount(unittest.TestCase):
              "CurrBal": "-100.00"}
         ])
 
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else pd.DataFrame()
+        mock_read_table.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else pd.DataFrame()
 
         result = deleteAcc(315, 5016)
 
         self.assertIn("cannot be deleted", result["message"].lower())
-        mock_to_csv.assert_not_called()
+        mock_write_table.assert_not_called()
 
-    @patch("scripts.deleteAccount.pd.read_csv")
-    @patch("scripts.deleteAccount.pd.DataFrame.to_csv")
-    def test_delete_non_existent_account(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.deleteAccount.read_table")
+    @patch("scripts.deleteAccount.write_table")
+    def test_delete_non_existent_account(self, mock_write_table, mock_read_table):
         """
         Test that attempting to delete a non-existent account returns an error.
         
@@ -100,17 +101,17 @@ class TestDeleteAccount(unittest.TestCase):
              "CurrBal": "800.00"}
         ])
 
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else pd.DataFrame()
+        mock_read_table.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else pd.DataFrame()
 
         result = deleteAcc(315, 9999)  # Account 9999 does not exist
 
         self.assertIn("not found", result["message"])
-        mock_to_csv.assert_not_called()
+        mock_write_table.assert_not_called()
 
-    @patch("scripts.deleteAccount.pd.read_csv")
-    @patch("scripts.deleteAccount.pd.DataFrame.to_csv")
-    @patch("scripts.deleteAccount.generate_transaction_ID", return_value="TX67890")
-    def test_log_account_deletion(self, mock_generate_txn, mock_to_csv, mock_read_csv):
+    @patch("scripts.deleteAccount.read_table")
+    @patch("scripts.deleteAccount.write_table")
+    @patch("scripts.deleteAccount.next_id", return_value=67890)
+    def test_log_account_deletion(self, mock_next_id, mock_write_table, mock_read_table):
         """
         Test that account deletion is properly logged in logs.csv.
 
@@ -134,13 +135,13 @@ class TestDeleteAccount(unittest.TestCase):
         mock_logs_df = pd.DataFrame(columns=["AccountID", "CustomerID", "TransactionType", "Amount", "TransactionID"])
 
         # Set the behavior of pd.read_csv to return the appropriate mock DataFrame based on file path
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
+        mock_read_table.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_logs_df
 
         # Call the deleteAcc function to perform the deletion
         result = deleteAcc(315, 1000)
 
         # Verify that the transaction log was saved (to_csv was called)
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
         # Check that the result returned is a success message
         self.assertEqual(result, {"status": "success", "message": "Account 1000 successfully deleted."})
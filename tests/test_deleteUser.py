@@ -3,9 +3,10 @@
 import unittest
 from unittest.mock import patch, mock_open
 import pandas as pd
+from tests.tableSandbox import TableTestCase
 from scripts.customer.deleteUser import delete_user_button_pressed
 
-class TestDeleteUserFunction(unittest.TestCase):
+class TestDeleteUserFunction(TableTestCase):
     """
     Unit tests for delete_user_button_pressed function.
 
@@ -19,10 +20,10 @@ class TestDeleteUserFunction(unittest.TestCase):
 
     @patch("scripts.customer.deleteUser.os.path.exists")
     @patch("scripts.customer.deleteUser.os.remove")
-    @patch("scripts.customer.deleteUser.pd.read_csv")
-    @patch("scripts.customer.deleteUser.pd.DataFrame.to_csv")
+    @patch("scripts.customer.deleteUser.read_table")
+    @patch("scripts.customer.deleteUser.write_table")
     @patch("scripts.customer.deleteUser.ECC.import_key")
-    def test_customer_deletion_success(self, mock_import, mock_to_csv, mock_read_csv, mock_remove, mock_exists):
+    def test_customer_deletion_success(self, mock_import, mock_write_table, mock_read_table, mock_remove, mock_exists):
         """
         Test successful deletion of a customer with no active accounts or bills and valid password.
         """
@@ -30,7 +31,7 @@ class TestDeleteUserFunction(unittest.TestCase):
         mock_exists.side_effect = lambda path: True if path.endswith("privatekey.pem") or ".csv" in path else False
 
         # Provide mock data
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{"ID": 111, "UserType": "Customer"}]),  # persons.csv
             pd.DataFrame(columns=["AccountID", "CustomerID"]),    # accounts.csv (empty)
             pd.DataFrame(columns=["BillID", "CustomerID"]),       # bills.csv (empty)
@@ -45,20 +46,20 @@ class TestDeleteUserFunction(unittest.TestCase):
         self.assertEqual(result["status"], "success")
         self.assertIn("successfully deleted", result["message"])
         mock_import.assert_called_once()
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
         mock_remove.assert_called()
 
     @patch("scripts.customer.deleteUser.os.path.exists")
     @patch("scripts.customer.deleteUser.os.remove")
-    @patch("scripts.customer.deleteUser.pd.read_csv")
-    @patch("scripts.customer.deleteUser.pd.DataFrame.to_csv")
-    def test_admin_deletes_teller_successfully(self, mock_to_csv, mock_read_csv, mock_remove, mock_exists):
+    @patch("scripts.customer.deleteUser.read_table")
+    @patch("scripts.customer.deleteUser.write_table")
+    def test_admin_deletes_teller_successfully(self, mock_write_table, mock_read_table, mock_remove, mock_exists):
         """
         Test that an admin can delete a teller account if no accounts or bills are linked.
         """
         mock_exists.side_effect = lambda path: True if path.endswith("privatekey.pem") or ".csv" in path else False
 
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{"ID": 888, "UserType": "Teller"}]),     # persons.csv
             pd.DataFrame(columns=["AccountID", "CustomerID"]),     # accounts.csv
             pd.DataFrame(columns=["BillID", "CustomerID"]),        # bills.csv
@@ -69,15 +70,15 @@ class TestDeleteUserFunction(unittest.TestCase):
 
         self.assertEqual(result["status"], "success")
         self.assertIn("successfully deleted", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
         mock_remove.assert_called()
 
-    @patch("scripts.customer.deleteUser.pd.read_csv")
-    def test_deletion_fails_with_active_accounts(self, mock_read_csv):
+    @patch("scripts.customer.deleteUser.read_table")
+    def test_deletion_fails_with_active_accounts(self, mock_read_table):
         """
         Test user cannot be deleted if they have active accounts.
         """
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{"ID": 222, "UserType": "Customer"}]),   # persons.csv
             pd.DataFrame([{"AccountID": 1, "CustomerID": 222}]),   # accounts.csv
             pd.DataFrame(columns=["BillID", "CustomerID"])         # bills.csv
@@ -89,12 +90,12 @@ class TestDeleteUserFunction(unittest.TestCase):
         self.assertIn("Active accounts", result["message"])
 
     @patch("scripts.customer.deleteUser.os.path.exists", return_value=False)
-    @patch("scripts.customer.deleteUser.pd.read_csv")
-    def test_missing_key_file(self, mock_read_csv, mock_exists):
+    @patch("scripts.customer.deleteUser.read_table")
+    def test_missing_key_file(self, mock_read_table, mock_exists):
         """
         Test customer deletion fails if PEM key file does not exist.
         """
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{"ID": 333, "UserType": "Customer"}]),
             pd.DataFrame(columns=["AccountID", "CustomerID"]),
             pd.DataFrame(columns=["BillID", "CustomerID"])
@@ -106,13 +107,13 @@ class TestDeleteUserFunction(unittest.TestCase):
         self.assertIn("Private key file not found", result["message"])
 
     @patch("scripts.customer.deleteUser.os.path.exists", return_value=True)
-    @patch("scripts.customer.deleteUser.pd.read_csv")
+    @patch("scripts.customer.deleteUser.read_table")
     @patch("scripts.customer.deleteUser.ECC.import_key", side_effect=ValueError("Decryption failed"))
-    def test_incorrect_password(self, mock_import, mock_read_csv, mock_exists):
+    def test_incorrect_password(self, mock_import, mock_read_table, mock_exists):
         """
         Test decryption failure due to incorrect password blocks deletion.
         """
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{"ID": 444}]),
             pd.DataFrame(columns=["AccountID", "CustomerID"]),
             pd.DataFrame(columns=["BillID", "CustomerID"])
@@ -126,13 +127,13 @@ class TestDeleteUserFunction(unittest.TestCase):
 
     @patch("scripts.customer.deleteUser.os.path.exists", return_value=True)
     @patch("scripts.customer.deleteUser.os.remove")
-    @patch("scripts.customer.deleteUser.pd.read_csv")
-    @patch("scripts.customer.deleteUser.pd.DataFrame.to_csv")
-    def test_admin_can_delete_without_password(self, mock_to_csv, mock_read_csv, mock_remove, mock_exists):
+    @patch("scripts.customer.deleteUser.read_table")
+    @patch("scripts.customer.deleteUser.write_table")
+    def test_admin_can_delete_without_password(self, mock_write_table, mock_read_table, mock_remove, mock_exists):
         """
         Test that admin can delete customer without password verification.
         """
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{"ID": 555, "UserType": "Customer"}]),
             pd.DataFrame(columns=["AccountID", "CustomerID"]),
             pd.DataFrame(columns=["BillID", "CustomerID"]),
@@ -143,21 +144,21 @@ class TestDeleteUserFunction(unittest.TestCase):
 
         self.assertEqual(result["status"], "success")
         self.assertIn("successfully deleted", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
         mock_remove.assert_called()
 
     @patch("scripts.customer.deleteUser.os.path.exists")
     @patch("scripts.customer.deleteUser.os.remove")
-    @patch("scripts.customer.deleteUser.pd.read_csv")
-    @patch("scripts.customer.deleteUser.pd.DataFrame.to_csv")
+    @patch("scripts.customer.deleteUser.read_table")
+    @patch("scripts.customer.deleteUser.write_table")
     @patch("scripts.customer.deleteUser.ECC.import_key")
-    def test_teller_deletes_customer_with_password(self, mock_import, mock_to_csv, mock_read_csv, mock_remove, mock_exists):
+    def test_teller_deletes_customer_with_password(self, mock_import, mock_write_table, mock_read_table, mock_remove, mock_exists):
         """
         Test that a teller (non-admin) can delete a customer account with a valid password.
         """
         mock_exists.side_effect = lambda path: True if path.endswith("privatekey.pem") or ".csv" in path else False
 
-        mock_read_csv.side_effect = [
+        mock_read_table.side_effect = [
             pd.DataFrame([{"ID": 777, "UserType": "Customer"}]),
             pd.DataFrame(columns=["AccountID", "CustomerID"]),
             pd.DataFrame(columns=["BillID", "CustomerID"]),
@@ -170,7 +171,7 @@ class TestDeleteUserFunction(unittest.TestCase):
         self.assertEqual(result["status"], "success")
         self.assertIn("successfully deleted", result["message"])
         mock_import.assert_called_once()
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
         mock_remove.assert_called()
 
 if __name__ == "__main__":
@@ -4,10 +4,11 @@ import unittest
 import pandas as pd
 from decimal import Decimal
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.fundTransfer import transferFunds
 
 
-class TestFundTransfer(unittest.TestCase):
+class TestFundTransfer(TableTestCase):
     """
     Unit tests for the transferFunds function in fundTransfer.py.
 
@@ -15,7 +16,7 @@ class TestFundTransfer(unittest.TestCase):
     - Successful fund transfer
     - Transfer with insufficient funds
     - Invalid account IDs
-    - Invalid transfer amounts
+    - Invalid transfer amounts, reported after missing accounts
     """
 
     def _mock_accounts_df(self, src_type, dest_type, src_bal="1000.00", dest_bal="500.00"):
@@ -24,16 +25,8 @@ class TestFundTransfer(unittest.TestCase):
             {"AccountID": 202, "CustomerID": 1, "AccountType": dest_type, "CurrBal": dest_bal},
         ])
 
-    def _mock_success(self, *args, **kwargs):
-        return {"status": "success", "message": "Success"}
-
-    def _mock_blocked(self, *args, **kwargs):
-        return {"status": "error", "message": "Not allowed"}
-
-    @patch("scripts.fundTransfer.deposit")
-    @patch("scripts.fundTransfer.withdraw")
-    @patch("scripts.fundTransfer.pd.read_csv")
-    def test_valid_account_type_transfers(self, mock_read_csv, mock_withdraw, mock_deposit):
+    @patch("scripts.ledger.read_table")
+    def test_valid_account_type_transfers(self, mock_read_table):
         valid_combinations = [
             ("Checking", "Checking"),
             ("Checking", "Savings"),
@@ -47,17 +40,13 @@ class TestFundTransfer(unittest.TestCase):
 
         for src, dest in valid_combinations:
             with self.subTest(src_type=src, dest_type=dest):
-                mock_read_csv.return_value = self._mock_accounts_df(src, dest)
-                mock_withdraw.side_effect = self._mock_success
-                mock_deposit.side_effect = self._mock_success
+                mock_read_table.return_value = self._mock_accounts_df(src, dest)
 
                 result = transferFunds(101, 202, Decimal("100.00"))
                 self.assertEqual(result["status"], "success")
 
-    @patch("scripts.fundTransfer.deposit")
-    @patch("scripts.fundTransfer.withdraw")
-    @patch("scripts.fundTransfer.pd.read_csv")
-    def test_invalid_account_type_transfers(self, mock_read_csv, mock_withdraw, mock_deposit):
+    @patch("scripts.ledger.read_table")
+    def test_invalid_account_type_transfers(self, mock_read_table):
         invalid_combinations = [
             ("Credit Card", "Checking"),
             ("Credit Card", "Savings"),
@@ -69,18 +58,14 @@ class TestFundTransfer(unittest.TestCase):
 
         for src, dest in invalid_combinations:
             with self.subTest(src_type=src, dest_type=dest):
-                mock_read_csv.return_value = self._mock_accounts_df(src, dest)
-                mock_withdraw.side_effect = self._mock_blocked
-                mock_deposit.side_effect = self._mock_blocked
+                mock_read_table.return_value = self._mock_accounts_df(src, dest)
 
                 result = transferFunds(101, 202, Decimal("100.00"))
                 self.assertEqual(result["status"], "error")
                 self.assertIn("fail", result["message"].lower() or "not allowed")
 
-    @patch("scripts.fundTransfer.deposit")
-    @patch("scripts.fundTransfer.withdraw")
-    @patch("scripts.fundTransfer.pd.read_csv")
-    def test_insufficient_funds(self, mock_read_csv, mock_withdraw, mock_deposit):
+    @patch("scripts.ledger.read_table")
+    def test_insufficient_funds(self, mock_read_table):
         """
         Test that transfer fails if source account has insufficient funds.
         """
@@ -88,8 +73,7 @@ class TestFundTransfer(unittest.TestCase):
             {"AccountID": 101, "CustomerID": 1, "AccountType": "Checking", "CurrBal": "50.00"},
             {"AccountID": 202, "CustomerID": 1, "AccountType": "Savings", "CurrBal": "100.00"},
         ])
-        mock_read_csv.return_value = mock_accounts_df
-        mock_withdraw.return_value = {"status": "error", "message": "Insufficient funds"}
+        mock_read_table.return_value = mock_accounts_df
 
         result = transferFunds(101, 202, Decimal("100.00"))
 
@@ -98,17 +82,15 @@ class TestFundTransfer(unittest.TestCase):
             "message": "Withdrawal failed. Transfer aborted."
         })
 
-    @patch("scripts.fundTransfer.deposit")
-    @patch("scripts.fundTransfer.withdraw")
-    @patch("scripts.fundTransfer.pd.read_csv")
-    def test_invalid_accounts(self, mock_read_csv, mock_withdraw, mock_deposit):
+    @patch("scripts.ledger.read_table")
+    def test_invalid_accounts(self, mock_read_table):
         """
         Test that transfer fails if either account ID is invalid.
         """
         mock_accounts_df = pd.DataFrame([
             {"AccountID": 101, "CustomerID": 1, "AccountType": "Checking", "CurrBal": "300.00"}
         ])
-        mock_read_csv.return_value = mock_accounts_df
+        mock_read_table.return_value = mock_accounts_df
 
         result = transferFunds(101, 9999, Decimal("50.00"))
 
@@ -117,8 +99,8 @@ class TestFundTransfer(unittest.TestCase):
             "message": "Destination account 9999 not found."
         })
 
-    @patch("scripts.fundTransfer.pd.read_csv")
-    def test_invalid_transfer_amounts(self, mock_read_csv):
+    @patch("scripts.fundTransfer.read_table")
+    def test_invalid_transfer_amounts(self, mock_read_table):
         """
         Test that transfer fails if amount is zero or negative.
         """
@@ -127,7 +109,7 @@ class TestFundTransfer(unittest.TestCase):
             {"AccountID": 101, "CustomerID": 1, "AccountType": "Checking", "CurrBal": "300.00"},
             {"AccountID": 202, "CustomerID": 1, "AccountType": "Savings", "CurrBal": "200.00"},
         ])
-        mock_read_csv.return_value = mock_accounts_df
+        mock_read_table.return_value = mock_accounts_df
 
         for invalid_amount in [Decimal("0.00"), Decimal("-100.00")]:
             with self.subTest(amount=invalid_amount):
@@ -137,5 +119,16 @@ class TestFundTransfer(unittest.TestCase):
                     "message": "Transfer amount must be positive."
                 })
 
+    @patch("scripts.fundTransfer.read_table")
+    def test_missing_account_reported_before_amount(self, mock_read_table):
+        """
+        Test that an unknown account is reported even when the amount is also invalid.
+        """
+        mock_read_table.return_value = self._mock_accounts_df("Checking", "Savings")
+        self.assertEqual(transferFunds(999, 202, Decimal("0.00")),
+                         {"status": "error", "message": "Source account 999 not found."})
+        self.assertEqual(transferFunds(101, 999, Decimal("-5.00")),
+                         {"status": "error", "message": "Destination account 999 not found."})
+
 if __name__ == "__main__":
     unittest.main()
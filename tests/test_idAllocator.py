@@ -0,0 +1,84 @@
+# In root dir: python -m unittest tests/test_idAllocator.py
+import json
+import unittest
+import multiprocessing
+from tests.tableSandbox import TableTestCase
+from scripts.idAllocator import IdAllocator
+
+
+def _draw_ids(csv_dir, count, queue):
+    allocator = IdAllocator(csv_dir, block_size=7)
+    queue.put([allocator.next_id("transaction") for _ in range(count)])
+
+
+class TestIdAllocator(TableTestCase):
+    """
+    Unit tests for the sequence-based ID allocator in idAllocator.py.
+
+    This suite tests:
+    - New sequences start after the largest ID already in the tables
+    - Reserved blocks are persisted, so a restarted process never reuses an ID
+    - Concurrent processes draw disjoint IDs
+    - Unknown sequences are rejected
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.tables.write("persons.csv",
+                          "UserType,ID,LastName\nCustomer,250,Doe\nTeller,4100,Roe\n")
+        self.tables.write("transactions.csv",
+                          "TransactionID,AccountID,TransactionType,Amount,TransDate\n"
+                          "5000,300,Deposit,10.00,2025-01-01\n")
+
+    def test_seeds_after_existing_ids(self):
+        """
+        Test that sequences start after the largest existing ID of their tables.
+        """
+        allocator = IdAllocator(self.tables.directory, block_size=10)
+        self.assertEqual(allocator.next_id("person"), 4101)
+        self.assertEqual(allocator.next_id("transaction"), 5001)
+        self.assertEqual(allocator.next_id("account"), 301)
+        self.assertEqual(allocator.next_id("log"), 1300)
+
+    def test_restart_skips_reserved_block(self):
+        """
+        Test that a new allocator continues after the block reserved by the previous one.
+        """
+        first = IdAllocator(self.tables.directory, block_size=10)
+        used = [first.next_id("bill") for _ in range(3)]
+        self.assertEqual(used, [1, 2, 3])
+        with open(self.tables.path("sequences.json")) as f:
+            self.assertEqual(json.load(f)["bill"], 11)
+
+        second = IdAllocator(self.tables.directory, block_size=10)
+        self.assertEqual(second.next_id("bill"), 11)
+        # Too few IDs left in the block: a fresh range is reserved after it
+        self.assertEqual(list(second.reserve("bill", 25)), list(range(21, 46)))
+
+    def test_processes_draw_unique_ids(self):
+        """
+        Test that several processes sharing the sequences file never draw the same ID.
+        """
+        queue = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_draw_ids, args=(self.tables.directory, 40, queue)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        ids = [i for _ in workers for i in queue.get(timeout=30)]
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(ids), 160)
+        self.assertEqual(len(set(ids)), 160)
+        self.assertGreater(min(ids), 5000)
+
+    def test_unknown_sequence(self):
+        """
+        Test that drawing from an undefined sequence raises KeyError.
+        """
+        with self.assertRaises(KeyError):
+            IdAllocator(self.tables.directory).next_id("widget")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# In root dir: python -m unittest tests/test_leaderLease.py
+import time
+import unittest
+import multiprocessing
+from tests.tableSandbox import TableTestCase
+from scripts.leaderLease import LeaderElector, LeaderLease
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _try_lead(path, queue):
+    queue.put(LeaderLease(path, lease_seconds=60).acquire())
+
+
+class TestLeaderLease(TableTestCase):
+    """
+    Unit tests for the scheduler lease in leaderLease.py.
+
+    This suite tests:
+    - Only one holder at a time, across processes
+    - Renewal keeps the lease; an expired lease is taken over
+    - A deposed leader cannot renew and steps down
+    - Releasing hands the lease over straight away
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tables.path("schedulerLease.json")
+        self.clock = _Clock()
+
+    def _lease(self, holder):
+        return LeaderLease(self.path, lease_seconds=30, holder=holder, clock=self.clock)
+
+    def test_single_holder(self):
+        """
+        Test that a second holder cannot take a live lease, in this or another process.
+        """
+        self.clock.now = time.time()
+        first, second = self._lease("a"), self._lease("b")
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertEqual(first.current()["holder"], "a")
+
+        # Another process on the real clock sees the lease as live
+        queue = multiprocessing.Queue()
+        child = multiprocessing.Process(target=_try_lead, args=(self.path, queue))
+        child.start()
+        self.assertFalse(queue.get(timeout=30))
+        child.join()
+
+    def test_renewal_and_takeover(self):
+        """
+        Test that renewing keeps the lease alive and an expired lease goes to the next holder.
+        """
+        first, second = self._lease("a"), self._lease("b")
+        self.assertTrue(first.acquire())
+        self.clock.now += 20
+        self.assertTrue(first.renew())
+        self.clock.now += 20
+        self.assertFalse(second.acquire())
+
+        # The leader stops renewing (it died or hung)
+        self.clock.now += 31
+        self.assertTrue(second.acquire())
+        self.assertEqual(second.current()["holder"], "b")
+        self.assertFalse(first.renew())
+
+    def test_release(self):
+        """
+        Test that a released lease can be taken at once and only its holder can release it.
+        """
+        first, second = self._lease("a"), self._lease("b")
+        first.acquire()
+        second.release()
+        self.assertFalse(second.acquire())
+        first.release()
+        self.assertEqual(first.current(), {})
+        self.assertTrue(second.acquire())
+
+    def test_elector_steps_down(self):
+        """
+        Test that the elector starts the scheduler when elected and stops it when the lease is lost.
+        """
+        events = []
+        elector = LeaderElector(self._lease("a"), lambda: events.append("elected"),
+                                lambda: events.append("deposed"))
+        rival = self._lease("b")
+        self.assertFalse(rival.acquire() and elector.step())
+        self.assertEqual(events, [])
+
+        self.clock.now += 31
+        self.assertTrue(elector.step())
+        self.assertTrue(elector.step())
+        self.assertEqual(events, ["elected"])
+
+        self.clock.now += 31
+        rival.acquire()
+        self.assertFalse(elector.step())
+        self.assertEqual(events, ["elected", "deposed"])
+
+        elector.stop()
+        self.assertEqual(rival.current()["holder"], "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# In root dir: python -m unittest tests/test_ledger.py
+import os
+import unittest
+import pandas as pd
+from decimal import Decimal
+from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
+from scripts.ledger import post
+from scripts.fundTransfer import transferFunds
+from scripts.repository import CsvRepository
+
+
+class TestLedger(TableTestCase):
+    """
+    Unit tests for the posting engine in ledger.py.
+
+    This suite tests:
+    - A transfer commits both balances and both journal rows in one commit
+    - A rejected leg leaves every table untouched
+    - Legs on the same account see each other's effect
+    - A commit that fails part way leaves balances and journal unchanged
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.accounts = self.tables.write("accounts.csv",
+                                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n"
+                                          "101,1,Checking,300.00,2025-01-01,,\n"
+                                          "202,1,Credit Card,-150.25,2025-01-01,1000.00,22.5\n")
+        self.journal = self.tables.write("transactions.csv",
+                                         "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+        self.tables.seed_ids(transaction=7000)
+        patcher = patch("scripts.repository.CsvRepository.commit", autospec=True, side_effect=CsvRepository.commit)
+        self.commit = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _balances(self):
+        return pd.read_csv(self.accounts, dtype=str)["CurrBal"].tolist()
+
+    def _journal(self):
+        return pd.read_csv(self.journal, dtype=str)
+
+    def test_transfer_is_one_commit(self):
+        """
+        Test that a transfer updates both balances and journals both legs in one commit.
+        """
+        result = transferFunds(101, 202, Decimal("100.00"))
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(self.commit.call_count, 1)
+        self.assertEqual(self._balances(), ["200.00", "-50.25"])
+        journal = self._journal()
+        self.assertEqual(journal[["TransactionID", "AccountID", "TransactionType", "Amount"]].values.tolist(), [
+            ["7000", "101", "Withdrawal", "100.00"],
+            ["7001", "202", "Payment to Credit Card", "100.00"],
+        ])
+
+    def test_rejected_leg_writes_nothing(self):
+        """
+        Test that a leg failing validation aborts the whole posting before any write.
+        """
+        result = transferFunds(202, 101, Decimal("10.00"))
+        self.assertEqual(result, {"status": "error", "message": "Withdrawal failed. Transfer aborted."})
+        result = transferFunds(101, 999, Decimal("10.00"))
+        self.assertEqual(result, {"status": "error", "message": "Destination account 999 not found."})
+        self.commit.assert_not_called()
+        self.assertEqual(self._balances(), ["300.00", "-150.25"])
+
+    def test_legs_on_one_account_compose(self):
+        """
+        Test that a second withdrawal is checked against the balance left by the first.
+        """
+        result = post([("withdrawal", 101, Decimal("200.00")), ("withdrawal", 101, Decimal("200.00"))])
+        self.assertEqual(result["status"], "error")
+        self.assertEqual((result["leg"], result["reason"]), (1, "insufficient"))
+        self.commit.assert_not_called()
+
+    def test_failed_commit_changes_nothing(self):
+        """
+        Test that a failure while staging the journal rows leaves both tables as they were.
+        """
+        stage = CsvRepository._stage
+
+        def failing_stage(df, path):
+            if path == self.journal:
+                raise OSError("disk full")
+            return stage(df, path)
+
+        with patch.object(CsvRepository, "_stage", side_effect=failing_stage):
+            with self.assertRaises(OSError):
+                post([("withdrawal", 101, Decimal("50.00")), ("deposit", 202, Decimal("50.00"))])
+        self.assertEqual(self._balances(), ["300.00", "-150.25"])
+        self.assertEqual(len(self._journal()), 0)
+        self.assertFalse([name for name in os.listdir(self.tables.directory) if name.endswith(".commit")])
+
+
+if __name__ == "__main__":
+    unittest.main()
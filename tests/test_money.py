@@ -0,0 +1,74 @@
+# In root dir: python -m unittest tests/test_money.py
+import unittest
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from tests.tableSandbox import TableTestCase
+from scripts.money import NA_CENTS, to_cents, apply_rate, format_cents, format_money_columns
+
+
+class TestMoney(TableTestCase):
+    """
+    Unit tests for the integer-cents codec in money.py.
+
+    This suite tests:
+    - Conversion to cents matches Decimal quantize, including half-cent ties
+    - Applying a rate matches Decimal multiplication and quantize
+    - Formatting writes two-decimal strings and keeps missing values empty
+    """
+
+    def test_to_cents_matches_decimal_quantize(self):
+        """
+        Test that floats, strings and Decimals round like Decimal(str(x)).quantize.
+        """
+        values = [2.675, 0.125, -0.135, 1.005, 12.5, "3.14159", Decimal("7.555"), -400.0]
+        expected = [int(Decimal(str(v)).quantize(Decimal("0.00")).scaleb(2)) for v in values]
+        self.assertEqual(to_cents(pd.Series(values, dtype=object)).tolist(), expected)
+        floats = [v for v in values if isinstance(v, float)]
+        self.assertEqual(to_cents(pd.Series(floats)).tolist(),
+                         [int(Decimal(str(v)).quantize(Decimal("0.00")).scaleb(2)) for v in floats])
+
+    def test_missing_values(self):
+        """
+        Test that NaN and blank values become NA_CENTS and format as empty strings.
+        """
+        cents = to_cents(pd.Series([np.nan, 1.5, ""], dtype=object))
+        self.assertEqual(cents[0], NA_CENTS)
+        self.assertEqual(cents[2], NA_CENTS)
+        self.assertEqual(format_cents(cents).tolist(), ["", "1.50", ""])
+
+    def test_apply_rate_matches_decimal(self):
+        """
+        Test that apply_rate gives the same cents as Decimal multiplication for random balances.
+        """
+        rng = np.random.default_rng(7)
+        balances = np.round(rng.uniform(-10000, 10000, 5000), 2)
+        rate = Decimal("1.0033")
+        expected = [int((Decimal(str(b)).quantize(Decimal("0.00")) * rate).quantize(Decimal("0.00")).scaleb(2))
+                    for b in balances]
+        self.assertEqual(apply_rate(to_cents(pd.Series(balances)), rate).tolist(), expected)
+
+    def test_apply_rate_per_element(self):
+        """
+        Test that an array of rates applies each rate to its own balance, as Decimal does.
+        """
+        rng = np.random.default_rng(11)
+        balances = np.round(rng.uniform(-300000, 0, 2000), 2)
+        rates = [Decimal(str(apr)) / Decimal(100) / Decimal(12) for apr in np.round(rng.uniform(0, 30, 2000), 2)]
+        expected = [int((Decimal(str(b)).quantize(Decimal("0.00")) * r).quantize(Decimal("0.00")).scaleb(2))
+                    for b, r in zip(balances, rates)]
+        self.assertEqual(apply_rate(to_cents(pd.Series(balances)), rates).tolist(), expected)
+
+    def test_format_money_columns(self):
+        """
+        Test that money columns are written as two-decimal strings and other columns are untouched.
+        """
+        df = pd.DataFrame({"AccountID": [1, 2], "CurrBal": [-0.5, 1234.0], "CreditLimit": [np.nan, 1000.0]})
+        format_money_columns(df, "CurrBal", "CreditLimit", "Missing")
+        self.assertEqual(df["CurrBal"].tolist(), ["-0.50", "1234.00"])
+        self.assertEqual(df["CreditLimit"].tolist(), ["", "1000.00"])
+        self.assertEqual(df["AccountID"].tolist(), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,435 @@
+# In root dir: python -m unittest tests/test_nightlyBatch.py
+import os
+import unittest
+import threading
+import pandas as pd
+from datetime import date
+from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
+from scripts.nightlyBatch import run_nightly_batch, partition_rows, catch_up_missed_runs
+from scripts.calcCreditInterest import charge_credit_interest
+from scripts.repository import CsvRepository, COMMIT_RECORD
+from scripts.batchThrottle import BatchThrottle
+from scripts.tableLock import table_lock
+from scripts.billIndex import BillIndex
+
+
+class TestNightlyBatch(TableTestCase):
+    """
+    Unit tests for the nightly pipeline in nightlyBatch.py.
+
+    This suite tests:
+    - Stages run in order on one snapshot and are committed together
+    - Each stage is timed, and monthly interest only runs on the 1st
+    - A failing stage leaves every table unchanged
+    - A commit interrupted after its record was written is finished by recover()
+    - Partitions keep a bill with its payment account, all of them are committed
+      once, and the commit does not depend on the number of workers
+    - A run that fails part way resumes from its checkpoint, and a finished
+      run date is not run again
+    - Missed nights are caught up in one run: months compounded at once and
+      bills paid on their due dates in order, next bills reported by their real IDs
+    - A throttled run backs off while the web app is busy, frees the table
+      locks between slices and keeps changes made online in between
+    - Throttled slices load the tables once and commit only their own rows,
+      patching the bills index instead of rebuilding it
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.files = {name: self.tables.path(f"{name}.csv") for name in ("accounts", "bills", "transactions")}
+        self.tables.write("accounts.csv",
+                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR,StatementDay\n"
+                          "101,1,Checking,500.00,2025-01-01,,,\n"
+                          "102,1,Savings,1000.00,2025-01-01,,4.0,\n"
+                          "103,1,Credit Card,-200.00,2025-01-01,1000.00,24.0,1\n"
+                          "104,2,Credit Card,-100.00,2025-01-01,1000.00,12.0,1\n")
+        self.tables.write("bills.csv",
+                          "BillID,CustomerID,PayeeName,PayeeAddress,Amount,DueDate,PaymentAccID,MinPayment,BillType,IsRecurring,Status\n"
+                          "1,1,Power,Addr,-50.00,2025-03-01,101,50.00,Regular,0,Pending\n"
+                          "2,2,Card,Addr,-100.00,2025-02-01,104,3.00,CreditCard,1,Late\n"
+                          "3,1,Water,Addr,-20.00,2025-02-20,101,20.00,Regular,0,Pending\n")
+        self.tables.write("transactions.csv",
+                          "TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+
+    def _tables(self):
+        return {name: pd.read_csv(path) for name, path in self.files.items()}
+
+    def _bytes(self):
+        contents = {}
+        for name, path in self.files.items():
+            with open(path, "rb") as f:
+                contents[name] = f.read()
+        return contents
+
+    def test_stages_commit_together(self):
+        """
+        Test that every stage sees the previous stages' changes and all of them are written.
+        """
+        result = run_nightly_batch(date(2025, 3, 1), csv_dir=self.tables.directory)
+        self.assertEqual(result["status"], "success")
+        self.assertEqual([s["stage"] for s in result["stages"]],
+                         ["monthly_interest", "bill_processing", "credit_statements", "credit_interest"])
+        self.assertTrue(all(s["status"] == "done" and s["seconds"] >= 0 for s in result["stages"]))
+        self.assertIn("commit_seconds", result)
+
+        tables = self._tables()
+        self.assertEqual(tables["accounts"]["CurrBal"].tolist(), [450.00, 1003.33, -200.00, -101.00])
+        bills = tables["bills"]
+        self.assertEqual(bills["Status"].tolist(), ["Paid", "Pending", "Late", "Pending"])
+        self.assertEqual(bills.iloc[1][["Amount", "MinPayment", "DueDate"]].tolist(), [-101.00, 3.03, "2025-03-31"])
+        # The statement for account 103 was made after bill 3 became Late, and account 104 keeps its bill
+        self.assertEqual(bills.iloc[3][["PaymentAccID", "Amount", "MinPayment", "BillType"]].tolist(),
+                         [103, -200.00, 25.00, "CreditCard"])
+        journal = tables["transactions"]
+        self.assertEqual(journal[["AccountID", "TransactionType", "Amount"]].values.tolist(), [
+            [102, "Interest Earned", 3.33],
+            [101, "Bill Payment to Power", -50.00],
+            [104, "Interest Charged", 1.00],
+        ])
+        self.assertEqual(journal["TransactionID"].nunique(), 3)
+        self.assertFalse(os.path.exists(self.tables.path(COMMIT_RECORD)))
+
+    def test_monthly_interest_only_on_the_first(self):
+        """
+        Test that monthly interest is skipped on other days.
+        """
+        result = run_nightly_batch(date(2025, 3, 2), stages=["monthly_interest"], csv_dir=self.tables.directory)
+        self.assertEqual([(s["stage"], s["status"]) for s in result["stages"]], [("monthly_interest", "skipped")])
+        self.assertEqual(self._tables()["accounts"]["CurrBal"].tolist()[1], 1000.00)
+
+    def test_failed_stage_commits_nothing(self):
+        """
+        Test that an exception in a later stage leaves all three tables untouched.
+        """
+        before = self._bytes()
+        with patch("scripts.nightlyBatch.charge_credit_interest", side_effect=ValueError("boom")):
+            result = run_nightly_batch(date(2025, 3, 1), csv_dir=self.tables.directory)
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["stages"][-1]["stage"], "credit_interest")
+        self.assertEqual(self._bytes(), before)
+
+    def test_interrupted_commit_is_recovered(self):
+        """
+        Test that a commit cut off after its record was written is rolled forward once.
+        """
+        before = self._bytes()
+        with patch.object(CsvRepository, "recover", side_effect=[False, False, RuntimeError("crash")]):
+            with self.assertRaises(RuntimeError):
+                run_nightly_batch(date(2025, 3, 1), csv_dir=self.tables.directory)
+        self.assertEqual(self._bytes(), before)
+        self.assertTrue(os.path.exists(self.tables.path(COMMIT_RECORD)))
+
+        repository = CsvRepository(self.tables.directory)
+        self.assertTrue(repository.recover())
+        self.assertFalse(repository.recover())
+        tables = self._tables()
+        self.assertEqual(tables["accounts"]["CurrBal"].tolist(), [450.00, 1003.33, -200.00, -101.00])
+        self.assertEqual(len(tables["transactions"]), 3)
+        self.assertEqual(os.listdir(self.tables.directory).count(COMMIT_RECORD), 0)
+        self.assertEqual(sorted(n for n in os.listdir(self.tables.directory) if n.endswith(".commit")), [])
+
+    def _write_customers(self, directory, customers):
+        """Writes checking, savings and card accounts and two bills for each customer."""
+        accounts, bills = [], []
+        for c in range(1, customers + 1):
+            accounts += [f"{c}01,{c},Checking,{100 + c}.00,2025-01-01,,",
+                         f"{c}02,{c},Savings,{1000 + c}.00,2025-01-01,,4.0",
+                         f"{c}03,{c},Credit Card,-{50 + c}.00,2025-01-01,1000.00,18.0"]
+            bills += [f"{2 * c},{c},Power,Addr,-{20 + c}.00,2025-03-01,{c}01,{20 + c}.00,Regular,1,Pending",
+                      f"{2 * c + 1},{c},Card,Addr,-{50 + c}.00,2025-02-01,{c}03,25.00,CreditCard,1," + ("Late" if c % 2 else "Paid")]
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "accounts.csv"), "w") as f:
+            f.write("AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n" + "\n".join(accounts) + "\n")
+        with open(os.path.join(directory, "bills.csv"), "w") as f:
+            f.write("BillID,CustomerID,PayeeName,PayeeAddress,Amount,DueDate,PaymentAccID,MinPayment,BillType,IsRecurring,Status\n"
+                    + "\n".join(bills) + "\n")
+        with open(os.path.join(directory, "transactions.csv"), "w") as f:
+            f.write("TransactionID,AccountID,TransactionType,Amount,TransDate\n")
+
+    def test_bill_stays_with_payment_account(self):
+        """
+        Test that a bill paid from another customer's account lands in that account's partition.
+        """
+        accounts = pd.DataFrame({"AccountID": range(1, 41), "CustomerID": range(1, 41)})
+        bills = pd.DataFrame({"CustomerID": [3, 7], "PaymentAccID": [30, 7]})
+        accountParts, billParts = partition_rows(accounts, bills, 8)
+        self.assertGreater(len(set(accountParts.tolist())), 1)
+        self.assertEqual(billParts[0], accountParts[29])
+        self.assertEqual(billParts[0], accountParts[2])
+        self.assertEqual(billParts[1], accountParts[6])
+
+    def test_commit_does_not_depend_on_workers(self):
+        """
+        Test that two workers commit the same bytes as one, and the same balances as an unpartitioned run.
+        """
+        runs = {}
+        for label, workers, partitions in (("serial", 1, 4), ("pool", 2, 4), ("whole", 1, 1)):
+            directory = self.tables.path(label)
+            self._write_customers(directory, 12)
+            result = run_nightly_batch(date(2025, 3, 1), csv_dir=directory, workers=workers, partitions=partitions)
+            self.assertEqual(result["status"], "success", result["message"])
+            runs[label] = {}
+            for name in ("accounts", "bills", "transactions"):
+                with open(os.path.join(directory, f"{name}.csv"), "rb") as f:
+                    runs[label][name] = f.read()
+
+        self.assertEqual(runs["serial"], runs["pool"])
+        self.assertEqual(runs["serial"]["accounts"], runs["whole"]["accounts"])
+        for name, key in (("bills", ["PaymentAccID", "DueDate", "Status"]), ("transactions", ["AccountID", "TransactionType"])):
+            frames = [pd.read_csv(self.tables.path(label, f"{name}.csv")) for label in ("serial", "whole")]
+            idColumn = "BillID" if name == "bills" else "TransactionID"
+            expected, actual = (frame.drop(columns=idColumn).sort_values(key).reset_index(drop=True) for frame in frames)
+            pd.testing.assert_frame_equal(expected, actual)
+
+    def test_partitions_commit_once(self):
+        """
+        Test that every partition's rows and checkpoint are written in a single commit.
+        """
+        directory = self.tables.path("partitioned")
+        self._write_customers(directory, 12)
+        with patch.object(CsvRepository, "commit", autospec=True, side_effect=CsvRepository.commit) as commit:
+            result = run_nightly_batch(date(2025, 3, 1), csv_dir=directory, partitions=4)
+        self.assertEqual(result["status"], "success", result["message"])
+        self.assertEqual(commit.call_count, 1)
+        self.assertEqual(sorted(commit.call_args[0][1]), ["accounts", "batchRuns", "bills"])
+        self.assertEqual(pd.read_csv(os.path.join(directory, "batchRuns.csv"))["Remaining"].tolist(), [3, 2, 1, 0])
+
+    def test_failed_run_resumes_from_checkpoint(self):
+        """
+        Test that the partitions committed before a failure are not run again when the run resumes.
+        """
+        expected = self.tables.path("expected")
+        self._write_customers(expected, 12)
+        self.assertEqual(run_nightly_batch(date(2025, 3, 1), csv_dir=expected, partitions=4)["status"], "success")
+
+        directory = self.tables.path("resumed")
+        self._write_customers(directory, 12)
+        calls = []
+
+        def fail_third(*args):
+            calls.append(1)
+            if len(calls) == 3:
+                raise ValueError("power cut")
+            return charge_credit_interest(*args)
+
+        with patch("scripts.nightlyBatch.charge_credit_interest", side_effect=fail_third):
+            failed = run_nightly_batch(date(2025, 3, 1), csv_dir=directory, partitions=4)
+        self.assertEqual(failed["status"], "error")
+        checkpoints = pd.read_csv(os.path.join(directory, "batchRuns.csv"))
+        self.assertEqual(checkpoints["Partition"].nunique(), 2)
+        self.assertGreater(len(pd.read_csv(os.path.join(directory, "transactions.csv"))), 0)
+
+        resumed = run_nightly_batch(date(2025, 3, 1), csv_dir=directory, partitions=1)
+        self.assertEqual(resumed["status"], "success")
+        self.assertTrue(resumed["resumed"])
+        self.assertEqual(resumed["run_id"], failed["run_id"])
+        self.assertEqual((resumed["partitions"], resumed["committed"]), (4, 2))
+        checkpoints = pd.read_csv(os.path.join(directory, "batchRuns.csv"))
+        self.assertEqual(checkpoints["Remaining"].tolist(), [3, 2, 1, 0])
+
+        with open(os.path.join(expected, "accounts.csv"), "rb") as f, open(os.path.join(directory, "accounts.csv"), "rb") as g:
+            self.assertEqual(f.read(), g.read())
+        bills = [pd.read_csv(os.path.join(d, "bills.csv")).drop(columns="BillID") for d in (expected, directory)]
+        pd.testing.assert_frame_equal(bills[0], bills[1])
+        columns = ["AccountID", "TransactionType", "Amount"]
+        journals = [pd.read_csv(os.path.join(d, "transactions.csv"))[columns].sort_values(columns).reset_index(drop=True)
+                    for d in (expected, directory)]
+        pd.testing.assert_frame_equal(journals[0], journals[1])
+
+    def test_finished_run_date_is_not_run_again(self):
+        """
+        Test that a second run for the same date changes nothing, while a new date still runs.
+        """
+        self.assertEqual(run_nightly_batch(date(2025, 3, 1), csv_dir=self.tables.directory)["status"], "success")
+        before = self._bytes()
+        again = run_nightly_batch(date(2025, 3, 1), csv_dir=self.tables.directory)
+        self.assertEqual(again["status"], "info")
+        self.assertEqual(self._bytes(), before)
+        self.assertEqual(run_nightly_batch(date(2025, 3, 2), csv_dir=self.tables.directory)["status"], "success")
+
+    def test_catch_up_missed_nights(self):
+        """
+        Test that a run after weeks of downtime compounds the missed months and pays the bills that fell due in order.
+        """
+        with open(self.files["bills"], "a") as f:
+            f.write("4,1,Gym,Addr,-10.00,2025-01-25,101,10.00,Regular,1,Pending\n")
+        self.assertEqual(run_nightly_batch(date(2025, 1, 20), csv_dir=self.tables.directory)["status"], "success")
+        before = len(pd.read_csv(self.files["transactions"]))
+
+        outcome = catch_up_missed_runs(date(2025, 3, 5), csv_dir=self.tables.directory)
+        self.assertEqual(outcome["status"], "success", outcome["message"])
+        self.assertEqual(len(outcome["runs"]), 1)
+
+        tables = self._tables()
+        accounts = tables["accounts"].set_index("AccountID")["CurrBal"]
+        self.assertEqual((accounts[101], accounts[102]), (410.00, 1006.68))
+        journal = tables["transactions"].iloc[before:]
+        interest = journal[journal["TransactionType"] == "Interest Earned"]
+        self.assertEqual(interest[["AccountID", "Amount", "TransDate"]].values.tolist(), [[102, 6.68, "2025-03-05"]])
+        payments = journal[journal["AccountID"] == 101]
+        self.assertEqual(payments[["TransactionType", "Amount", "TransDate"]].values.tolist(), [
+            ["Bill Payment to Gym", -10.00, "2025-01-25"],
+            ["Bill Payment to Water", -20.00, "2025-02-20"],
+            ["Bill Payment to Gym", -10.00, "2025-02-25"],
+            ["Bill Payment to Power", -50.00, "2025-03-01"],
+        ])
+        gym = tables["bills"][tables["bills"]["PayeeName"] == "Gym"]
+        self.assertEqual(gym[["DueDate", "Status"]].values.tolist(),
+                         [["2025-01-25", "Paid"], ["2025-02-25", "Paid"], ["2025-03-25", "Pending"]])
+        # The next bill paid within the run is reported by its real ID
+        messages = [line["message"] for stage in outcome["runs"][0]["stages"] for line in stage["results"]]
+        self.assertIn(f"Bill {gym['BillID'].iloc[1]} processed successfully. Paid $10.00 from account 101.", messages)
+        self.assertFalse([message for message in messages if "ill -" in message])
+
+        again = catch_up_missed_runs(date(2025, 3, 5), csv_dir=self.tables.directory)
+        self.assertEqual(again["status"], "info")
+
+    def test_throttled_run_yields_between_slices(self):
+        """
+        Test that a throttled run waits out a busy web app, unlocks the tables between slices and keeps online changes.
+        """
+        expected = self.tables.path("expected")
+        self._write_customers(expected, 12)
+        self.assertEqual(run_nightly_batch(date(2025, 3, 1), csv_dir=expected, partitions=4)["status"], "success")
+
+        directory = self.tables.path("throttled")
+        self._write_customers(directory, 12)
+        accountsPath = os.path.join(directory, "accounts.csv")
+        loads, sleeps, online = [], [], []
+
+        def deposit():
+            # An online request between slices: the locks must be free
+            with table_lock(accountsPath, timeout=2):
+                accounts = pd.read_csv(accountsPath)
+                accounts.loc[accounts["AccountID"] == 101, "CurrBal"] += 7
+                accounts.to_csv(accountsPath, index=False)
+            online.append(True)
+
+        def load():
+            loads.append(1)
+            if len(loads) == 3:
+                worker = threading.Thread(target=deposit)
+                worker.start()
+                worker.join()
+            return {"in_flight": 0, "p95_ms": 900.0 if len(loads) == 1 else 20.0, "workers": 2}
+
+        throttle = BatchThrottle(target_p95_ms=250, max_in_flight=4, min_backoff=1, load=load, sleep=sleeps.append)
+        result = run_nightly_batch(date(2025, 3, 1), csv_dir=directory, partitions=4, throttle=throttle)
+        self.assertEqual(result["status"], "success", result["message"])
+        self.assertEqual(result["throttle"], {"slices": 4, "backoffs": 1, "waited_seconds": 1.0})
+        self.assertEqual(sleeps, [1])
+        self.assertEqual(online, [True])
+
+        balances = [pd.read_csv(os.path.join(d, "accounts.csv")).set_index("AccountID")["CurrBal"]
+                    for d in (expected, directory)]
+        balances[0][101] += 7
+        pd.testing.assert_series_equal(balances[0], balances[1])
+        bills = [pd.read_csv(os.path.join(d, "bills.csv")).drop(columns="BillID") for d in (expected, directory)]
+        pd.testing.assert_frame_equal(bills[0], bills[1])
+        columns = ["AccountID", "TransactionType", "Amount"]
+        journals = [pd.read_csv(os.path.join(d, "transactions.csv"))[columns].sort_values(columns).reset_index(drop=True)
+                    for d in (expected, directory)]
+        pd.testing.assert_frame_equal(journals[0], journals[1])
+        self.assertEqual(pd.read_csv(os.path.join(directory, "batchRuns.csv"))["Remaining"].tolist(), [3, 2, 1, 0])
+
+    def test_throttled_slices_commit_only_their_rows(self):
+        """
+        Test that a throttled run loads each table once and commits each slice's rows alone, as an unthrottled run would.
+        """
+        expected = self.tables.path("expected")
+        self._write_customers(expected, 12)
+        self.assertEqual(run_nightly_batch(date(2025, 3, 1), csv_dir=expected, partitions=4)["status"], "success")
+
+        directory = self.tables.path("sliced")
+        self._write_customers(directory, 12)
+        throttle = BatchThrottle(load=lambda: {"in_flight": 0, "p95_ms": 20.0, "workers": 2}, sleep=lambda seconds: None)
+        with patch.object(CsvRepository, "load", autospec=True, side_effect=CsvRepository.load) as load, \
+                patch.object(CsvRepository, "commit", autospec=True, side_effect=CsvRepository.commit) as commit, \
+                patch.object(BillIndex, "rebuild", autospec=True, side_effect=BillIndex.rebuild) as rebuild:
+            result = run_nightly_batch(date(2025, 3, 1), csv_dir=directory, partitions=4, throttle=throttle)
+        self.assertEqual(result["status"], "success", result["message"])
+
+        loaded = [call[0][1] for call in load.call_args_list]
+        self.assertEqual((loaded.count("accounts"), loaded.count("bills")), (1, 1))
+        # Built once for the first slice's read, then patched by every commit
+        self.assertEqual(rebuild.call_count, 1)
+        self.assertEqual(commit.call_count, 4)
+        sliceAccounts = [len(call[0][3]["accounts"]) for call in commit.call_args_list]
+        self.assertEqual(sum(sliceAccounts), 36)
+        self.assertLess(max(sliceAccounts), 36)
+
+        with open(os.path.join(expected, "accounts.csv"), "rb") as f, open(os.path.join(directory, "accounts.csv"), "rb") as g:
+            self.assertEqual(f.read(), g.read())
+        bills = [pd.read_csv(os.path.join(d, "bills.csv")).drop(columns="BillID") for d in (expected, directory)]
+        key = list(bills[0].columns)
+        pd.testing.assert_frame_equal(*(frame.sort_values(key).reset_index(drop=True) for frame in bills))
+        # The patched index still matches the file, so reading it does not rebuild it
+        with patch.object(BillIndex, "rebuild") as rebuild:
+            self.assertEqual(len(BillIndex(os.path.join(directory, "bills.csv")).read_slice()[1]), len(bills[1]))
+        rebuild.assert_not_called()
+
+    def test_bill_added_between_slices_keeps_partitions(self):
+        """
+        Test that a bill linking a committed partition to a pending one, added between slices,
+        does not make the run skip or repeat any rows.
+        """
+        expected = self.tables.path("expected")
+        self._write_customers(expected, 12)
+        self.assertEqual(run_nightly_batch(date(2025, 3, 1), csv_dir=expected, partitions=4)["status"], "success")
+
+        directory = self.tables.path("linked")
+        self._write_customers(directory, 12)
+        billsPath = os.path.join(directory, "bills.csv")
+        loads, linked = [], []
+
+        def link():
+            # After the first slice: a customer of the committed partition pays from a pending partition's account
+            with table_lock(billsPath, timeout=2):
+                accounts = pd.read_csv(os.path.join(directory, "accounts.csv"))
+                bills = pd.read_csv(billsPath)
+                accountParts, _ = partition_rows(accounts, bills, 4)
+                committed = pd.read_csv(os.path.join(directory, "batchRuns.csv"))["Partition"].iloc[0]
+                payer = accounts.loc[accountParts == committed, "CustomerID"].iloc[0]
+                payee = accounts.loc[accountParts != committed, "AccountID"].iloc[0]
+                with open(billsPath, "a") as f:
+                    f.write(f"100,{payer},Link,Addr,-5.00,2025-06-01,{payee},5.00,Regular,0,Pending\n")
+            linked.append((payer, payee))
+
+        def load():
+            loads.append(1)
+            if len(loads) == 2:
+                link()
+            return {"in_flight": 0, "p95_ms": 20.0, "workers": 2}
+
+        throttle = BatchThrottle(target_p95_ms=250, max_in_flight=4, load=load, sleep=lambda seconds: None)
+        result = run_nightly_batch(date(2025, 3, 1), csv_dir=directory, partitions=4, throttle=throttle)
+        self.assertEqual(result["status"], "success", result["message"])
+        self.assertEqual(len(linked), 1)
+
+        with open(os.path.join(expected, "accounts.csv"), "rb") as f, open(os.path.join(directory, "accounts.csv"), "rb") as g:
+            self.assertEqual(f.read(), g.read())
+        bills = [pd.read_csv(os.path.join(d, "bills.csv")).drop(columns="BillID") for d in (expected, directory)]
+        self.assertEqual(bills[1]["PayeeName"].tolist().count("Link"), 1)
+        pd.testing.assert_frame_equal(bills[0], bills[1][bills[1]["PayeeName"] != "Link"].reset_index(drop=True))
+        columns = ["AccountID", "TransactionType", "Amount"]
+        journals = [pd.read_csv(os.path.join(d, "transactions.csv"))[columns].sort_values(columns).reset_index(drop=True)
+                    for d in (expected, directory)]
+        pd.testing.assert_frame_equal(journals[0], journals[1])
+        checkpoints = pd.read_csv(os.path.join(directory, "batchRuns.csv"))
+        self.assertEqual(checkpoints["Remaining"].tolist(), [3, 2, 1, 0])
+        self.assertEqual(checkpoints["PartitionMap"].nunique(), 1)
+
+    def test_catch_up_needs_a_recorded_run(self):
+        """
+        Test that nothing is run when no nightly run was ever recorded.
+        """
+        before = self._bytes()
+        self.assertEqual(catch_up_missed_runs(date(2025, 3, 5), csv_dir=self.tables.directory)["status"], "info")
+        self.assertEqual(self._bytes(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,10 @@ import unittest
 from decimal import Decimal
 import pandas as pd
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.customer.openAcc import open_account
 
-class TestOpenAccount(unittest.TestCase):
+class TestOpenAccount(TableTestCase):
     """
     Unit tests for open_account function.
 
@@ -19,9 +20,9 @@ class TestOpenAccount(unittest.TestCase):
             {"CustomerID": 151, "AccountType": accType, "CurrBal": newBal},
         ])
 
-    @patch("scripts.customer.openAcc.pd.read_csv")
-    @patch("scripts.customer.openAcc.pd.DataFrame.to_csv")
-    def test_invalid_account(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.customer.openAcc.read_table")
+    @patch("scripts.customer.openAcc.write_table")
+    def test_invalid_account(self, mock_write_table, mock_read_table):
         """
         Test that an account is not opened with a negative balance.
         """
@@ -29,14 +30,14 @@ class TestOpenAccount(unittest.TestCase):
 
         for account in validAccounts:
             with self.subTest(accType=account):
-                mock_read_csv.return_value = self._mock_accounts_df(account)
+                mock_read_table.return_value = self._mock_accounts_df(account)
                 result = open_account(151, account, Decimal("-50.00"))
-                mock_to_csv.assert_not_called()
+                mock_write_table.assert_not_called()
                 self.assertEqual(result["status"], "error")
 
-    @patch("scripts.customer.openAcc.pd.read_csv")
-    @patch("scripts.customer.openAcc.pd.DataFrame.to_csv")
-    def test_valid_account(self, mock_to_csv, mock_read_csv):
+    @patch("scripts.customer.openAcc.read_table")
+    @patch("scripts.customer.openAcc.write_table")
+    def test_valid_account(self, mock_write_table, mock_read_table):
         """
         Test that an account is opened with a non-negative balance.
         """
@@ -44,9 +45,9 @@ class TestOpenAccount(unittest.TestCase):
 
         for account in validAccounts:
             with self.subTest(accType=account):
-                mock_read_csv.return_value = self._mock_accounts_df(account)
+                mock_read_table.return_value = self._mock_accounts_df(account)
                 result = open_account(151, account, Decimal("50.00"))
-                mock_to_csv.assert_called()
+                mock_write_table.assert_called()
                 self.assertEqual(result["status"], "success")
 
 if __name__ == "__main__":
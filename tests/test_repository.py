@@ -0,0 +1,117 @@
+# In root dir: python -m unittest tests/test_repository.py
+import os
+import sqlite3
+import unittest
+from unittest.mock import patch
+from decimal import Decimal
+import pandas as pd
+from tests.tableSandbox import TableTestCase
+from scripts.repository import CsvRepository, SqliteRepository, migrate_csv_to_sqlite, COMMIT_RECORD
+
+
+class TestRepository(TableTestCase):
+    """
+    Unit tests for the CSV and SQLite repositories in repository.py.
+
+    This suite tests:
+    - Both backends return the same frame for the same table
+    - SQLite lookups match IDs stored as text or as numbers
+    - Point lookups on indexed columns use the index
+    - Saving a frame replaces the table
+    - Rows read and rewritten by ID leave every other row as it was
+    - A commit finishes an interrupted commit over other tables first
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.tables.write("accounts.csv",
+                          "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR\n"
+                          "101,1,Checking,50.00,2025-01-01,,\n"
+                          "5001,1,Credit Card,-400.00,2025-01-02,1000.0,24.99\n")
+        self.tables.write("bills.csv",
+                          "BillID,CustomerID,PayeeName,PayeeAddress,Amount,DueDate,PaymentAccID,MinPayment,BillType,IsRecurring,Status\n"
+                          "1,1,Power,1 Main St,-80.00,2025-05-01,5001,2.40,CreditCard,False,Pending\n"
+                          "2,1,Power,1 Main St,-20.00,2025-04-01,5001,0.60,CreditCard,False,Paid\n")
+        self.db_path = self.tables.path("bank.db")
+        self.csv = CsvRepository(self.tables.directory)
+        self.sqlite = SqliteRepository(self.db_path)
+        migrate_csv_to_sqlite(self.tables.directory, self.db_path)
+
+    def test_backends_load_the_same_table(self):
+        """
+        Test that a migrated table loads with the same values and dtypes as the CSV.
+        """
+        pd.testing.assert_frame_equal(self.csv.load("accounts"), self.sqlite.load("accounts"))
+        pd.testing.assert_frame_equal(self.csv.load("bills"), self.sqlite.load("bills"))
+
+    def test_find_matches_text_and_numbers(self):
+        """
+        Test that lookups match migrated text IDs and IDs saved as numbers.
+        """
+        self.assertEqual(self.sqlite.get("accounts", 5001)["AccountType"], "Credit Card")
+        accounts = self.sqlite.load("accounts")
+        accounts.loc[len(accounts)] = [202, 2, "Savings", Decimal("5.00"), "2025-03-01", None, None]
+        self.sqlite.save("accounts", accounts)
+        self.assertEqual(self.sqlite.get("accounts", "202")["AccountType"], "Savings")
+        self.assertIsNone(self.sqlite.get("accounts", 999))
+
+    def test_active_bill_lookup_uses_index(self):
+        """
+        Test that bill lookups by PaymentAccID are answered from the index.
+        """
+        active = self.sqlite.find("bills", PaymentAccID=5001, Status=["Pending", "Late"])
+        self.assertEqual(active["BillID"].tolist(), [1])
+        conn = sqlite3.connect(self.db_path)
+        plan = " ".join(row[-1] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM bills WHERE "PaymentAccID" IN (?)', (5001,)))
+        conn.close()
+        self.assertIn("USING INDEX", plan)
+
+    def test_csv_and_sqlite_find_agree(self):
+        """
+        Test that both backends answer the same find() query.
+        """
+        csv_rows = self.csv.find("bills", PaymentAccID=5001, Status="Paid")
+        sqlite_rows = self.sqlite.find("bills", PaymentAccID=5001, Status="Paid")
+        self.assertEqual(csv_rows["BillID"].tolist(), sqlite_rows["BillID"].tolist())
+
+    def test_rows_are_read_and_rewritten_by_id(self):
+        """
+        Test that updated rows replace their own rows while the other rows keep their bytes, with both backends.
+        """
+        for repository in (self.csv, self.sqlite):
+            rows = repository.read_rows("accounts", [5001])
+            self.assertEqual(rows["AccountID"].tolist(), [5001])
+            rows["CurrBal"] = "-350.00"
+            added = pd.DataFrame([[6001, 2, "Savings", "10.00", "2025-03-01", None, None]], columns=rows.columns)
+            repository.commit({}, {"accounts": added}, {"accounts": rows})
+            accounts = repository.load("accounts").set_index("AccountID")
+            self.assertEqual(accounts["CurrBal"].tolist(), [50.00, -350.00, 10.00])
+        with open(self.csv.path("accounts"), "rb") as f:
+            self.assertEqual(f.read().splitlines()[1], b"101,1,Checking,50.00,2025-01-01,,")
+
+    def test_commit_finishes_interrupted_commit_of_other_tables(self):
+        """
+        Test that a commit left interrupted over accounts and bills is finished by the next commit over accounts only.
+        """
+        accounts = self.csv.load("accounts")
+        bills = self.csv.load("bills")
+        accounts.loc[0, "CurrBal"] = 40.0
+        bills.loc[0, "Status"] = "Paid"
+        with patch.object(CsvRepository, "recover", side_effect=[False, RuntimeError("crash")]):
+            with self.assertRaises(RuntimeError):
+                self.csv.commit({"accounts": accounts, "bills": bills})
+        self.assertTrue(os.path.exists(self.tables.path(COMMIT_RECORD)))
+
+        rows = self.csv.read_rows("accounts", [5001])
+        rows["CurrBal"] = "-350.00"
+        self.csv.commit({}, updates={"accounts": rows})
+        self.assertFalse(os.path.exists(self.tables.path(COMMIT_RECORD)))
+        self.assertEqual(self.csv.load("accounts")["CurrBal"].tolist(), [40.00, -350.00])
+        self.assertEqual(self.csv.load("bills")["Status"].tolist(), ["Paid", "Paid"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# In root dir: python -m unittest tests/test_statementCycle.py
+import unittest
+import pandas as pd
+from datetime import date
+from tests.tableSandbox import TableTestCase
+from scripts.statementCycle import (
+    CYCLE_DAYS, StatementCycleIndex, assign_cycle_day, cohort_days, cycle_days, cycle_index, parse_cycle_days
+)
+from scripts.billPayment import statement_bills_frame
+
+
+class TestStatementCycle(TableTestCase):
+    """
+    Unit tests for the statement cycle days in statementCycle.py.
+
+    This suite tests:
+    - Cycle days are parsed from the configuration, stored days are used and missing ones derived evenly
+    - New cards get the least used cycle day
+    - Each night bills its own cohort; the last day of a month also bills the days it lacks
+    - The cycle-day index reads only the cohort's rows and is rebuilt when accounts.csv changes
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tables.write("accounts.csv",
+                                      "AccountID,CustomerID,AccountType,CurrBal,DateOpened,CreditLimit,APR,StatementDay\n"
+                                      "101,1,Checking,500.00,2025-01-01,,,\n"
+                                      "102,1,Credit Card,-200.00,2025-01-01,1000.00,24.0,5\n"
+                                      "103,2,Credit Card,-100.00,2025-01-01,1000.00,12.0,\n"
+                                      "\n"
+                                      "104,3,Credit Card,-300.00,2025-01-01,1000.00,12.0,30\n"
+                                      "105,3,Credit Card,-50.00,2025-01-01,1000.00,12.0,5\n")
+
+    def test_cycle_days(self):
+        """
+        Test that stored cycle days are kept and missing ones spread over the configured days.
+        """
+        self.assertEqual(parse_cycle_days("1,8, 15-17"), [1, 8, 15, 16, 17])
+        with self.assertRaises(ValueError):
+            parse_cycle_days("0-40")
+
+        accounts = pd.read_csv(self.path)
+        self.assertEqual(cycle_days(accounts).tolist()[1:], [5, CYCLE_DAYS[103 % len(CYCLE_DAYS)], 30, 5])
+        derived = cycle_days(pd.DataFrame({"AccountID": range(1000, 1000 + 10 * len(CYCLE_DAYS))}))
+        self.assertEqual(set(pd.Series(derived).value_counts()), {10})
+
+    def test_assign_least_used_day(self):
+        """
+        Test that a new card gets the cycle day with the fewest cards, the earliest on a tie.
+        """
+        self.assertEqual(assign_cycle_day(pd.DataFrame(columns=["AccountID", "AccountType"])), CYCLE_DAYS[0])
+        cards = pd.DataFrame({"AccountID": range(1, 4), "AccountType": "Credit Card",
+                              "StatementDay": [CYCLE_DAYS[0], CYCLE_DAYS[0], CYCLE_DAYS[1]]})
+        self.assertEqual(assign_cycle_day(cards), CYCLE_DAYS[2])
+        everyDay = pd.DataFrame({"AccountID": range(len(CYCLE_DAYS)), "AccountType": "Credit Card",
+                                 "StatementDay": CYCLE_DAYS})
+        self.assertEqual(assign_cycle_day(pd.concat([everyDay, cards], ignore_index=True)), CYCLE_DAYS[2])
+
+    def test_cohorts(self):
+        """
+        Test which cycle days are billed on a night, at month end and over missed nights.
+        """
+        self.assertEqual(cohort_days(date(2025, 3, 5)), [5])
+        self.assertEqual(cohort_days(date(2025, 2, 28)), [28, 29, 30, 31])
+        self.assertEqual(cohort_days(date(2025, 3, 30)), [30])
+        self.assertEqual(cohort_days(date(2025, 3, 6), since=date(2025, 3, 3)), [4, 5, 6])
+        self.assertEqual(cohort_days(date(2025, 3, 6), since=date(2025, 1, 20)), list(range(1, 32)))
+
+        accounts = pd.read_csv(self.path)
+        bills = pd.DataFrame(columns=["PaymentAccID", "Status"])
+        statements = statement_bills_frame(accounts, bills, date(2025, 3, 5))
+        self.assertEqual(statements["PaymentAccID"].tolist(), [102, 105])
+        # The 30th does not exist in February, so its cards are billed on the 28th
+        self.assertEqual(statement_bills_frame(accounts, bills, date(2025, 2, 28))["PaymentAccID"].tolist(), [104])
+
+    def test_index_reads_cohort(self):
+        """
+        Test that the index returns only the cohort's card rows and follows changes to the file.
+        """
+        index = cycle_index(self.path)
+        self.assertIsInstance(index, StatementCycleIndex)
+        self.assertEqual(len(index.records()), 4)
+        cohort = index.read_cohort([5])
+        self.assertEqual(cohort["AccountID"].tolist(), [102, 105])
+        self.assertEqual(cohort.columns.tolist(), pd.read_csv(self.path).columns.tolist())
+        self.assertEqual(len(index.read_cohort([2])), 0)
+
+        with open(self.path, "a") as f:
+            f.write("106,4,Credit Card,-10.00,2025-01-01,1000.00,12.0,5\n")
+        self.assertEqual(index.read_cohort([5])["AccountID"].tolist(), [102, 105, 106])
+
+    def test_unindexable_file(self):
+        """
+        Test that a file with a line break inside a field is read whole instead.
+        """
+        with open(self.path, "a") as f:
+            f.write('107,5,"Credit\nCard",-10.00,2025-01-01,1000.00,12.0,5\n')
+        self.assertIsNone(cycle_index(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
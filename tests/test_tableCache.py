@@ -0,0 +1,205 @@
+# In root dir: python -m unittest tests/test_tableCache.py
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+import pandas as pd
+from tests.tableSandbox import TableTestCase
+from scripts.tableCache import TableCache, _file_signature
+from scripts.tableSidecar import load_sidecar, save_sidecar
+
+
+def _replace_file(path, text):
+    """Writes a new file and renames it over `path`, as write_table does."""
+    with open(path + ".new", "w") as f:
+        f.write(text)
+    os.replace(path + ".new", path)
+
+
+class TestTableCache(TableTestCase):
+    """
+    Unit tests for the shared CSV table cache in tableCache.py.
+
+    This suite tests:
+    - Repeated reads of an unchanged file are served from memory
+    - Changing the file's size, mtime or inode forces a re-parse
+    - Writes through the cache drop the cached entry and replace the file
+    - Callers receive independent copies
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tables.write("accounts.csv", "AccountID,CurrBal\n101,50.00\n")
+        self.cache = TableCache()
+
+    def test_unchanged_file_is_a_hit(self):
+        """
+        Test that a second read of an unchanged file does not re-parse it.
+        """
+        first = self.cache.read(self.path)
+        second = self.cache.read(self.path)
+        self.assertTrue(first.equals(second))
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_changed_file_is_reparsed(self):
+        """
+        Test that a new size or mtime invalidates the cached parse.
+        """
+        self.cache.read(self.path)
+        _replace_file(self.path, "AccountID,CurrBal\n101,50.00\n202,75.00\n")
+        df = self.cache.read(self.path)
+        self.assertEqual(len(df), 2)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_write_invalidates_entry(self):
+        """
+        Test that writing a table through the cache drops its entry.
+        """
+        df = self.cache.read(self.path)
+        df.loc[0, "CurrBal"] = 10.0
+        self.cache.write(df, self.path)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+        self.assertEqual(self.cache.read(self.path).loc[0, "CurrBal"], 10.0)
+
+    def test_returns_independent_copies(self):
+        """
+        Test that modifying a returned frame does not alter the cached one.
+        """
+        df = self.cache.read(self.path)
+        df.loc[0, "CurrBal"] = 999.0
+        self.assertEqual(self.cache.read(self.path).loc[0, "CurrBal"], 50.0)
+
+    def test_same_size_write_in_same_tick_is_reparsed(self):
+        """
+        Test that another process's write of the same size and timestamp is
+        still seen, because the write gives the table a new inode.
+        """
+        self.tables.write("accounts.csv", "AccountID,CurrBal\n101,50.0\n")
+        self.cache.read(self.path)
+        before = os.stat(self.path)
+        other = TableCache()
+        df = other.read(self.path)
+        df.loc[0, "CurrBal"] = 75.0
+        other.write(df, self.path)
+        os.utime(self.path, ns=(before.st_atime_ns, before.st_mtime_ns))
+        self.assertEqual(os.path.getsize(self.path), before.st_size)
+        self.assertEqual(self.cache.read(self.path).loc[0, "CurrBal"], 75.0)
+        self.assertEqual(self.cache.misses, 2)
+
+
+class TestTableSidecars(TableTestCase):
+    """
+    Unit tests for the binary sidecars of parsed tables in tableSidecar.py.
+
+    This suite tests:
+    - A parse is written to a sidecar and a new cache loads it without parsing
+    - A sidecar of another version of the file is ignored and rewritten
+    - A damaged sidecar falls back to parsing the file
+    - Files below the size threshold get no sidecar
+    - Text, missing, boolean and numeric columns load with their dtypes, and
+      columns that cannot be stored as plain arrays get no sidecar
+    - Integer column names (header=None) load as integers
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tables.write("transactions.csv",
+                                      "TransactionID,AccountID,Amount,Type\n1,101,50.00,Deposit\n2,102,12.50,Withdrawal\n")
+
+    def _sidecars(self):
+        return [name for name in os.listdir(self.tables.directory) if name.endswith(".frame")]
+
+    def _fresh_cache(self):
+        # A new cache stands in for a freshly started worker
+        return TableCache(sidecars=True, sidecar_min_bytes=0)
+
+    def test_restarted_cache_loads_sidecar(self):
+        """
+        Test that a second cache reads the first one's parse from the sidecar.
+        """
+        first = self._fresh_cache()
+        parsed = first.read(self.path)
+        self.assertEqual(first.sidecar_writes, 1)
+        self.assertEqual(len(self._sidecars()), 1)
+
+        second = self._fresh_cache()
+        with patch("scripts.tableCache.pd.read_csv") as mock_read_csv:
+            loaded = second.read(self.path)
+        mock_read_csv.assert_not_called()
+        self.assertEqual(second.sidecar_hits, 1)
+        self.assertTrue(parsed.equals(loaded))
+        loaded.loc[0, "Amount"] = 1.0
+        self.assertEqual(second.read(self.path).loc[0, "Amount"], 50.0)
+
+    def test_changed_file_rewrites_sidecar(self):
+        """
+        Test that a sidecar of an older version of the file is not used.
+        """
+        self._fresh_cache().read(self.path)
+        _replace_file(self.path, "TransactionID,AccountID,Amount,Type\n1,101,75.00,Deposit\n2,102,12.50,Withdrawal\n")
+        cache = self._fresh_cache()
+        self.assertEqual(cache.read(self.path).loc[0, "Amount"], 75.0)
+        self.assertEqual(cache.sidecar_hits, 0)
+        self.assertEqual(cache.sidecar_writes, 1)
+        self.assertEqual(self._fresh_cache().read(self.path).loc[0, "Amount"], 75.0)
+
+    def test_damaged_sidecar_is_a_miss(self):
+        """
+        Test that a truncated sidecar makes the cache parse the file.
+        """
+        self._fresh_cache().read(self.path)
+        sidecar = self.tables.path(self._sidecars()[0])
+        with open(sidecar, "r+b") as f:
+            f.truncate(os.path.getsize(sidecar) // 2)
+        cache = self._fresh_cache()
+        self.assertEqual(len(cache.read(self.path)), 2)
+        self.assertEqual(cache.sidecar_hits, 0)
+
+    def test_small_files_get_no_sidecar(self):
+        """
+        Test that files under sidecar_min_bytes are only cached in memory.
+        """
+        cache = TableCache(sidecars=True, sidecar_min_bytes=1024 * 1024)
+        cache.read(self.path)
+        self.assertEqual(self._sidecars(), [])
+        self.assertEqual(cache.sidecar_writes, 0)
+
+    def test_sidecar_keeps_column_types(self):
+        """
+        Test that a sidecar brings back every column with its dtype and missing values.
+        """
+        path = self.tables.write("bills.csv", "BillID,PayeeName,Amount,IsRecurring\n1,Caf\u00e9,-5.25,True\n2,,-1.00,False\n")
+        parsed = self._fresh_cache().read(path)
+        loaded = self._fresh_cache()
+        pd.testing.assert_frame_equal(loaded.read(path), parsed)
+        self.assertEqual(loaded.sidecar_hits, 1)
+
+    def test_integer_column_names_are_kept(self):
+        """
+        Test that a table read with header=None loads from its sidecar with integer column names.
+        """
+        parsed = self._fresh_cache().read(self.path, header=None)
+        loaded = self._fresh_cache()
+        frame = loaded.read(self.path, header=None)
+        self.assertEqual(loaded.sidecar_hits, 1)
+        pd.testing.assert_frame_equal(frame, parsed)
+        self.assertEqual(frame[0].tolist(), ["TransactionID", "1", "2"])
+
+    def test_unstorable_column_gets_no_sidecar(self):
+        """
+        Test that a frame with a column of Python objects other than text is not written.
+        """
+        frame = pd.DataFrame({"Amount": [Decimal("1.00"), Decimal("2.50")]})
+        signature = _file_signature(self.path)
+        self.assertFalse(save_sidecar(self.path, (), signature, frame))
+        self.assertEqual(self._sidecars(), [])
+        self.assertIsNone(load_sidecar(self.path, (), signature))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# In root dir: python -m unittest tests/test_tableLock.py
+import threading
+import unittest
+from tests.tableSandbox import TableTestCase
+from scripts.tableLock import LockManager, LockOrderError, LockTimeout, EXCLUSIVE, SHARED, table_lock
+
+
+class TestTableLock(TableTestCase):
+    """
+    Unit tests for the per-table locks in tableLock.py.
+
+    This suite tests:
+    - Exclusive locks serialize read-modify-write sections across threads
+    - Shared locks can be held together
+    - A held lock can be re-entered by the same thread
+    - Waiting past the timeout raises LockTimeout and is counted
+    - A shared lock cannot be upgraded to an exclusive one
+    - Nested locks must follow the global lock order
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.table = self.tables.path("accounts.csv")
+        with open(self.table, "w") as f:
+            f.write("0")
+
+    def _table(self, name):
+        return self.tables.path(name)
+
+    def test_exclusive_lock_prevents_lost_updates(self):
+        """
+        Test that concurrent increments under the lock are all kept.
+        """
+        def increment():
+            for _ in range(50):
+                with table_lock(self.table):
+                    with open(self.table) as f:
+                        value = int(f.read())
+                    with open(self.table, "w") as f:
+                        f.write(str(value + 1))
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with open(self.table) as f:
+            self.assertEqual(int(f.read()), 200)
+
+    def test_shared_locks_coexist(self):
+        """
+        Test that a second reader is not blocked by the first.
+        """
+        first, second = LockManager(), LockManager()
+        first.acquire(self.table, SHARED)
+        second.acquire(self.table, SHARED, timeout=0.1)
+        second.release(self.table)
+        first.release(self.table)
+
+    def test_lock_is_reentrant(self):
+        """
+        Test that a thread holding a lock can take it again.
+        """
+        with table_lock(self.table):
+            with table_lock(self.table, timeout=0.1):
+                with table_lock(self.table, exclusive=False, timeout=0.1):
+                    pass
+
+    def test_timeout_raises(self):
+        """
+        Test that a writer gives up when another holder keeps the lock.
+        """
+        holder, waiter = LockManager(), LockManager()
+        holder.acquire(self.table, SHARED)
+        try:
+            with self.assertRaises(LockTimeout):
+                waiter.acquire(self.table, EXCLUSIVE, timeout=0.05)
+        finally:
+            holder.release(self.table)
+        stats = waiter.stats()["accounts.csv"]
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["max_wait_ms"], 50)
+
+    def test_upgrade_is_refused(self):
+        """
+        Test that asking for an exclusive lock while holding a shared one raises.
+        """
+        with table_lock(self.table, exclusive=False):
+            with self.assertRaises(LockOrderError):
+                with table_lock(self.table, timeout=0.1):
+                    pass
+        # The shared lock was released, so an exclusive one can be taken now
+        with table_lock(self.table, timeout=0.1):
+            pass
+
+    def test_nested_locks_follow_order(self):
+        """
+        Test that a nested lock sorting before a held one raises, and one after it does not.
+        """
+        with table_lock(self._table("bills.csv")):
+            with self.assertRaises(LockOrderError):
+                with table_lock(self.table, timeout=0.1):
+                    pass
+            # Bookkeeping files come after every table
+            with table_lock(self._table("sequences.json"), timeout=0.1):
+                pass
+        with table_lock(self.table, reads=(self._table("bills.csv"),)):
+            with table_lock(self._table("bills.csv"), exclusive=False, timeout=0.1):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# In root dir: python -m unittest tests/test_transactionIndex.py
+import os
+import unittest
+from tests.tableSandbox import TableTestCase
+from scripts.transactionJournal import TransactionJournal
+from scripts.transactionIndex import TransactionIndex, RECORD
+from scripts.tableLock import lock_stats, reset_lock_stats
+
+
+class TestTransactionIndex(TableTestCase):
+    """
+    Unit tests for the per-account offset index in transactionIndex.py.
+
+    This suite tests:
+    - Journal appends are recorded in the sidecar index
+    - Rows appended outside the journal are indexed on the next read
+    - A rewritten file triggers a rebuild instead of returning stale rows
+    - Only the requested accounts' rows are returned
+    - Reads of an up-to-date index take only the shared table lock
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tables.path("transactions.csv")
+        with open(self.path, "w") as f:
+            f.write("TransactionID,AccountID,TransactionType,Amount,TransDate\n"
+                    "1,101,Deposit,10.00,2025-04-01\n")
+        self.journal = TransactionJournal(self.path)
+        self.index = TransactionIndex(self.path)
+
+    def _post(self, transactionID, accountID):
+        self.journal.append([{
+            "TransactionID": transactionID, "AccountID": accountID,
+            "TransactionType": "Deposit", "Amount": "1.00", "TransDate": "2025-04-02"
+        }])
+
+    def _indexed_rows(self):
+        return os.path.getsize(self.path + ".idx") // RECORD.itemsize
+
+    def test_reads_only_requested_account(self):
+        """
+        Test that the index returns exactly one account's rows in file order.
+        """
+        self._post(2, 202)
+        self._post(3, 101)
+        df = self.index.read_accounts([101])
+        self.assertEqual(df["TransactionID"].tolist(), [1, 3])
+        self.assertTrue((df["AccountID"] == 101).all())
+
+    def test_journal_appends_are_recorded(self):
+        """
+        Test that appends after the first read extend the sidecar directly.
+        """
+        self.index.read_accounts([101])
+        self.assertEqual(self._indexed_rows(), 1)
+        self._post(2, 202)
+        self.assertEqual(self._indexed_rows(), 2)
+
+    def test_external_appends_are_caught_up(self):
+        """
+        Test that rows written without the journal are indexed on read.
+        """
+        self.index.read_accounts([101])
+        with open(self.path, "a") as f:
+            f.write("7,101,Withdrawal,-5.00,2025-04-03\n")
+        self.assertEqual(self.index.read_accounts([101])["TransactionID"].tolist(), [1, 7])
+
+    def test_rewritten_file_rebuilds_index(self):
+        """
+        Test that moved rows are found again after the file is rewritten.
+        """
+        self._post(2, 202)
+        self.index.read_accounts([101])
+        with open(self.path, "w") as f:
+            f.write("TransactionID,AccountID,TransactionType,Amount,TransDate\n"
+                    "2,202,Deposit,1.00,2025-04-02\n"
+                    "8,101,Deposit,3.00,2025-04-04\n"
+                    "9,101,Deposit,4.00,2025-04-05\n")
+        self.assertEqual(self.index.read_accounts([101])["TransactionID"].tolist(), [8, 9])
+
+    def test_reads_several_accounts_in_file_order(self):
+        """
+        Test that rows of several accounts, appended interleaved, come back in file order.
+        """
+        for transactionID, accountID in ((2, 303), (3, 202), (4, 101), (5, 303), (6, 404)):
+            self._post(transactionID, accountID)
+        df = self.index.read_accounts([303, 101, 505])
+        self.assertEqual(df["TransactionID"].tolist(), [1, 2, 4, 5])
+
+    def test_current_index_is_read_under_shared_lock(self):
+        """
+        Test that only a read that must extend the index takes the exclusive lock.
+        """
+        reset_lock_stats()
+        self.index.read_accounts([101])
+        self.index.read_accounts([101])
+        stats = lock_stats()["transactions.csv"]
+        self.assertEqual((stats["shared"], stats["exclusive"]), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
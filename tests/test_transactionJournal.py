@@ -0,0 +1,97 @@
+# In root dir: python -m unittest tests/test_transactionJournal.py
+import unittest
+from datetime import date
+from decimal import Decimal
+from tests.tableSandbox import TableTestCase
+from scripts.transactionJournal import TransactionJournal, compact_transactions
+
+
+class TestTransactionJournal(TableTestCase):
+    """
+    Unit tests for the append-only transaction journal.
+
+    This suite tests:
+    - The header is written when the journal file is new
+    - Rows are appended without rewriting existing content
+    - A missing trailing newline is repaired before appending
+    - Returned offsets point at the start of each appended row
+    - Compaction normalizes dates and drops blank rows
+    """
+
+    copy_tables = False
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.tables.path("transactions.csv")
+        self.journal = TransactionJournal(self.path)
+
+    def _read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def _row(self, transactionID, amount="10.00"):
+        return {
+            "TransactionID": transactionID,
+            "AccountID": 101,
+            "TransactionType": "Deposit",
+            "Amount": Decimal(amount),
+            "TransDate": date(2025, 4, 1)
+        }
+
+    def test_new_file_gets_header(self):
+        """
+        Test that the first append writes the CSV header.
+        """
+        self.journal.append([self._row(1)])
+        self.assertEqual(
+            self._read(),
+            b"TransactionID,AccountID,TransactionType,Amount,TransDate\n1,101,Deposit,10.00,2025-04-01\n"
+        )
+
+    def test_append_keeps_existing_rows(self):
+        """
+        Test that appends leave earlier rows untouched.
+        """
+        self.journal.append([self._row(1)])
+        self.journal.append([self._row(2, "5.5")])
+        lines = self._read().decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2], "2,101,Deposit,5.50,2025-04-01")
+
+    def test_missing_trailing_newline_is_repaired(self):
+        """
+        Test that a file without a final newline does not merge rows.
+        """
+        with open(self.path, "w") as f:
+            f.write("TransactionID,AccountID,TransactionType,Amount,TransDate")
+        self.journal.append([self._row(1)])
+        self.assertEqual(self._read().decode().splitlines()[1], "1,101,Deposit,10.00,2025-04-01")
+
+    def test_offsets_point_at_rows(self):
+        """
+        Test that returned offsets locate each appended row.
+        """
+        self.journal.append([self._row(1)])
+        offsets = self.journal.append([self._row(2), self._row(3)])
+        data = self._read()
+        self.assertTrue(data[offsets[0]:].startswith(b"2,101"))
+        self.assertTrue(data[offsets[1]:].startswith(b"3,101"))
+
+    def test_compaction_normalizes_rows(self):
+        """
+        Test that compaction rewrites dates as YYYY-MM-DD and drops blank rows.
+        """
+        with open(self.path, "w") as f:
+            f.write("TransactionID,AccountID,TransactionType,Amount,TransDate\n"
+                    "1,101,Deposit,10.00,2025-04-01 09:30:00\n"
+                    ",,,,\n")
+        result = compact_transactions(self.path)
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(
+            self._read(),
+            b"TransactionID,AccountID,TransactionType,Amount,TransDate\n1,101,Deposit,10.00,2025-04-01\n"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
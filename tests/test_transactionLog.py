@@ -3,9 +3,10 @@ import unittest
 import pandas as pd
 from decimal import Decimal
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.transactionLog import generate_transaction_ID
 
-class TestDeposit(unittest.TestCase):
+class TestDeposit(TableTestCase):
     """
     Unit tests for the generate_transaction_ID function in transactionLog.py
 
@@ -3,9 +3,10 @@ import unittest
 from decimal import Decimal
 import pandas as pd
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.useCreditCard import useCreditCard
 
-class TestUseCreditCard(unittest.TestCase):
+class TestUseCreditCard(TableTestCase):
     """
     Unit tests for the useCreditCard function.
 
@@ -16,10 +17,10 @@ class TestUseCreditCard(unittest.TestCase):
     - Rejection of non-credit card accounts.
     """
 
-    @patch("scripts.useCreditCard.pd.read_csv")
-    @patch("scripts.useCreditCard.pd.DataFrame.to_csv")
+    @patch("scripts.useCreditCard.read_table")
+    @patch("scripts.useCreditCard.write_table")
     @patch("scripts.useCreditCard.generate_transaction_ID", return_value="TX99999")
-    def test_successful_charge(self, mock_txn_id, mock_to_csv, mock_read_csv):
+    def test_successful_charge(self, mock_txn_id, mock_write_table, mock_read_table):
         """
         Test that a valid credit card charge is processed correctly.
 
@@ -38,16 +39,16 @@ class TestUseCreditCard(unittest.TestCase):
         }])
         mock_trans_df = pd.DataFrame(columns=["TransactionID", "AccountID", "TransactionType", "Amount", "TransDate"])
 
-        mock_read_csv.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_trans_df
+        mock_read_table.side_effect = lambda path: mock_accounts_df if "accounts.csv" in path else mock_trans_df
 
         result = useCreditCard(5001, Decimal("100.00"))
 
         self.assertEqual(result["status"], "success")
         self.assertIn("Charged $100.00 to credit card account 5001", result["message"])
-        mock_to_csv.assert_called()
+        mock_write_table.assert_called()
 
-    @patch("scripts.useCreditCard.pd.read_csv")
-    def test_account_not_found(self, mock_read_csv):
+    @patch("scripts.useCreditCard.read_table")
+    def test_account_not_found(self, mock_read_table):
         """
         Test that an error is returned if the credit card account ID does not exist.
         """
@@ -59,15 +60,15 @@ class TestUseCreditCard(unittest.TestCase):
             "CreditLimit": "1000.00",
             "APR": "24.99"
         }])
-        mock_read_csv.return_value = mock_accounts_df
+        mock_read_table.return_value = mock_accounts_df
 
         result = useCreditCard(9999, Decimal("50.00"))
 
         self.assertEqual(result["status"], "error")
         self.assertIn("Credit card account 9999 not found", result["message"])
 
-    @patch("scripts.useCreditCard.pd.read_csv")
-    def test_not_a_credit_card(self, mock_read_csv):
+    @patch("scripts.useCreditCard.read_table")
+    def test_not_a_credit_card(self, mock_read_table):
         """
         Test that an error is returned if the account is not a credit card.
         """
@@ -79,15 +80,15 @@ class TestUseCreditCard(unittest.TestCase):
             "CreditLimit": "0.00",
             "APR": "0.00"
         }])
-        mock_read_csv.return_value = mock_accounts_df
+        mock_read_table.return_value = mock_accounts_df
 
         result = useCreditCard(5003, Decimal("50.00"))
 
         self.assertEqual(result["status"], "error")
         self.assertIn("Account 5003 is not a credit card", result["message"])
 
-    @patch("scripts.useCreditCard.pd.read_csv")
-    def test_exceeds_credit_limit(self, mock_read_csv):
+    @patch("scripts.useCreditCard.read_table")
+    def test_exceeds_credit_limit(self, mock_read_table):
         """
         Test that an over-limit purchase is rejected.
 
@@ -101,7 +102,7 @@ class TestUseCreditCard(unittest.TestCase):
             "CreditLimit": "1000.00",
             "APR": "24.99"
         }])
-        mock_read_csv.return_value = mock_accounts_df
+        mock_read_table.return_value = mock_accounts_df
 
         result = useCreditCard(5004, Decimal("100.00"))
 
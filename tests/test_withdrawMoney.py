@@ -3,10 +3,11 @@ import unittest
 import pandas as pd
 from decimal import Decimal
 from unittest.mock import patch
+from tests.tableSandbox import TableTestCase
 from scripts.withdrawMoney import withdraw
 
 
-class TestDeposit(unittest.TestCase):
+class TestDeposit(TableTestCase):
     """
     Unit tests for the withdraw function in withdrawMoney.py.
 
@@ -25,8 +26,8 @@ class TestDeposit(unittest.TestCase):
         return {"status": "success", "message": "Success"}
     
     @patch("scripts.withdrawMoney.withdraw")
-    @patch("scripts.withdrawMoney.pd.read_csv")
-    def test_valid_account_types(self, mock_read_csv, mock_withdraw):
+    @patch("scripts.ledger.read_table")
+    def test_valid_account_types(self, mock_read_table, mock_withdraw):
         """
         Test that withdrawal succeeds with correct account type and sufficient funds
         """
@@ -34,15 +35,15 @@ class TestDeposit(unittest.TestCase):
 
         for type in validTypes:
             with self.subTest(accType=type):
-                mock_read_csv.return_value = self._mock_accounts_df(type)
+                mock_read_table.return_value = self._mock_accounts_df(type)
                 mock_withdraw.side_effect = self._mock_success
 
                 result = withdraw(101, Decimal("100.00"))
                 self.assertEqual(result["status"], "success")
 
     @patch("scripts.withdrawMoney.withdraw")
-    @patch("scripts.withdrawMoney.pd.read_csv")
-    def test_insufficient_funds(self, mock_read_csv, mock_withdraw):
+    @patch("scripts.ledger.read_table")
+    def test_insufficient_funds(self, mock_read_table, mock_withdraw):
         """
         Test that withdrawal fails if source account has insufficient funds.
         """
@@ -50,7 +51,7 @@ class TestDeposit(unittest.TestCase):
             {"AccountID": 101, "CustomerID": 202, "AccountType": "Checking", "CurrBal": "50.00", "CreditLimit": "3000.00"},
         ])
     
-        mock_read_csv.return_value = mock_accounts_df
+        mock_read_table.return_value = mock_accounts_df
         mock_withdraw.return_value = {"status": "error", "message": "Insufficient funds"}
 
         result = withdraw(101, Decimal("100.00"))
@@ -60,15 +61,15 @@ class TestDeposit(unittest.TestCase):
             "message": "Insufficient funds. Cannot withdraw 100.00 from account 101."
         })
 
-    @patch("scripts.withdrawMoney.pd.read_csv")
-    def test_invalid_accounts(self, mock_read_csv):
+    @patch("scripts.ledger.read_table")
+    def test_invalid_accounts(self, mock_read_table):
         """
         Test that withdrawal fails if the account ID is invalid.
         """
         mock_accounts_df = pd.DataFrame([
             {"AccountID": 101, "CustomerID": 202, "AccountType": "Checking", "CurrBal": "300.00", "CreditLimit": "3000.00"}
         ])
-        mock_read_csv.return_value = mock_accounts_df
+        mock_read_table.return_value = mock_accounts_df
 
         result = withdraw(105, Decimal("50.00"))
 
@@ -0,0 +1,16 @@
+# wsgi.py
+"""
+Production entry point for the Flask application.
+
+A multi-worker server imports `app` from here in every worker, e.g.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Unlike run.py this does not start the scheduler: gunicorn.conf.py has each
+worker compete for the scheduler lease (see scheduler.start_leader_election),
+so the batch jobs run in exactly one worker.
+"""
+
+from app import create_app
+
+app = create_app()